@@ -0,0 +1,59 @@
+"""Loop run mode: loop settings and iteration counters on task_groups/tasks.
+
+Revision ID: a3b7e9d2c5f4
+Revises: f8c3d1a6b4e2
+Create Date: 2026-10-19 20:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import context, op
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+
+# revision identifiers, used by Alembic.
+revision: str = "a3b7e9d2c5f4"  # pragma: allowlist secret - Alembic revision id
+down_revision: Union[str, Sequence[str], None] = "f8c3d1a6b4e2"  # pragma: allowlist secret
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_COLUMNS = (
+    ("task_groups", sa.Column("loop", sa.JSON(), nullable=True)),
+    ("task_groups", sa.Column("iteration", sa.Integer(), nullable=False, server_default="0")),
+    ("tasks", sa.Column("iteration", sa.Integer(), nullable=False, server_default="0")),
+)
+
+
+def _has_table(inspector: sa.Inspector, table: str) -> bool:
+    return inspector.has_table(table)
+
+
+def _has_column(inspector: sa.Inspector, table: str, column: str) -> bool:
+    return any(col.get("name") == column for col in inspector.get_columns(table))
+
+
+def upgrade() -> None:
+    """Add loop columns to task_groups and tasks (idempotent)."""
+    if context.is_offline_mode():
+        op.execute("-- offline: skip inspection-driven migration")
+        return
+
+    bind: Connection = op.get_bind()
+    inspector = inspect(bind)
+    for table, column in _COLUMNS:
+        if _has_table(inspector, table) and not _has_column(inspector, table, column.name):
+            op.add_column(table, column.copy())
+
+
+def downgrade() -> None:
+    """Remove the loop columns where possible."""
+    if context.is_offline_mode():
+        op.execute("-- offline: downgrade is no-op")
+        return
+
+    bind: Connection = op.get_bind()
+    inspector = inspect(bind)
+    for table, column in reversed(_COLUMNS):
+        if _has_table(inspector, table) and _has_column(inspector, table, column.name):
+            op.drop_column(table, column.name)
@@ -0,0 +1,60 @@
+"""Archive usage counters for incremental retention/quota reporting.
+
+Revision ID: a7c3e9b1d5f4
+Revises: e5b1f7a3c8d2
+Create Date: 2026-10-19 13:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import context, op
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+
+# revision identifiers, used by Alembic.
+revision: str = "a7c3e9b1d5f4"  # pragma: allowlist secret - Alembic revision id
+down_revision: Union[str, Sequence[str], None] = "e5b1f7a3c8d2"  # pragma: allowlist secret
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(inspector: sa.Inspector, table: str) -> bool:
+    return inspector.has_table(table)
+
+
+def upgrade() -> None:
+    """Create archive_usage_counters (idempotent).
+
+    The table starts empty; the retention worker's first reconcile pass fills it.
+    """
+    if context.is_offline_mode():
+        op.execute("-- offline: skip inspection-driven migration")
+        return
+
+    bind: Connection = op.get_bind()
+    inspector = inspect(bind)
+
+    if not _has_table(inspector, "archive_usage_counters"):
+        op.create_table(
+            "archive_usage_counters",
+            sa.Column("project_slug", sa.String(length=255), nullable=False),
+            sa.Column("metric", sa.String(length=32), nullable=False),
+            sa.Column("bucket", sa.String(length=16), nullable=False, server_default=""),
+            sa.Column("value", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("project_slug", "metric", "bucket"),
+        )
+
+
+def downgrade() -> None:
+    """Drop archive_usage_counters where present."""
+    if context.is_offline_mode():
+        op.execute("-- offline: downgrade is no-op")
+        return
+
+    bind: Connection = op.get_bind()
+    inspector = inspect(bind)
+
+    if _has_table(inspector, "archive_usage_counters"):
+        op.drop_table("archive_usage_counters")
@@ -0,0 +1,57 @@
+"""Retention executor progress checkpoints.
+
+Revision ID: b3d8f2c6e1a9
+Revises: a7c3e9b1d5f4
+Create Date: 2026-10-19 14:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import context, op
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+
+# revision identifiers, used by Alembic.
+revision: str = "b3d8f2c6e1a9"  # pragma: allowlist secret - Alembic revision id
+down_revision: Union[str, Sequence[str], None] = "a7c3e9b1d5f4"  # pragma: allowlist secret
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(inspector: sa.Inspector, table: str) -> bool:
+    return inspector.has_table(table)
+
+
+def upgrade() -> None:
+    """Create retention_checkpoints (idempotent)."""
+    if context.is_offline_mode():
+        op.execute("-- offline: skip inspection-driven migration")
+        return
+
+    bind: Connection = op.get_bind()
+    inspector = inspect(bind)
+
+    if not _has_table(inspector, "retention_checkpoints"):
+        op.create_table(
+            "retention_checkpoints",
+            sa.Column("name", sa.String(length=64), nullable=False),
+            sa.Column("last_created_ts", sa.DateTime(), nullable=False),
+            sa.Column("last_message_id", sa.Integer(), nullable=False),
+            sa.Column("archived_total", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("name"),
+        )
+
+
+def downgrade() -> None:
+    """Drop retention_checkpoints where present."""
+    if context.is_offline_mode():
+        op.execute("-- offline: downgrade is no-op")
+        return
+
+    bind: Connection = op.get_bind()
+    inspector = inspect(bind)
+
+    if _has_table(inspector, "retention_checkpoints"):
+        op.drop_table("retention_checkpoints")
@@ -0,0 +1,78 @@
+"""Signal import pipeline: dedupe key on signals and resumable import cursors.
+
+Revision ID: b8d4e2a1c9f3
+Revises: f3b0b0c96c12
+Create Date: 2026-10-19 09:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import context, op
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+
+# revision identifiers, used by Alembic.
+revision: str = "b8d4e2a1c9f3"  # pragma: allowlist secret - Alembic revision id
+down_revision: Union[str, Sequence[str], None] = "f3b0b0c96c12"  # pragma: allowlist secret
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(inspector: sa.Inspector, table: str) -> bool:
+    return inspector.has_table(table)
+
+
+def _has_column(inspector: sa.Inspector, table: str, column: str) -> bool:
+    return any(col.get("name") == column for col in inspector.get_columns(table))
+
+
+def _has_index(inspector: sa.Inspector, table: str, name: str) -> bool:
+    return any(idx.get("name") == name for idx in inspector.get_indexes(table))
+
+
+def upgrade() -> None:
+    """Add signals.dedupe_key (unique) and signal_import_cursors (idempotent)."""
+    if context.is_offline_mode():
+        op.execute("-- offline: skip inspection-driven migration")
+        return
+
+    bind: Connection = op.get_bind()
+    inspector = inspect(bind)
+
+    if _has_table(inspector, "signals"):
+        if not _has_column(inspector, "signals", "dedupe_key"):
+            op.add_column(
+                "signals", sa.Column("dedupe_key", sa.String(length=64), nullable=True)
+            )
+        if not _has_index(inspector, "signals", "ix_signals_dedupe_key"):
+            op.create_index(
+                "ix_signals_dedupe_key", "signals", ["dedupe_key"], unique=True
+            )
+
+    if not _has_table(inspector, "signal_import_cursors"):
+        op.create_table(
+            "signal_import_cursors",
+            sa.Column("path", sa.String(length=1024), primary_key=True),
+            sa.Column("offset", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+        )
+
+
+def downgrade() -> None:
+    """Remove the signal import pipeline additions where possible."""
+    if context.is_offline_mode():
+        op.execute("-- offline: downgrade is no-op")
+        return
+
+    bind: Connection = op.get_bind()
+    inspector = inspect(bind)
+
+    if _has_table(inspector, "signal_import_cursors"):
+        op.drop_table("signal_import_cursors")
+
+    if _has_table(inspector, "signals"):
+        if _has_index(inspector, "signals", "ix_signals_dedupe_key"):
+            op.drop_index("ix_signals_dedupe_key", table_name="signals")
+        if _has_column(inspector, "signals", "dedupe_key"):
+            op.drop_column("signals", "dedupe_key")
@@ -0,0 +1,134 @@
+"""Signals list API: keyset/filter composite indexes and trigger-maintained counters.
+
+Revision ID: c1e7a3f5d2b4
+Revises: b8d4e2a1c9f3
+Create Date: 2026-10-19 10:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import context, op
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+
+# revision identifiers, used by Alembic.
+revision: str = "c1e7a3f5d2b4"  # pragma: allowlist secret - Alembic revision id
+down_revision: Union[str, Sequence[str], None] = "b8d4e2a1c9f3"  # pragma: allowlist secret
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_INDEXES: tuple[tuple[str, list[str]], ...] = (
+    ("ix_signals_created_id", ["created_at", "id"]),
+    ("ix_signals_project_status_created", ["project_id", "status", "created_at", "id"]),
+    ("ix_signals_mission_created", ["mission_id", "created_at", "id"]),
+)
+
+_TRIGGERS: tuple[tuple[str, str], ...] = (
+    (
+        "signal_counters_ai",
+        """
+        CREATE TRIGGER IF NOT EXISTS signal_counters_ai
+        AFTER INSERT ON signals
+        BEGIN
+            INSERT INTO signal_counters(project_id, status, severity, count)
+            VALUES (new.project_id, new.status, new.severity, 1)
+            ON CONFLICT(project_id, status, severity) DO UPDATE SET count = count + 1;
+        END;
+        """,
+    ),
+    (
+        "signal_counters_ad",
+        """
+        CREATE TRIGGER IF NOT EXISTS signal_counters_ad
+        AFTER DELETE ON signals
+        BEGIN
+            UPDATE signal_counters SET count = count - 1
+            WHERE project_id = old.project_id
+              AND status = old.status
+              AND severity = old.severity;
+        END;
+        """,
+    ),
+    (
+        "signal_counters_au",
+        """
+        CREATE TRIGGER IF NOT EXISTS signal_counters_au
+        AFTER UPDATE OF project_id, status, severity ON signals
+        WHEN old.project_id IS NOT new.project_id
+          OR old.status IS NOT new.status
+          OR old.severity IS NOT new.severity
+        BEGIN
+            UPDATE signal_counters SET count = count - 1
+            WHERE project_id = old.project_id
+              AND status = old.status
+              AND severity = old.severity;
+            INSERT INTO signal_counters(project_id, status, severity, count)
+            VALUES (new.project_id, new.status, new.severity, 1)
+            ON CONFLICT(project_id, status, severity) DO UPDATE SET count = count + 1;
+        END;
+        """,
+    ),
+)
+
+
+def _has_table(inspector: sa.Inspector, table: str) -> bool:
+    return inspector.has_table(table)
+
+
+def _has_index(inspector: sa.Inspector, table: str, name: str) -> bool:
+    return any(idx.get("name") == name for idx in inspector.get_indexes(table))
+
+
+def upgrade() -> None:
+    """Add signals composite indexes and the signal_counters table (idempotent)."""
+    if context.is_offline_mode():
+        op.execute("-- offline: skip inspection-driven migration")
+        return
+
+    bind: Connection = op.get_bind()
+    inspector = inspect(bind)
+
+    if not _has_table(inspector, "signals"):
+        return
+
+    for name, columns in _INDEXES:
+        if not _has_index(inspector, "signals", name):
+            op.create_index(name, "signals", columns)
+
+    if not _has_table(inspector, "signal_counters"):
+        op.create_table(
+            "signal_counters",
+            sa.Column("project_id", sa.Integer(), primary_key=True),
+            sa.Column("status", sa.String(length=16), primary_key=True),
+            sa.Column("severity", sa.String(length=16), primary_key=True),
+            sa.Column("count", sa.Integer(), nullable=False, server_default="0"),
+        )
+        op.execute(
+            "INSERT INTO signal_counters(project_id, status, severity, count) "
+            "SELECT project_id, status, severity, COUNT(*) FROM signals "
+            "GROUP BY project_id, status, severity"
+        )
+    if bind.dialect.name == "sqlite":
+        for _, ddl in _TRIGGERS:
+            op.execute(ddl)
+
+
+def downgrade() -> None:
+    """Remove signals list indexes and counters where possible."""
+    if context.is_offline_mode():
+        op.execute("-- offline: downgrade is no-op")
+        return
+
+    bind: Connection = op.get_bind()
+    inspector = inspect(bind)
+
+    if bind.dialect.name == "sqlite":
+        for name, _ in _TRIGGERS:
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    if _has_table(inspector, "signal_counters"):
+        op.drop_table("signal_counters")
+    if _has_table(inspector, "signals"):
+        for name, _ in reversed(_INDEXES):
+            if _has_index(inspector, "signals", name):
+                op.drop_index(name, table_name="signals")
@@ -0,0 +1,83 @@
+"""Workflow run queue: project, options and claim columns on workflow_runs.
+
+Revision ID: c9e4a1f7b2d6
+Revises: b3d8f2c6e1a9
+Create Date: 2026-10-19 15:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import context, op
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+
+# revision identifiers, used by Alembic.
+revision: str = "c9e4a1f7b2d6"  # pragma: allowlist secret - Alembic revision id
+down_revision: Union[str, Sequence[str], None] = "b3d8f2c6e1a9"  # pragma: allowlist secret
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_COLUMNS = (
+    sa.Column("project_id", sa.Integer(), nullable=True),
+    sa.Column("allow_self_heal", sa.Boolean(), nullable=False, server_default=sa.true()),
+    sa.Column("queued_at", sa.DateTime(), nullable=True),
+    sa.Column("worker_id", sa.String(length=64), nullable=True),
+)
+
+
+def _has_table(inspector: sa.Inspector, table: str) -> bool:
+    return inspector.has_table(table)
+
+
+def _has_column(inspector: sa.Inspector, table: str, column: str) -> bool:
+    return any(col.get("name") == column for col in inspector.get_columns(table))
+
+
+def _has_index(inspector: sa.Inspector, table: str, name: str) -> bool:
+    return any(idx.get("name") == name for idx in inspector.get_indexes(table))
+
+
+def upgrade() -> None:
+    """Add run queue columns and indexes to workflow_runs (idempotent)."""
+    if context.is_offline_mode():
+        op.execute("-- offline: skip inspection-driven migration")
+        return
+
+    bind: Connection = op.get_bind()
+    inspector = inspect(bind)
+    if not _has_table(inspector, "workflow_runs"):
+        return
+
+    for column in _COLUMNS:
+        if not _has_column(inspector, "workflow_runs", column.name):
+            op.add_column("workflow_runs", column.copy())
+    if not _has_index(inspector, "workflow_runs", "ix_workflow_runs_project_id"):
+        op.create_index("ix_workflow_runs_project_id", "workflow_runs", ["project_id"])
+    if not _has_index(inspector, "workflow_runs", "ix_workflow_runs_queued"):
+        op.create_index(
+            "ix_workflow_runs_queued",
+            "workflow_runs",
+            ["queued_at"],
+            sqlite_where=sa.text("status = 'queued'"),
+            postgresql_where=sa.text("status = 'queued'"),
+        )
+
+
+def downgrade() -> None:
+    """Remove the run queue additions where possible."""
+    if context.is_offline_mode():
+        op.execute("-- offline: downgrade is no-op")
+        return
+
+    bind: Connection = op.get_bind()
+    inspector = inspect(bind)
+    if not _has_table(inspector, "workflow_runs"):
+        return
+
+    for name in ("ix_workflow_runs_queued", "ix_workflow_runs_project_id"):
+        if _has_index(inspector, "workflow_runs", name):
+            op.drop_index(name, table_name="workflow_runs")
+    for column in reversed(_COLUMNS):
+        if _has_column(inspector, "workflow_runs", column.name):
+            op.drop_column("workflow_runs", column.name)
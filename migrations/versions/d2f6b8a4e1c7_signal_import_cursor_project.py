@@ -0,0 +1,75 @@
+"""Signal import cursors keyed by (path, project).
+
+Revision ID: d2f6b8a4e1c7
+Revises: a3b7e9d2c5f4
+Create Date: 2026-10-20 10:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import context, op
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+
+# revision identifiers, used by Alembic.
+revision: str = "d2f6b8a4e1c7"  # pragma: allowlist secret - Alembic revision id
+down_revision: Union[str, Sequence[str], None] = "a3b7e9d2c5f4"  # pragma: allowlist secret
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(inspector: sa.Inspector, table: str) -> bool:
+    return inspector.has_table(table)
+
+
+def _has_column(inspector: sa.Inspector, table: str, column: str) -> bool:
+    return any(col.get("name") == column for col in inspector.get_columns(table))
+
+
+def _create(with_project: bool) -> None:
+    columns = [sa.Column("path", sa.String(length=1024), primary_key=True)]
+    if with_project:
+        columns.append(
+            sa.Column("project", sa.String(length=255), primary_key=True, server_default="")
+        )
+    op.create_table(
+        "signal_import_cursors",
+        *columns,
+        sa.Column("offset", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+
+
+def upgrade() -> None:
+    """Recreate signal_import_cursors with a (path, project) key (idempotent).
+
+    Cursors are resume hints only (imports are deduplicated), so existing rows
+    are dropped; the next import rescans each file once.
+    """
+    if context.is_offline_mode():
+        op.execute("-- offline: skip inspection-driven migration")
+        return
+
+    bind: Connection = op.get_bind()
+    inspector = inspect(bind)
+    if _has_table(inspector, "signal_import_cursors"):
+        if _has_column(inspector, "signal_import_cursors", "project"):
+            return
+        op.drop_table("signal_import_cursors")
+    _create(with_project=True)
+
+
+def downgrade() -> None:
+    """Return to path-only cursors."""
+    if context.is_offline_mode():
+        op.execute("-- offline: downgrade is no-op")
+        return
+
+    bind: Connection = op.get_bind()
+    inspector = inspect(bind)
+    if _has_table(inspector, "signal_import_cursors") and _has_column(
+        inspector, "signal_import_cursors", "project"
+    ):
+        op.drop_table("signal_import_cursors")
+        _create(with_project=False)
@@ -0,0 +1,79 @@
+"""Ack TTL scanner: escalation marker and partial ack-due index.
+
+Revision ID: d4a9c2e6b7f1
+Revises: c1e7a3f5d2b4
+Create Date: 2026-10-19 11:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import context, op
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+
+# revision identifiers, used by Alembic.
+revision: str = "d4a9c2e6b7f1"  # pragma: allowlist secret - Alembic revision id
+down_revision: Union[str, Sequence[str], None] = "c1e7a3f5d2b4"  # pragma: allowlist secret
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(inspector: sa.Inspector, table: str) -> bool:
+    return inspector.has_table(table)
+
+
+def _has_column(inspector: sa.Inspector, table: str, column: str) -> bool:
+    return any(col.get("name") == column for col in inspector.get_columns(table))
+
+
+def _has_index(inspector: sa.Inspector, table: str, name: str) -> bool:
+    return any(idx.get("name") == name for idx in inspector.get_indexes(table))
+
+
+def upgrade() -> None:
+    """Add message_recipients.ack_escalated_ts and ix_messages_ack_due (idempotent)."""
+    if context.is_offline_mode():
+        op.execute("-- offline: skip inspection-driven migration")
+        return
+
+    bind: Connection = op.get_bind()
+    inspector = inspect(bind)
+
+    if _has_table(inspector, "message_recipients") and not _has_column(
+        inspector, "message_recipients", "ack_escalated_ts"
+    ):
+        op.add_column(
+            "message_recipients",
+            sa.Column("ack_escalated_ts", sa.DateTime(), nullable=True),
+        )
+
+    if _has_table(inspector, "messages") and not _has_index(
+        inspector, "messages", "ix_messages_ack_due"
+    ):
+        op.create_index(
+            "ix_messages_ack_due",
+            "messages",
+            ["created_ts"],
+            sqlite_where=sa.text("ack_required = 1"),
+            postgresql_where=sa.text("ack_required"),
+        )
+
+
+def downgrade() -> None:
+    """Remove the ack scanner additions where possible."""
+    if context.is_offline_mode():
+        op.execute("-- offline: downgrade is no-op")
+        return
+
+    bind: Connection = op.get_bind()
+    inspector = inspect(bind)
+
+    if _has_table(inspector, "messages") and _has_index(
+        inspector, "messages", "ix_messages_ack_due"
+    ):
+        op.drop_index("ix_messages_ack_due", table_name="messages")
+    if _has_table(inspector, "message_recipients") and _has_column(
+        inspector, "message_recipients", "ack_escalated_ts"
+    ):
+        op.drop_column("message_recipients", "ack_escalated_ts")
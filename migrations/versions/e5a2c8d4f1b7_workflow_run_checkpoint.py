@@ -0,0 +1,64 @@
+"""Workflow run checkpoint: resume cursor and heartbeat columns on workflow_runs.
+
+Revision ID: e5a2c8d4f1b7
+Revises: c9e4a1f7b2d6
+Create Date: 2026-10-19 18:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import context, op
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+
+# revision identifiers, used by Alembic.
+revision: str = "e5a2c8d4f1b7"  # pragma: allowlist secret - Alembic revision id
+down_revision: Union[str, Sequence[str], None] = "c9e4a1f7b2d6"  # pragma: allowlist secret
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_COLUMNS = (
+    sa.Column("checkpoint", sa.JSON(), nullable=True),
+    sa.Column("heartbeat_at", sa.DateTime(), nullable=True),
+)
+
+
+def _has_table(inspector: sa.Inspector, table: str) -> bool:
+    return inspector.has_table(table)
+
+
+def _has_column(inspector: sa.Inspector, table: str, column: str) -> bool:
+    return any(col.get("name") == column for col in inspector.get_columns(table))
+
+
+def upgrade() -> None:
+    """Add checkpoint columns to workflow_runs (idempotent)."""
+    if context.is_offline_mode():
+        op.execute("-- offline: skip inspection-driven migration")
+        return
+
+    bind: Connection = op.get_bind()
+    inspector = inspect(bind)
+    if not _has_table(inspector, "workflow_runs"):
+        return
+
+    for column in _COLUMNS:
+        if not _has_column(inspector, "workflow_runs", column.name):
+            op.add_column("workflow_runs", column.copy())
+
+
+def downgrade() -> None:
+    """Remove the checkpoint columns where possible."""
+    if context.is_offline_mode():
+        op.execute("-- offline: downgrade is no-op")
+        return
+
+    bind: Connection = op.get_bind()
+    inspector = inspect(bind)
+    if not _has_table(inspector, "workflow_runs"):
+        return
+
+    for column in reversed(_COLUMNS):
+        if _has_column(inspector, "workflow_runs", column.name):
+            op.drop_column("workflow_runs", column.name)
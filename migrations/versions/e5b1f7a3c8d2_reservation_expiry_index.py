@@ -0,0 +1,65 @@
+"""Reservation expiry scheduler: partial index over unreleased reservations.
+
+Revision ID: e5b1f7a3c8d2
+Revises: d4a9c2e6b7f1
+Create Date: 2026-10-19 12:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import context, op
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+
+# revision identifiers, used by Alembic.
+revision: str = "e5b1f7a3c8d2"  # pragma: allowlist secret - Alembic revision id
+down_revision: Union[str, Sequence[str], None] = "d4a9c2e6b7f1"  # pragma: allowlist secret
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(inspector: sa.Inspector, table: str) -> bool:
+    return inspector.has_table(table)
+
+
+def _has_index(inspector: sa.Inspector, table: str, name: str) -> bool:
+    return any(idx.get("name") == name for idx in inspector.get_indexes(table))
+
+
+def upgrade() -> None:
+    """Add ix_file_reservations_active_expiry (idempotent)."""
+    if context.is_offline_mode():
+        op.execute("-- offline: skip inspection-driven migration")
+        return
+
+    bind: Connection = op.get_bind()
+    inspector = inspect(bind)
+
+    if _has_table(inspector, "file_reservations") and not _has_index(
+        inspector, "file_reservations", "ix_file_reservations_active_expiry"
+    ):
+        op.create_index(
+            "ix_file_reservations_active_expiry",
+            "file_reservations",
+            ["expires_ts"],
+            sqlite_where=sa.text("released_ts IS NULL"),
+            postgresql_where=sa.text("released_ts IS NULL"),
+        )
+
+
+def downgrade() -> None:
+    """Drop ix_file_reservations_active_expiry where present."""
+    if context.is_offline_mode():
+        op.execute("-- offline: downgrade is no-op")
+        return
+
+    bind: Connection = op.get_bind()
+    inspector = inspect(bind)
+
+    if _has_table(inspector, "file_reservations") and _has_index(
+        inspector, "file_reservations", "ix_file_reservations_active_expiry"
+    ):
+        op.drop_index(
+            "ix_file_reservations_active_expiry", table_name="file_reservations"
+        )
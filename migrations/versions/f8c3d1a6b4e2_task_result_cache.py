@@ -0,0 +1,61 @@
+"""Task result cache keyed by a hash of engine config, command, input and artifacts.
+
+Revision ID: f8c3d1a6b4e2
+Revises: e5a2c8d4f1b7
+Create Date: 2026-10-19 20:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import context, op
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+
+# revision identifiers, used by Alembic.
+revision: str = "f8c3d1a6b4e2"  # pragma: allowlist secret - Alembic revision id
+down_revision: Union[str, Sequence[str], None] = "e5a2c8d4f1b7"  # pragma: allowlist secret
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(inspector: sa.Inspector, table: str) -> bool:
+    return inspector.has_table(table)
+
+
+def upgrade() -> None:
+    """Create task_result_cache (idempotent)."""
+    if context.is_offline_mode():
+        op.execute("-- offline: skip inspection-driven migration")
+        return
+
+    bind: Connection = op.get_bind()
+    inspector = inspect(bind)
+
+    if not _has_table(inspector, "task_result_cache"):
+        op.create_table(
+            "task_result_cache",
+            sa.Column("key", sa.String(length=64), nullable=False),
+            sa.Column("output", sa.JSON(), nullable=True),
+            sa.Column("artifacts", sa.JSON(), nullable=True),
+            sa.Column("source_task_id", sa.String(length=36), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("expires_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("key"),
+        )
+        op.create_index(
+            "ix_task_result_cache_expires_at", "task_result_cache", ["expires_at"]
+        )
+
+
+def downgrade() -> None:
+    """Drop task_result_cache where present."""
+    if context.is_offline_mode():
+        op.execute("-- offline: downgrade is no-op")
+        return
+
+    bind: Connection = op.get_bind()
+    inspector = inspect(bind)
+
+    if _has_table(inspector, "task_result_cache"):
+        op.drop_table("task_result_cache")
@@ -0,0 +1,72 @@
+"""Cold-start benchmark for the HTTP server (import + build_http_app).
+
+Runs N fresh interpreters and compares the median against a budget so CI can
+track regressions. Heavy UI/image/Git modules must stay deferred.
+
+Usage: python scripts/bench_cold_start.py [--runs 5] [--budget-ms 1500]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SRC = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(SRC))
+
+from mcp_agent_mail.startup_profile import format_report, profile_startup
+
+# Target median wall time for a fresh worker (override with STARTUP_BUDGET_MS)
+DEFAULT_BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS", "1500"))
+MUST_DEFER = ("PIL", "git", "bleach", "markdown2", "jinja2", "uvicorn")
+
+_PROBE = (
+    "from mcp_agent_mail.config import get_settings;"
+    "from mcp_agent_mail.http import build_http_app;"
+    "build_http_app(get_settings())"
+)
+
+
+def _run_once(env: dict[str, str]) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", _PROBE], env=env, check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--report", action="store_true", help="Print importtime report")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        p for p in (str(SRC), env.get("PYTHONPATH", "")) if p
+    )
+    _run_once(env)  # warm the filesystem / bytecode caches
+    samples = [_run_once(env) for _ in range(args.runs)]
+    median = statistics.median(samples)
+    print(
+        f"cold start median={median:.1f}ms min={min(samples):.1f}ms "
+        f"max={max(samples):.1f}ms budget={args.budget_ms:.0f}ms"
+    )
+
+    profile = profile_startup(env=env)
+    eager = [name for name in MUST_DEFER if profile.loaded(name)]
+    if args.report:
+        print(format_report(profile))
+    if eager:
+        print("eagerly imported (should be lazy): " + ", ".join(eager))
+    if median > args.budget_ms or eager:
+        print("FAIL: cold start budget exceeded")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
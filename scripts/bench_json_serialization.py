@@ -0,0 +1,112 @@
+"""Microbenchmark: serialize a unified-inbox sized payload (1,000 messages).
+
+Compares Starlette's stdlib ``JSONResponse`` against ``FastJSONResponse`` and
+the streaming array response used by ``/mail/api/unified-inbox?stream=true``.
+
+Usage: python scripts/bench_json_serialization.py [--messages 1000] [--repeat 20]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from starlette.responses import JSONResponse
+
+from mcp_agent_mail.responses import (
+    FAST_JSON_BACKEND,
+    FastJSONResponse,
+    StreamingJSONResponse,
+)
+
+
+def build_payload(count: int, body_bytes: int) -> dict:
+    now = datetime.now(timezone.utc)
+    body = ("Lorem ipsum dolor sit amet, 日本語テキスト. " * (body_bytes // 40 + 1))[
+        :body_bytes
+    ]
+    messages = []
+    for i in range(count):
+        created = now - timedelta(minutes=i)
+        messages.append(
+            {
+                "id": i + 1,
+                "subject": f"Status update #{i}",
+                "body_md": body,
+                "excerpt": body[:150] + "...",
+                "created_ts": str(created),
+                "created_full": created.strftime("%B %d, %Y at %I:%M %p"),
+                "created_relative": f"{i}m ago",
+                "importance": "normal" if i % 5 else "high",
+                "thread_id": f"thread-{i // 10}",
+                "sender": "BlueLake",
+                "project_slug": "backend",
+                "project_name": "/srv/backend",
+                "recipients": "GreenCastle, RedStone",
+                "read": False,
+            }
+        )
+    return {"messages": messages, "projects": []}
+
+
+def _time(fn, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+async def _drain(response: StreamingJSONResponse) -> int:
+    size = 0
+    async for chunk in response.body_iterator:
+        size += len(chunk)
+    return size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--body-bytes", type=int, default=2048)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    payload = build_payload(args.messages, args.body_bytes)
+    size = len(FastJSONResponse(payload).body)
+
+    results = {
+        "stdlib JSONResponse": _time(lambda: JSONResponse(payload), args.repeat),
+        f"FastJSONResponse ({FAST_JSON_BACKEND})": _time(
+            lambda: FastJSONResponse(payload), args.repeat
+        ),
+        "StreamingJSONResponse": _time(
+            lambda: asyncio.run(
+                _drain(
+                    StreamingJSONResponse(
+                        payload["messages"],
+                        array_key="messages",
+                        envelope={"projects": []},
+                    )
+                )
+            ),
+            args.repeat,
+        ),
+    }
+
+    print(f"payload: {args.messages} messages, {size / 1024:.1f} KiB serialized")
+    for name, samples in results.items():
+        print(
+            f"{name:<32} median={statistics.median(samples):8.2f} ms"
+            f"  min={min(samples):8.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Benchmark sequential vs parallel execution of a 20-task agent_cli mission.
+
+Each task spawns a short-lived Python process that sleeps for --task-seconds,
+which stands in for an agent CLI call. The same mission shape is run with
+SequentialWorkflow and with ParallelWorkflow at the given concurrency, against
+a file-backed SQLite database in a temporary directory.
+
+Usage: python scripts/bench_parallel_workflow.py [--tasks 20] [--task-seconds 0.3] [--concurrency 4 8]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+from mcp_agent_mail.models import Agent, Mission, Project, Task, TaskGroup
+from mcp_agent_mail.workflow_engine import ParallelWorkflow, SequentialWorkflow
+
+
+async def _mission(session: AsyncSession, label: str, n_tasks: int, task_seconds: float) -> Mission:
+    project = Project(slug=f"bench-{label}", human_key=f"bench-{label}")
+    session.add(project)
+    await session.commit()
+    agent = Agent(project_id=project.id, name=f"Bench{label}", program="bench", model="bench")
+    mission = Mission(project_id=project.id, title=f"bench {label}")
+    session.add_all([agent, mission])
+    await session.commit()
+    group = TaskGroup(mission_id=mission.id, title="agents")
+    session.add(group)
+    await session.commit()
+    command = [sys.executable, "-c", f"import time; time.sleep({task_seconds})"]
+    session.add_all(
+        [
+            Task(
+                group_id=group.id,
+                agent_id=agent.id,
+                title=f"agent {i}",
+                order=i,
+                input={"kind": "agent_cli", "command": command},
+            )
+            for i in range(n_tasks)
+        ]
+    )
+    await session.commit()
+    return mission
+
+
+async def _run(workdir: Path, args: argparse.Namespace) -> int:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{workdir / 'bench.sqlite3'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    runs: list[tuple[str, type[SequentialWorkflow], int]] = [("sequential", SequentialWorkflow, 1)]
+    runs += [(f"parallel x{c}", ParallelWorkflow, c) for c in args.concurrency]
+    baseline = None
+    status_ok = True
+    for label, cls, concurrency in runs:
+        async with factory() as session:
+            mission = await _mission(session, label.replace(" ", ""), args.tasks, args.task_seconds)
+            workflow = cls(session, trace_dir=workdir / "traces", max_concurrency=concurrency)
+            start = time.perf_counter()
+            status = await workflow.run(mission)
+            elapsed = time.perf_counter() - start
+        status_ok = status_ok and status == "completed"
+        baseline = baseline or elapsed
+        print(f"{label:<14} {elapsed:7.2f}s  speedup {baseline / elapsed:5.2f}x  status={status}")
+    await engine.dispose()
+    return 0 if status_ok else 1
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=20)
+    parser.add_argument("--task-seconds", type=float, default=0.3)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[4, 8])
+    args = parser.parse_args()
+
+    cwd = Path.cwd()
+    with tempfile.TemporaryDirectory(prefix="bench_workflow_") as tmp:
+        # CLI trace logs and CI evidence are written relative to the cwd
+        os.chdir(tmp)
+        try:
+            return asyncio.run(_run(Path(tmp), args))
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
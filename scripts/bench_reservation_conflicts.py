@@ -0,0 +1,112 @@
+"""Benchmark file reservation conflict checks at 10k active reservations.
+
+Compares the per-project segment trie against a linear scan with the same
+overlap predicate.
+
+Usage: python scripts/bench_reservation_conflicts.py [--reservations 10000] [--queries 2000]
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from mcp_agent_mail.reservation_index import (
+    ActiveReservation,
+    ProjectReservationTrie,
+    patterns_overlap,
+    split_pattern,
+)
+
+AGENTS = [f"Agent{i:03d}" for i in range(200)]
+
+
+def _patterns(n: int, rng: random.Random) -> list[str]:
+    out: list[str] = []
+    for i in range(n):
+        kind = rng.random()
+        if kind < 0.4:
+            # Shape produced by ack escalation claims
+            out.append(
+                f"agents/{rng.choice(AGENTS)}/inbox/{rng.randint(2023, 2026)}/"
+                f"{rng.randint(1, 12):02d}/*.md"
+            )
+        elif kind < 0.8:
+            out.append(f"src/pkg{rng.randint(0, 499)}/mod{i % 50}/*.py")
+        elif kind < 0.95:
+            out.append(f"docs/section{rng.randint(0, 999)}/**")
+        else:
+            out.append(f"tests/unit{rng.randint(0, 99)}/test_{i}.py")
+    return out
+
+
+def _queries(n: int, rng: random.Random) -> list[str]:
+    out: list[str] = []
+    for _ in range(n):
+        kind = rng.random()
+        if kind < 0.4:
+            out.append(f"agents/{rng.choice(AGENTS)}/inbox/2025/0{rng.randint(1, 9)}/m.md")
+        elif kind < 0.8:
+            out.append(f"src/pkg{rng.randint(0, 499)}/mod{rng.randint(0, 49)}/x.py")
+        else:
+            out.append(f"docs/section{rng.randint(0, 999)}/index.md")
+    return out
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reservations", type=int, default=10_000)
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    expires = datetime.now(timezone.utc) + timedelta(hours=1)
+    patterns = _patterns(args.reservations, rng)
+    queries = _queries(args.queries, rng)
+
+    start = time.perf_counter()
+    trie = ProjectReservationTrie()
+    for rid, pattern in enumerate(patterns):
+        trie.add(
+            ActiveReservation(
+                id=rid,
+                agent_id=rid % 200,
+                path_pattern=pattern,
+                exclusive=True,
+                expires_ts=expires,
+            )
+        )
+    build_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    trie_hits = [len(trie.overlapping(q)) for q in queries]
+    trie_s = time.perf_counter() - start
+
+    compiled = [split_pattern(p) for p in patterns]
+    sample = queries[: max(1, min(len(queries), 200))]
+    start = time.perf_counter()
+    linear_hits = [
+        sum(1 for segs in compiled if patterns_overlap(segs, split_pattern(q)))
+        for q in sample
+    ]
+    linear_s = time.perf_counter() - start
+
+    if linear_hits != trie_hits[: len(sample)]:
+        print("FAIL: trie and linear scan disagree")
+        return 1
+    trie_us = trie_s / len(queries) * 1e6
+    linear_us = linear_s / len(sample) * 1e6
+    print(f"reservations={len(patterns)} build={build_ms:.1f}ms")
+    print(f"trie:   {trie_us:9.1f} us/query ({len(queries)} queries)")
+    print(f"linear: {linear_us:9.1f} us/query ({len(sample)} queries)")
+    print(f"speedup: {linear_us / trie_us:.0f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
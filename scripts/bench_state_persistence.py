@@ -0,0 +1,101 @@
+"""Benchmark per-task state persistence overhead of the workflow engine.
+
+Runs a mission of simulated tasks (no real work, so the timing is engine and
+database overhead only) with SequentialWorkflow, once per --flush-ms value,
+against a file-backed SQLite database in a temporary directory. Commits are
+counted with a SQLAlchemy "commit" event listener. --flush-ms 0 commits every
+state transition, which is how the engine persisted state before batching.
+
+Usage: python scripts/bench_state_persistence.py [--tasks 200] [--groups 10] [--flush-ms 0 500]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+from mcp_agent_mail.models import Agent, Mission, Project, Task, TaskGroup
+from mcp_agent_mail.workflow_engine import SequentialWorkflow
+
+
+async def _mission(session: AsyncSession, label: str, n_tasks: int, n_groups: int) -> Mission:
+    project = Project(slug=f"bench-{label}", human_key=f"bench-{label}")
+    session.add(project)
+    await session.commit()
+    agent = Agent(project_id=project.id, name=f"Bench{label}", program="bench", model="bench")
+    mission = Mission(project_id=project.id, title=f"bench {label}")
+    session.add_all([agent, mission])
+    await session.commit()
+    groups = [TaskGroup(mission_id=mission.id, title=f"g{i}", order=i) for i in range(n_groups)]
+    session.add_all(groups)
+    await session.commit()
+    session.add_all(
+        [
+            Task(group_id=groups[i % n_groups].id, agent_id=agent.id, title=f"task {i}", order=i)
+            for i in range(n_tasks)
+        ]
+    )
+    await session.commit()
+    return mission
+
+
+async def _run(workdir: Path, args: argparse.Namespace) -> int:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{workdir / 'bench.sqlite3'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    commits = 0
+
+    @event.listens_for(engine.sync_engine, "commit")
+    def _count_commit(conn) -> None:
+        nonlocal commits
+        commits += 1
+
+    ok = True
+    for flush_ms in args.flush_ms:
+        async with factory() as session:
+            mission = await _mission(session, f"f{flush_ms}", args.tasks, args.groups)
+            workflow = SequentialWorkflow(
+                session, trace_dir=workdir / "traces", state_flush_ms=flush_ms
+            )
+            commits = 0
+            start = time.perf_counter()
+            status = await workflow.run(mission)
+            elapsed = time.perf_counter() - start
+        ok = ok and status == "completed"
+        print(
+            f"flush_ms={flush_ms:<6g} {elapsed * 1000:8.1f} ms total  "
+            f"{elapsed * 1000 / args.tasks:6.3f} ms/task  commits={commits:<5d} status={status}"
+        )
+    await engine.dispose()
+    return 0 if ok else 1
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--groups", type=int, default=10)
+    parser.add_argument("--flush-ms", type=float, nargs="+", default=[0, 500])
+    args = parser.parse_args()
+
+    cwd = Path.cwd()
+    with tempfile.TemporaryDirectory(prefix="bench_state_") as tmp:
+        # Traces and CI evidence are written relative to the cwd
+        os.chdir(tmp)
+        try:
+            return asyncio.run(_run(Path(tmp), args))
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,333 @@
+"""Incremental scanner for overdue acknowledgements (ack TTL worker)."""
+
+from __future__ import annotations
+
+import contextlib
+import importlib
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import structlog
+from sqlalchemy import and_, bindparam, select, text, update
+
+from .config import Settings
+from .db import ensure_schema, get_session
+from .models import Agent, Message, MessageRecipient
+
+DEFAULT_SCAN_BATCH_SIZE = 500
+
+
+@dataclass(slots=True, frozen=True)
+class OverdueAck:
+    """A recipient that has not acknowledged an ``ack_required`` message in time."""
+
+    message_id: int
+    project_id: int
+    agent_id: int
+    created_ts: datetime
+    age_s: int
+
+
+def _as_utc(ts: datetime) -> datetime:
+    # SQLite yields naive datetimes; stored values are UTC
+    if ts.tzinfo is None or ts.tzinfo.utcoffset(ts) is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc)
+
+
+class AckScanner:
+    """Find recipients whose ack deadline passed since the previous scan.
+
+    Each scan only reads messages created in ``(watermark, now - ttl]`` through the
+    partial ``ix_messages_ack_due`` index, and every row it reports is stamped with
+    ``ack_escalated_ts`` so alerts and escalations fire once. The watermark lives
+    in memory: after a restart the first scan covers all outstanding acks, and the
+    escalated marker keeps it from re-alerting.
+    """
+
+    def __init__(
+        self, settings: Settings, *, batch_size: int = DEFAULT_SCAN_BATCH_SIZE
+    ) -> None:
+        self.settings = settings
+        self.batch_size = max(1, int(batch_size))
+        self.watermark: datetime | None = None
+        self._holder_ids: dict[int, int] = {}
+
+    async def scan_once(self, now: datetime | None = None) -> list[OverdueAck]:
+        """Report, escalate and mark every ack that became overdue since the last scan."""
+        now = now or datetime.now(timezone.utc)
+        cutoff = now - timedelta(seconds=self.settings.ack_ttl_seconds)
+        await ensure_schema()
+        overdue: list[OverdueAck] = []
+        while True:
+            batch = await self._fetch_due(cutoff, now)
+            if not batch:
+                break
+            _report(batch, self.settings.ack_ttl_seconds)
+            if self.settings.ack_escalation_enabled:
+                mode = (self.settings.ack_escalation_mode or "log").lower()
+                if mode == "file_reservation":
+                    try:
+                        await self._escalate_file_reservations(batch, now)
+                    except Exception as exc:
+                        structlog.get_logger("ack.ttl").warning(
+                            "ack_escalation_record_failed", error=str(exc)
+                        )
+            await self._mark_escalated(batch, now)
+            overdue.extend(batch)
+            if len(batch) < self.batch_size:
+                break
+        self.watermark = cutoff
+        return overdue
+
+    async def _fetch_due(self, cutoff: datetime, now: datetime) -> list[OverdueAck]:
+        m = Message.__table__.c
+        mr = MessageRecipient.__table__.c
+        conditions = [
+            m.ack_required == 1,
+            m.created_ts <= cutoff,
+            mr.ack_ts.is_(None),
+            mr.ack_escalated_ts.is_(None),
+        ]
+        if self.watermark is not None:
+            conditions.append(m.created_ts > self.watermark)
+        stmt = (
+            select(m.id, m.project_id, m.created_ts, mr.agent_id)
+            .select_from(
+                Message.__table__.join(
+                    MessageRecipient.__table__, mr.message_id == m.id
+                )
+            )
+            .where(and_(*conditions))
+            .order_by(m.created_ts, m.id, mr.agent_id)
+            .limit(self.batch_size)
+        )
+        async with get_session() as session:
+            rows = (await session.execute(stmt)).fetchall()
+        return [
+            OverdueAck(
+                message_id=int(mid),
+                project_id=int(pid),
+                agent_id=int(aid),
+                created_ts=_as_utc(created),
+                age_s=int((now - _as_utc(created)).total_seconds()),
+            )
+            for mid, pid, created, aid in rows
+        ]
+
+    async def _mark_escalated(self, batch: list[OverdueAck], now: datetime) -> None:
+        mr = MessageRecipient.__table__.c
+        stmt = (
+            update(MessageRecipient.__table__)
+            .where(
+                and_(
+                    mr.message_id == bindparam("b_mid"),
+                    mr.agent_id == bindparam("b_aid"),
+                )
+            )
+            .values(ack_escalated_ts=bindparam("b_ts"))
+        )
+        async with get_session() as session:
+            await session.execute(
+                stmt,
+                [
+                    {"b_mid": item.message_id, "b_aid": item.agent_id, "b_ts": now}
+                    for item in batch
+                ],
+            )
+            await session.commit()
+
+    async def _holder_for(
+        self, session: Any, project_id: int, now: datetime
+    ) -> tuple[int | None, bool]:
+        """Resolve (or create) the ops holder agent; returns ``(id, created)``."""
+        name = self.settings.ack_escalation_claim_holder_name
+        if project_id in self._holder_ids:
+            return self._holder_ids[project_id], False
+        created = False
+        query = text("SELECT id FROM agents WHERE project_id = :pid AND name = :name")
+        hid = (
+            await session.execute(query, {"pid": project_id, "name": name})
+        ).scalar_one_or_none()
+        if not isinstance(hid, int):
+            holder = Agent(
+                project_id=project_id,
+                name=name,
+                program="ops",
+                model="system",
+                task_description="ops-escalation",
+                inception_ts=now,
+                last_active_ts=now,
+            )
+            session.add(holder)
+            await session.commit()
+            await session.refresh(holder)
+            hid = holder.id
+            if not isinstance(hid, int):
+                return None, False
+            created = True
+        self._holder_ids[project_id] = hid
+        return hid, created
+
+    async def _escalate_file_reservations(
+        self, batch: list[OverdueAck], now: datetime
+    ) -> None:
+        from .storage import (
+            AsyncFileLock,
+            ensure_archive,
+            write_agent_profile,
+            write_file_reservation_record,
+        )
+
+        settings = self.settings
+        expires_at = now + timedelta(seconds=settings.ack_escalation_claim_ttl_seconds)
+        agent_ids = sorted({item.agent_id for item in batch})
+        project_ids = sorted({item.project_id for item in batch})
+        created: dict[int, int] = {}
+        async with get_session() as session:
+            names = dict(
+                (
+                    await session.execute(
+                        text("SELECT id, name FROM agents WHERE id IN :ids").bindparams(
+                            bindparam("ids", expanding=True)
+                        ),
+                        {"ids": agent_ids},
+                    )
+                ).fetchall()
+            )
+            slugs = dict(
+                (
+                    await session.execute(
+                        text("SELECT id, slug FROM projects WHERE id IN :ids").bindparams(
+                            bindparam("ids", expanding=True)
+                        ),
+                        {"ids": project_ids},
+                    )
+                ).fetchall()
+            )
+            holders: dict[int, int] = {}
+            if settings.ack_escalation_claim_holder_name:
+                for pid in project_ids:
+                    hid, is_new = await self._holder_for(session, pid, now)
+                    if hid is not None:
+                        holders[pid] = hid
+                        if is_new:
+                            created[pid] = hid
+
+            records: dict[int, list[dict[str, object]]] = defaultdict(list)
+            rows: list[dict[str, Any]] = []
+            for item in batch:
+                recipient_name = names.get(item.agent_id) or "*"
+                y_dir = item.created_ts.strftime("%Y")
+                m_dir = item.created_ts.strftime("%m")
+                pattern = f"agents/{recipient_name}/inbox/{y_dir}/{m_dir}/*.md"
+                rows.append(
+                    {
+                        "pid": item.project_id,
+                        "holder": holders.get(item.project_id, item.agent_id),
+                        "pattern": pattern,
+                        "exclusive": 1 if settings.ack_escalation_claim_exclusive else 0,
+                        "reason": "ack-overdue",
+                        "cts": now,
+                        "ets": expires_at,
+                    }
+                )
+                records[item.project_id].append(
+                    {
+                        "project": slugs.get(item.project_id) or "",
+                        "agent": settings.ack_escalation_claim_holder_name or "ops",
+                        "path_pattern": pattern,
+                        "exclusive": settings.ack_escalation_claim_exclusive,
+                        "reason": "ack-overdue",
+                        "created_ts": now.astimezone().isoformat(),
+                        "expires_ts": expires_at.astimezone().isoformat(),
+                    }
+                )
+            await session.execute(
+                text(
+                    """
+                    INSERT INTO file_reservations(project_id, agent_id, path_pattern, exclusive, reason, created_ts, expires_ts)
+                    VALUES (:pid, :holder, :pattern, :exclusive, :reason, :cts, :ets)
+                    """
+                ),
+                rows,
+            )
+            await session.commit()
+
+        # One archive + lock per project instead of per overdue row
+        for pid, project_records in records.items():
+            slug = slugs.get(pid) or ""
+            archive = await ensure_archive(settings, slug)
+            async with AsyncFileLock(archive.lock_path):
+                if pid in created:
+                    await write_agent_profile(
+                        archive,
+                        {
+                            "id": created[pid],
+                            "name": settings.ack_escalation_claim_holder_name,
+                            "program": "ops",
+                            "model": "system",
+                            "project_slug": slug,
+                            "inception_ts": now.astimezone().isoformat(),
+                            "inception_iso": now.astimezone().isoformat(),
+                            "task": "ops-escalation",
+                        },
+                    )
+                seen: set[str] = set()
+                for record in project_records:
+                    pattern = str(record["path_pattern"])
+                    if pattern in seen:
+                        continue  # same inbox pattern maps to the same record file
+                    seen.add(pattern)
+                    await write_file_reservation_record(archive, record)
+
+
+def _report(batch: list[OverdueAck], ttl_seconds: int) -> None:
+    """Emit the operator-facing alert for each newly overdue ack."""
+    try:
+        Console = importlib.import_module("rich.console").Console
+        Panel = importlib.import_module("rich.panel").Panel
+        Text = importlib.import_module("rich.text").Text
+        con: Any = Console()
+    except Exception:
+        con = None
+    log = structlog.get_logger("tasks")
+    for item in batch:
+        try:
+            if con is None:
+                raise RuntimeError("rich unavailable")
+            body = Text.assemble(
+                ("message_id: ", "cyan"),
+                (str(item.message_id), "white"),
+                "\n",
+                ("agent_id: ", "cyan"),
+                (str(item.agent_id), "white"),
+                "\n",
+                ("project_id: ", "cyan"),
+                (str(item.project_id), "white"),
+                "\n",
+                ("age_s: ", "cyan"),
+                (str(item.age_s), "white"),
+                "\n",
+                ("ttl_s: ", "cyan"),
+                (str(ttl_seconds), "white"),
+            )
+            con.print(Panel(body, title="ACK Overdue", border_style="red"))
+        except Exception:
+            print(
+                f"ack-warning message_id={item.message_id} project_id={item.project_id} agent_id={item.agent_id} age_s={item.age_s} ttl_s={ttl_seconds}"
+            )
+        with contextlib.suppress(Exception):
+            log.warning(
+                "ack_overdue",
+                message_id=str(item.message_id),
+                project_id=str(item.project_id),
+                agent_id=str(item.agent_id),
+                age_s=item.age_s,
+                ttl_s=int(ttl_seconds),
+            )
+
+
+__all__ = ["DEFAULT_SCAN_BATCH_SIZE", "AckScanner", "OverdueAck"]
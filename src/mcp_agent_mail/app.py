@@ -9,6 +9,8 @@ from uuid import UUID
 from fastapi import FastAPI, HTTPException, status
 from pydantic import BaseModel
 
+from .metrics import tool_metrics_snapshot
+
 
 class _ArtifactPayload(BaseModel):
     """アーティファクト作成用のペイロード。"""
@@ -21,9 +23,9 @@ class _ArtifactPayload(BaseModel):
 
 
 def _tool_metrics_snapshot() -> dict[str, Any]:
-    """ツールメトリクスのダミースナップショット。"""
+    """ツール別のレイテンシヒストグラムとエラー件数を返す。"""
 
-    return {}
+    return tool_metrics_snapshot()
 
 
 async def get_project_sibling_data() -> dict[str, Any]:
@@ -117,4 +119,4 @@ def app() -> FastAPI:
             status_code=status.HTTP_404_NOT_FOUND, detail="ARTIFACT_NOT_FOUND"
         )
 
-    return fastapi_app
+    return fastapi_app
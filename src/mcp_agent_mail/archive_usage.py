@@ -0,0 +1,250 @@
+"""Per-project archive usage counters for retention and quota reporting.
+
+Storage writers record deltas in memory (``USAGE.add``); the retention worker
+flushes them into ``archive_usage_counters`` and reports from the table, so a
+report costs one query instead of a walk over every archived file. An
+occasional ``reconcile`` pass rescans project directories with ``os.scandir``
+in a worker thread and replaces the counters, correcting any drift.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .config import Settings
+from .db import ensure_schema, get_session
+from .models import ArchiveUsageCounter
+
+METRIC_MESSAGES = "messages"  # canonical messages, bucket = YYYY-MM
+METRIC_INBOX = "inbox"  # inbox copies, bucket = YYYY-MM
+METRIC_ATTACHMENTS = "attachments"  # stored .webp files
+METRIC_ATTACHMENT_BYTES = "attachment_bytes"
+
+UsageKey = tuple[str, str, str]  # (project_slug, metric, bucket)
+
+
+class UsageAccumulator:
+    """Thread-safe pending deltas, drained into the database in one batch."""
+
+    def __init__(self) -> None:
+        self._pending: dict[UsageKey, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, project: str, metric: str, delta: int = 1, bucket: str = "") -> None:
+        if not project or not delta:
+            return
+        with self._lock:
+            self._pending[(project, metric, bucket)] += int(delta)
+
+    def drain(self) -> dict[UsageKey, int]:
+        with self._lock:
+            pending = dict(self._pending)
+            self._pending.clear()
+        return pending
+
+    def restore(self, pending: dict[UsageKey, int]) -> None:
+        with self._lock:
+            for key, delta in pending.items():
+                self._pending[key] += delta
+
+    async def flush(self) -> int:
+        """Upsert pending deltas; returns the number of counters touched."""
+        pending = {k: v for k, v in self.drain().items() if v}
+        if not pending:
+            return 0
+        now = datetime.now(timezone.utc)
+        rows = [
+            {
+                "project_slug": project,
+                "metric": metric,
+                "bucket": bucket,
+                "value": delta,
+                "updated_at": now,
+            }
+            for (project, metric, bucket), delta in pending.items()
+        ]
+        stmt = sqlite_insert(ArchiveUsageCounter.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["project_slug", "metric", "bucket"],
+            set_={
+                "value": ArchiveUsageCounter.__table__.c.value + stmt.excluded.value,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+        try:
+            await ensure_schema()
+            async with get_session() as session:
+                await session.execute(stmt, rows)
+                await session.commit()
+        except Exception:
+            self.restore(pending)
+            raise
+        return len(rows)
+
+
+USAGE = UsageAccumulator()
+
+
+def _scan_files(root: Path, suffix: str) -> Iterable[os.DirEntry[str]]:
+    """Yield files below ``root`` ending with ``suffix`` (iterative scandir walk)."""
+    stack = [str(root)]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.lower().endswith(suffix):
+                        yield entry
+        except OSError:
+            continue
+
+
+def _subdirs(path: Path | str) -> list[os.DirEntry[str]]:
+    try:
+        with os.scandir(path) as it:
+            return [e for e in it if e.is_dir(follow_symlinks=False)]
+    except OSError:
+        return []
+
+
+def _count_month_tree(root: Path | str) -> dict[str, int]:
+    """Count ``*.md`` files in a ``YYYY/MM`` tree, keyed by ``YYYY-MM``."""
+    counts: dict[str, int] = {}
+    for year in _subdirs(root):
+        for month in _subdirs(year.path):
+            try:
+                with os.scandir(month.path) as it:
+                    n = sum(1 for e in it if e.name.endswith(".md") and e.is_file())
+            except OSError:
+                continue
+            if n:
+                key = f"{year.name}-{month.name}"
+                counts[key] = counts.get(key, 0) + n
+    return counts
+
+
+def scan_project_usage(project_root: Path) -> dict[tuple[str, str], int]:
+    """Recompute every counter for one project directory (blocking; run in a thread)."""
+    usage: dict[tuple[str, str], int] = {}
+    for bucket, n in _count_month_tree(project_root / "messages").items():
+        usage[(METRIC_MESSAGES, bucket)] = n
+    for agent in _subdirs(project_root / "agents"):
+        for bucket, n in _count_month_tree(Path(agent.path) / "inbox").items():
+            key = (METRIC_INBOX, bucket)
+            usage[key] = usage.get(key, 0) + n
+    files = total = 0
+    for entry in _scan_files(project_root / "attachments", ".webp"):
+        try:
+            total += entry.stat(follow_symlinks=False).st_size
+            files += 1
+        except OSError:
+            continue
+    if files:
+        usage[(METRIC_ATTACHMENTS, "")] = files
+        usage[(METRIC_ATTACHMENT_BYTES, "")] = total
+    return usage
+
+
+def _projects_root(settings: Settings) -> Path:
+    return Path(settings.storage.root).expanduser().resolve() / "projects"
+
+
+async def reconcile(settings: Settings) -> dict[str, int]:
+    """Rescan every project archive and replace its counters; returns files per project."""
+    root = _projects_root(settings)
+
+    def _scan_all() -> dict[str, dict[tuple[str, str], int]]:
+        return {
+            entry.name: scan_project_usage(Path(entry.path)) for entry in _subdirs(root)
+        }
+
+    # Flush first so deltas written before the scan are not applied twice
+    await USAGE.flush()
+    scanned = await asyncio.to_thread(_scan_all)
+    # Writes that landed during the scan are in its totals already; their
+    # deltas go now, before the replace (later ones are flushed on top of it)
+    USAGE.drain()
+    now = datetime.now(timezone.utc)
+    table = ArchiveUsageCounter.__table__
+    await ensure_schema()
+    async with get_session() as session:
+        await session.execute(delete(table))
+        rows = [
+            {
+                "project_slug": slug,
+                "metric": metric,
+                "bucket": bucket,
+                "value": value,
+                "updated_at": now,
+            }
+            for slug, usage in scanned.items()
+            for (metric, bucket), value in usage.items()
+        ]
+        if rows:
+            await session.execute(table.insert(), rows)
+        await session.commit()
+    return {
+        slug: sum(v for (m, _), v in usage.items() if m != METRIC_ATTACHMENT_BYTES)
+        for slug, usage in scanned.items()
+    }
+
+
+async def usage_report(
+    *, retention_cutoff: datetime | None = None
+) -> dict[str, dict[str, Any]]:
+    """Aggregate counters per project (one query, O(projects x months))."""
+    cutoff_bucket = retention_cutoff.strftime("%Y-%m") if retention_cutoff else None
+    table = ArchiveUsageCounter.__table__
+    await ensure_schema()
+    async with get_session() as session:
+        rows = (
+            await session.execute(select(table.c.project_slug, table.c.metric, table.c.bucket, table.c.value))
+        ).fetchall()
+    report: dict[str, dict[str, Any]] = {}
+    for slug, metric, bucket, value in rows:
+        entry = report.setdefault(
+            slug,
+            {
+                "messages": 0,
+                "old_messages": 0,
+                "inbox": 0,
+                "attachments": 0,
+                "attachment_bytes": 0,
+                "messages_by_month": {},
+            },
+        )
+        value = int(value or 0)
+        if metric == METRIC_MESSAGES:
+            entry["messages"] += value
+            entry["messages_by_month"][bucket] = value
+            # Month granularity: a month counts as old once it ends before the cutoff
+            if cutoff_bucket is not None and bucket < cutoff_bucket:
+                entry["old_messages"] += value
+        elif metric in entry:
+            entry[metric] += value
+    return report
+
+
+__all__ = [
+    "METRIC_ATTACHMENTS",
+    "METRIC_ATTACHMENT_BYTES",
+    "METRIC_INBOX",
+    "METRIC_MESSAGES",
+    "USAGE",
+    "UsageAccumulator",
+    "reconcile",
+    "scan_project_usage",
+    "usage_report",
+]
@@ -0,0 +1,184 @@
+"""ASGI response compression (gzip, or brotli when the module is installed)."""
+
+from __future__ import annotations
+
+import importlib
+import zlib
+from collections.abc import Iterable
+from typing import Any
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+DEFAULT_COMPRESSIBLE_TYPES: tuple[str, ...] = (
+    "text/html",
+    "text/plain",
+    "text/css",
+    "text/csv",
+    "application/json",
+    "application/javascript",
+    "image/svg+xml",
+)
+
+try:  # brotli is optional; gzip is always available
+    _brotli: Any = importlib.import_module("brotli")
+except ImportError:
+    _brotli = None
+
+
+class _GzipEncoder:
+    encoding = "gzip"
+
+    def __init__(self, level: int) -> None:
+        # wbits=31 -> gzip container
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        # Sync flush so every streamed chunk is decodable as soon as it arrives
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_FINISH)
+
+
+class _BrotliEncoder:
+    encoding = "br"
+
+    def __init__(self, level: int) -> None:
+        # Map the gzip-style 1..9 level onto a fast brotli quality
+        self._obj = _brotli.Compressor(quality=max(1, min(level, 11)))
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._obj.process(data) + self._obj.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._obj.process(data) + self._obj.finish()
+
+
+def _accepted(accept_encoding: str) -> set[str]:
+    accepted: set[str] = set()
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in {"q=0", "q=0.0"}:
+            continue
+        if token:
+            accepted.add(token.strip().lower())
+    return accepted
+
+
+class CompressionMiddleware:
+    """Compress allow-listed response types above ``minimum_size`` bytes.
+
+    Responses whose body stays below the threshold pass through untouched.
+    Streaming responses (``more_body``) are compressed chunk by chunk with a sync
+    flush so the browser can start rendering before the body is complete.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        minimum_size: int = 1024,
+        content_types: Iterable[str] = DEFAULT_COMPRESSIBLE_TYPES,
+        compresslevel: int = 6,
+        brotli_enabled: bool = True,
+    ) -> None:
+        self.app = app
+        self.minimum_size = max(int(minimum_size), 0)
+        self.content_types = frozenset(t.strip().lower() for t in content_types if t)
+        self.compresslevel = compresslevel
+        self.brotli_enabled = brotli_enabled and _brotli is not None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accepted = _accepted(Headers(scope=scope).get("accept-encoding", ""))
+        if self.brotli_enabled and "br" in accepted:
+            factory: Any = _BrotliEncoder
+        elif "gzip" in accepted:
+            factory = _GzipEncoder
+        else:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(self, factory, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, owner: CompressionMiddleware, factory: Any, send: Send) -> None:
+        self.owner = owner
+        self.factory = factory
+        self.downstream = send
+        self.start: Message | None = None
+        self.encoder: Any = None
+        self.passthrough = False
+        self.buffered: list[bytes] = []
+        self.buffered_size = 0
+
+    def _compressible(self, headers: Headers) -> bool:
+        if headers.get("content-encoding"):
+            return False
+        media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return media_type in self.owner.content_types
+
+    async def send(self, message: Message) -> None:
+        kind = message["type"]
+        if kind == "http.response.start":
+            self.start = message
+            status = int(message.get("status", 200))
+            self.passthrough = status in (204, 304) or not self._compressible(
+                Headers(raw=message.get("headers", []))
+            )
+            if self.passthrough:
+                await self.downstream(message)
+            return
+        if kind != "http.response.body" or self.passthrough:
+            await self.downstream(message)
+            return
+
+        body: bytes = message.get("body", b"")
+        more_body = bool(message.get("more_body", False))
+        if self.encoder is None:
+            assert self.start is not None
+            # Buffer until the threshold is reached so small responses that
+            # arrive in several chunks (BaseHTTPMiddleware) are not compressed.
+            self.buffered.append(body)
+            self.buffered_size += len(body)
+            if more_body and self.buffered_size < self.owner.minimum_size:
+                return
+            body = b"".join(self.buffered)
+            self.buffered = []
+            if not more_body and len(body) < self.owner.minimum_size:
+                self.passthrough = True
+                await self.downstream(self.start)
+                await self.downstream({"type": "http.response.body", "body": body})
+                return
+            self.encoder = self.factory(self.owner.compresslevel)
+            headers = MutableHeaders(raw=self.start.setdefault("headers", []))
+            headers["Content-Encoding"] = self.encoder.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                del headers["Content-Length"]
+                await self.downstream(self.start)
+                await self.downstream(
+                    {
+                        "type": "http.response.body",
+                        "body": self.encoder.chunk(body),
+                        "more_body": True,
+                    }
+                )
+                return
+            compressed = self.encoder.finish(body)
+            headers["Content-Length"] = str(len(compressed))
+            await self.downstream(self.start)
+            await self.downstream({"type": "http.response.body", "body": compressed})
+            return
+
+        data = self.encoder.chunk(body) if more_body else self.encoder.finish(body)
+        await self.downstream(
+            {"type": "http.response.body", "body": data, "more_body": more_body}
+        )
+
+
+__all__ = ["DEFAULT_COMPRESSIBLE_TYPES", "CompressionMiddleware"]
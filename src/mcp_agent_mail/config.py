@@ -46,9 +46,18 @@ class HttpSettings:
     rate_limit_tools_burst: int
     rate_limit_resources_burst: int
     request_log_enabled: bool
+    # Serialize JSON API responses with orjson (stdlib fallback)
+    fast_json_enabled: bool
+    # Response compression (gzip/brotli) above a size threshold
+    compression_enabled: bool
+    compression_min_bytes: int
+    compression_content_types: list[str]
     otel_enabled: bool
     otel_service_name: str
     otel_exporter_otlp_endpoint: str
+    # Parent-based trace-id ratio sampling and optional JSONL span file
+    otel_sample_ratio: float
+    otel_file_exporter_path: str
     # JWT / RBAC
     jwt_enabled: bool
     jwt_algorithms: list[str]
@@ -72,6 +81,9 @@ class DatabaseSettings:
 
     url: str
     echo: bool
+    query_stats_enabled: bool = True
+    slow_query_ms: int = 100
+    query_plan_interval_seconds: int = 300
 
 
 @dataclass(slots=True, frozen=True)
@@ -170,6 +182,41 @@ class Settings:
     messaging_auto_register_recipients: bool
     # When true, attempt a contact handshake automatically if delivery is blocked
     messaging_auto_handshake_on_block: bool
+    # Mail UI templates: production mode caches bytecode, disables auto-reload
+    # and preloads every template at startup
+    ui_templates_production: bool
+    ui_template_cache_dir: str
+    # Stream large SSR pages (inbox, thread, commit diff) via generate_async
+    ui_stream_render_enabled: bool
+    # Tail the dangerous-command audit log into signals in the background
+    signals_tailer_enabled: bool
+    signals_tailer_path: str
+    signals_tailer_interval_seconds: int
+    signals_tailer_project: str
+    # Per-subscriber buffer for pushed signal notifications (oldest dropped first)
+    signals_bus_buffer_size: int
+    retention_reconcile_interval_seconds: int
+    retention_enforce_enabled: bool
+    retention_enforce_batch_size: int
+    retention_segments_dir: str
+    workflow_max_concurrency: int
+    workflow_run_queue_enabled: bool
+    workflow_run_workers: int
+    workflow_runs_per_project: int
+    workflow_run_poll_seconds: int
+    workflow_state_flush_ms: int
+    workflow_trace_flush_ms: int
+    workflow_trace_max_bytes: int
+    workflow_trace_compress: bool
+    workflow_run_orphan_seconds: int
+    workflow_task_cache_enabled: bool
+    workflow_task_cache_ttl_seconds: int
+    workflow_loop_max_iterations: int
+    workflow_self_heal_retries: int
+    workflow_self_heal_backoff_ms: int
+    workflow_self_heal_backoff_max_ms: int
+    workflow_self_heal_budget: int
+    workflow_self_heal_strategies: str
 
 
 def _bool(value: str, *, default: bool) -> bool:
@@ -198,6 +245,12 @@ def get_settings() -> Settings:
         items = [part.strip() for part in raw.split(",") if part.strip()]
         return items
 
+    def _float(value: str, *, default: float) -> float:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return default
+
     http_settings = HttpSettings(
         host=_config_value("HTTP_HOST", default="127.0.0.1"),
         port=_int(_config_value("HTTP_PORT", default="8765"), default=8765),
@@ -229,6 +282,19 @@ def get_settings() -> Settings:
         request_log_enabled=_bool(
             _config_value("HTTP_REQUEST_LOG_ENABLED", default="false"), default=False
         ),
+        fast_json_enabled=_bool(
+            _config_value("HTTP_FAST_JSON_ENABLED", default="false"), default=False
+        ),
+        compression_enabled=_bool(
+            _config_value("HTTP_COMPRESSION_ENABLED", default="false"), default=False
+        ),
+        compression_min_bytes=_int(
+            _config_value("HTTP_COMPRESSION_MIN_BYTES", default="1024"), default=1024
+        ),
+        compression_content_types=_csv(
+            "HTTP_COMPRESSION_CONTENT_TYPES",
+            default="text/html,text/plain,text/css,text/csv,application/json,application/javascript,image/svg+xml",
+        ),
         otel_enabled=_bool(
             _config_value("HTTP_OTEL_ENABLED", default="false"), default=False
         ),
@@ -236,6 +302,10 @@ def get_settings() -> Settings:
         otel_exporter_otlp_endpoint=_config_value(
             "OTEL_EXPORTER_OTLP_ENDPOINT", default=""
         ),
+        otel_sample_ratio=_float(
+            _config_value("OTEL_TRACES_SAMPLER_ARG", default="0.1"), default=0.1
+        ),
+        otel_file_exporter_path=_config_value("OTEL_FILE_EXPORTER_PATH", default=""),
         jwt_enabled=_bool(
             _config_value("HTTP_JWT_ENABLED", default="false"), default=False
         ),
@@ -268,6 +338,16 @@ def get_settings() -> Settings:
             "DATABASE_URL", default="sqlite+aiosqlite:///./storage.sqlite3"
         ),
         echo=_bool(_config_value("DATABASE_ECHO", default="false"), default=False),
+        query_stats_enabled=_bool(
+            _config_value("DATABASE_QUERY_STATS_ENABLED", default="true"), default=True
+        ),
+        slow_query_ms=_int(
+            _config_value("DATABASE_SLOW_QUERY_MS", default="100"), default=100
+        ),
+        query_plan_interval_seconds=_int(
+            _config_value("DATABASE_QUERY_PLAN_INTERVAL_SECONDS", default="300"),
+            default=300,
+        ),
     )
 
     storage_settings = StorageSettings(
@@ -303,12 +383,6 @@ def get_settings() -> Settings:
         allow_headers=_csv("HTTP_CORS_ALLOW_HEADERS", default="*"),
     )
 
-    def _float(value: str, *, default: float) -> float:
-        try:
-            return float(value)
-        except (TypeError, ValueError):
-            return default
-
     llm_settings = LlmSettings(
         enabled=_bool(_config_value("LLM_ENABLED", default="true"), default=True),
         default_model=_config_value("LLM_DEFAULT_MODEL", default="gpt-5-mini"),
@@ -438,6 +512,98 @@ def get_settings() -> Settings:
             _config_value("MESSAGING_AUTO_HANDSHAKE_ON_BLOCK", default="true"),
             default=True,
         ),
+        ui_templates_production=_bool(
+            _config_value(
+                "UI_TEMPLATES_PRODUCTION",
+                default="true" if environment == "production" else "false",
+            ),
+            default=environment == "production",
+        ),
+        ui_template_cache_dir=_config_value("UI_TEMPLATE_CACHE_DIR", default=""),
+        ui_stream_render_enabled=_bool(
+            _config_value("UI_STREAM_RENDER_ENABLED", default="false"), default=False
+        ),
+        signals_tailer_enabled=_bool(
+            _config_value("SIGNALS_TAILER_ENABLED", default="false"), default=False
+        ),
+        signals_tailer_path=_config_value(
+            "SIGNALS_TAILER_PATH",
+            default="data/logs/current/audit/dangerous_command_events.jsonl",
+        ),
+        signals_tailer_interval_seconds=_int(
+            _config_value("SIGNALS_TAILER_INTERVAL_SECONDS", default="5"), default=5
+        ),
+        signals_tailer_project=_config_value("SIGNALS_TAILER_PROJECT", default=""),
+        signals_bus_buffer_size=_int(
+            _config_value("SIGNALS_BUS_BUFFER_SIZE", default="256"), default=256
+        ),
+        retention_reconcile_interval_seconds=_int(
+            _config_value("RETENTION_RECONCILE_INTERVAL_SECONDS", default="86400"),
+            default=86400,
+        ),
+        retention_enforce_enabled=_bool(
+            _config_value("RETENTION_ENFORCE_ENABLED", default="false"), default=False
+        ),
+        retention_enforce_batch_size=_int(
+            _config_value("RETENTION_ENFORCE_BATCH_SIZE", default="500"), default=500
+        ),
+        retention_segments_dir=_config_value(
+            "RETENTION_SEGMENTS_DIR", default="~/.mcp_agent_mail_retention_segments"
+        ),
+        workflow_max_concurrency=_int(
+            _config_value("WORKFLOW_MAX_CONCURRENCY", default="4"), default=4
+        ),
+        workflow_run_queue_enabled=_bool(
+            _config_value("WORKFLOW_RUN_QUEUE_ENABLED", default="true"), default=True
+        ),
+        workflow_run_workers=_int(
+            _config_value("WORKFLOW_RUN_WORKERS", default="2"), default=2
+        ),
+        workflow_runs_per_project=_int(
+            _config_value("WORKFLOW_RUNS_PER_PROJECT", default="1"), default=1
+        ),
+        workflow_run_poll_seconds=_int(
+            _config_value("WORKFLOW_RUN_POLL_SECONDS", default="5"), default=5
+        ),
+        workflow_state_flush_ms=_int(
+            _config_value("WORKFLOW_STATE_FLUSH_MS", default="500"), default=500
+        ),
+        workflow_trace_flush_ms=_int(
+            _config_value("WORKFLOW_TRACE_FLUSH_MS", default="1000"), default=1000
+        ),
+        workflow_trace_max_bytes=_int(
+            _config_value("WORKFLOW_TRACE_MAX_BYTES", default="67108864"), default=67108864
+        ),
+        workflow_trace_compress=_bool(
+            _config_value("WORKFLOW_TRACE_COMPRESS", default="false"), default=False
+        ),
+        workflow_run_orphan_seconds=_int(
+            _config_value("WORKFLOW_RUN_ORPHAN_SECONDS", default="300"), default=300
+        ),
+        workflow_task_cache_enabled=_bool(
+            _config_value("WORKFLOW_TASK_CACHE_ENABLED", default="false"), default=False
+        ),
+        workflow_task_cache_ttl_seconds=_int(
+            _config_value("WORKFLOW_TASK_CACHE_TTL_SECONDS", default="86400"), default=86400
+        ),
+        workflow_loop_max_iterations=_int(
+            _config_value("WORKFLOW_LOOP_MAX_ITERATIONS", default="10"), default=10
+        ),
+        workflow_self_heal_retries=_int(
+            _config_value("WORKFLOW_SELF_HEAL_RETRIES", default="0"), default=0
+        ),
+        workflow_self_heal_backoff_ms=_int(
+            _config_value("WORKFLOW_SELF_HEAL_BACKOFF_MS", default="1000"), default=1000
+        ),
+        workflow_self_heal_backoff_max_ms=_int(
+            _config_value("WORKFLOW_SELF_HEAL_BACKOFF_MAX_MS", default="30000"), default=30000
+        ),
+        workflow_self_heal_budget=_int(
+            _config_value("WORKFLOW_SELF_HEAL_BUDGET", default="10"), default=10
+        ),
+        workflow_self_heal_strategies=_config_value(
+            "WORKFLOW_SELF_HEAL_STRATEGIES", default="recover"
+        ),
     )
 
 
@@ -6,6 +6,7 @@ import asyncio
 import logging
 import secrets
 import threading
+import time
 from collections.abc import AsyncIterator, Callable
 from contextlib import asynccontextmanager
 from functools import wraps
@@ -33,7 +34,10 @@ except ImportError:
 from sqlmodel import SQLModel
 
 from .config import DatabaseSettings, Settings, get_settings
+from .metrics import DB_SESSION_MS
+from .query_stats import install_query_stats
 from .storage import close_all_archives
+from .tracing import instrument_engine
 
 T = TypeVar("T")
 
@@ -194,6 +198,10 @@ def _build_engine(settings: DatabaseSettings) -> AsyncEngine:
             cursor.execute("PRAGMA busy_timeout=30000")
             cursor.close()
 
+    # Per-statement timings and the slow-query log (DATABASE_SLOW_QUERY_MS)
+    install_query_stats(engine, settings)
+    # db.query spans per statement (no-op unless tracing is configured)
+    instrument_engine(engine)
     return engine
 
 
@@ -229,8 +237,12 @@ def get_session_factory() -> async_sessionmaker[AsyncSession]:
 @asynccontextmanager
 async def session_context() -> AsyncIterator[AsyncSession]:
     factory = get_session_factory()
-    async with factory() as session:
-        yield session
+    started = time.perf_counter()
+    try:
+        async with factory() as session:
+            yield session
+    finally:
+        DB_SESSION_MS.labels().observe((time.perf_counter() - started) * 1000)
 
 
 @asynccontextmanager
@@ -269,6 +281,11 @@ async def ensure_schema(settings: Settings | None = None) -> None:
             # Setup FTS and custom indexes
             await conn.run_sync(_setup_fts)
             await conn.run_sync(_extend_agents_table)
+            await conn.run_sync(_extend_signals_table)
+            await conn.run_sync(_extend_deadline_indexes)
+            await conn.run_sync(_extend_workflow_runs_table)
+            await conn.run_sync(_extend_task_loop_columns)
+            await conn.run_sync(_extend_signal_import_cursors)
         _schema_ready = True
 
 
@@ -386,3 +403,164 @@ def _extend_agents_table(connection) -> None:
     _add("task_summary TEXT")
     _add("skills JSON")
     _add("primary_model TEXT")
+
+
+def _extend_signals_table(connection) -> None:
+    """Best-effort upgrade of an existing signals table (dedupe key for imports)."""
+
+    try:
+        connection.exec_driver_sql(
+            "ALTER TABLE signals ADD COLUMN dedupe_key VARCHAR(64)"
+        )
+    except Exception as exc:  # pragma: no cover - defensive fallback
+        msg = str(exc).lower()
+        if "duplicate column name" not in msg and "already exists" not in msg:
+            logging.debug("signals schema extension skipped: %s", exc)
+    connection.exec_driver_sql(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_signals_dedupe_key ON signals(dedupe_key)"
+    )
+    for name, columns in _SIGNAL_INDEXES:
+        connection.exec_driver_sql(
+            f"CREATE INDEX IF NOT EXISTS {name} ON signals({columns})"
+        )
+    _setup_signal_counters(connection)
+
+
+def _extend_deadline_indexes(connection) -> None:
+    """Best-effort ack escalation marker and deadline indexes (ack TTL, reservation expiry)."""
+
+    try:
+        connection.exec_driver_sql(
+            "ALTER TABLE message_recipients ADD COLUMN ack_escalated_ts DATETIME"
+        )
+    except Exception as exc:  # pragma: no cover - defensive fallback
+        msg = str(exc).lower()
+        if "duplicate column name" not in msg and "already exists" not in msg:
+            logging.debug("message_recipients schema extension skipped: %s", exc)
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_messages_ack_due ON messages(created_ts) "
+        "WHERE ack_required = 1"
+    )
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_file_reservations_active_expiry "
+        "ON file_reservations(expires_ts) WHERE released_ts IS NULL"
+    )
+
+
+def _extend_workflow_runs_table(connection) -> None:
+    """Best-effort run queue/checkpoint columns and the queued-run index on workflow_runs."""
+
+    for column_sql in (
+        "project_id INTEGER",
+        "allow_self_heal BOOLEAN NOT NULL DEFAULT 1",
+        "queued_at DATETIME",
+        "worker_id VARCHAR(64)",
+        "checkpoint JSON",
+        "heartbeat_at DATETIME",
+    ):
+        try:
+            connection.exec_driver_sql(f"ALTER TABLE workflow_runs ADD COLUMN {column_sql}")
+        except Exception as exc:  # pragma: no cover - defensive fallback
+            msg = str(exc).lower()
+            if "duplicate column name" not in msg and "already exists" not in msg:
+                logging.debug("workflow_runs schema extension skipped: %s", exc)
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_workflow_runs_project_id ON workflow_runs(project_id)"
+    )
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_workflow_runs_queued "
+        "ON workflow_runs(queued_at) WHERE status = 'queued'"
+    )
+
+
+def _extend_task_loop_columns(connection) -> None:
+    """Best-effort loop settings and iteration counters on task_groups/tasks."""
+
+    for table, column_sql in (
+        ("task_groups", "loop JSON"),
+        ("task_groups", "iteration INTEGER NOT NULL DEFAULT 0"),
+        ("tasks", "iteration INTEGER NOT NULL DEFAULT 0"),
+    ):
+        try:
+            connection.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column_sql}")
+        except Exception as exc:  # pragma: no cover - defensive fallback
+            msg = str(exc).lower()
+            if "duplicate column name" not in msg and "already exists" not in msg:
+                logging.debug("%s schema extension skipped: %s", table, exc)
+
+
+def _extend_signal_import_cursors(connection) -> None:
+    """Rebuild signal_import_cursors keyed by (path, project) if it predates the project key.
+
+    Cursors are only resume hints (imports are deduplicated), so the old rows
+    are dropped rather than migrated.
+    """
+
+    from .models import SignalImportCursor
+
+    columns = connection.exec_driver_sql("PRAGMA table_info(signal_import_cursors)").fetchall()
+    if columns and all(col[1] != "project" for col in columns):
+        connection.exec_driver_sql("DROP TABLE signal_import_cursors")
+        SignalImportCursor.__table__.create(connection)
+
+
+_SIGNAL_INDEXES: tuple[tuple[str, str], ...] = (
+    ("ix_signals_created_id", "created_at, id"),
+    ("ix_signals_project_status_created", "project_id, status, created_at, id"),
+    ("ix_signals_mission_created", "mission_id, created_at, id"),
+)
+
+_SIGNAL_COUNTER_TRIGGERS: tuple[str, ...] = (
+    """
+    CREATE TRIGGER IF NOT EXISTS signal_counters_ai
+    AFTER INSERT ON signals
+    BEGIN
+        INSERT INTO signal_counters(project_id, status, severity, count)
+        VALUES (new.project_id, new.status, new.severity, 1)
+        ON CONFLICT(project_id, status, severity) DO UPDATE SET count = count + 1;
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS signal_counters_ad
+    AFTER DELETE ON signals
+    BEGIN
+        UPDATE signal_counters SET count = count - 1
+        WHERE project_id = old.project_id
+          AND status = old.status
+          AND severity = old.severity;
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS signal_counters_au
+    AFTER UPDATE OF project_id, status, severity ON signals
+    WHEN old.project_id IS NOT new.project_id
+      OR old.status IS NOT new.status
+      OR old.severity IS NOT new.severity
+    BEGIN
+        UPDATE signal_counters SET count = count - 1
+        WHERE project_id = old.project_id
+          AND status = old.status
+          AND severity = old.severity;
+        INSERT INTO signal_counters(project_id, status, severity, count)
+        VALUES (new.project_id, new.status, new.severity, 1)
+        ON CONFLICT(project_id, status, severity) DO UPDATE SET count = count + 1;
+    END;
+    """,
+)
+
+
+def _setup_signal_counters(connection) -> None:
+    """Maintain signal_counters from triggers so counts never scan signals."""
+
+    for ddl in _SIGNAL_COUNTER_TRIGGERS:
+        connection.exec_driver_sql(ddl)
+    # Backfill once for databases that had signals before the counters existed
+    has_counters = connection.exec_driver_sql(
+        "SELECT 1 FROM signal_counters LIMIT 1"
+    ).first()
+    if has_counters is None:
+        connection.exec_driver_sql(
+            "INSERT INTO signal_counters(project_id, status, severity, count) "
+            "SELECT project_id, status, severity, COUNT(*) FROM signals "
+            "GROUP BY project_id, status, severity"
+        )
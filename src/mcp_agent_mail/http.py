@@ -6,71 +6,79 @@ import argparse
 import asyncio
 import base64
 import contextlib
+import functools
 import importlib
+import importlib.util
 import json
 import logging
 import os
 import re
+import time
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, cast
 from uuid import UUID
 
 import structlog
-import uvicorn
-from fastapi import FastAPI, HTTPException, Request, status
+from fastapi import FastAPI, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse
-from sqlalchemy import text
+from fastapi.responses import (
+    HTMLResponse,
+    JSONResponse,
+    Response,
+    StreamingResponse,
+)
+from sqlalchemy import and_, func, or_, text
 from sqlalchemy.exc import NoResultFound
 from sqlmodel import select
 from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
 from starlette.staticfiles import StaticFiles
 
 from .app import (
-    _expire_stale_file_reservations,
     _tool_metrics_snapshot,
     build_mcp_server,
     get_project_sibling_data,
     refresh_project_sibling_suggestions,
     update_project_sibling_status,
 )
+from .compression import CompressionMiddleware
 from .config import Settings, get_settings
 from .db import ensure_schema, get_session
 from .mail_client import MailClient
-from .models import Signal
+from .metrics import (
+    REGISTRY,
+    TEMPLATE_RENDER_MS,
+    RouteMetricsMiddleware,
+    snapshot_delta,
+)
+from .models import Signal, SignalCounter
+from .query_stats import QUERY_STATS, run_plan_capture
+from .reservation_index import ReservationConflictError
+from .reservation_scheduler import RESERVATION_SCHEDULER
+from .responses import StreamingJSONResponse, json_response_class
 from .routers import missions
-from .storage import (
-    AsyncFileLock,
-    collect_lock_status,
-    ensure_archive,
-    get_agent_communication_graph,
-    get_archive_tree,
-    get_commit_detail,
-    get_file_content,
-    get_historical_inbox_snapshot,
-    get_message_commit_sha,
-    get_recent_commits,
-    get_timeline_commits,
-    write_agent_profile,
-    write_file_reservation_record,
+from .run_queue import RUN_QUEUE, recover_orphaned_runs
+from .signal_bus import SIGNAL_BUS, signal_event
+from .signal_import import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_DANGEROUS_LOG,
+    SignalImporter,
+    run_signal_tailer,
+)
+from .trace_writer import TRACE_WRITERS
+from .tracing import (
+    TracingMiddleware,
+    configure_tracing,
+    shutdown_tracing,
+    tracing_enabled,
 )
 
 mail_client = MailClient()
 
-
-async def _project_slug_from_id(pid: int | None) -> str | None:
-    if pid is None:
-        return None
-    async with get_session() as session:
-        row = await session.execute(
-            text("SELECT slug FROM projects WHERE id = :pid"), {"pid": pid}
-        )
-        res = row.fetchone()
-        return res[0] if res and res[0] else None
-
-
-__all__ = ["app", "build_http_app", "main"]
+# Characters buffered before a streamed template chunk is flushed
+_STREAM_CHUNK_CHARS = 16 * 1024
+# Idle interval before an SSE keep-alive comment is sent
+_SSE_HEARTBEAT_SECONDS = 15.0
 
 
 def _decode_jwt_header_segment(token: str) -> dict[str, object] | None:
@@ -84,6 +92,29 @@ def _decode_jwt_header_segment(token: str) -> dict[str, object] | None:
         return None
 
 
+def _encode_signal_cursor(created_at: datetime, signal_id: int) -> str:
+    """Opaque keyset cursor for ``/api/signals`` (last row's created_at, id)."""
+    raw = json.dumps([created_at.isoformat(), signal_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_signal_cursor(cursor: str) -> tuple[datetime, int]:
+    """Inverse of ``_encode_signal_cursor``; raises ValueError when malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_raw, signal_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_raw), int(signal_id)
+    except Exception as exc:
+        raise ValueError("invalid cursor") from exc
+
+
+def _csv_values(value: str | None) -> list[str]:
+    """Split a comma separated query value (``status=pending,acknowledged``)."""
+    if not value:
+        return []
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
 _LOGGING_CONFIGURED = False
 
 
@@ -533,6 +564,8 @@ async def readiness_check() -> None:
 def build_http_app(settings: Settings, server=None) -> FastAPI:
     # Configure logging once
     _configure_logging(settings)
+    # Before any engine is built, so SQL statements get spans too
+    configure_tracing(settings)
     if server is None:
         server = build_mcp_server()
 
@@ -543,358 +576,108 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
 
     # Background workers lifecycle
     async def _startup() -> None:  # pragma: no cover - service lifecycle
+        TRACE_WRITERS.configure(settings)
         if settings.environment == "test":
             fastapi_app.state._background_tasks = []
             return
+        plan_capture_enabled = (
+            settings.database.query_stats_enabled
+            and settings.database.query_plan_interval_seconds > 0
+        )
         if not (
             settings.file_reservations_cleanup_enabled
             or settings.ack_ttl_enabled
             or settings.retention_report_enabled
+            or settings.retention_enforce_enabled
             or settings.quota_enabled
             or settings.tool_metrics_emit_enabled
+            or settings.signals_tailer_enabled
+            or plan_capture_enabled
+            or settings.workflow_run_queue_enabled
         ):
             fastapi_app.state._background_tasks = []
             return
 
         async def _worker_cleanup() -> None:
-            while True:
-                try:
-                    await ensure_schema()
-                    async with get_session() as session:
-                        rows = await session.execute(
-                            text("SELECT DISTINCT project_id FROM file_reservations")
-                        )
-                        pids = [r[0] for r in rows.fetchall() if r[0] is not None]
-                    for pid in pids:
-                        with contextlib.suppress(Exception):
-                            await _expire_stale_file_reservations(pid)
-                    with contextlib.suppress(Exception):
-                        rich_console = importlib.import_module("rich.console")
-                        rich_panel = importlib.import_module("rich.panel")
-                        Console = rich_console.Console
-                        Panel = rich_panel.Panel
-                        Console().print(
-                            Panel.fit(
-                                f"projects_scanned={len(pids)}",
-                                title="File Reservations Cleanup",
-                                border_style="cyan",
-                            )
-                        )
-                    with contextlib.suppress(Exception):
-                        structlog.get_logger("tasks").info(
-                            "file_reservations_cleanup", projects_scanned=len(pids)
-                        )
-                except Exception as exc:
-                    structlog.get_logger("tasks").warning(
-                        "file_reservations_cleanup_failed", error=str(exc)
-                    )
-                await asyncio.sleep(settings.file_reservations_cleanup_interval_seconds)
+            # Wakes at the next expires_ts (or when MailClient schedules a lease)
+            # instead of polling every project on a fixed interval.
+            RESERVATION_SCHEDULER.resync_seconds = max(
+                settings.file_reservations_cleanup_interval_seconds, 1
+            )
+            await RESERVATION_SCHEDULER.run()
 
         async def _worker_ack_ttl() -> None:
-            import datetime as _dt
+            from .ack_scanner import AckScanner
 
+            scanner = AckScanner(settings)
             while True:
                 log = structlog.get_logger("ack.ttl")
                 try:
-                    await ensure_schema()
-                    async with get_session() as session:
-                        result = await session.execute(
-                            text(
-                                """
-                            SELECT m.id, m.project_id, m.created_ts, mr.agent_id
-                            FROM messages m
-                            JOIN message_recipients mr ON mr.message_id = m.id
-                            WHERE m.ack_required = 1 AND mr.ack_ts IS NULL
-                            """
-                            )
-                        )
-                        rows = result.fetchall()
-                    now = _dt.datetime.now(_dt.timezone.utc)
-                    for mid, project_id, created_ts, agent_id in rows:
-                        # Normalize to timezone-aware UTC before arithmetic; SQLite may yield naive datetimes
-                        ts = created_ts
-                        if (
-                            getattr(ts, "tzinfo", None) is None
-                            or ts.tzinfo.utcoffset(ts) is None
-                        ):
-                            ts = ts.replace(tzinfo=_dt.timezone.utc)
-                        else:
-                            ts = ts.astimezone(_dt.timezone.utc)
-                        age = (now - ts).total_seconds()
-                        if age >= settings.ack_ttl_seconds:
-                            try:
-                                rich_console = importlib.import_module("rich.console")
-                                rich_panel = importlib.import_module("rich.panel")
-                                rich_text = importlib.import_module("rich.text")
-                                Console = rich_console.Console
-                                Panel = rich_panel.Panel
-                                Text = rich_text.Text
-                                con = Console()
-                                body = Text.assemble(
-                                    ("message_id: ", "cyan"),
-                                    (str(mid), "white"),
-                                    "\n",
-                                    ("agent_id: ", "cyan"),
-                                    (str(agent_id), "white"),
-                                    "\n",
-                                    ("project_id: ", "cyan"),
-                                    (str(project_id), "white"),
-                                    "\n",
-                                    ("age_s: ", "cyan"),
-                                    (str(int(age)), "white"),
-                                    "\n",
-                                    ("ttl_s: ", "cyan"),
-                                    (str(settings.ack_ttl_seconds), "white"),
-                                )
-                                con.print(
-                                    Panel(body, title="ACK Overdue", border_style="red")
-                                )
-                            except Exception:
-                                print(
-                                    f"ack-warning message_id={mid} project_id={project_id} agent_id={agent_id} age_s={int(age)} ttl_s={settings.ack_ttl_seconds}"
-                                )
-                            with contextlib.suppress(Exception):
-                                structlog.get_logger("tasks").warning(
-                                    "ack_overdue",
-                                    message_id=str(mid),
-                                    project_id=str(project_id),
-                                    agent_id=str(agent_id),
-                                    age_s=int(age),
-                                    ttl_s=int(settings.ack_ttl_seconds),
-                                )
-                            if settings.ack_escalation_enabled:
-                                mode = (settings.ack_escalation_mode or "log").lower()
-                                if mode == "file_reservation":
-                                    try:
-                                        y_dir = created_ts.strftime("%Y")
-                                        m_dir = created_ts.strftime("%m")
-                                        # Resolve recipient name
-                                        async with get_session() as s_lookup:
-                                            name_row = await s_lookup.execute(
-                                                text(
-                                                    "SELECT name FROM agents WHERE id = :aid"
-                                                ),
-                                                {"aid": agent_id},
-                                            )
-                                            name_res = name_row.fetchone()
-                                        recipient_name = (
-                                            name_res[0]
-                                            if name_res and name_res[0]
-                                            else "*"
-                                        )
-                                        pattern = (
-                                            f"agents/{recipient_name}/inbox/{y_dir}/{m_dir}/*.md"
-                                            if recipient_name != "*"
-                                            else f"agents/*/inbox/{y_dir}/{m_dir}/*.md"
-                                        )
-                                        holder_agent_id = int(agent_id)
-                                        if settings.ack_escalation_claim_holder_name:
-                                            async with get_session() as s_holder:
-                                                hid_row = await s_holder.execute(
-                                                    text(
-                                                        "SELECT id FROM agents WHERE project_id = :pid AND name = :name"
-                                                    ),
-                                                    {
-                                                        "pid": project_id,
-                                                        "name": settings.ack_escalation_claim_holder_name,
-                                                    },
-                                                )
-                                                hid = hid_row.scalar_one_or_none()
-                                                if isinstance(hid, int):
-                                                    holder_agent_id = hid
-                                                else:
-                                                    # Auto-create ops holder in DB and write profile.json
-                                                    await s_holder.execute(
-                                                        text(
-                                                            "INSERT INTO agents(project_id, name, program, model, task_description, inception_ts, last_active_ts) VALUES (:pid, :name, :program, :model, :task, :ts, :ts)"
-                                                        ),
-                                                        {
-                                                            "pid": project_id,
-                                                            "name": settings.ack_escalation_claim_holder_name,
-                                                            "program": "ops",
-                                                            "model": "system",
-                                                            "task": "ops-escalation",
-                                                            "ts": now,
-                                                        },
-                                                    )
-                                                    await s_holder.commit()
-                                                    hid_row2 = await s_holder.execute(
-                                                        text(
-                                                            "SELECT id FROM agents WHERE project_id = :pid AND name = :name"
-                                                        ),
-                                                        {
-                                                            "pid": project_id,
-                                                            "name": settings.ack_escalation_claim_holder_name,
-                                                        },
-                                                    )
-                                                    hid2 = hid_row2.scalar_one_or_none()
-                                                    if isinstance(hid2, int):
-                                                        holder_agent_id = hid2
-                                                        # Write profile.json to archive
-                                                        archive = await ensure_archive(
-                                                            settings,
-                                                            (
-                                                                await _project_slug_from_id(
-                                                                    project_id
-                                                                )
-                                                            )
-                                                            or "",
-                                                        )
-                                                        async with AsyncFileLock(
-                                                            archive.lock_path
-                                                        ):
-                                                            await write_agent_profile(
-                                                                archive,
-                                                                {
-                                                                    "id": holder_agent_id,
-                                                                    "name": settings.ack_escalation_claim_holder_name,
-                                                                    "program": "ops",
-                                                                    "model": "system",
-                                                                    "project_slug": (
-                                                                        await _project_slug_from_id(
-                                                                            project_id
-                                                                        )
-                                                                    )
-                                                                    or "",
-                                                                    "inception_ts": now.astimezone().isoformat(),
-                                                                    "inception_iso": now.astimezone().isoformat(),
-                                                                    "task": "ops-escalation",
-                                                                },
-                                                            )
-                                        async with get_session() as s2:
-                                            await s2.execute(
-                                                text(
-                                                    """
-                                                INSERT INTO file_reservations(project_id, agent_id, path_pattern, exclusive, reason, created_ts, expires_ts)
-                                                VALUES (:pid, :holder, :pattern, :exclusive, :reason, :cts, :ets)
-                                                """
-                                                ),
-                                                {
-                                                    "pid": project_id,
-                                                    "holder": holder_agent_id,
-                                                    "pattern": pattern,
-                                                    "exclusive": (
-                                                        1
-                                                        if settings.ack_escalation_claim_exclusive
-                                                        else 0
-                                                    ),
-                                                    "reason": "ack-overdue",
-                                                    "cts": now,
-                                                    "ets": now
-                                                    + _dt.timedelta(
-                                                        seconds=settings.ack_escalation_claim_ttl_seconds
-                                                    ),
-                                                },
-                                            )
-                                            await s2.commit()
-                                        # Also write JSON artifact to archive
-                                        project_slug = (
-                                            await _project_slug_from_id(project_id)
-                                        ) or ""
-                                        archive = await ensure_archive(
-                                            settings, project_slug
-                                        )
-                                        expires_at = now + _dt.timedelta(
-                                            seconds=settings.ack_escalation_claim_ttl_seconds
-                                        )
-                                        async with AsyncFileLock(archive.lock_path):
-                                            await write_file_reservation_record(
-                                                archive,
-                                                {
-                                                    "project": project_slug,
-                                                    "agent": settings.ack_escalation_claim_holder_name
-                                                    or "ops",
-                                                    "path_pattern": pattern,
-                                                    "exclusive": settings.ack_escalation_claim_exclusive,
-                                                    "reason": "ack-overdue",
-                                                    "created_ts": now.astimezone().isoformat(),
-                                                    "expires_ts": expires_at.astimezone().isoformat(),
-                                                },
-                                            )
-                                    except Exception as exc:
-                                        log.warning(
-                                            "ack_escalation_record_failed",
-                                            error=str(exc),
-                                        )
+                    # Only acks that became due since the previous scan are read
+                    await scanner.scan_once()
                 except Exception as exc:
                     log.warning("ack_ttl_scan_failed", error=str(exc))
                 await asyncio.sleep(settings.ack_ttl_scan_interval_seconds)
 
         async def _worker_tool_metrics() -> None:
             log = structlog.get_logger("tool.metrics")
+            interval = max(5, settings.tool_metrics_emit_interval_seconds)
+            previous: dict[str, dict[str, Any]] = {}
             while True:
                 try:
-                    snapshot = _tool_metrics_snapshot()
-                    if snapshot:
-                        log.info("tool_metrics_snapshot", tools=snapshot)
+                    # Emit only what moved since the previous tick
+                    current = REGISTRY.snapshot()
+                    delta = snapshot_delta(previous, current)
+                    previous = current
+                    if delta:
+                        log.info("metrics_delta", interval_seconds=interval, metrics=delta)
                 except Exception as exc:
                     log.warning("tool_metrics_snapshot_failed", error=str(exc))
-                await asyncio.sleep(max(5, settings.tool_metrics_emit_interval_seconds))
+                await asyncio.sleep(interval)
 
         async def _worker_retention_quota() -> None:
             import datetime as _dt
-            from pathlib import Path as _Path
+            import fnmatch as _fnmatch
+            import time as _time
 
-            while True:
-                from contextlib import suppress as _suppress
+            from .archive_usage import USAGE, reconcile, usage_report
 
-                with _suppress(Exception):
-                    storage_root = _Path(settings.storage.root).expanduser().resolve()
+            log = structlog.get_logger("maintenance")
+            next_reconcile = 0.0
+            while True:
+                try:
+                    # Counters are maintained at write time; the full rescan only
+                    # runs at startup and every retention_reconcile_interval_seconds.
+                    if _time.monotonic() >= next_reconcile:
+                        await reconcile(settings)
+                        next_reconcile = _time.monotonic() + max(
+                            60, settings.retention_reconcile_interval_seconds
+                        )
+                    else:
+                        await USAGE.flush()
                     cutoff = _dt.datetime.now(_dt.timezone.utc) - _dt.timedelta(
                         days=int(settings.retention_max_age_days)
                     )
+                    usage = await usage_report(retention_cutoff=cutoff)
+                    ignore_patterns = list(
+                        getattr(settings, "retention_ignore_project_patterns", []) or []
+                    )
                     old_messages = 0
                     total_attach_bytes = 0
                     per_project_attach: dict[str, int] = {}
                     per_project_inbox_counts: dict[str, int] = {}
-                    # Compile ignore patterns once per loop
-                    import fnmatch as _fnmatch
-
-                    ignore_patterns = list(
-                        getattr(settings, "retention_ignore_project_patterns", []) or []
-                    )
-                    for proj_dir in (
-                        storage_root.iterdir() if storage_root.exists() else []
-                    ):
-                        if not proj_dir.is_dir():
-                            continue
-                        proj_name = proj_dir.name
+                    for proj_name, counts in usage.items():
                         # Skip test/demo projects in real server runs
                         if any(
                             _fnmatch.fnmatch(proj_name, pat) for pat in ignore_patterns
                         ):
                             continue
-                        msg_root = proj_dir / "messages"
-                        if msg_root.exists():
-                            for ydir in msg_root.iterdir():
-                                for mdir in ydir.iterdir() if ydir.is_dir() else []:
-                                    for f in mdir.iterdir() if mdir.is_dir() else []:
-                                        if f.suffix.lower() == ".md":
-                                            with _suppress(Exception):
-                                                ts = _dt.datetime.fromtimestamp(
-                                                    f.stat().st_mtime, _dt.timezone.utc
-                                                )
-                                                if ts < cutoff:
-                                                    old_messages += 1
-                        # Count per-agent inbox files (agents/*/inbox/YYYY/MM/*.md)
-                        inbox_root = proj_dir / "agents"
-                        if inbox_root.exists():
-                            count_inbox = 0
-                            for f in inbox_root.rglob("inbox/*/*/*.md"):
-                                with _suppress(Exception):
-                                    if f.is_file():
-                                        count_inbox += 1
-                            per_project_inbox_counts[proj_name] = count_inbox
-                        att_root = proj_dir / "attachments"
-                        if att_root.exists():
-                            for sub in att_root.rglob("*.webp"):
-                                with _suppress(Exception):
-                                    sz = sub.stat().st_size
-                                    total_attach_bytes += sz
-                                    per_project_attach[proj_name] = (
-                                        per_project_attach.get(proj_name, 0) + sz
-                                    )
-                    structlog.get_logger("maintenance").info(
+                        old_messages += counts["old_messages"]
+                        total_attach_bytes += counts["attachment_bytes"]
+                        if counts["attachment_bytes"]:
+                            per_project_attach[proj_name] = counts["attachment_bytes"]
+                        per_project_inbox_counts[proj_name] = counts["inbox"]
+                    log.info(
                         "retention_quota_report",
                         old_messages=old_messages,
                         retention_max_age_days=int(settings.retention_max_age_days),
@@ -909,7 +692,7 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
                     if limit_b > 0:
                         for proj, used in per_project_attach.items():
                             if used >= limit_b:
-                                structlog.get_logger("maintenance").warning(
+                                log.warning(
                                     "quota_attachments_exceeded",
                                     project=proj,
                                     used_bytes=used,
@@ -918,12 +701,14 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
                     if inbox_limit > 0:
                         for proj, cnt in per_project_inbox_counts.items():
                             if cnt >= inbox_limit:
-                                structlog.get_logger("maintenance").warning(
+                                log.warning(
                                     "quota_inbox_exceeded",
                                     project=proj,
                                     inbox_count=cnt,
                                     limit=inbox_limit,
                                 )
+                except Exception as exc:
+                    log.warning("retention_quota_report_failed", error=str(exc))
                 await asyncio.sleep(max(60, settings.retention_report_interval_seconds))
 
         tasks = []
@@ -935,6 +720,41 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
             tasks.append(asyncio.create_task(_worker_tool_metrics()))
         if settings.retention_report_enabled or settings.quota_enabled:
             tasks.append(asyncio.create_task(_worker_retention_quota()))
+        if settings.retention_enforce_enabled:
+            from .retention import run_retention_enforcer
+
+            tasks.append(
+                asyncio.create_task(
+                    run_retention_enforcer(
+                        settings,
+                        interval_seconds=settings.retention_report_interval_seconds,
+                    )
+                )
+            )
+        if plan_capture_enabled:
+            tasks.append(
+                asyncio.create_task(
+                    run_plan_capture(settings.database.query_plan_interval_seconds)
+                )
+            )
+        if settings.signals_tailer_enabled:
+            tasks.append(
+                asyncio.create_task(
+                    run_signal_tailer(
+                        settings.signals_tailer_path,
+                        interval_seconds=settings.signals_tailer_interval_seconds,
+                        project_key=settings.signals_tailer_project or None,
+                    )
+                )
+            )
+        if settings.workflow_run_queue_enabled:
+            RUN_QUEUE.configure(settings)
+            # Runs left "running" by a previous process resume from their checkpoint
+            with contextlib.suppress(Exception):
+                await recover_orphaned_runs(
+                    stale_seconds=settings.workflow_run_orphan_seconds, startup=True
+                )
+            await RUN_QUEUE.start()
         fastapi_app.state._background_tasks = tasks
 
     async def _shutdown() -> None:  # pragma: no cover - service lifecycle
@@ -944,6 +764,12 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
         for task in tasks:
             with contextlib.suppress(Exception):
                 await task
+        with contextlib.suppress(Exception):
+            await RUN_QUEUE.stop()
+        with contextlib.suppress(Exception):
+            await TRACE_WRITERS.close_all()
+        with contextlib.suppress(Exception):
+            shutdown_tracing()
 
     from contextlib import asynccontextmanager
 
@@ -951,6 +777,13 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
     async def lifespan_context(app: FastAPI):
         # Ensure the mounted MCP app initializes its internal task group
         async with mcp_http_app.lifespan(mcp_http_app):
+            preload = getattr(fastapi_app.state, "ui_preload_templates", None)
+            if preload is not None:
+                with contextlib.suppress(Exception):
+                    count = await asyncio.to_thread(preload)
+                    structlog.get_logger("ui").info(
+                        "ui_templates_preloaded", count=count
+                    )
             await _startup()
             try:
                 yield
@@ -1060,6 +893,24 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
             allow_headers=settings.cors.allow_headers or ["*"],
         )
 
+    # Optional response compression (outermost so it sees the final body)
+    if settings.http.compression_enabled:
+        fastapi_app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.http.compression_min_bytes,
+            content_types=settings.http.compression_content_types,
+        )
+
+    # Per-route latency/status metrics (outermost, so auth and compression count)
+    fastapi_app.add_middleware(RouteMetricsMiddleware)
+    # FastAPI releases with native telemetry already open a server span per
+    # request once a tracer provider is installed; only add ours for older ones
+    if tracing_enabled() and importlib.util.find_spec("fastapi.telemetry") is None:
+        fastapi_app.add_middleware(TracingMiddleware)
+
+    # JSON API routes use the fast serializer when HTTP_FAST_JSON_ENABLED is set
+    api_json = json_response_class(settings.http.fast_json_enabled)
+
     # Health endpoints
     @fastapi_app.get("/health/liveness")
     async def liveness() -> JSONResponse:
@@ -1089,22 +940,66 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
             ) from exc
         return JSONResponse({"status": "ready"})
 
-    # Minimal Prometheus-style metrics endpoint (JSON snapshot for CI/tests)
+    REGISTRY.gauge(
+        "signal_bus_subscribers",
+        "Connected /api/signals/stream subscribers",
+        lambda: SIGNAL_BUS.stats()["subscribers"],
+    )
+    REGISTRY.gauge(
+        "file_reservations_scheduled",
+        "Unreleased reservations tracked by the expiry scheduler",
+        lambda: len(RESERVATION_SCHEDULER),
+    )
+    REGISTRY.gauge(
+        "file_reservations_expired",
+        "Reservations released by the expiry scheduler since start",
+        lambda: RESERVATION_SCHEDULER.expired_total,
+    )
+
+    # Metrics: JSON snapshot by default, Prometheus text for scrapers
+    # (?format=prometheus or an openmetrics/text-plain Accept header)
     @fastapi_app.get("/metrics")
-    async def metrics() -> JSONResponse:
+    async def metrics(
+        request: Request,
+        output: str | None = Query(default=None, alias="format"),
+    ) -> Response:
+        accept = request.headers.get("accept", "")
+        if output == "prometheus" or (
+            output is None
+            and ("openmetrics-text" in accept or accept.startswith("text/plain"))
+        ):
+            return Response(
+                REGISTRY.render_prometheus(),
+                media_type="text/plain; version=0.0.4; charset=utf-8",
+            )
         try:
             data = {
                 "generated_at": datetime.now(timezone.utc).isoformat(),
                 "tools": _tool_metrics_snapshot(),
+                "templates": TEMPLATE_RENDER_MS.snapshot(),
+                "registry": REGISTRY.snapshot(),
+                "signal_bus": SIGNAL_BUS.stats(),
+                "file_reservations": {
+                    "scheduled": len(RESERVATION_SCHEDULER),
+                    "expired_total": RESERVATION_SCHEDULER.expired_total,
+                },
             }
-            return JSONResponse(data)
+            return api_json(data)
         except Exception as exc:
             with contextlib.suppress(Exception):
                 structlog.get_logger("metrics").error("metrics_error", error=str(exc))
-            return JSONResponse(
+            return api_json(
                 {"detail": str(exc)}, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    # Statement timings by normalized SQL, with captured query plans
+    @fastapi_app.get("/metrics/slow-queries")
+    async def metrics_slow_queries(
+        limit: int = Query(default=50, ge=1, le=500),
+        order_by: str = Query(default="total_ms"),
+    ) -> Response:
+        return api_json(QUERY_STATS.report(limit=limit, order_by=order_by))
+
     # Well-known OAuth metadata endpoints (some clients probe these); return harmless JSON
     @fastapi_app.get("/.well-known/oauth-authorization-server")
     async def oauth_meta_root() -> JSONResponse:
@@ -1132,124 +1027,167 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
         return JSONResponse({"keys": []}, status_code=200)
 
     # Include Missions API Router (Phase 2)
-    fastapi_app.include_router(missions.router)
+    fastapi_app.include_router(missions.router, default_response_class=api_json)
 
     # Signals API (Mail UI に依存しない軽量ルート)
     @fastapi_app.get("/api/signals")
-    async def api_signals(limit: int = 100) -> JSONResponse:
+    async def api_signals(
+        limit: int = 100,
+        cursor: str | None = None,
+        project_id: int | None = None,
+        mission_id: str | None = None,
+        signal_type: str | None = Query(default=None, alias="type"),
+        severity: str | None = None,
+        signal_status: str | None = Query(default=None, alias="status"),
+    ) -> JSONResponse:
+        """シグナル一覧(フィルタ + (created_at, id) キーセットページング)。"""
+
         capped = min(max(limit, 1), 500)
+        stmt = select(Signal)
+        if project_id is not None:
+            stmt = stmt.where(Signal.project_id == project_id)
+        if mission_id:
+            try:
+                stmt = stmt.where(Signal.mission_id == UUID(mission_id))
+            except ValueError as exc:
+                raise HTTPException(
+                    status_code=400, detail="invalid mission_id format"
+                ) from exc
+        for column, raw in (
+            (Signal.type, signal_type),
+            (Signal.severity, severity),
+            (Signal.status, signal_status),
+        ):
+            values = _csv_values(raw)
+            if values:
+                stmt = stmt.where(column.in_(values))
+        if cursor:
+            try:
+                after_created, after_id = _decode_signal_cursor(cursor)
+            except ValueError as exc:
+                raise HTTPException(status_code=400, detail="invalid cursor") from exc
+            stmt = stmt.where(
+                or_(
+                    Signal.created_at < after_created,
+                    and_(Signal.created_at == after_created, Signal.id < after_id),
+                )
+            )
+        stmt = stmt.order_by(Signal.created_at.desc(), Signal.id.desc()).limit(
+            capped + 1
+        )
         await ensure_schema()
         async with get_session() as session:
-            result = await session.execute(
-                select(Signal).order_by(Signal.created_at.desc()).limit(capped)
-            )
-            items = result.scalars().all()
-        return JSONResponse(
+            items = list((await session.execute(stmt)).scalars().all())
+        next_cursor = None
+        if len(items) > capped:
+            items = items[:capped]
+            last = items[-1]
+            next_cursor = _encode_signal_cursor(last.created_at, int(last.id or 0))
+        return api_json(
             {
-                "signals": [
-                    {
-                        "id": s.id,
-                        "type": s.type,
-                        "severity": s.severity,
-                        "status": s.status,
-                        "project_id": s.project_id,
-                        "mission_id": str(s.mission_id) if s.mission_id else None,
-                        "created_at": s.created_at.isoformat(),
-                        "message": s.message,
-                    }
-                    for s in items
-                ]
+                "signals": [signal_event(s) for s in items],
+                "next_cursor": next_cursor,
+            }
+        )
+
+    @fastapi_app.get("/api/signals/counts")
+    async def api_signal_counts(project_id: int | None = None) -> JSONResponse:
+        """status / severity 別の件数(トリガー維持の signal_counters を集計)。"""
+
+        stmt = select(
+            SignalCounter.status,
+            SignalCounter.severity,
+            func.sum(SignalCounter.count),
+        ).group_by(SignalCounter.status, SignalCounter.severity)
+        if project_id is not None:
+            stmt = stmt.where(SignalCounter.project_id == project_id)
+        await ensure_schema()
+        async with get_session() as session:
+            rows = (await session.execute(stmt)).all()
+        by_status: dict[str, int] = {}
+        by_severity: dict[str, int] = {}
+        total = 0
+        for sig_status, sig_severity, count in rows:
+            n = int(count or 0)
+            if n <= 0:
+                continue
+            total += n
+            by_status[sig_status] = by_status.get(sig_status, 0) + n
+            by_severity[sig_severity] = by_severity.get(sig_severity, 0) + n
+        return api_json(
+            {
+                "project_id": project_id,
+                "total": total,
+                "by_status": by_status,
+                "by_severity": by_severity,
             }
         )
 
+    SIGNAL_BUS.buffer_size = settings.signals_bus_buffer_size
+
+    @fastapi_app.get("/api/signals/stream")
+    async def api_signal_stream(
+        request: Request,
+        project_id: int | None = None,
+        severity: str | None = None,
+    ) -> StreamingResponse:
+        """シグナルを SSE で配信する(project / severity で絞り込み)。"""
+
+        sub = SIGNAL_BUS.subscribe(
+            project_id=project_id, severities=_csv_values(severity)
+        )
+
+        async def _events():
+            reported_drops = 0
+            try:
+                yield "retry: 3000\n\n"
+                while True:
+                    events = await sub.wait(_SSE_HEARTBEAT_SECONDS)
+                    if sub.dropped > reported_drops:
+                        # 取りこぼしを通知し、クライアントに /api/signals での再同期を促す
+                        yield (
+                            "event: dropped\n"
+                            f"data: {json.dumps({'dropped': sub.dropped})}\n\n"
+                        )
+                        reported_drops = sub.dropped
+                    if not events:
+                        if await request.is_disconnected():
+                            break
+                        yield ": keep-alive\n\n"
+                        continue
+                    yield "".join(
+                        f"id: {ev['id']}\nevent: signal\n"
+                        f"data: {json.dumps(ev, ensure_ascii=False)}\n\n"
+                        for ev in events
+                    )
+            finally:
+                SIGNAL_BUS.unsubscribe(sub)
+
+        return StreamingResponse(
+            _events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
     @fastapi_app.post("/api/signals/import/dangerous")
     async def api_import_dangerous_signals(payload: dict) -> JSONResponse:
-        """dangerous_command 等のログをシグナルとして取り込む。"""
+        """dangerous_command 等のログをシグナルとして取り込む(再開・重複排除あり)。"""
 
-        path = (
-            payload.get("path")
-            or "data/logs/current/audit/dangerous_command_events.jsonl"
-        )
-        project_key = payload.get("project")
-        project_id_raw = payload.get("project_id")
-        max_rows = int(payload.get("max_rows", 200))
+        path = payload.get("path") or DEFAULT_DANGEROUS_LOG
         p = Path(path)
         if not p.exists():
             raise HTTPException(status_code=404, detail="log file not found")
-        allowed_events = {
-            "dangerous_command",
-            "approval_required",
-            "failing_test",
-            "retry",
-            "timeout",
-        }
-        severity_map = {
-            "dangerous_command": "warning",
-            "approval_required": "info",
-            "failing_test": "warning",
-            "retry": "info",
-            "timeout": "warning",
-        }
-        rows = []
-        for line in p.read_text(encoding="utf-8").splitlines()[
-            : max_rows if max_rows > 0 else None
-        ]:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                obj = json.loads(line)
-            except Exception:
-                continue
-            if obj.get("event") not in allowed_events:
-                continue
-            rows.append(obj)
-        await ensure_schema()
-        imported = 0
-        skipped = 0
-        async with get_session() as session:
-
-            async def _resolve_project_id(row: dict) -> int | None:
-                pid = row.get("project_id") or project_id_raw
-                if pid is not None:
-                    return int(pid)
-                key = (
-                    row.get("project")
-                    or row.get("project_slug")
-                    or row.get("project_key")
-                    or project_key
-                )
-                if not key:
-                    return None
-                res = (
-                    await session.execute(
-                        text(
-                            "SELECT id FROM projects WHERE slug = :k OR human_key = :k"
-                        ),
-                        {"k": key},
-                    )
-                ).fetchone()
-                return int(res[0]) if res else None
-
-            for row in rows:
-                sig_type = (row.get("event") or "dangerous_command").strip()
-                severity = severity_map.get(sig_type, "info")
-                pid = await _resolve_project_id(row)
-                if pid is None:
-                    skipped += 1
-                    continue
-                signal = Signal(
-                    project_id=pid,
-                    mission_id=None,
-                    type=sig_type,
-                    severity=severity,
-                    status="pending",
-                    message=row.get("command") or row.get("note"),
-                )
-                session.add(signal)
-                imported += 1
-            await session.commit()
-        return JSONResponse({"imported": imported, "skipped": skipped})
+        importer = SignalImporter(
+            project_key=payload.get("project"),
+            project_id=payload.get("project_id"),
+            batch_size=int(payload.get("batch_size", DEFAULT_BATCH_SIZE)),
+        )
+        result = await importer.import_file(
+            p,
+            max_rows=int(payload.get("max_rows", 200)),
+            resume=bool(payload.get("resume", True)),
+        )
+        return api_json(result.as_dict())
 
     @fastapi_app.post("/api/signals")
     async def api_signal_create(payload: dict) -> JSONResponse:
@@ -1284,7 +1222,8 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
             session.add(signal)
             await session.commit()
             await session.refresh(signal)
-        return JSONResponse(
+        SIGNAL_BUS.publish_signal(signal)
+        return api_json(
             {"id": signal.id, "created_at": signal.created_at.isoformat()}
         )
 
@@ -1308,8 +1247,9 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
             session.add(signal)
             await session.commit()
             await session.refresh(signal)
+        SIGNAL_BUS.publish_signal(signal)
 
-        return JSONResponse(
+        return api_json(
             {
                 "id": signal.id,
                 "status": signal.status,
@@ -1321,108 +1261,180 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
 
     # ----- Simple SSR Mail UI -----
     def _register_mail_ui() -> None:
-        try:
-            import bleach  # type: ignore
-            import markdown2  # type: ignore
-        except ImportError:
+        # UI dependencies (jinja2, bleach, markdown2) are imported on first use so
+        # API-only workers do not pay for them at startup.
+        if any(
+            importlib.util.find_spec(name) is None
+            for name in ("bleach", "markdown2", "jinja2")
+        ):
             return
 
-        try:
-            from bleach.css_sanitizer import CSSSanitizer  # type: ignore
-        except Exception:  # tinycss2 may be missing; degrade gracefully
-            CSSSanitizer = None  # type: ignore
-        from jinja2 import (  # type: ignore
-            Environment,
-            FileSystemLoader,
-            select_autoescape,
-        )
-
         templates_root = Path(__file__).resolve().parent / "templates"
-        env = Environment(
-            loader=FileSystemLoader(str(templates_root)),
-            autoescape=select_autoescape(["html", "xml"]),
-            enable_async=True,
-        )
-        # HTML sanitizer (allow safe images and limited CSS)
-        _css_sanitizer = (
-            CSSSanitizer(
-                allowed_css_properties=[
-                    "color",
-                    "background-color",
-                    "text-align",
-                    "text-decoration",
-                    "font-weight",
-                ]
+
+        @functools.lru_cache(maxsize=1)
+        def _ui_env() -> Any:
+            jinja2 = importlib.import_module("jinja2")
+            if not settings.ui_templates_production:
+                return jinja2.Environment(
+                    loader=jinja2.FileSystemLoader(str(templates_root)),
+                    autoescape=jinja2.select_autoescape(["html", "xml"]),
+                    enable_async=True,
+                )
+            # Production: compiled bytecode survives restarts and templates are
+            # never stat-checked after the first load.
+            cache_dir = settings.ui_template_cache_dir or None
+            if cache_dir:
+                Path(cache_dir).expanduser().mkdir(parents=True, exist_ok=True)
+                cache_dir = str(Path(cache_dir).expanduser())
+            return jinja2.Environment(
+                loader=jinja2.FileSystemLoader(str(templates_root)),
+                autoescape=jinja2.select_autoescape(["html", "xml"]),
+                enable_async=True,
+                auto_reload=False,
+                cache_size=-1,
+                bytecode_cache=jinja2.FileSystemBytecodeCache(cache_dir),
             )
-            if CSSSanitizer
-            else None
-        )
-        _html_cleaner = bleach.Cleaner(
-            tags=[
-                "a",
-                "abbr",
-                "acronym",
-                "b",
-                "blockquote",
-                "code",
-                "em",
-                "i",
-                "li",
-                "ol",
-                "ul",
-                "p",
-                "pre",
-                "strong",
-                "table",
-                "thead",
-                "tbody",
-                "tr",
-                "th",
-                "td",
-                "h1",
-                "h2",
-                "h3",
-                "h4",
-                "h5",
-                "h6",
-                "hr",
-                "br",
-                "span",
-                "img",
-            ],
-            attributes={
-                "*": ["class"],
-                "a": ["href", "title", "rel"],
-                "abbr": ["title"],
-                "acronym": ["title"],
-                "code": ["class"],
-                "pre": ["class"],
-                "span": ["class", "style"],
-                "p": ["class", "style"],
-                "table": ["class", "style"],
-                "td": ["class", "style"],
-                "th": ["class", "style"],
-                "img": [
-                    "src",
-                    "alt",
-                    "title",
-                    "width",
-                    "height",
-                    "loading",
-                    "decoding",
-                    "class",
+
+        def _preload_templates() -> int:
+            """Compile every template up front (fills the bytecode cache)."""
+            env = _ui_env()
+            names = env.list_templates(extensions=["html", "xml", "txt"])
+            for name in names:
+                env.get_template(name)
+            return len(names)
+
+        if settings.ui_templates_production:
+            fastapi_app.state.ui_preload_templates = _preload_templates
+
+        @functools.lru_cache(maxsize=1)
+        def _html_cleaner() -> Any:
+            """Build the HTML sanitizer (allow safe images and limited CSS)."""
+            bleach = importlib.import_module("bleach")
+            try:
+                CSSSanitizer = importlib.import_module(
+                    "bleach.css_sanitizer"
+                ).CSSSanitizer
+            except Exception:  # tinycss2 may be missing; degrade gracefully
+                CSSSanitizer = None
+            _css_sanitizer = (
+                CSSSanitizer(
+                    allowed_css_properties=[
+                        "color",
+                        "background-color",
+                        "text-align",
+                        "text-decoration",
+                        "font-weight",
+                    ]
+                )
+                if CSSSanitizer
+                else None
+            )
+            return bleach.Cleaner(
+                tags=[
+                    "a",
+                    "abbr",
+                    "acronym",
+                    "b",
+                    "blockquote",
+                    "code",
+                    "em",
+                    "i",
+                    "li",
+                    "ol",
+                    "ul",
+                    "p",
+                    "pre",
+                    "strong",
+                    "table",
+                    "thead",
+                    "tbody",
+                    "tr",
+                    "th",
+                    "td",
+                    "h1",
+                    "h2",
+                    "h3",
+                    "h4",
+                    "h5",
+                    "h6",
+                    "hr",
+                    "br",
+                    "span",
+                    "img",
                 ],
-            },
-            protocols=["http", "https", "mailto", "data"],
-            strip=True,
-            css_sanitizer=_css_sanitizer,
-        )
+                attributes={
+                    "*": ["class"],
+                    "a": ["href", "title", "rel"],
+                    "abbr": ["title"],
+                    "acronym": ["title"],
+                    "code": ["class"],
+                    "pre": ["class"],
+                    "span": ["class", "style"],
+                    "p": ["class", "style"],
+                    "table": ["class", "style"],
+                    "td": ["class", "style"],
+                    "th": ["class", "style"],
+                    "img": [
+                        "src",
+                        "alt",
+                        "title",
+                        "width",
+                        "height",
+                        "loading",
+                        "decoding",
+                        "class",
+                    ],
+                },
+                protocols=["http", "https", "mailto", "data"],
+                strip=True,
+                css_sanitizer=_css_sanitizer,
+            )
+
+        def _markdown_to_html(text: str) -> str:
+            markdown2 = importlib.import_module("markdown2")
+            return _html_cleaner().clean(
+                markdown2.markdown(
+                    text,
+                    extras=["fenced-code-blocks", "tables", "strike", "cuddled-lists"],
+                )
+            )
 
         async def _render(name: str, **ctx) -> HTMLResponse:
-            tpl = env.get_template(name)
+            started = time.perf_counter()
+            tpl = _ui_env().get_template(name)
             html = await tpl.render_async(**ctx)
+            TEMPLATE_RENDER_MS.observe(name, (time.perf_counter() - started) * 1000)
             return HTMLResponse(html)
 
+        async def _render_stream(name: str, **ctx) -> StreamingResponse:
+            """Render ``name`` incrementally so the first bytes ship early."""
+            tpl = _ui_env().get_template(name)
+
+            async def _body() -> Any:
+                started = time.perf_counter()
+                pending: list[str] = []
+                size = 0
+                async for fragment in tpl.generate_async(**ctx):
+                    pending.append(fragment)
+                    size += len(fragment)
+                    # Coalesce Jinja's many tiny fragments into ~16 KiB chunks
+                    if size >= _STREAM_CHUNK_CHARS:
+                        yield "".join(pending).encode("utf-8")
+                        pending, size = [], 0
+                if pending:
+                    yield "".join(pending).encode("utf-8")
+                TEMPLATE_RENDER_MS.observe(
+                    name, (time.perf_counter() - started) * 1000
+                )
+
+            return StreamingResponse(_body(), media_type="text/html; charset=utf-8")
+
+        async def _render_page(name: str, **ctx) -> Response:
+            """Render a potentially large page, streaming when enabled."""
+            if settings.ui_stream_render_enabled:
+                return await _render_stream(name, **ctx)
+            return await _render(name, **ctx)
+
         def _parse_fts_query(
             raw: str, scope_preference: str | None = None
         ) -> tuple[str, str, str, list[dict[str, str]]]:
@@ -1476,13 +1488,127 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
             like_pat = "%" + "%".join(like_terms) + "%" if like_terms else ""
             return fts, like_pat, like_scope, tokens
 
-        @fastapi_app.get("/mail/api/locks", response_class=JSONResponse)
+        @fastapi_app.get("/mail/api/locks", response_class=api_json)
         async def mail_lock_status() -> JSONResponse:
             """Return metadata about active archive locks for observability."""
+            from .storage import collect_lock_status
 
             settings_local = get_settings()
             payload = collect_lock_status(settings_local)
-            return JSONResponse(payload)
+            return api_json(payload)
+
+        _UNIFIED_INBOX_SQL = text(
+            """
+            SELECT
+                m.id,
+                m.subject,
+                m.body_md,
+                m.created_ts,
+                m.importance,
+                m.thread_id,
+                sender.name AS sender_name,
+                p.slug AS project_slug,
+                p.human_key AS project_name,
+                COALESCE(
+                    (
+                        SELECT GROUP_CONCAT(name, ', ')
+                        FROM (
+                            SELECT DISTINCT recip2.name AS name
+                            FROM message_recipients mr2
+                            JOIN agents recip2 ON recip2.id = mr2.agent_id
+                            WHERE mr2.message_id = m.id
+                            ORDER BY name
+                        )
+                    ),
+                    ''
+                ) AS recipients
+            FROM messages m
+            JOIN agents sender ON m.sender_id = sender.id
+            JOIN projects p ON m.project_id = p.id
+            ORDER BY m.created_ts DESC
+            LIMIT :limit
+            """
+        )
+
+        def _unified_inbox_message(r: Any, now: datetime) -> dict[str, Any]:
+            """Convert a unified inbox row into its JSON/template representation."""
+
+            body = r[2] or ""
+            excerpt = (
+                body[:150]
+                .replace("#", "")
+                .replace("*", "")
+                .replace("`", "")
+                .strip()
+            )
+            if len(body) > 150:
+                excerpt += "..."
+
+            created_ts = r[3]
+            if isinstance(created_ts, str):
+                created_dt = datetime.fromisoformat(
+                    created_ts.replace("Z", "+00:00")
+                )
+            else:
+                created_dt = created_ts
+
+            if created_dt.tzinfo is None:
+                created_dt = created_dt.replace(tzinfo=timezone.utc)
+            else:
+                created_dt = created_dt.astimezone(timezone.utc)
+
+            delta = now - created_dt
+
+            if delta.days < 0 or (delta.days == 0 and delta.seconds < 0):
+                created_relative = "Just now"
+            elif delta.days > 365:
+                created_relative = f"{delta.days // 365}y ago"
+            elif delta.days > 30:
+                created_relative = f"{delta.days // 30}mo ago"
+            elif delta.days > 0:
+                created_relative = f"{delta.days}d ago"
+            elif delta.seconds > 3600:
+                created_relative = f"{delta.seconds // 3600}h ago"
+            elif delta.seconds > 60:
+                created_relative = f"{delta.seconds // 60}m ago"
+            else:
+                created_relative = "Just now"
+
+            return {
+                "id": r[0],
+                "subject": r[1] or "(No subject)",
+                "body_md": r[2] or "",
+                "excerpt": excerpt,
+                "created_ts": str(r[3]),
+                "created_full": created_dt.strftime(
+                    "%B %d, %Y at %I:%M %p"
+                ),
+                "created_relative": created_relative,
+                "importance": r[4] or "normal",
+                "thread_id": r[5],
+                "sender": r[6],
+                "project_slug": r[7],
+                "project_name": r[8],
+                "recipients": ", ".join(
+                    part.strip()
+                    for part in (r[9] or "").split(",")
+                    if part.strip()
+                ),
+                "read": False,
+            }
+
+        async def _iter_unified_inbox_messages(limit: int) -> Any:
+            """Yield unified inbox messages as rows are fetched from the database."""
+
+            safe_limit = max(1, min(int(limit), 1000))
+            await ensure_schema()
+            now = datetime.now(timezone.utc)
+            async with get_session() as session:
+                result = await session.stream(
+                    _UNIFIED_INBOX_SQL, {"limit": safe_limit}
+                )
+                async for r in result:
+                    yield _unified_inbox_message(r, now)
 
         async def _build_unified_inbox_payload(
             *, limit: int = 500, include_projects: bool = True
@@ -1503,108 +1629,13 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
 
                 async with get_session() as session:
                     # Fetch recent messages with sender/project and computed recipient list
-                    query = text(
-                        """
-                        SELECT
-                            m.id,
-                            m.subject,
-                            m.body_md,
-                            m.created_ts,
-                            m.importance,
-                            m.thread_id,
-                            sender.name AS sender_name,
-                            p.slug AS project_slug,
-                            p.human_key AS project_name,
-                            COALESCE(
-                                (
-                                    SELECT GROUP_CONCAT(name, ', ')
-                                    FROM (
-                                        SELECT DISTINCT recip2.name AS name
-                                        FROM message_recipients mr2
-                                        JOIN agents recip2 ON recip2.id = mr2.agent_id
-                                        WHERE mr2.message_id = m.id
-                                        ORDER BY name
-                                    )
-                                ),
-                                ''
-                            ) AS recipients
-                        FROM messages m
-                        JOIN agents sender ON m.sender_id = sender.id
-                        JOIN projects p ON m.project_id = p.id
-                        ORDER BY m.created_ts DESC
-                        LIMIT :limit
-                        """
+                    rows = await session.execute(
+                        _UNIFIED_INBOX_SQL, {"limit": safe_limit}
                     )
-
-                    rows = await session.execute(query, {"limit": safe_limit})
+                    now = datetime.now(timezone.utc)
 
                     for r in rows.fetchall():
-                        body = r[2] or ""
-                        excerpt = (
-                            body[:150]
-                            .replace("#", "")
-                            .replace("*", "")
-                            .replace("`", "")
-                            .strip()
-                        )
-                        if len(body) > 150:
-                            excerpt += "..."
-
-                        created_ts = r[3]
-                        if isinstance(created_ts, str):
-                            created_dt = datetime.fromisoformat(
-                                created_ts.replace("Z", "+00:00")
-                            )
-                        else:
-                            created_dt = created_ts
-
-                        if created_dt.tzinfo is None:
-                            created_dt = created_dt.replace(tzinfo=timezone.utc)
-                        else:
-                            created_dt = created_dt.astimezone(timezone.utc)
-
-                        now = datetime.now(timezone.utc)
-                        delta = now - created_dt
-
-                        if delta.days < 0 or (delta.days == 0 and delta.seconds < 0):
-                            created_relative = "Just now"
-                        elif delta.days > 365:
-                            created_relative = f"{delta.days // 365}y ago"
-                        elif delta.days > 30:
-                            created_relative = f"{delta.days // 30}mo ago"
-                        elif delta.days > 0:
-                            created_relative = f"{delta.days}d ago"
-                        elif delta.seconds > 3600:
-                            created_relative = f"{delta.seconds // 3600}h ago"
-                        elif delta.seconds > 60:
-                            created_relative = f"{delta.seconds // 60}m ago"
-                        else:
-                            created_relative = "Just now"
-
-                        messages.append(
-                            {
-                                "id": r[0],
-                                "subject": r[1] or "(No subject)",
-                                "body_md": r[2] or "",
-                                "excerpt": excerpt,
-                                "created_ts": str(r[3]),
-                                "created_full": created_dt.strftime(
-                                    "%B %d, %Y at %I:%M %p"
-                                ),
-                                "created_relative": created_relative,
-                                "importance": r[4] or "normal",
-                                "thread_id": r[5],
-                                "sender": r[6],
-                                "project_slug": r[7],
-                                "project_name": r[8],
-                                "recipients": ", ".join(
-                                    part.strip()
-                                    for part in (r[9] or "").split(",")
-                                    if part.strip()
-                                ),
-                                "read": False,
-                            }
-                        )
+                        messages.append(_unified_inbox_message(r, now))
 
                     if include_projects:
                         rows = await session.execute(
@@ -1640,12 +1671,12 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
         @fastapi_app.get("/mail", response_class=HTMLResponse)
         async def mail_unified_inbox(
             request: Request, lang: str | None = None
-        ) -> HTMLResponse:
+        ) -> Response:
             """Unified inbox showing ALL messages across ALL projects (Gmail-style) + Projects below"""
 
             payload = await _build_unified_inbox_payload()
             lang_sel = (lang or request.query_params.get("lang") or "en").lower()
-            return await _render(
+            return await _render_page(
                 "mail_unified_inbox.html",
                 messages=payload.get("messages", []),
                 projects=payload.get("projects", []),
@@ -1689,20 +1720,28 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
                 """
             )
 
-        @fastapi_app.get("/mail/api/unified-inbox", response_class=JSONResponse)
+        @fastapi_app.get("/mail/api/unified-inbox", response_class=api_json)
         async def mail_unified_inbox_api(
             limit: int = 500,
             include_projects: bool = False,
-        ) -> JSONResponse:
+            stream: bool = False,
+        ) -> Response:
             """JSON feed for the unified inbox view (used for background refresh)."""
 
+            if stream and not include_projects:
+                # Serialize messages as rows arrive instead of building the full list
+                return StreamingJSONResponse(
+                    _iter_unified_inbox_messages(limit),
+                    array_key="messages",
+                    envelope={"projects": []},
+                )
             payload = await _build_unified_inbox_payload(
                 limit=limit, include_projects=include_projects
             )
             if not include_projects:
                 # Reduce payload size when polling for message updates only
                 payload["projects"] = []
-            return JSONResponse(payload)
+            return api_json(payload)
 
         @fastapi_app.get("/mail/projects", response_class=HTMLResponse)
         async def mail_projects_list() -> HTMLResponse:
@@ -1924,7 +1963,7 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
             limit: int = 100,
             filter_importance: str | None = None,
             lang: str | None = None,
-        ) -> HTMLResponse:
+        ) -> Response:
             """Unified inbox showing messages from all active agents across all projects."""
             with contextlib.suppress(Exception):
                 pass
@@ -2061,7 +2100,7 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
                     )
 
             lang_sel = (lang or request.query_params.get("lang") or "en").lower()
-            return await _render(
+            return await _render_page(
                 "mail_unified_inbox.html",
                 projects=projects_data,
                 messages=messages,
@@ -2136,8 +2175,84 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
                 prev_page=page - 1 if page > 1 else None,
             )
 
+        async def _render_archived_message(prow: Any, mid: int) -> HTMLResponse | None:
+            """Render a message that the retention executor moved into a month segment."""
+            from .retention import archived_message, archived_messages
+
+            settings = get_settings()
+            record = await archived_message(settings, prow[1], mid)
+            if record is None:
+                return None
+            thread_items: list[dict] = []
+            th = record.get("thread_id")
+            if isinstance(th, str) and th.strip():
+                month_items = await archived_messages(
+                    settings, prow[1], record["created_ts"][:7]
+                )
+                thread_items = [
+                    {
+                        "id": r["id"],
+                        "subject": r["subject"],
+                        "from": r["sender"],
+                        "created": r["created_ts"],
+                    }
+                    for r in month_items
+                    if r.get("thread_id") == th or r["id"] == mid
+                ]
+            body = record.get("body_md") or ""
+            return await _render(
+                "mail_message.html",
+                project={"slug": prow[1], "human_key": prow[2]},
+                message={
+                    "id": record["id"],
+                    "subject": record["subject"],
+                    "body_md": body,
+                    "body_html": _markdown_to_html(body) if body else "",
+                    "sender": record["sender"],
+                    "created": record["created_ts"],
+                    "importance": record["importance"],
+                    "thread_id": th,
+                    "archived": True,
+                },
+                recipients=[
+                    {"name": r["name"], "kind": r["kind"]} for r in record["recipients"]
+                ],
+                thread_items=thread_items,
+                commit_sha=None,
+            )
+
+        @fastapi_app.get("/mail/api/archive/{project}/months", response_class=api_json)
+        async def api_archived_months(project: str) -> JSONResponse:
+            """List months that retention moved out of the database."""
+            from .retention import archived_months
+
+            if not _validate_project_slug(project):
+                raise HTTPException(status_code=400, detail="Invalid project identifier")
+            months = await archived_months(get_settings(), project)
+            return api_json({"project": project, "months": months})
+
+        @fastapi_app.get(
+            "/mail/api/archive/{project}/months/{month}", response_class=api_json
+        )
+        async def api_archived_month(
+            project: str, month: str, agent: str | None = None
+        ) -> JSONResponse:
+            """Serve one archived month (optionally filtered to an agent) from its segment."""
+            from .retention import archived_messages
+
+            if not _validate_project_slug(project):
+                raise HTTPException(status_code=400, detail="Invalid project identifier")
+            if not re.match(r"^\d{4}-\d{2}$", month):
+                raise HTTPException(status_code=400, detail="month must be YYYY-MM")
+            messages = await archived_messages(
+                get_settings(), project, month, agent=agent or None
+            )
+            return api_json({"project": project, "month": month, "messages": messages})
+
         @fastapi_app.get("/mail/{project}/message/{mid}", response_class=HTMLResponse)
         async def mail_message(project: str, mid: int) -> HTMLResponse:
+            from .storage import ensure_archive, get_message_commit_sha
+
             await ensure_schema()
             async with get_session() as session:
                 prow = (
@@ -2160,6 +2275,9 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
                     )
                 ).fetchone()
                 if not mrow:
+                    archived = await _render_archived_message(prow, mid)
+                    if archived is not None:
+                        return archived
                     return await _render("error.html", message="Message not found")
                 recs = await session.execute(
                     text(
@@ -2188,16 +2306,7 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
                         for rr in th_rows.fetchall()
                     ]
             # Convert markdown body to HTML for display (server-side render)
-            body_html = (
-                markdown2.markdown(
-                    mrow[2] or "",
-                    extras=["fenced-code-blocks", "tables", "strike", "cuddled-lists"],
-                )
-                if mrow[2]
-                else ""
-            )
-            if body_html:
-                body_html = _html_cleaner.clean(body_html)
+            body_html = _markdown_to_html(mrow[2]) if mrow[2] else ""
 
             # Get commit SHA for provenance badge
             commit_sha = None
@@ -2402,7 +2511,7 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
         @fastapi_app.get(
             "/mail/{project}/thread/{thread_id}", response_class=HTMLResponse
         )
-        async def mail_thread(project: str, thread_id: str) -> HTMLResponse:
+        async def mail_thread(project: str, thread_id: str) -> Response:
             """Display all messages in a thread chronologically (Gmail-style conversation view).
 
             NOTE: Currently loads ALL messages in thread without pagination.
@@ -2462,16 +2571,7 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
                     # Convert markdown to HTML for each message
                     body_html = ""
                     if r[2]:  # body_md
-                        body_html = markdown2.markdown(
-                            r[2],
-                            extras=[
-                                "fenced-code-blocks",
-                                "tables",
-                                "strike",
-                                "cuddled-lists",
-                            ],
-                        )
-                        body_html = _html_cleaner.clean(body_html)
+                        body_html = _markdown_to_html(r[2])
 
                     messages.append(
                         {
@@ -2499,7 +2599,7 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
                     else f"Thread {thread_id}"
                 )
 
-                return await _render(
+                return await _render_page(
                     "mail_thread.html",
                     project={"slug": prow[1], "human_key": prow[2]},
                     thread_id=thread_id,
@@ -3170,6 +3270,7 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
         @fastapi_app.get("/mail/archive/activity", response_class=HTMLResponse)
         async def archive_activity(limit: int = 50) -> HTMLResponse:
             """Display recent commits across all projects."""
+            from .storage import get_recent_commits
             # Validate and cap limit to prevent DoS
             limit = max(1, min(limit, 500))  # Between 1 and 500
 
@@ -3187,8 +3288,10 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
             return await _render("archive_activity.html", commits=commits)
 
         @fastapi_app.get("/mail/archive/commit/{sha}", response_class=HTMLResponse)
-        async def archive_commit(sha: str) -> HTMLResponse:
+        async def archive_commit(sha: str) -> Response:
             """Display detailed commit information with diffs."""
+            from .storage import get_commit_detail
+
             settings = get_settings()
             repo_root = Path(settings.storage.root).expanduser().resolve()
 
@@ -3202,7 +3305,7 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
             try:
                 repo = GitRepo(str(repo_root))
                 commit = await get_commit_detail(repo, sha)
-                return await _render("archive_commit.html", commit=commit)
+                return await _render_page("archive_commit.html", commit=commit)
             except ValueError:
                 # Validation errors (bad SHA, etc.)
                 return await _render("error.html", message="Invalid commit identifier")
@@ -3213,6 +3316,7 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
         @fastapi_app.get("/mail/archive/timeline", response_class=HTMLResponse)
         async def archive_timeline(project: str | None = None) -> HTMLResponse:
             """Display communication timeline with Mermaid.js visualization."""
+            from .storage import get_timeline_commits
             # Validate project slug if provided
             if project and not _validate_project_slug(project):
                 return await _render("error.html", message="Invalid project identifier")
@@ -3269,6 +3373,7 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
             project: str | None = None, path: str = ""
         ) -> HTMLResponse:
             """Browse archive files and directories."""
+            from .storage import ensure_archive, get_archive_tree
             if not project:
                 # Show project selector - requires project parameter
                 return await _render(
@@ -3290,6 +3395,7 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
         @fastapi_app.get("/mail/archive/browser/{project}/file")
         async def archive_browser_file(project: str, path: str) -> JSONResponse:
             """Get file content from archive."""
+            from .storage import ensure_archive, get_file_content
             # Validate project slug
             if not _validate_project_slug(project):
                 raise HTTPException(
@@ -3316,6 +3422,7 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
         @fastapi_app.get("/mail/archive/network", response_class=HTMLResponse)
         async def archive_network(project: str | None = None) -> HTMLResponse:
             """Display agent communication network graph."""
+            from .storage import get_agent_communication_graph
             # Validate project slug if provided
             if project and not _validate_project_slug(project):
                 return await _render("error.html", message="Invalid project identifier")
@@ -3395,7 +3502,7 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
                 )
                 agents = [r[0] for r in agents_result.fetchall()]
 
-            return JSONResponse({"agents": agents})
+            return api_json({"agents": agents})
 
         @fastapi_app.post("/api/mail/send")
         async def api_mail_send(payload: dict) -> JSONResponse:
@@ -3408,14 +3515,14 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
                     status_code=400, detail="project/agent/subject required"
                 )
             msg = await mail_client.send_message(project, agent, subject, body_md)
-            return JSONResponse(
+            return api_json(
                 {"message_id": msg.id, "created_ts": msg.created_ts.isoformat()}
             )
 
         @fastapi_app.get("/api/mail/messages")
         async def api_mail_messages(project: str) -> JSONResponse:
             items = await mail_client.list_messages(project)
-            return JSONResponse(
+            return api_json(
                 {
                     "messages": [
                         {
@@ -3437,15 +3544,45 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
                 raise HTTPException(
                     status_code=400, detail="project/agent/path_pattern required"
                 )
-            lease = await mail_client.create_lease(project, agent, path)
-            return JSONResponse(
+            try:
+                lease = await mail_client.create_lease(project, agent, path)
+            except ReservationConflictError as exc:
+                return api_json(
+                    {
+                        "detail": str(exc),
+                        "conflicts": [c.as_dict() for c in exc.conflicts],
+                    },
+                    status_code=status.HTTP_409_CONFLICT,
+                )
+            return api_json(
                 {"lease_id": lease.id, "expires_ts": lease.expires_ts.isoformat()}
             )
 
+        @fastapi_app.post("/api/leases/check")
+        async def api_check_lease(payload: dict) -> JSONResponse:
+            project = payload.get("project")
+            path = payload.get("path_pattern")
+            if not project or not path:
+                raise HTTPException(
+                    status_code=400, detail="project/path_pattern required"
+                )
+            conflicts = await mail_client.check_lease_conflicts(
+                project,
+                path,
+                agent_name=payload.get("agent") or None,
+                exclusive=bool(payload.get("exclusive", True)),
+            )
+            return api_json(
+                {
+                    "path_pattern": path,
+                    "conflicts": [c.as_dict() for c in conflicts],
+                }
+            )
+
         @fastapi_app.post("/api/leases/{lease_id}/release")
         async def api_release_lease(lease_id: int) -> JSONResponse:
             lease = await mail_client.release_lease(lease_id)
-            return JSONResponse({"released_ts": lease.released_ts.isoformat()})
+            return api_json({"released_ts": lease.released_ts.isoformat()})
 
         @fastapi_app.get("/mail/archive/time-travel", response_class=HTMLResponse)
         async def archive_time_travel() -> HTMLResponse:
@@ -3464,6 +3601,7 @@ def build_http_app(settings: Settings, server=None) -> FastAPI:
             project: str, agent: str, timestamp: str
         ) -> JSONResponse:
             """Get historical inbox snapshot."""
+            from .storage import ensure_archive, get_historical_inbox_snapshot
             # Validate project slug
             if not _validate_project_slug(project):
                 raise HTTPException(
@@ -3545,9 +3683,26 @@ def main() -> None:
     parser.add_argument("--host", help="Override HTTP host", default=None)
     parser.add_argument("--port", help="Override HTTP port", type=int, default=None)
     parser.add_argument("--log-level", help="Uvicorn log level", default="info")
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Print a -X importtime style cold-start report and exit",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=25,
+        help="Number of imports shown by --profile-startup",
+    )
     # Be tolerant of extraneous argv when invoked under test runners
     args, _unknown = parser.parse_known_args()
 
+    if args.profile_startup:
+        from .startup_profile import format_report, profile_startup
+
+        print(format_report(profile_startup(), limit=args.profile_top))
+        return
+
     settings = get_settings()
     host = args.host or settings.http.host
     port = args.port or settings.http.port
@@ -3556,6 +3711,8 @@ def main() -> None:
     # Disable WebSockets when running the service directly; HTTP-only transport
     import inspect as _inspect
 
+    import uvicorn
+
     _sig = _inspect.signature(uvicorn.run)
     _kwargs: dict[str, Any] = {"host": host, "port": port, "log_level": args.log_level}
     if "ws" in _sig.parameters:
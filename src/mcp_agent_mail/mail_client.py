@@ -9,7 +9,10 @@ from sqlalchemy import desc
 from sqlalchemy.sql.elements import ColumnElement
 from sqlmodel import select
 from .db import ensure_schema, session_context
+from .metrics import tracked_tool
 from .models import Agent, FileReservation, Message, Project
+from .reservation_index import RESERVATION_INDEX, ActiveReservation, ReservationConflictError
+from .reservation_scheduler import RESERVATION_SCHEDULER
 
 
 class MailClient:
@@ -17,37 +20,53 @@ class MailClient:
     async def _ids(self, project_key: str, agent_name: str | None = None) -> tuple[int, int | None]:
         """プロジェクトIDと任意のエージェントIDを解決する。""" ; await ensure_schema()
         async with session_context() as s:
-            pid = (await s.exec(select(Project.id).where((Project.slug == project_key) | (Project.human_key == project_key))))  # type: ignore[attr-defined]
+            pid = (await s.execute(select(Project.id).where((Project.slug == project_key) | (Project.human_key == project_key)))).scalars()  # type: ignore[attr-defined]
             pid = pid.first()
             if pid is None: raise ValueError("project not found")
             if agent_name is None: return int(pid), None
-            aid = (await s.exec(select(Agent.id).where((Agent.project_id == pid) & (Agent.name == agent_name))))  # type: ignore[attr-defined]
+            aid = (await s.execute(select(Agent.id).where((Agent.project_id == pid) & (Agent.name == agent_name)))).scalars()  # type: ignore[attr-defined]
             aid = aid.first()
             if aid is None: raise ValueError("agent not found")
             return int(pid), int(aid)
 
+    @tracked_tool("send_message")
     async def send_message(self, project_key: str, agent_name: str, subject: str, body_md: str) -> Message:
         """指定プロジェクト/エージェントでメッセージを保存する。""" ; pid, sid = await self._ids(project_key, agent_name)
         async with session_context() as s:
             msg = Message(project_id=pid, sender_id=sid, subject=subject, body_md=body_md); s.add(msg); await s.commit(); await s.refresh(msg); return msg
 
+    @tracked_tool("list_messages")
     async def list_messages(self, project_key: str) -> list[Message]:
         """プロジェクト内のメッセージを新しい順に返す。""" ; pid, _ = await self._ids(project_key)
         async with session_context() as s:
             created_col = cast(ColumnElement[Any], Message.created_ts)
-            res = await s.exec(select(Message).where(Message.project_id == pid).order_by(desc(created_col)))  # type: ignore[attr-defined]
+            res = (await s.execute(select(Message).where(Message.project_id == pid).order_by(desc(created_col)))).scalars()  # type: ignore[attr-defined]
             return list(res.all())
 
+    @tracked_tool("check_lease_conflicts")
+    async def check_lease_conflicts(self, project_key: str, path_pattern: str, agent_name: str | None = None, exclusive: bool = True) -> list[ActiveReservation]:
+        """他エージェントの有効な予約のうち path_pattern と重なるものを返す。""" ; await ensure_schema(); pid, aid = await self._ids(project_key, agent_name)
+        async with session_context() as s:
+            return await RESERVATION_INDEX.conflicts(s, pid, path_pattern, agent_id=aid, exclusive=exclusive)
+
+    @tracked_tool("create_lease")
     async def create_lease(self, project_key: str, agent_name: str, path_pattern: str) -> FileReservation:
-        """1時間TTLのファイル予約を作成する。""" ; await ensure_schema(); pid, aid = await self._ids(project_key, agent_name); now = datetime.now(timezone.utc)
+        """1時間TTLのファイル予約を作成する(競合時は ReservationConflictError)。""" ; await ensure_schema(); pid, aid = await self._ids(project_key, agent_name); now = datetime.now(timezone.utc)
         lease = FileReservation(project_id=pid, agent_id=aid, path_pattern=path_pattern, exclusive=True, reason="mail-client", created_ts=now, expires_ts=now + timedelta(hours=1))
-        async with session_context() as s:
-            s.add(lease); await s.commit(); await s.refresh(lease); return lease
+        async with RESERVATION_INDEX.guard(pid), session_context() as s:  # 検査から索引登録までを直列化
+            conflicts = await RESERVATION_INDEX.conflicts(s, pid, path_pattern, agent_id=aid, now=now)
+            if conflicts: raise ReservationConflictError(path_pattern, conflicts)
+            s.add(lease); await s.commit(); await s.refresh(lease)
+            RESERVATION_INDEX.add(pid, lease)
+        if lease.id is not None: RESERVATION_SCHEDULER.schedule(lease.id, lease.expires_ts)  # 期限で起床するよう通知
+        return lease
 
+    @tracked_tool("release_lease")
     async def release_lease(self, lease_id: int) -> FileReservation:
         """予約を解放し released_ts を記録する。""" ; await ensure_schema()
         async with session_context() as s:
-            res = await s.exec(select(FileReservation).where(FileReservation.id == lease_id))  # type: ignore[attr-defined]
+            res = (await s.execute(select(FileReservation).where(FileReservation.id == lease_id))).scalars()  # type: ignore[attr-defined]
             lease = res.first()
             if lease is None: raise ValueError("lease not found")
-            lease.released_ts = datetime.now(timezone.utc); s.add(lease); await s.commit(); await s.refresh(lease); return cast(FileReservation, lease)
+            lease.released_ts = datetime.now(timezone.utc); s.add(lease); await s.commit(); await s.refresh(lease)
+        RESERVATION_INDEX.remove_many([lease_id]); RESERVATION_SCHEDULER.cancel(lease_id); return cast(FileReservation, lease)
@@ -0,0 +1,488 @@
+"""In-process metrics: per-thread sharded counters/histograms and a small registry.
+
+Hot paths only touch the calling thread's shard (no lock, no allocation after the
+first observation on a thread); readers sum the shards. The registry renders
+the same data as the JSON ``/metrics`` snapshot and as Prometheus text.
+"""
+
+from __future__ import annotations
+
+import bisect
+import functools
+import threading
+import time
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+from typing import Any
+
+# Upper bounds (milliseconds) shared by latency histograms.
+DEFAULT_LATENCY_BUCKETS_MS: tuple[float, ...] = (
+    1,
+    2.5,
+    5,
+    10,
+    25,
+    50,
+    100,
+    250,
+    500,
+    1000,
+    2500,
+    5000,
+)
+
+PROMETHEUS_PREFIX = "mcp_agent_mail_"
+
+
+def _bucket_label(bound: float) -> str:
+    return f"{bound:g}"
+
+
+class _HistogramShard:
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self, size: int) -> None:
+        self.counts = [0] * size
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+
+class Histogram:
+    """Fixed-bucket histogram; ``observe`` is O(log buckets) and lock free."""
+
+    __slots__ = ("_bounds", "_local", "_shards", "_lock")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS_MS) -> None:
+        self._bounds = tuple(sorted(float(b) for b in buckets))
+        self._local = threading.local()
+        self._shards: list[_HistogramShard] = []
+        self._lock = threading.Lock()
+
+    def _shard(self) -> _HistogramShard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = _HistogramShard(len(self._bounds) + 1)
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def observe(self, value: float) -> None:
+        shard = self._shard()
+        shard.counts[bisect.bisect_left(self._bounds, value)] += 1
+        shard.count += 1
+        shard.sum += value
+        if value > shard.max:
+            shard.max = value
+
+    @contextmanager
+    def time_ms(self) -> Iterator[None]:
+        """Observe the wall time of the ``with`` body in milliseconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe((time.perf_counter() - started) * 1000)
+
+    @property
+    def count(self) -> int:
+        return sum(shard.count for shard in list(self._shards))
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return cumulative bucket counts (Prometheus ``le`` semantics)."""
+        counts = [0] * (len(self._bounds) + 1)
+        total = 0
+        total_sum = 0.0
+        peak = 0.0
+        for shard in list(self._shards):
+            for i, n in enumerate(shard.counts):
+                counts[i] += n
+            total += shard.count
+            total_sum += shard.sum
+            peak = max(peak, shard.max)
+        buckets: dict[str, int] = {}
+        running = 0
+        for bound, n in zip(self._bounds, counts, strict=False):
+            running += n
+            buckets[_bucket_label(bound)] = running
+        buckets["+Inf"] = running + counts[-1]
+        return {
+            "count": total,
+            "sum": round(total_sum, 3),
+            "max": round(peak, 3),
+            "buckets": buckets,
+        }
+
+
+class Counter:
+    """Monotonic counter with per-thread shards."""
+
+    __slots__ = ("_local", "_shards", "_lock")
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._shards: list[list[float]] = []
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = [0.0]
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        shard[0] += amount
+
+    @property
+    def value(self) -> float:
+        return sum(shard[0] for shard in list(self._shards))
+
+
+LabelValues = str | tuple[str, ...]
+
+
+class _Family:
+    kind = ""
+
+    def __init__(
+        self, name: str, *, help_text: str = "", label_names: Sequence[str] = ("name",)
+    ) -> None:
+        self.name = name
+        self.help = help_text or name
+        self.label_names = tuple(label_names)
+        self._children: dict[tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self) -> Any:  # pragma: no cover - overridden
+        raise NotImplementedError
+
+    def labels(self, *values: str) -> Any:
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _child(self, values: LabelValues) -> Any:
+        return self.labels(*((values,) if isinstance(values, str) else values))
+
+    def items(self) -> list[tuple[tuple[str, ...], Any]]:
+        return sorted(self._children.items())
+
+    def reset(self) -> None:
+        with self._lock:
+            self._children.clear()
+
+
+class HistogramFamily(_Family):
+    """A set of histograms keyed by label values (e.g. template name)."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS_MS,
+        *,
+        help_text: str = "",
+        label_names: Sequence[str] = ("name",),
+    ) -> None:
+        super().__init__(name, help_text=help_text, label_names=label_names)
+        self._buckets = tuple(buckets)
+
+    def _new_child(self) -> Histogram:
+        return Histogram(self._buckets)
+
+    def observe(self, values: LabelValues, amount: float) -> None:
+        self._child(values).observe(amount)
+
+    def time_ms(self, values: LabelValues) -> Any:
+        return self._child(values).time_ms()
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        return {"|".join(key): child.snapshot() for key, child in self.items()}
+
+
+class CounterFamily(_Family):
+    """A set of counters keyed by label values."""
+
+    kind = "counter"
+
+    def _new_child(self) -> Counter:
+        return Counter()
+
+    def inc(self, values: LabelValues, amount: float = 1) -> None:
+        self._child(values).inc(amount)
+
+    def snapshot(self) -> dict[str, float]:
+        return {"|".join(key): child.value for key, child in self.items()}
+
+
+class MetricsRegistry:
+    """Named metric families plus callback gauges, rendered as JSON or Prometheus text."""
+
+    def __init__(self, prefix: str = PROMETHEUS_PREFIX) -> None:
+        self.prefix = prefix
+        self._families: dict[str, _Family] = {}
+        self._gauges: dict[str, tuple[str, Callable[[], float]]] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, family: _Family) -> Any:
+        with self._lock:
+            existing = self._families.get(family.name)
+            if existing is not None:
+                return existing
+            self._families[family.name] = family
+        return family
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str = "",
+        *,
+        label_names: Sequence[str] = ("name",),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS_MS,
+    ) -> HistogramFamily:
+        return self._register(
+            HistogramFamily(name, buckets, help_text=help_text, label_names=label_names)
+        )
+
+    def counter(
+        self, name: str, help_text: str = "", *, label_names: Sequence[str] = ("name",)
+    ) -> CounterFamily:
+        return self._register(
+            CounterFamily(name, help_text=help_text, label_names=label_names)
+        )
+
+    def gauge(self, name: str, help_text: str, fn: Callable[[], float]) -> None:
+        """Register a gauge read from ``fn`` at render time."""
+        with self._lock:
+            self._gauges[name] = (help_text, fn)
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        return {name: family.snapshot() for name, family in sorted(self._families.items())}
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: list[str] = []
+        for name, family in sorted(self._families.items()):
+            metric = self.prefix + name
+            if isinstance(family, CounterFamily):
+                metric += "_total"
+            lines.append(f"# HELP {metric} {_escape_help(family.help)}")
+            lines.append(f"# TYPE {metric} {family.kind}")
+            for key, child in family.items():
+                labels = list(zip(family.label_names, key, strict=False))
+                if isinstance(family, HistogramFamily):
+                    snap = child.snapshot()
+                    for le, n in snap["buckets"].items():
+                        lines.append(
+                            f"{metric}_bucket{_labels(labels + [('le', le)])} {n}"
+                        )
+                    lines.append(f"{metric}_sum{_labels(labels)} {snap['sum']}")
+                    lines.append(f"{metric}_count{_labels(labels)} {snap['count']}")
+                else:
+                    lines.append(f"{metric}{_labels(labels)} {_num(child.value)}")
+        for name, (help_text, fn) in sorted(self._gauges.items()):
+            try:
+                value = float(fn())
+            except Exception:
+                continue
+            metric = self.prefix + name
+            lines.append(f"# HELP {metric} {_escape_help(help_text)}")
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {_num(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs: list[tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in pairs) + "}"
+
+
+def _num(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def snapshot_delta(
+    previous: dict[str, dict[str, Any]], current: dict[str, dict[str, Any]]
+) -> dict[str, dict[str, Any]]:
+    """Changes between two ``MetricsRegistry.snapshot()`` results (only series that moved).
+
+    Histogram deltas carry count/sum/bucket differences; ``max`` stays the
+    cumulative maximum because a per-interval maximum cannot be derived.
+    """
+    delta: dict[str, dict[str, Any]] = {}
+    for name, series in current.items():
+        before = previous.get(name, {})
+        changed: dict[str, Any] = {}
+        for key, value in series.items():
+            old = before.get(key)
+            if isinstance(value, dict):
+                old_count = old["count"] if old else 0
+                if value["count"] == old_count:
+                    continue
+                old_buckets = old["buckets"] if old else {}
+                changed[key] = {
+                    "count": value["count"] - old_count,
+                    "sum": round(value["sum"] - (old["sum"] if old else 0.0), 3),
+                    "max": value["max"],
+                    "buckets": {
+                        le: n - old_buckets.get(le, 0) for le, n in value["buckets"].items()
+                    },
+                }
+            else:
+                diff = value - (old or 0)
+                if diff:
+                    changed[key] = diff
+        if changed:
+            delta[name] = changed
+    return delta
+
+
+class RouteMetricsMiddleware:
+    """ASGI middleware recording per-route latency (time to response headers) and status."""
+
+    def __init__(self, app: Any, *, registry: MetricsRegistry | None = None) -> None:
+        self.app = app
+        self.registry = registry or REGISTRY
+
+    async def __call__(self, scope: Any, receive: Any, send: Any) -> None:
+        if scope.get("type") != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        recorded = False
+
+        def _record(status: int) -> None:
+            nonlocal recorded
+            if recorded:
+                return
+            recorded = True
+            route = scope.get("route")
+            # Route templates keep label cardinality bounded (no raw paths)
+            path = getattr(route, "path", None) or "unmatched"
+            label = f"{scope.get('method', '-')} {path}"
+            HTTP_REQUEST_MS.observe(label, (time.perf_counter() - started) * 1000)
+            HTTP_RESPONSES.inc((label, f"{status // 100}xx"))
+
+        async def _send(message: Any) -> None:
+            if message["type"] == "http.response.start":
+                _record(int(message.get("status", 0)))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        except Exception:
+            _record(500)
+            raise
+
+
+REGISTRY = MetricsRegistry()
+
+# Server-side template render latency, keyed by template name.
+TEMPLATE_RENDER_MS = REGISTRY.histogram(
+    "template_render_ms", "Template render latency (ms)", label_names=("template",)
+)
+TOOL_CALL_MS = REGISTRY.histogram(
+    "tool_call_ms", "Tool call latency (ms)", label_names=("tool",)
+)
+TOOL_CALL_ERRORS = REGISTRY.counter(
+    "tool_call_errors", "Tool calls that raised", label_names=("tool",)
+)
+HTTP_REQUEST_MS = REGISTRY.histogram(
+    "http_request_ms",
+    "HTTP latency to response headers (ms)",
+    label_names=("route",),
+)
+HTTP_RESPONSES = REGISTRY.counter(
+    "http_responses", "HTTP responses by status class", label_names=("route", "status")
+)
+DB_SESSION_MS = REGISTRY.histogram(
+    "db_session_ms", "Time a database session was held open (ms)", label_names=()
+)
+DB_QUERY_MS = REGISTRY.histogram(
+    "db_query_ms", "SQL statement execution latency (ms)", label_names=()
+)
+DB_SLOW_QUERIES = REGISTRY.counter(
+    "db_slow_queries", "SQL statements at or above DATABASE_SLOW_QUERY_MS", label_names=()
+)
+GIT_COMMIT_MS = REGISTRY.histogram(
+    "git_commit_ms", "Archive git commit latency (ms)", label_names=()
+)
+ATTACHMENT_CONVERT_MS = REGISTRY.histogram(
+    "attachment_convert_ms",
+    "Image attachment conversion latency (ms)",
+    label_names=("format",),
+)
+
+
+@contextmanager
+def track_tool(name: str) -> Iterator[None]:
+    """Record latency (and errors) of one tool call under ``name``."""
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        TOOL_CALL_ERRORS.inc(name)
+        raise
+    finally:
+        TOOL_CALL_MS.observe(name, (time.perf_counter() - started) * 1000)
+
+
+def tracked_tool(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator form of ``track_tool`` for async tool handlers."""
+
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with track_tool(name):
+                return await fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def tool_metrics_snapshot() -> dict[str, dict[str, Any]]:
+    """Per-tool latency histogram plus error count (the ``tools`` section of /metrics)."""
+    errors = TOOL_CALL_ERRORS.snapshot()
+    return {
+        tool: {**snap, "errors": int(errors.get(tool, 0))}
+        for tool, snap in TOOL_CALL_MS.snapshot().items()
+    }
+
+
+__all__ = [
+    "ATTACHMENT_CONVERT_MS",
+    "DB_SESSION_MS",
+    "DEFAULT_LATENCY_BUCKETS_MS",
+    "GIT_COMMIT_MS",
+    "HTTP_REQUEST_MS",
+    "HTTP_RESPONSES",
+    "REGISTRY",
+    "TEMPLATE_RENDER_MS",
+    "TOOL_CALL_ERRORS",
+    "TOOL_CALL_MS",
+    "Counter",
+    "CounterFamily",
+    "Histogram",
+    "HistogramFamily",
+    "MetricsRegistry",
+    "RouteMetricsMiddleware",
+    "snapshot_delta",
+    "tool_metrics_snapshot",
+    "track_tool",
+    "tracked_tool",
+]
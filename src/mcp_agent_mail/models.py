@@ -7,7 +7,7 @@ from datetime import datetime, timezone
 from typing import Any, Optional
 from uuid import UUID
 
-from sqlalchemy import Column, UniqueConstraint
+from sqlalchemy import Column, Index, UniqueConstraint, text
 from sqlalchemy.types import JSON
 from sqlmodel import Field, SQLModel
 
@@ -54,10 +54,20 @@ class MessageRecipient(SQLModel, table=True):
     kind: str = Field(max_length=8, default="to")
     read_ts: Optional[datetime] = Field(default=None)
     ack_ts: Optional[datetime] = Field(default=None)
+    # Set once the ack TTL scanner has alerted/escalated this overdue ack
+    ack_escalated_ts: Optional[datetime] = Field(default=None)
 
 
 class Message(SQLModel, table=True):
     __tablename__ = "messages"
+    __table_args__ = (
+        # Partial index: the ack TTL scanner only reads messages awaiting an ack
+        Index(
+            "ix_messages_ack_due",
+            "created_ts",
+            sqlite_where=text("ack_required = 1"),
+        ),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     project_id: int = Field(foreign_key="projects.id", index=True)
@@ -76,6 +86,14 @@ class Message(SQLModel, table=True):
 
 class FileReservation(SQLModel, table=True):
     __tablename__ = "file_reservations"
+    __table_args__ = (
+        # Partial index: the expiry scheduler only loads unreleased reservations
+        Index(
+            "ix_file_reservations_active_expiry",
+            "expires_ts",
+            sqlite_where=text("released_ts IS NULL"),
+        ),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     project_id: int = Field(foreign_key="projects.id", index=True)
@@ -143,6 +161,30 @@ class ProjectSiblingSuggestion(SQLModel, table=True):
     dismissed_ts: Optional[datetime] = Field(default=None)
 
 
+class ArchiveUsageCounter(SQLModel, table=True):
+    """Per-project archive usage maintained at write time (see archive_usage)."""
+
+    __tablename__ = "archive_usage_counters"
+
+    project_slug: str = Field(primary_key=True, max_length=255)
+    metric: str = Field(primary_key=True, max_length=32)  # messages | inbox | attachments | attachment_bytes
+    bucket: str = Field(default="", primary_key=True, max_length=16)  # YYYY-MM or ""
+    value: int = Field(default=0)
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class RetentionCheckpoint(SQLModel, table=True):
+    """Progress of the retention executor, committed with each pruned batch."""
+
+    __tablename__ = "retention_checkpoints"
+
+    name: str = Field(primary_key=True, max_length=64)
+    last_created_ts: datetime
+    last_message_id: int
+    archived_total: int = Field(default=0)
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
 class Mission(SQLModel, table=True):
     __tablename__ = "missions"
 
@@ -155,7 +197,7 @@ class Mission(SQLModel, table=True):
     owner: Optional[str] = Field(default=None, max_length=128)
     run_mode: str = Field(
         default="sequential", max_length=32
-    )  # sequential|parallel|loop
+    )  # sequential|parallel|loop|dag
     context: Optional[dict] = Field(default=None, sa_column=Column(JSON, nullable=True))
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
@@ -170,6 +212,9 @@ class TaskGroup(SQLModel, table=True):
     kind: str = Field(default="sequential", max_length=32)  # sequential|parallel|loop
     order: int = Field(default=0)
     status: str = Field(default="pending", max_length=32)
+    # kind="loop": max_iterations / max_seconds / until / on_exhausted (see task_loop)
+    loop: Optional[dict] = Field(default=None, sa_column=Column(JSON, nullable=True))
+    iteration: int = Field(default=0)  # current/last loop iteration (1-based)
 
 
 class Task(SQLModel, table=True):
@@ -187,6 +232,7 @@ class Task(SQLModel, table=True):
     input: Optional[dict] = Field(default=None, sa_column=Column(JSON, nullable=True))
     output: Optional[dict] = Field(default=None, sa_column=Column(JSON, nullable=True))
     error: Optional[str] = Field(default=None)
+    iteration: int = Field(default=0)  # loop iteration that produced output/status
 
 
 class Artifact(SQLModel, table=True):
@@ -232,6 +278,12 @@ class Signal(SQLModel, table=True):
     """安全イベントや通知を記録するシグナル。"""
 
     __tablename__ = "signals"
+    # 一覧 API のキーセットページング (created_at DESC, id DESC) とフィルタ用
+    __table_args__ = (
+        Index("ix_signals_created_id", "created_at", "id"),
+        Index("ix_signals_project_status_created", "project_id", "status", "created_at", "id"),
+        Index("ix_signals_mission_created", "mission_id", "created_at", "id"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     project_id: int = Field(foreign_key="projects.id", index=True)
@@ -241,6 +293,33 @@ class Signal(SQLModel, table=True):
     status: str = Field(default="pending", max_length=16)  # pending|acknowledged|resolved
     message: Optional[str] = Field(default=None, max_length=1024)
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    # 取り込み元行のコンテンツハッシュ(再取り込み時の重複防止キー)
+    dedupe_key: Optional[str] = Field(
+        default=None, max_length=64, unique=True, index=True
+    )
+
+
+class SignalCounter(SQLModel, table=True):
+    """(project, status, severity) 別のシグナル件数。signals のトリガーで維持する。"""
+
+    __tablename__ = "signal_counters"
+
+    project_id: int = Field(primary_key=True)
+    status: str = Field(primary_key=True, max_length=16)
+    severity: str = Field(primary_key=True, max_length=16)
+    count: int = Field(default=0)
+
+
+class SignalImportCursor(SQLModel, table=True):
+    """JSONL ログ取り込みの再開位置(バイトオフセット)をファイル×取り込み先プロジェクトごとに保持する。"""
+
+    __tablename__ = "signal_import_cursors"
+
+    path: str = Field(primary_key=True, max_length=1024)
+    # 取り込み先 (project_id か project キー。行ごとの指定に任せる場合は "")
+    project: str = Field(default="", primary_key=True, max_length=255)
+    offset: int = Field(default=0)
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 
 class WorkflowRun(SQLModel, table=True):
@@ -249,7 +328,29 @@ class WorkflowRun(SQLModel, table=True):
     run_id: UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     mission_id: UUID = Field(foreign_key="missions.id", index=True)
     mode: str = Field(default="sequential", max_length=32)
-    status: str = Field(default="running", max_length=32)
+    status: str = Field(default="running", max_length=32)  # queued|running|completed|failed|interrupted
     started_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     ended_at: Optional[datetime] = Field(default=None)
     trace_uri: Optional[str] = Field(default=None, max_length=1024)
+    # Run queue: per-project cap, options for the deferred run and the claiming worker
+    project_id: Optional[int] = Field(default=None, index=True)
+    allow_self_heal: bool = Field(default=True)
+    queued_at: Optional[datetime] = Field(default=None)
+    worker_id: Optional[str] = Field(default=None, max_length=64)
+    # Resume cursor ({"completed_task_ids": [...], "shared_data": {...}}) and liveness
+    checkpoint: Optional[dict] = Field(default=None, sa_column=Column(JSON, nullable=True))
+    heartbeat_at: Optional[datetime] = Field(default=None)
+
+
+class CachedTaskResult(SQLModel, table=True):
+    """Successful task output keyed by a hash of what produced it (see task_cache)."""
+
+    __tablename__ = "task_result_cache"
+
+    key: str = Field(primary_key=True, max_length=64)  # sha256 hex
+    output: Optional[dict] = Field(default=None, sa_column=Column(JSON, nullable=True))
+    # Descriptors of artifacts the task produced, re-attached on a cache hit
+    artifacts: Optional[list[dict]] = Field(default=None, sa_column=Column(JSON, nullable=True))
+    source_task_id: Optional[UUID] = Field(default=None)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    expires_at: datetime = Field(index=True)
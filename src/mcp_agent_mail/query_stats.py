@@ -0,0 +1,282 @@
+"""Per-statement timing, slow-query log and query-plan capture for the engine.
+
+``install_query_stats`` hooks ``before/after_cursor_execute`` on the engine and
+aggregates every statement by its normalized SQL shape (literals, numbers and
+bind parameters collapsed to ``?``). Statements at or above
+``DATABASE_SLOW_QUERY_MS`` are logged with parameter values redacted to their
+types. ``capture_plans`` runs ``EXPLAIN QUERY PLAN`` for the slowest shapes,
+binding ``NULL`` for every parameter, so no recorded value is ever replayed;
+``/metrics/slow-queries`` serves ``QUERY_STATS.report()``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import re
+import threading
+import time
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+import structlog
+
+from .config import DatabaseSettings
+from .metrics import DB_QUERY_MS, DB_SLOW_QUERIES
+
+_MAX_SHAPES = 512
+_MAX_STATEMENT_CHARS = 2000
+_PLANNABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_NAMED_PARAM_RE = re.compile(r"(?<![:\w]):\w+|\$\d+|%\(\w+\)s|%s")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_RE = re.compile(r"(\(\?\.\.\.\))(?:\s*,\s*\(\?\.\.\.\))+")
+_WS_RE = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=4096)
+def normalize_sql(statement: str) -> str:
+    """Collapse literals and bind parameters so equivalent statements share a shape."""
+    sql = _STRING_RE.sub("?", statement)
+    sql = _NAMED_PARAM_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _IN_LIST_RE.sub("(?...)", sql)
+    sql = _VALUES_RE.sub(r"\1", sql)
+    return _WS_RE.sub(" ", sql).strip()
+
+
+def redact_params(params: Any, executemany: bool = False) -> Any:
+    """Replace parameter values with their type names (and string lengths)."""
+    if executemany and isinstance(params, Sequence) and not isinstance(params, (str, bytes)):
+        return f"<{len(params)} rows>"
+    if isinstance(params, Mapping):
+        return {str(k): _redact_value(v) for k, v in params.items()}
+    if isinstance(params, Sequence) and not isinstance(params, (str, bytes)):
+        return [_redact_value(v) for v in params]
+    return None if params is None else _redact_value(params)
+
+
+def _redact_value(value: Any) -> str:
+    if value is None:
+        return "NULL"
+    if isinstance(value, (str, bytes)):
+        return f"<{type(value).__name__}:{len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def _null_params(params: Any, executemany: bool) -> Any:
+    """Parameters of the same shape with every value bound to NULL."""
+    if executemany and isinstance(params, Sequence) and params:
+        params = params[0]
+    if isinstance(params, Mapping):
+        return {k: None for k in params}
+    if isinstance(params, Sequence) and not isinstance(params, (str, bytes)):
+        return tuple(None for _ in params)
+    return ()
+
+
+@dataclass(slots=True)
+class QueryShape:
+    """Aggregated timings for one normalized statement."""
+
+    sql: str
+    statement: str
+    plan_params: Any
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    slow_count: int = 0
+    last_slow_at: float | None = None
+    plan: list[str] | None = None
+    plan_error: str | None = None
+    plan_captured_at: float | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "sql": self.sql,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "slow_count": self.slow_count,
+            "last_slow_at": self.last_slow_at,
+            "plan": self.plan,
+            "plan_error": self.plan_error,
+            "plan_captured_at": self.plan_captured_at,
+        }
+
+
+class QueryStats:
+    """Thread-safe statement aggregates keyed by normalized SQL (bounded)."""
+
+    def __init__(self, *, slow_ms: float = 100.0, max_shapes: int = _MAX_SHAPES) -> None:
+        self.slow_ms = float(slow_ms)
+        self.max_shapes = max(1, int(max_shapes))
+        self._shapes: dict[str, QueryShape] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self, statement: str, params: Any, elapsed_ms: float, executemany: bool = False
+    ) -> bool:
+        """Add one execution; returns True when it crossed the slow threshold."""
+        sql = normalize_sql(statement)
+        slow = elapsed_ms >= self.slow_ms
+        with self._lock:
+            shape = self._shapes.get(sql)
+            if shape is None:
+                if len(self._shapes) >= self.max_shapes:
+                    # Evict the cheapest shape; keeps the report focused on real cost
+                    cheapest = min(self._shapes.values(), key=lambda s: s.total_ms)
+                    del self._shapes[cheapest.sql]
+                shape = QueryShape(
+                    sql=sql,
+                    statement=statement[:_MAX_STATEMENT_CHARS],
+                    plan_params=_null_params(params, executemany),
+                )
+                self._shapes[sql] = shape
+            shape.count += 1
+            shape.total_ms += elapsed_ms
+            if elapsed_ms > shape.max_ms:
+                shape.max_ms = elapsed_ms
+            if slow:
+                shape.slow_count += 1
+                shape.last_slow_at = time.time()
+        return slow
+
+    def slowest(self, limit: int, *, stale_before: float | None = None) -> list[QueryShape]:
+        """Slow shapes by max latency; with ``stale_before`` only those needing a plan."""
+        with self._lock:
+            shapes = [s for s in self._shapes.values() if s.slow_count]
+        if stale_before is not None:
+            shapes = [
+                s
+                for s in shapes
+                if s.plan_captured_at is None or s.plan_captured_at < stale_before
+            ]
+        shapes.sort(key=lambda s: s.max_ms, reverse=True)
+        return shapes[: max(0, limit)]
+
+    def report(self, *, limit: int = 50, order_by: str = "total_ms") -> dict[str, Any]:
+        key = order_by if order_by in {"total_ms", "max_ms", "count", "slow_count"} else "total_ms"
+        with self._lock:
+            shapes = [s.as_dict() for s in self._shapes.values()]
+        shapes.sort(key=lambda s: s[key], reverse=True)
+        return {
+            "slow_threshold_ms": self.slow_ms,
+            "shapes_tracked": len(shapes),
+            "statements": sum(s["count"] for s in shapes),
+            "slow_statements": sum(s["slow_count"] for s in shapes),
+            "order_by": key,
+            "queries": shapes[: max(0, limit)],
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._shapes.clear()
+
+
+QUERY_STATS = QueryStats()
+
+
+def install_query_stats(engine: Any, settings: DatabaseSettings) -> None:
+    """Time every statement on ``engine`` into ``QUERY_STATS`` (idempotent)."""
+    if not settings.query_stats_enabled:
+        return
+    from sqlalchemy import event
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if getattr(sync_engine, "_mcp_query_stats", False):
+        return
+    QUERY_STATS.slow_ms = float(settings.slow_query_ms)
+    log = structlog.get_logger("db.slow_query")
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn: Any, cursor: Any, statement: str, params: Any, context: Any, executemany: bool) -> None:
+        if context is not None:
+            context._mcp_query_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn: Any, cursor: Any, statement: str, params: Any, context: Any, executemany: bool) -> None:
+        started = getattr(context, "_mcp_query_started", None)
+        if started is None or statement.startswith("EXPLAIN"):
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        DB_QUERY_MS.labels().observe(elapsed_ms)
+        if QUERY_STATS.record(statement, params, elapsed_ms, executemany):
+            DB_SLOW_QUERIES.labels().inc()
+            log.warning(
+                "slow_query",
+                duration_ms=round(elapsed_ms, 3),
+                threshold_ms=QUERY_STATS.slow_ms,
+                sql=normalize_sql(statement)[:_MAX_STATEMENT_CHARS],
+                params=redact_params(params, executemany),
+            )
+
+    sync_engine._mcp_query_stats = True
+
+
+def _format_plan(rows: Sequence[Sequence[Any]]) -> list[str]:
+    """Render ``EXPLAIN QUERY PLAN`` rows (id, parent, notused, detail) as an indented tree."""
+    depth: dict[int, int] = {0: -1}
+    lines: list[str] = []
+    for row in rows:
+        node, parent, detail = int(row[0]), int(row[1]), str(row[-1])
+        depth[node] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node] + detail)
+    return lines
+
+
+async def capture_plans(
+    engine: Any, *, limit: int = 5, refresh_seconds: float = 3600.0
+) -> int:
+    """Run ``EXPLAIN QUERY PLAN`` for the slowest shapes; returns plans captured."""
+    if engine.dialect.name != "sqlite":
+        return 0
+    now = time.time()
+    captured = 0
+    for shape in QUERY_STATS.slowest(limit, stale_before=now - refresh_seconds):
+        if not shape.statement.lstrip().upper().startswith(_PLANNABLE):
+            continue
+        try:
+            async with engine.connect() as conn:
+                result = await conn.exec_driver_sql(
+                    "EXPLAIN QUERY PLAN " + shape.statement, shape.plan_params
+                )
+                rows = result.fetchall()
+            shape.plan, shape.plan_error = _format_plan(rows), None
+            captured += 1
+        except Exception as exc:
+            shape.plan, shape.plan_error = None, str(exc)
+        shape.plan_captured_at = now
+    return captured
+
+
+async def run_plan_capture(interval_seconds: int) -> None:  # pragma: no cover - service loop
+    """Background loop refreshing plans for the slowest shapes."""
+    from .db import get_engine
+
+    log = structlog.get_logger("db.query_plans")
+    interval = max(10, int(interval_seconds))
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            captured = await capture_plans(get_engine(), refresh_seconds=interval)
+            if captured:
+                log.info("query_plans_captured", count=captured)
+        except Exception as exc:
+            log.warning("query_plan_capture_failed", error=str(exc))
+
+
+__all__ = [
+    "QUERY_STATS",
+    "QueryShape",
+    "QueryStats",
+    "capture_plans",
+    "install_query_stats",
+    "normalize_sql",
+    "redact_params",
+    "run_plan_capture",
+]
@@ -0,0 +1,351 @@
+"""Per-project segment trie for file reservation conflict checks."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import weakref
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from fnmatch import fnmatchcase
+from typing import Any
+
+from sqlalchemy import and_, select
+
+from .models import FileReservation
+
+_GLOB_CHARS = frozenset("*?[")
+
+
+def split_pattern(pattern: str) -> tuple[str, ...]:
+    """Normalize a reservation pattern into path segments."""
+    cleaned = pattern.strip().replace("\\", "/")
+    while cleaned.startswith("./"):
+        cleaned = cleaned[2:]
+    return tuple(seg for seg in cleaned.split("/") if seg and seg != ".")
+
+
+def _is_glob(segment: str) -> bool:
+    return any(ch in _GLOB_CHARS for ch in segment)
+
+
+def _affixes(segment: str) -> tuple[str, str]:
+    first = min((segment.find(ch) for ch in _GLOB_CHARS if ch in segment))
+    last = max(segment.rfind(ch) for ch in "*?]")
+    return segment[:first], segment[last + 1 :]
+
+
+def segments_overlap(a: str, b: str) -> bool:
+    """Return True when some path segment can match both ``a`` and ``b``.
+
+    Literal/glob pairs are exact (``fnmatchcase``); glob/glob pairs compare the
+    literal prefix and suffix around the wildcards, which may report an overlap
+    that no concrete name satisfies but never misses a real one.
+    """
+    a_glob, b_glob = _is_glob(a), _is_glob(b)
+    if not a_glob and not b_glob:
+        return a == b
+    if not a_glob:
+        return fnmatchcase(a, b)
+    if not b_glob:
+        return fnmatchcase(b, a)
+    a_pre, a_suf = _affixes(a)
+    b_pre, b_suf = _affixes(b)
+    return (a_pre.startswith(b_pre) or b_pre.startswith(a_pre)) and (
+        a_suf.endswith(b_suf) or b_suf.endswith(a_suf)
+    )
+
+
+def patterns_overlap(a: str | tuple[str, ...], b: str | tuple[str, ...]) -> bool:
+    """Reference (linear) check: can one path match both patterns? ``**`` spans segments."""
+    sa = split_pattern(a) if isinstance(a, str) else a
+    sb = split_pattern(b) if isinstance(b, str) else b
+    seen: set[tuple[int, int]] = set()
+
+    def walk(i: int, j: int) -> bool:
+        if (i, j) in seen:
+            return False
+        seen.add((i, j))
+        if i == len(sa) and j == len(sb):
+            return True
+        if i < len(sa) and sa[i] == "**":
+            if walk(i + 1, j) or (j < len(sb) and walk(i, j + 1)):
+                return True
+        if j < len(sb) and sb[j] == "**":
+            if walk(i, j + 1) or (i < len(sa) and walk(i + 1, j)):
+                return True
+        if i < len(sa) and j < len(sb) and sa[i] != "**" and sb[j] != "**":
+            return segments_overlap(sa[i], sb[j]) and walk(i + 1, j + 1)
+        return False
+
+    return walk(0, 0)
+
+
+class ReservationConflictError(ValueError):
+    """Raised when a new lease overlaps active reservations held by other agents."""
+
+    def __init__(self, path_pattern: str, conflicts: list[ActiveReservation]) -> None:
+        super().__init__(
+            f"path_pattern {path_pattern!r} conflicts with "
+            f"{len(conflicts)} active reservation(s)"
+        )
+        self.path_pattern = path_pattern
+        self.conflicts = conflicts
+
+
+@dataclass(slots=True)
+class ActiveReservation:
+    """An unreleased reservation tracked by the index."""
+
+    id: int
+    agent_id: int
+    path_pattern: str
+    exclusive: bool
+    expires_ts: datetime
+    segments: tuple[str, ...] = ()
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "agent_id": self.agent_id,
+            "path_pattern": self.path_pattern,
+            "exclusive": self.exclusive,
+            "expires_ts": self.expires_ts.isoformat(),
+        }
+
+
+@dataclass(slots=True)
+class _Node:
+    literal: dict[str, _Node] = field(default_factory=dict)
+    globs: dict[str, _Node] = field(default_factory=dict)
+    doublestar: _Node | None = None
+    terminal: set[int] = field(default_factory=set)
+
+    def children(self) -> Iterable[_Node]:
+        yield from self.literal.values()
+        yield from self.globs.values()
+        if self.doublestar is not None:
+            yield self.doublestar
+
+    def empty(self) -> bool:
+        return not (self.literal or self.globs or self.doublestar or self.terminal)
+
+
+class ProjectReservationTrie:
+    """Active reservations of one project, indexed by path segment."""
+
+    def __init__(self) -> None:
+        self.root = _Node()
+        self.entries: dict[int, ActiveReservation] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, entry: ActiveReservation) -> None:
+        if entry.id in self.entries:
+            self.remove(entry.id)
+        entry.segments = split_pattern(entry.path_pattern)
+        node = self.root
+        for seg in entry.segments:
+            if seg == "**":
+                if node.doublestar is None:
+                    node.doublestar = _Node()
+                node = node.doublestar
+            else:
+                table = node.globs if _is_glob(seg) else node.literal
+                node = table.setdefault(seg, _Node())
+        node.terminal.add(entry.id)
+        self.entries[entry.id] = entry
+
+    def remove(self, reservation_id: int) -> bool:
+        entry = self.entries.pop(reservation_id, None)
+        if entry is None:
+            return False
+        path: list[tuple[_Node, str]] = []
+        node = self.root
+        for seg in entry.segments:
+            path.append((node, seg))
+            if seg == "**":
+                child = node.doublestar
+            else:
+                child = (node.globs if _is_glob(seg) else node.literal).get(seg)
+            if child is None:
+                return True
+            node = child
+        node.terminal.discard(reservation_id)
+        # Prune now-empty branches so long-lived tries do not accumulate nodes
+        for parent, seg in reversed(path):
+            if not node.empty():
+                break
+            if seg == "**":
+                parent.doublestar = None
+            else:
+                (parent.globs if _is_glob(seg) else parent.literal).pop(seg, None)
+            node = parent
+        return True
+
+    def overlapping(self, pattern: str) -> list[ActiveReservation]:
+        """Reservations whose pattern can match a path that ``pattern`` matches."""
+        segs = split_pattern(pattern)
+        found: set[int] = set()
+        seen: set[tuple[int, int, bool]] = set()
+
+        def visit(node: _Node, i: int, in_star: bool = False) -> None:
+            key = (id(node), i, in_star)
+            if key in seen:
+                return
+            seen.add(key)
+            if in_star:
+                # Stored "**": match zero segments, or swallow one and stay
+                visit(node, i)
+                if i < len(segs):
+                    visit(node, i + 1, True)
+                return
+            if node.doublestar is not None:
+                visit(node.doublestar, i, True)
+            if i == len(segs):
+                found.update(node.terminal)
+                return
+            seg = segs[i]
+            if seg == "**":
+                visit(node, i + 1)
+                for child in node.children():
+                    visit(child, i)
+                return
+            if _is_glob(seg):
+                for name, child in node.literal.items():
+                    if fnmatchcase(name, seg):
+                        visit(child, i + 1)
+            else:
+                child = node.literal.get(seg)
+                if child is not None:
+                    visit(child, i + 1)
+            for name, child in node.globs.items():
+                if segments_overlap(name, seg):
+                    visit(child, i + 1)
+
+        visit(self.root, 0)
+        return [self.entries[rid] for rid in sorted(found)]
+
+
+class ReservationIndex:
+    """Lazily loaded per-project tries kept in sync on create/release/expire."""
+
+    def __init__(self) -> None:
+        self._projects: dict[int, ProjectReservationTrie] = {}
+        self._owner: dict[int, int] = {}
+        self._lock = threading.Lock()
+        # asyncio locks are bound to a loop, so keep one set per event loop
+        self._guards: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, dict[int, asyncio.Lock]
+        ] = weakref.WeakKeyDictionary()
+
+    def guard(self, project_id: int) -> asyncio.Lock:
+        """Lock serializing conflict check, insert and ``add`` for one project."""
+        guards = self._guards.setdefault(asyncio.get_running_loop(), {})
+        return guards.setdefault(project_id, asyncio.Lock())
+
+    async def ensure_loaded(self, session: Any, project_id: int) -> ProjectReservationTrie:
+        trie = self._projects.get(project_id)
+        if trie is not None:
+            return trie
+        fr = FileReservation.__table__.c
+        rows = (
+            await session.execute(
+                select(
+                    fr.id, fr.agent_id, fr.path_pattern, fr.exclusive, fr.expires_ts
+                ).where(and_(fr.project_id == project_id, fr.released_ts.is_(None)))
+            )
+        ).fetchall()
+        trie = ProjectReservationTrie()
+        for rid, agent_id, pattern, exclusive, expires in rows:
+            trie.add(_entry(rid, agent_id, pattern, exclusive, expires))
+        with self._lock:
+            current = self._projects.setdefault(project_id, trie)
+            for rid in current.entries:
+                self._owner[rid] = project_id
+        return current
+
+    def add(self, project_id: int, reservation: FileReservation) -> None:
+        """Track a newly created reservation (no-op until the project is loaded)."""
+        with self._lock:
+            trie = self._projects.get(project_id)
+            if trie is None or reservation.id is None:
+                return
+            trie.add(
+                _entry(
+                    reservation.id,
+                    reservation.agent_id,
+                    reservation.path_pattern,
+                    reservation.exclusive,
+                    reservation.expires_ts,
+                )
+            )
+            self._owner[int(reservation.id)] = project_id
+
+    def remove_many(self, reservation_ids: Iterable[int]) -> None:
+        with self._lock:
+            for rid in reservation_ids:
+                project_id = self._owner.pop(int(rid), None)
+                trie = self._projects.get(project_id) if project_id is not None else None
+                if trie is not None:
+                    trie.remove(int(rid))
+
+    def clear(self) -> None:
+        """Drop every loaded project; the next check reloads from the database."""
+        with self._lock:
+            self._projects.clear()
+            self._owner.clear()
+
+    async def conflicts(
+        self,
+        session: Any,
+        project_id: int,
+        path_pattern: str,
+        *,
+        agent_id: int | None = None,
+        exclusive: bool = True,
+        now: datetime | None = None,
+    ) -> list[ActiveReservation]:
+        """Active reservations by other agents that would conflict with a new lease."""
+        trie = await self.ensure_loaded(session, project_id)
+        now = now or datetime.now(timezone.utc)
+        with self._lock:
+            candidates = trie.overlapping(path_pattern)
+        return [
+            entry
+            for entry in candidates
+            if entry.expires_ts > now
+            and (agent_id is None or entry.agent_id != agent_id)
+            and (exclusive or entry.exclusive)
+        ]
+
+
+def _entry(
+    rid: int, agent_id: int, pattern: str, exclusive: bool, expires: datetime
+) -> ActiveReservation:
+    if expires.tzinfo is None or expires.tzinfo.utcoffset(expires) is None:
+        expires = expires.replace(tzinfo=timezone.utc)
+    return ActiveReservation(
+        id=int(rid),
+        agent_id=int(agent_id),
+        path_pattern=str(pattern),
+        exclusive=bool(exclusive),
+        expires_ts=expires,
+    )
+
+
+RESERVATION_INDEX = ReservationIndex()
+
+
+__all__ = [
+    "RESERVATION_INDEX",
+    "ActiveReservation",
+    "ProjectReservationTrie",
+    "ReservationConflictError",
+    "ReservationIndex",
+    "patterns_overlap",
+    "segments_overlap",
+    "split_pattern",
+]
@@ -0,0 +1,174 @@
+"""In-process expiry scheduler for file reservations (heap keyed by ``expires_ts``)."""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import threading
+from datetime import datetime, timezone
+
+import structlog
+from sqlalchemy import and_, select, update
+
+from .db import ensure_schema, get_session
+from .models import FileReservation
+from .reservation_index import RESERVATION_INDEX
+
+
+def _as_utc(ts: datetime) -> datetime:
+    # SQLite yields naive datetimes; stored values are UTC
+    if ts.tzinfo is None or ts.tzinfo.utcoffset(ts) is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc)
+
+
+class ReservationExpiryScheduler:
+    """Release file reservations exactly when they expire.
+
+    Active reservations are kept in a min-heap of ``(expires_ts, id)``. The run
+    loop sleeps until the earliest deadline (or until ``schedule``/``cancel``
+    wakes it), then releases every due reservation with a single UPDATE.
+    ``MailClient`` notifies the scheduler on create/release; a periodic resync
+    from the ``ix_file_reservations_active_expiry`` index picks up rows written
+    by other processes.
+    """
+
+    def __init__(self, *, resync_seconds: float = 300.0) -> None:
+        self.resync_seconds = max(float(resync_seconds), 1.0)
+        self.expired_total = 0
+        self._heap: list[tuple[datetime, int]] = []
+        # id -> expires_ts for live entries; heap entries not matching are stale
+        self._live: dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._wakeup: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def schedule(self, reservation_id: int, expires_ts: datetime) -> None:
+        """Track (or reschedule) a reservation; wakes the loop if it is now earliest."""
+        due = _as_utc(expires_ts)
+        with self._lock:
+            self._live[int(reservation_id)] = due
+            heapq.heappush(self._heap, (due, int(reservation_id)))
+            earliest = self._heap[0][1] == int(reservation_id)
+        if earliest:
+            self._wake()
+
+    def cancel(self, reservation_id: int) -> None:
+        """Forget a reservation released before its deadline (lazy heap removal)."""
+        with self._lock:
+            self._live.pop(int(reservation_id), None)
+
+    def next_due(self) -> datetime | None:
+        with self._lock:
+            self._discard_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: datetime) -> list[int]:
+        """Remove and return the ids whose deadline is at or before ``now``."""
+        due: list[int] = []
+        with self._lock:
+            self._discard_stale()
+            while self._heap and self._heap[0][0] <= now:
+                _, rid = heapq.heappop(self._heap)
+                if self._live.pop(rid, None) is not None:
+                    due.append(rid)
+                self._discard_stale()
+        return due
+
+    def _discard_stale(self) -> None:
+        while self._heap:
+            due, rid = self._heap[0]
+            if self._live.get(rid) == due:
+                return
+            heapq.heappop(self._heap)
+
+    def _wake(self) -> None:
+        loop, event = self._loop, self._wakeup
+        if loop is None or event is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            event.set()
+        else:
+            loop.call_soon_threadsafe(event.set)
+
+    async def resync(self) -> None:
+        """Rebuild the heap from all unreleased reservations."""
+        await ensure_schema()
+        fr = FileReservation.__table__.c
+        async with get_session() as session:
+            rows = (
+                await session.execute(
+                    select(fr.id, fr.expires_ts).where(fr.released_ts.is_(None))
+                )
+            ).fetchall()
+        live = {int(rid): _as_utc(ts) for rid, ts in rows}
+        # Conflict tries reload lazily, picking up rows written by other processes
+        RESERVATION_INDEX.clear()
+        with self._lock:
+            # Keep entries scheduled while the query was running
+            for rid, due in self._live.items():
+                live.setdefault(rid, due)
+            self._live = live
+            self._heap = [(due, rid) for rid, due in live.items()]
+            heapq.heapify(self._heap)
+
+    async def expire_due(self, now: datetime | None = None) -> int:
+        """Release every due reservation with one UPDATE; returns rows released."""
+        now = now or datetime.now(timezone.utc)
+        ids = self.pop_due(now)
+        if not ids:
+            return 0
+        fr = FileReservation.__table__.c
+        async with get_session() as session:
+            result = await session.execute(
+                update(FileReservation.__table__)
+                .where(and_(fr.id.in_(ids), fr.released_ts.is_(None)))
+                .values(released_ts=now)
+            )
+            await session.commit()
+        RESERVATION_INDEX.remove_many(ids)
+        released = int(result.rowcount or 0)
+        self.expired_total += released
+        return released
+
+    async def run(self) -> None:
+        """Sleep until the next deadline, release what is due, repeat."""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        log = structlog.get_logger("tasks")
+        loop_time = self._loop.time
+        next_resync = 0.0
+        while True:
+            self._wakeup.clear()
+            try:
+                if loop_time() >= next_resync:
+                    await self.resync()
+                    next_resync = loop_time() + self.resync_seconds
+                released = await self.expire_due()
+                if released:
+                    log.info("file_reservations_expired", released=released)
+            except Exception as exc:
+                log.warning("file_reservations_cleanup_failed", error=str(exc))
+            timeout = next_resync - loop_time()
+            due = self.next_due()
+            if due is not None:
+                until_due = (due - datetime.now(timezone.utc)).total_seconds()
+                timeout = min(timeout, until_due)
+            if timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+
+RESERVATION_SCHEDULER = ReservationExpiryScheduler()
+
+
+__all__ = ["RESERVATION_SCHEDULER", "ReservationExpiryScheduler"]
@@ -0,0 +1,134 @@
+"""JSON response classes with an optional fast serializer path."""
+
+from __future__ import annotations
+
+import datetime as _dt
+import json
+from collections.abc import AsyncIterable, Iterable
+from decimal import Decimal
+from enum import Enum
+from typing import Any
+from uuid import UUID
+
+from starlette.background import BackgroundTask
+from starlette.responses import JSONResponse, StreamingResponse
+
+try:  # orjson is a declared dependency, but keep a stdlib path for slim installs
+    import orjson as _orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    _orjson = None
+
+FAST_JSON_BACKEND = "orjson" if _orjson is not None else "json"
+
+# Number of serialized array items joined into one chunk before it is yielded.
+STREAM_CHUNK_ITEMS = 64
+
+
+def _default(value: Any) -> Any:
+    """Coerce the types orjson handles natively so both backends agree."""
+    if isinstance(value, _dt.datetime | _dt.date | _dt.time):
+        return value.isoformat()
+    if isinstance(value, UUID | Decimal):
+        return str(value)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, set | frozenset | tuple):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize ``content`` to compact UTF-8 JSON bytes."""
+    if _orjson is not None:
+        return _orjson.dumps(
+            content,
+            default=_default,
+            option=_orjson.OPT_NON_STR_KEYS | _orjson.OPT_SERIALIZE_NUMPY,
+        )
+    return json.dumps(
+        content,
+        default=_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """``JSONResponse`` rendered with orjson when available (stdlib otherwise)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class StreamingJSONResponse(StreamingResponse):
+    """Stream a JSON object whose ``array_key`` member is produced incrementally.
+
+    ``items`` may be a sync or async iterable; each item is serialized as soon as
+    it is produced, so the full array is never materialized in memory. Extra
+    members in ``envelope`` are emitted after the array.
+    """
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        items: Iterable[Any] | AsyncIterable[Any],
+        *,
+        array_key: str = "items",
+        envelope: dict[str, Any] | None = None,
+        status_code: int = 200,
+        headers: dict[str, str] | None = None,
+        background: BackgroundTask | None = None,
+    ) -> None:
+        self._items = items
+        self._array_key = array_key
+        self._envelope = dict(envelope or {})
+        super().__init__(
+            self._iter_body(),
+            status_code=status_code,
+            headers=headers,
+            media_type=self.media_type,
+            background=background,
+        )
+
+    async def _iter_items(self) -> AsyncIterable[Any]:
+        if isinstance(self._items, AsyncIterable):
+            async for item in self._items:
+                yield item
+        else:
+            for item in self._items:
+                yield item
+
+    async def _iter_body(self) -> AsyncIterable[bytes]:
+        yield b"{" + dumps(self._array_key) + b":["
+        pending: list[bytes] = []
+        first = True
+        async for item in self._iter_items():
+            pending.append(dumps(item))
+            if len(pending) >= STREAM_CHUNK_ITEMS:
+                yield (b"" if first else b",") + b",".join(pending)
+                first = False
+                pending = []
+        if pending:
+            yield (b"" if first else b",") + b",".join(pending)
+        tail = b"]"
+        for key, value in self._envelope.items():
+            if key == self._array_key:
+                continue
+            tail += b"," + dumps(key) + b":" + dumps(value)
+        yield tail + b"}"
+
+
+def json_response_class(fast: bool) -> type[JSONResponse]:
+    """Return the response class to use for JSON API routes."""
+    return FastJSONResponse if fast else JSONResponse
+
+
+__all__ = [
+    "FAST_JSON_BACKEND",
+    "FastJSONResponse",
+    "StreamingJSONResponse",
+    "dumps",
+    "json_response_class",
+]
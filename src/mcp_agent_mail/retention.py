@@ -0,0 +1,416 @@
+"""Retention enforcement: move old messages out of the hot tables into month segments.
+
+Messages created before ``now - retention_max_age_days`` are exported, in bounded
+batches ordered by ``(created_ts, id)``, to gzip-compressed JSONL parts under
+``<segments_dir>/<project_slug>/<YYYY-MM>/<first_id>-<last_id>.jsonl.gz``. Each
+part is written to a temp file and renamed into place before the batch is
+deleted from ``messages``/``message_recipients`` (the FTS delete trigger drops
+the search rows), and the deletion commits together with the progress
+checkpoint. A crash between the two steps re-exports the same batch to the same
+part name on the next run, and readers dedupe by message id. Projects whose
+slug matches ``retention_ignore_project_patterns`` are skipped, as in the
+retention report.
+
+The Git markdown archive is untouched, so time-travel snapshots keep working;
+``SegmentStore`` serves archived months back to the UI on demand.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import fnmatch
+import gzip
+import json
+import os
+import threading
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+import structlog
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import Settings
+from .db import ensure_schema, get_session
+from .models import Agent, Message, MessageRecipient, Project, RetentionCheckpoint
+
+DEFAULT_RETENTION_BATCH_SIZE = 500
+_CHECKPOINT_NAME = "messages"
+_PART_SUFFIX = ".jsonl.gz"
+
+
+def _as_utc(ts: datetime) -> datetime:
+    # SQLite yields naive datetimes; stored values are UTC
+    if ts.tzinfo is None or ts.tzinfo.utcoffset(ts) is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc)
+
+
+def _iso(ts: datetime | None) -> str | None:
+    return _as_utc(ts).isoformat() if ts is not None else None
+
+
+def segments_root(settings: Settings) -> Path:
+    return Path(settings.retention_segments_dir).expanduser().resolve()
+
+
+def _write_part(path: Path, records: list[dict[str, Any]]) -> None:
+    """Atomically write one compressed part (temp file + fsync + rename)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    with open(tmp, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as gz:
+            for record in records:
+                gz.write(json.dumps(record, sort_keys=True).encode("utf-8") + b"\n")
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(tmp, path)
+
+
+def _read_part(path: Path) -> list[dict[str, Any]]:
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+@dataclass(slots=True)
+class RetentionRunResult:
+    """Summary of one ``RetentionExecutor.run_once`` call."""
+
+    cutoff: datetime
+    archived: int = 0
+    batches: int = 0
+    parts: list[str] = field(default_factory=list)
+    complete: bool = True
+
+
+class RetentionExecutor:
+    """Export and prune messages older than the retention cutoff in bounded batches."""
+
+    def __init__(
+        self,
+        settings: Settings,
+        *,
+        batch_size: int = DEFAULT_RETENTION_BATCH_SIZE,
+        max_batches: int | None = None,
+    ) -> None:
+        self.settings = settings
+        self.batch_size = max(1, int(batch_size))
+        self.max_batches = max_batches
+        self.root = segments_root(settings)
+
+    async def run_once(self, now: datetime | None = None) -> RetentionRunResult:
+        """Archive every expired message (or ``max_batches`` batches of them)."""
+        now = now or datetime.now(timezone.utc)
+        cutoff = now - timedelta(days=int(self.settings.retention_max_age_days))
+        result = RetentionRunResult(cutoff=cutoff)
+        await ensure_schema()
+        while self.max_batches is None or result.batches < self.max_batches:
+            records = await self._fetch_batch(cutoff)
+            if not records:
+                break
+            parts = await asyncio.to_thread(self._export, records)
+            await self._prune(records)
+            result.archived += len(records)
+            result.batches += 1
+            result.parts.extend(parts)
+            if len(records) < self.batch_size:
+                break
+            # Yield between batches so request handlers keep the write lock moving
+            await asyncio.sleep(0)
+        else:
+            result.complete = False
+        if result.archived:
+            structlog.get_logger("maintenance").info(
+                "retention_enforced",
+                archived=result.archived,
+                batches=result.batches,
+                cutoff=cutoff.isoformat(),
+                complete=result.complete,
+            )
+        return result
+
+    async def _fetch_batch(self, cutoff: datetime) -> list[dict[str, Any]]:
+        m = Message.__table__.c
+        mr = MessageRecipient.__table__.c
+        a = Agent.__table__.c
+        p = Project.__table__.c
+        stmt = (
+            select(
+                m.id,
+                m.project_id,
+                p.slug,
+                a.name,
+                m.thread_id,
+                m.subject,
+                m.body_md,
+                m.importance,
+                m.ack_required,
+                m.created_ts,
+                m.attachments,
+            )
+            .select_from(
+                Message.__table__.join(Project.__table__, p.id == m.project_id).join(
+                    Agent.__table__, a.id == m.sender_id
+                )
+            )
+            .where(m.created_ts < cutoff)
+            .order_by(m.created_ts, m.id)
+            .limit(self.batch_size)
+        )
+        async with get_session() as session:
+            ignored = await self._ignored_project_ids(session)
+            if ignored:
+                stmt = stmt.where(m.project_id.not_in(ignored))
+            rows = (await session.execute(stmt)).fetchall()
+            if not rows:
+                return []
+            ids = [int(r[0]) for r in rows]
+            recipients: dict[int, list[dict[str, Any]]] = defaultdict(list)
+            rec_rows = (
+                await session.execute(
+                    select(mr.message_id, a.name, mr.kind, mr.read_ts, mr.ack_ts)
+                    .select_from(
+                        MessageRecipient.__table__.join(
+                            Agent.__table__, a.id == mr.agent_id
+                        )
+                    )
+                    .where(mr.message_id.in_(ids))
+                    .order_by(mr.message_id, a.name)
+                )
+            ).fetchall()
+        for mid, name, kind, read_ts, ack_ts in rec_rows:
+            recipients[int(mid)].append(
+                {"name": name, "kind": kind, "read_ts": _iso(read_ts), "ack_ts": _iso(ack_ts)}
+            )
+        return [
+            {
+                "id": int(mid),
+                "project_id": int(pid),
+                "project_slug": slug,
+                "sender": sender,
+                "thread_id": thread_id,
+                "subject": subject,
+                "body_md": body_md,
+                "importance": importance,
+                "ack_required": bool(ack_required),
+                "created_ts": _iso(created),
+                "attachments": attachments or [],
+                "recipients": recipients.get(int(mid), []),
+            }
+            for (
+                mid,
+                pid,
+                slug,
+                sender,
+                thread_id,
+                subject,
+                body_md,
+                importance,
+                ack_required,
+                created,
+                attachments,
+            ) in rows
+        ]
+
+    async def _ignored_project_ids(self, session: AsyncSession) -> list[int]:
+        patterns = list(self.settings.retention_ignore_project_patterns or [])
+        if not patterns:
+            return []
+        p = Project.__table__.c
+        rows = (await session.execute(select(p.id, p.slug))).fetchall()
+        return [
+            int(pid)
+            for pid, slug in rows
+            if any(fnmatch.fnmatch(slug, pattern) for pattern in patterns)
+        ]
+
+    def _export(self, records: list[dict[str, Any]]) -> list[str]:
+        groups: dict[tuple[str, str], list[dict[str, Any]]] = defaultdict(list)
+        for record in records:
+            groups[(record["project_slug"], record["created_ts"][:7])].append(record)
+        written: list[str] = []
+        for (slug, month), items in groups.items():
+            ids = [item["id"] for item in items]
+            path = self.root / slug / month / f"{min(ids)}-{max(ids)}{_PART_SUFFIX}"
+            _write_part(path, items)
+            written.append(str(path))
+        SEGMENT_STORE.invalidate(self.root, {(slug, month) for slug, month in groups})
+        return written
+
+    async def _prune(self, records: list[dict[str, Any]]) -> None:
+        ids = [r["id"] for r in records]
+        last = records[-1]
+        now = datetime.now(timezone.utc)
+        table = RetentionCheckpoint.__table__
+        checkpoint = sqlite_insert(table).values(
+            name=_CHECKPOINT_NAME,
+            last_created_ts=datetime.fromisoformat(last["created_ts"]),
+            last_message_id=last["id"],
+            archived_total=len(ids),
+            updated_at=now,
+        )
+        checkpoint = checkpoint.on_conflict_do_update(
+            index_elements=["name"],
+            set_={
+                "last_created_ts": checkpoint.excluded.last_created_ts,
+                "last_message_id": checkpoint.excluded.last_message_id,
+                "archived_total": table.c.archived_total + checkpoint.excluded.archived_total,
+                "updated_at": checkpoint.excluded.updated_at,
+            },
+        )
+        async with get_session() as session:
+            await session.execute(
+                delete(MessageRecipient.__table__).where(
+                    MessageRecipient.__table__.c.message_id.in_(ids)
+                )
+            )
+            await session.execute(
+                delete(Message.__table__).where(Message.__table__.c.id.in_(ids))
+            )
+            await session.execute(checkpoint)
+            await session.commit()
+
+
+async def load_checkpoint() -> dict[str, Any] | None:
+    """Progress of the retention executor (``None`` before the first archived batch)."""
+    await ensure_schema()
+    table = RetentionCheckpoint.__table__
+    async with get_session() as session:
+        row = (
+            await session.execute(
+                select(
+                    table.c.last_created_ts,
+                    table.c.last_message_id,
+                    table.c.archived_total,
+                    table.c.updated_at,
+                ).where(table.c.name == _CHECKPOINT_NAME)
+            )
+        ).fetchone()
+    if row is None:
+        return None
+    return {
+        "last_created_ts": _iso(row[0]),
+        "last_message_id": int(row[1]),
+        "archived_total": int(row[2]),
+        "updated_at": _iso(row[3]),
+    }
+
+
+class SegmentStore:
+    """On-demand reader for archived months with a small LRU of decoded months."""
+
+    def __init__(self, max_months: int = 8) -> None:
+        self.max_months = max(1, int(max_months))
+        self._cache: OrderedDict[tuple[str, str, str], list[dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def invalidate(self, root: Path, months: set[tuple[str, str]]) -> None:
+        with self._lock:
+            for slug, month in months:
+                self._cache.pop((str(root), slug, month), None)
+
+    def months(self, root: Path, slug: str) -> list[str]:
+        try:
+            with os.scandir(root / slug) as it:
+                return sorted(e.name for e in it if e.is_dir() and len(e.name) == 7)
+        except OSError:
+            return []
+
+    def load_month(self, root: Path, slug: str, month: str) -> list[dict[str, Any]]:
+        """All archived messages of one month, deduped by id, oldest first."""
+        key = (str(root), slug, month)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+        by_id: dict[int, dict[str, Any]] = {}
+        month_dir = root / slug / month
+        for part in sorted(month_dir.glob(f"*{_PART_SUFFIX}")):
+            for record in _read_part(part):
+                by_id[int(record["id"])] = record
+        records = sorted(by_id.values(), key=lambda r: (r["created_ts"], r["id"]))
+        with self._lock:
+            self._cache[key] = records
+            while len(self._cache) > self.max_months:
+                self._cache.popitem(last=False)
+        return records
+
+    def find_message(self, root: Path, slug: str, message_id: int) -> dict[str, Any] | None:
+        """Locate one archived message using the id range encoded in part names."""
+        for month in reversed(self.months(root, slug)):
+            for part in (root / slug / month).glob(f"*{_PART_SUFFIX}"):
+                first, _, last = part.name[: -len(_PART_SUFFIX)].partition("-")
+                try:
+                    in_range = int(first) <= message_id <= int(last)
+                except ValueError:
+                    continue
+                if in_range:
+                    for record in self.load_month(root, slug, month):
+                        if record["id"] == message_id:
+                            return record
+        return None
+
+
+SEGMENT_STORE = SegmentStore()
+
+
+async def archived_months(settings: Settings, slug: str) -> list[str]:
+    return await asyncio.to_thread(SEGMENT_STORE.months, segments_root(settings), slug)
+
+
+async def archived_messages(
+    settings: Settings, slug: str, month: str, *, agent: str | None = None
+) -> list[dict[str, Any]]:
+    """Archived messages of ``month`` (``YYYY-MM``), optionally only those sent to ``agent``."""
+    records = await asyncio.to_thread(
+        SEGMENT_STORE.load_month, segments_root(settings), slug, month
+    )
+    if agent:
+        records = [
+            r
+            for r in records
+            if r["sender"] == agent or any(rc["name"] == agent for rc in r["recipients"])
+        ]
+    return records
+
+
+async def archived_message(
+    settings: Settings, slug: str, message_id: int
+) -> dict[str, Any] | None:
+    return await asyncio.to_thread(
+        SEGMENT_STORE.find_message, segments_root(settings), slug, message_id
+    )
+
+
+async def run_retention_enforcer(settings: Settings, *, interval_seconds: int) -> None:
+    """Background loop: enforce retention, then sleep ``interval_seconds``."""
+    executor = RetentionExecutor(
+        settings, batch_size=settings.retention_enforce_batch_size
+    )
+    log = structlog.get_logger("maintenance")
+    while True:
+        try:
+            await executor.run_once()
+        except Exception as exc:
+            log.warning("retention_enforce_failed", error=str(exc))
+        await asyncio.sleep(max(60, interval_seconds))
+
+
+__all__ = [
+    "DEFAULT_RETENTION_BATCH_SIZE",
+    "SEGMENT_STORE",
+    "RetentionExecutor",
+    "RetentionRunResult",
+    "SegmentStore",
+    "archived_message",
+    "archived_messages",
+    "archived_months",
+    "load_checkpoint",
+    "run_retention_enforcer",
+    "segments_root",
+]
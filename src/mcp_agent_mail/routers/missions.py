@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Annotated, Any, Optional
 from uuid import UUID
 
@@ -12,9 +12,13 @@ from sqlalchemy import desc, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import SQLModel, select
 
+from ..config import get_settings
 from ..db import get_session
-from ..models import Artifact, Knowledge, Mission, TaskGroup, WorkflowRun
-from ..workflow_engine import SelfHealWorkflow, SequentialWorkflow
+from ..models import Artifact, Knowledge, Mission, Project, Task, TaskGroup, WorkflowRun
+from ..run_queue import RUN_QUEUE, mission_progress, queue_position
+from ..task_graph import DEPENDS_ON_KEY, TaskDependencyError, topological_order
+from ..task_loop import LOOP_CONTEXT_KEY, LoopSpecError, parse_loop_spec
+from ..workflow_engine import workflow_class_for, workflow_options
 
 router = APIRouter(prefix="/missions", tags=["missions"])
 
@@ -45,6 +49,38 @@ class ArtifactPayload(BaseModel):
     knowledge_tags: Optional[list[str]] = None
 
 
+class TaskPayload(BaseModel):
+    """Task definition inside a mission creation payload."""
+
+    id: Optional[UUID] = None
+    title: str = Field(max_length=255)
+    agent_id: int
+    order: int = 0
+    input: Optional[dict[str, Any]] = None
+    depends_on: list[UUID] = Field(default_factory=list)
+
+
+class TaskGroupPayload(BaseModel):
+    """Task group definition inside a mission creation payload."""
+
+    title: str = Field(max_length=255)
+    kind: str = Field(default="sequential", max_length=32)
+    order: Optional[int] = None
+    loop: Optional[dict[str, Any]] = None
+    tasks: list[TaskPayload] = Field(default_factory=list)
+
+
+class MissionCreatePayload(BaseModel):
+    """Payload for mission creation with its task groups and tasks."""
+
+    project_id: int
+    title: str = Field(max_length=255)
+    run_mode: str = Field(default="sequential", max_length=32)
+    owner: Optional[str] = Field(default=None, max_length=128)
+    context: Optional[dict[str, Any]] = None
+    groups: list[TaskGroupPayload] = Field(default_factory=list)
+
+
 class ArtifactRead(SQLModel):
     """Read model for artifact responses."""
 
@@ -95,6 +131,93 @@ async def list_missions(
     ]
 
 
+@router.post("/", response_model=MissionSummary, status_code=status.HTTP_201_CREATED)
+async def create_mission(
+    payload: MissionCreatePayload,
+    session: Annotated[AsyncSession, Depends(get_session)],
+) -> MissionSummary:
+    if await session.get(Project, payload.project_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="PROJECT_NOT_FOUND"
+        )
+
+    # Loop settings are validated up front so a bad spec never reaches a run
+    try:
+        if payload.run_mode == "loop":
+            parse_loop_spec((payload.context or {}).get(LOOP_CONTEXT_KEY))
+        for group_payload in payload.groups:
+            if group_payload.kind == "loop":
+                parse_loop_spec(group_payload.loop)
+    except LoopSpecError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="INVALID_LOOP_SPEC"
+        ) from exc
+
+    mission = Mission(
+        project_id=payload.project_id,
+        title=payload.title,
+        run_mode=payload.run_mode,
+        owner=payload.owner,
+        context=payload.context,
+    )
+    groups: list[TaskGroup] = []
+    tasks: list[Task] = []
+    graph: dict[str, list[str]] = {}
+    for index, group_payload in enumerate(payload.groups):
+        group = TaskGroup(
+            mission_id=mission.id,
+            title=group_payload.title,
+            kind=group_payload.kind,
+            order=index if group_payload.order is None else group_payload.order,
+            loop=group_payload.loop if group_payload.kind == "loop" else None,
+        )
+        groups.append(group)
+        for task_payload in group_payload.tasks:
+            task_input = dict(task_payload.input or {})
+            if task_payload.depends_on:
+                task_input[DEPENDS_ON_KEY] = [str(dep) for dep in task_payload.depends_on]
+            task = Task(
+                mission_id=mission.id,
+                group_id=group.id,
+                agent_id=task_payload.agent_id,
+                title=task_payload.title,
+                order=task_payload.order,
+                input=task_input or None,
+            )
+            if task_payload.id is not None:
+                task.id = task_payload.id
+            if str(task.id) in graph:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST, detail="DUPLICATE_TASK_ID"
+                )
+            graph[str(task.id)] = task_input.get(DEPENDS_ON_KEY, [])
+            tasks.append(task)
+
+    # Reject unknown dependencies and cycles before anything is stored
+    try:
+        topological_order(graph)
+    except TaskDependencyError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="TASK_DEPENDENCY_CYCLE" if exc.cycle else "UNKNOWN_TASK_DEPENDENCY",
+        ) from exc
+
+    session.add(mission)
+    session.add_all(groups)
+    session.add_all(tasks)
+    await session.commit()
+    await session.refresh(mission)
+    return MissionSummary(
+        id=mission.id,
+        title=mission.title,
+        status=mission.status,
+        run_mode=mission.run_mode,
+        task_group_count=len(groups),
+        artifact_count=0,
+        updated_at=mission.updated_at,
+    )
+
+
 @router.get("/{mission_id}/artifacts", response_model=list[ArtifactRead])
 async def list_artifacts(
     mission_id: UUID, session: Annotated[AsyncSession, Depends(get_session)]
@@ -212,6 +335,7 @@ async def run_mission(
     mission_id: UUID,
     session: Annotated[AsyncSession, Depends(get_session)],
     allow_self_heal: bool = True,
+    wait: bool = False,
 ) -> MissionRunResponse:
     mission = await session.get(Mission, mission_id)
     if mission is None:
@@ -234,8 +358,16 @@ async def run_mission(
             status_code=status.HTTP_400_BAD_REQUEST, detail="NO_TASK_GROUPS"
         )
 
-    workflow_cls = SelfHealWorkflow if allow_self_heal else SequentialWorkflow
-    engine = workflow_cls(session)
+    settings = get_settings()
+    if not wait and settings.workflow_run_queue_enabled and RUN_QUEUE.running:
+        # Hand off to the run queue; poll GET /missions/runs/{run_id} for progress
+        queued = await RUN_QUEUE.enqueue(session, mission, allow_self_heal=allow_self_heal)
+        return MissionRunResponse(
+            mission_id=mission_id, status=queued.status, run_id=queued.run_id
+        )
+
+    workflow_cls = workflow_class_for(mission.run_mode, allow_self_heal)
+    engine = workflow_cls(session, **workflow_options(settings))
     status_result = await engine.run(mission)
 
     # pick latest workflow_run for this mission
@@ -253,3 +385,105 @@ async def run_mission(
     return MissionRunResponse(
         mission_id=mission_id, status=status_result, run_id=run.run_id
     )
+
+
+RESUMABLE_RUN_STATUSES = frozenset({"interrupted", "failed"})
+
+
+class WorkflowRunStatus(BaseModel):
+    """キュー投入済み/実行中/完了したワークフロー実行の状態。"""
+
+    run_id: UUID
+    mission_id: UUID
+    mode: str
+    status: str
+    queued_at: Optional[datetime] = None
+    started_at: datetime
+    ended_at: Optional[datetime] = None
+    worker_id: Optional[str] = None
+    queue_position: Optional[int] = None
+    trace_uri: Optional[str] = None
+    progress: dict[str, Any] = Field(default_factory=dict)
+    completed_tasks: int = 0
+    heartbeat_at: Optional[datetime] = None
+
+
+async def _run_status(session: AsyncSession, run: WorkflowRun) -> WorkflowRunStatus:
+    """WorkflowRun 行に待ち順位とタスク進捗を付けて返す。"""
+    return WorkflowRunStatus(
+        run_id=run.run_id,
+        mission_id=run.mission_id,
+        mode=run.mode,
+        status=run.status,
+        queued_at=run.queued_at,
+        started_at=run.started_at,
+        ended_at=run.ended_at,
+        worker_id=run.worker_id,
+        queue_position=await queue_position(session, run),
+        trace_uri=run.trace_uri,
+        progress=await mission_progress(session, run.mission_id),
+        completed_tasks=len((run.checkpoint or {}).get("completed_task_ids") or []),
+        heartbeat_at=run.heartbeat_at,
+    )
+
+
+@router.post(
+    "/runs/{run_id}/resume",
+    response_model=MissionRunResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def resume_run(
+    run_id: UUID,
+    session: Annotated[AsyncSession, Depends(get_session)],
+    wait: bool = False,
+) -> MissionRunResponse:
+    run = await session.get(WorkflowRun, run_id)
+    if run is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="RUN_NOT_FOUND")
+    if run.status not in RESUMABLE_RUN_STATUSES:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="RUN_NOT_RESUMABLE")
+    mission = await session.get(Mission, run.mission_id)
+    if mission is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="MISSION_NOT_FOUND")
+
+    settings = get_settings()
+    if not wait and settings.workflow_run_queue_enabled and RUN_QUEUE.running:
+        # The worker resumes from run.checkpoint, skipping completed tasks
+        run.status = "queued"
+        run.queued_at = datetime.now(timezone.utc)
+        run.worker_id = None
+        session.add(run)
+        await session.commit()
+        RUN_QUEUE.notify()
+        return MissionRunResponse(mission_id=mission.id, status=run.status, run_id=run.run_id)
+
+    workflow_cls = workflow_class_for(mission.run_mode, run.allow_self_heal)
+    engine = workflow_cls(session, **workflow_options(settings))
+    status_result = await engine.run(mission, run=run)
+    return MissionRunResponse(mission_id=mission.id, status=status_result, run_id=run.run_id)
+
+
+@router.get("/runs/{run_id}", response_model=WorkflowRunStatus)
+async def get_run(
+    run_id: UUID,
+    session: Annotated[AsyncSession, Depends(get_session)],
+) -> WorkflowRunStatus:
+    run = await session.get(WorkflowRun, run_id)
+    if run is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="RUN_NOT_FOUND")
+    return await _run_status(session, run)
+
+
+@router.get("/{mission_id}/runs", response_model=list[WorkflowRunStatus])
+async def list_runs(
+    mission_id: UUID,
+    session: Annotated[AsyncSession, Depends(get_session)],
+    limit: int = 20,
+) -> list[WorkflowRunStatus]:
+    rows = await session.execute(
+        select(WorkflowRun)
+        .where(WorkflowRun.__table__.c.mission_id == mission_id)  # type: ignore[arg-type]
+        .order_by(desc(WorkflowRun.__table__.c.started_at))  # type: ignore[arg-type]
+        .limit(max(1, min(limit, 200)))
+    )
+    return [await _run_status(session, run) for run in rows.scalars().all()]
@@ -0,0 +1,399 @@
+"""Background queue for mission runs.
+
+``POST /missions/{id}/run`` stores a ``WorkflowRun`` with ``status="queued"``
+and returns its ``run_id`` at once. Workers claim queued rows with a single
+conditional ``UPDATE``, which also enforces ``WORKFLOW_RUNS_PER_PROJECT``.
+Because the claim lives in the database, workers can run inside the app
+lifespan (``RUN_QUEUE``) or in a separate process
+(``python -m mcp_agent_mail.run_queue``). Enqueueing in-process wakes idle
+workers immediately; rows enqueued elsewhere are picked up on the next poll.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import os
+import socket
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+from uuid import UUID, uuid4
+
+import structlog
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import Settings, get_settings
+from .db import ensure_schema, get_session
+from .models import Mission, Task, TaskGroup, WorkflowRun
+from .trace_writer import TRACE_WRITERS
+
+_CLAIM_BATCH = 20
+
+
+class RunQueue:
+    """Worker pool executing queued ``WorkflowRun`` rows."""
+
+    def __init__(
+        self,
+        *,
+        workers: int = 2,
+        per_project: int = 1,
+        poll_seconds: float = 5.0,
+        orphan_seconds: float = 300.0,
+        options: dict[str, Any] | None = None,
+        trace_dir: Path | None = None,
+    ) -> None:
+        self.workers = max(1, workers)
+        self.per_project = max(1, per_project)
+        self.poll_seconds = max(0.1, poll_seconds)
+        # Heartbeat age after which another worker's run counts as orphaned
+        self.orphan_seconds = max(1.0, orphan_seconds)
+        # Keyword arguments for the workflow class (see workflow_options)
+        self.options = dict(options or {})
+        self.trace_dir = trace_dir
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:6]}"
+        self.active: dict[UUID, int] = {}  # run_id -> worker index
+        self.completed_total = 0
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task[None]] = []
+
+    def configure(self, settings: Settings) -> None:
+        self.workers = max(1, settings.workflow_run_workers)
+        self.per_project = max(1, settings.workflow_runs_per_project)
+        self.poll_seconds = max(0.1, float(settings.workflow_run_poll_seconds))
+        self.orphan_seconds = max(1.0, float(settings.workflow_run_orphan_seconds))
+        from .workflow_engine import workflow_options
+
+        self.options = workflow_options(settings)
+
+    @property
+    def running(self) -> bool:
+        return any(not t.done() for t in self._tasks)
+
+    async def enqueue(
+        self, session: AsyncSession, mission: Mission, *, allow_self_heal: bool = True
+    ) -> WorkflowRun:
+        """Store a queued run for ``mission`` and wake a worker."""
+        now = datetime.now(timezone.utc)
+        run = WorkflowRun(
+            mission_id=mission.id,
+            project_id=mission.project_id,
+            mode=mission.run_mode or "sequential",
+            status="queued",
+            started_at=now,
+            queued_at=now,
+            allow_self_heal=allow_self_heal,
+        )
+        session.add(run)
+        await session.commit()
+        await session.refresh(run)
+        self.notify()
+        return run
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        # Bind the event to the running loop (the app may be rebuilt in tests)
+        self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Cancel the workers and put their in-flight runs back in the queue."""
+        tasks, self._tasks = self._tasks, []
+        interrupted = list(self.active)
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with contextlib.suppress(BaseException):
+                await task
+        if interrupted:
+            # Rows are updated after the workers are gone so none of them can
+            # re-claim a run; the checkpoint lets the next worker resume it.
+            await self._requeue(interrupted)
+
+    async def _requeue(self, run_ids: list[UUID]) -> None:
+        runs = WorkflowRun.__table__
+        try:
+            async with get_session() as session:
+                await session.execute(
+                    update(runs)
+                    .where(
+                        runs.c.run_id.in_(run_ids),
+                        runs.c.status == "running",
+                        runs.c.worker_id == self.worker_id,
+                    )
+                    .values(status="queued", queued_at=datetime.now(timezone.utc), worker_id=None)
+                )
+                await session.commit()
+        except Exception as exc:
+            structlog.get_logger("run_queue").warning(
+                "run_queue_requeue_failed", runs=[str(r) for r in run_ids], error=str(exc)
+            )
+
+    async def _worker(self, index: int) -> None:
+        log = structlog.get_logger("run_queue")
+        next_sweep = time.monotonic() + self.orphan_seconds
+        while True:
+            if index == 0 and time.monotonic() >= next_sweep:
+                # Runs of workers that died after startup are only found by a sweep
+                next_sweep = time.monotonic() + self.orphan_seconds
+                try:
+                    await recover_orphaned_runs(stale_seconds=self.orphan_seconds)
+                except Exception as exc:
+                    log.warning("run_queue_orphan_sweep_failed", error=str(exc))
+            try:
+                run_id = await self.claim_next()
+            except Exception as exc:
+                log.warning("run_queue_claim_failed", error=str(exc))
+                run_id = None
+            if run_id is None:
+                self._wakeup.clear()
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+                continue
+            self.active[run_id] = index
+            try:
+                await self.execute(run_id)
+            finally:
+                self.active.pop(run_id, None)
+                self.completed_total += 1
+                # A finished run frees a per-project slot for queued runs
+                self.notify()
+
+    async def claim_next(self) -> UUID | None:
+        """Claim the oldest queued run whose project is under the cap."""
+        await ensure_schema()
+        runs = WorkflowRun.__table__
+        async with get_session() as session:
+            candidates = (
+                await session.execute(
+                    select(runs.c.run_id)
+                    .where(runs.c.status == "queued")
+                    .order_by(runs.c.queued_at, runs.c.started_at)
+                    .limit(_CLAIM_BATCH)
+                )
+            ).scalars().all()
+            if not candidates:
+                return None
+            others = runs.alias("project_runs")
+            project_running = (
+                select(func.count())
+                .select_from(others)
+                .where(others.c.project_id == runs.c.project_id, others.c.status == "running")
+                .scalar_subquery()
+            )
+            for run_id in candidates:
+                # Single UPDATE: claims atomically across processes and
+                # re-checks the per-project cap under the write lock
+                result = await session.execute(
+                    update(runs)
+                    .where(
+                        runs.c.run_id == run_id,
+                        runs.c.status == "queued",
+                        project_running < self.per_project,
+                    )
+                    .values(
+                        status="running",
+                        started_at=datetime.now(timezone.utc),
+                        worker_id=self.worker_id,
+                    )
+                )
+                await session.commit()
+                if result.rowcount == 1:
+                    return run_id
+        return None
+
+    async def execute(self, run_id: UUID) -> str:
+        """Run a claimed mission to completion; returns the final status."""
+        from .workflow_engine import workflow_class_for
+
+        log = structlog.get_logger("run_queue")
+        try:
+            async with get_session() as session:
+                run = await session.get(WorkflowRun, run_id)
+                mission = await session.get(Mission, run.mission_id) if run else None
+                if run is None or mission is None:
+                    raise LookupError(f"run {run_id} or its mission is missing")
+                workflow_cls = workflow_class_for(mission.run_mode, run.allow_self_heal)
+                kwargs: dict[str, Any] = dict(self.options)
+                if self.trace_dir is not None:
+                    kwargs["trace_dir"] = self.trace_dir
+                engine = workflow_cls(session, **kwargs)
+                status = await engine.run(mission, run=run)
+            log.info("run_queue_run_finished", run_id=str(run_id), status=status)
+            return status
+        except Exception as exc:
+            log.warning("run_queue_run_failed", run_id=str(run_id), error=str(exc))
+            with contextlib.suppress(Exception):
+                async with get_session() as session:
+                    await session.execute(
+                        update(WorkflowRun.__table__)
+                        .where(WorkflowRun.__table__.c.run_id == run_id)
+                        .values(status="failed", ended_at=datetime.now(timezone.utc))
+                    )
+                    await session.commit()
+            return "failed"
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "workers": self.workers if self.running else 0,
+            "per_project": self.per_project,
+            "active_runs": [str(run_id) for run_id in self.active],
+            "completed_total": self.completed_total,
+        }
+
+
+def _worker_process(worker_id: str | None) -> int | None:
+    """PID from ``host:pid[:...]`` when the worker runs on this host."""
+    host, _, rest = (worker_id or "").partition(":")
+    pid = rest.partition(":")[0]
+    if host != socket.gethostname() or not pid.isdigit():
+        return None
+    return int(pid)
+
+
+def _process_gone(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except OSError:  # e.g. EPERM: exists but owned by someone else
+        return False
+    return False
+
+
+async def recover_orphaned_runs(
+    *, stale_seconds: float = 300.0, requeue: bool = True, startup: bool = False
+) -> list[UUID]:
+    """Find ``running`` runs whose process is gone and queue them for resume.
+
+    A run is orphaned when its worker process on this host no longer exists,
+    or when its heartbeat is older than ``stale_seconds`` (the only signal for
+    other hosts). Runs naming this host and PID belong to this process, so a
+    periodic sweep leaves them alone; with ``startup=True`` they are orphaned
+    instead, because a process that has just started owns no runs and a
+    match means a previous process with the same PID (e.g. PID 1 in a
+    restarted container) left them behind.
+    Orphans go back to ``queued`` (their checkpoint makes the worker resume
+    them) or, with ``requeue=False``, to ``interrupted`` for a manual
+    ``POST /missions/runs/{run_id}/resume``.
+    """
+    await ensure_schema()
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(seconds=stale_seconds)
+    recovered: list[UUID] = []
+    async with get_session() as session:
+        rows = await session.execute(
+            select(WorkflowRun).where(WorkflowRun.__table__.c.status == "running")  # type: ignore[arg-type]
+        )
+        for run in rows.scalars().all():
+            pid = _worker_process(run.worker_id)
+            if pid == os.getpid():
+                if not startup:
+                    continue
+            elif pid is None or not _process_gone(pid):
+                last_seen = run.heartbeat_at or run.started_at
+                if last_seen.tzinfo is None:
+                    last_seen = last_seen.replace(tzinfo=timezone.utc)
+                if last_seen >= cutoff:
+                    continue
+            run.status = "queued" if requeue else "interrupted"
+            run.queued_at = now if requeue else run.queued_at
+            run.worker_id = None
+            session.add(run)
+            recovered.append(run.run_id)
+        await session.commit()
+    if recovered:
+        structlog.get_logger("run_queue").warning(
+            "run_queue_orphans_recovered",
+            runs=[str(run_id) for run_id in recovered],
+            requeued=requeue,
+        )
+        if requeue:
+            RUN_QUEUE.notify()
+    return recovered
+
+
+async def queue_position(session: AsyncSession, run: WorkflowRun) -> int | None:
+    """1-based position among queued runs, or None when not queued."""
+    if run.status != "queued":
+        return None
+    runs = WorkflowRun.__table__
+    ahead = await session.execute(
+        select(func.count())
+        .select_from(runs)
+        .where(runs.c.status == "queued", runs.c.queued_at < run.queued_at)
+    )
+    return int(ahead.scalar_one()) + 1
+
+
+async def mission_progress(session: AsyncSession, mission_id: UUID) -> dict[str, Any]:
+    """Task counts by status for a mission (one grouped query)."""
+    tasks, groups = Task.__table__, TaskGroup.__table__
+    rows = await session.execute(
+        select(tasks.c.status, func.count())
+        .select_from(tasks.join(groups, groups.c.id == tasks.c.group_id))
+        .where(groups.c.mission_id == mission_id)
+        .group_by(tasks.c.status)
+    )
+    by_status = {status: int(count) for status, count in rows.all()}
+    total = sum(by_status.values())
+    done = by_status.get("completed", 0) + by_status.get("failed", 0)
+    return {
+        "tasks_total": total,
+        "tasks_by_status": by_status,
+        "fraction_done": round(done / total, 4) if total else 0.0,
+    }
+
+
+RUN_QUEUE = RunQueue()
+
+
+def main() -> None:  # pragma: no cover - manual execution path
+    """Consume queued mission runs from the database without serving HTTP."""
+    parser = argparse.ArgumentParser(description="Run the mission run queue workers")
+    parser.add_argument("--workers", type=int, default=None, help="Override WORKFLOW_RUN_WORKERS")
+    args, _unknown = parser.parse_known_args()
+
+    settings = get_settings()
+    RUN_QUEUE.configure(settings)
+    TRACE_WRITERS.configure(settings)
+    if args.workers:
+        RUN_QUEUE.workers = max(1, args.workers)
+
+    async def _serve() -> None:
+        await ensure_schema()
+        await recover_orphaned_runs(
+            stale_seconds=settings.workflow_run_orphan_seconds, startup=True
+        )
+        await RUN_QUEUE.start()
+        structlog.get_logger("run_queue").info("run_queue_started", **RUN_QUEUE.stats())
+        try:
+            await asyncio.gather(*RUN_QUEUE._tasks)
+        finally:
+            await TRACE_WRITERS.close_all()
+
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(_serve())
+
+
+if __name__ == "__main__":  # pragma: no cover - manual execution path
+    main()
+
+
+__all__ = [
+    "RUN_QUEUE",
+    "RunQueue",
+    "mission_progress",
+    "queue_position",
+    "recover_orphaned_runs",
+]
@@ -0,0 +1,110 @@
+"""セルフヒール方針: 元タスクの指数バックオフ再試行・並列リカバリ戦略・ミッション単位の予算。
+
+失敗タスクはまず retries 回まで元タスクを再実行し (待ち時間は backoff_ms から倍々、
+backoff_max_ms で頭打ち)、それでも失敗したらリカバリ戦略ごとのリカバリタスクを同時に
+起動して最初に成功したものを採用する (残りはキャンセル)。再試行 1 回・リカバリタスク 1 件が
+それぞれ予算を 1 消費し、予算はミッション実行 (run) 単位で共有する。
+
+戦略は Task.input["recovery"] (タスク単位) か方針の strategies で与え、リカバリタスクの
+input にそのまま重ねる (例: {"strategy": "fallback", "kind": "agent_cli", "command": [...]})。
+文字列は {"strategy": <名前>} とみなす。Mission.context["self_heal"] で方針を上書きできる。
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field, replace
+from typing import Any
+
+SELF_HEAL_CONTEXT_KEY = "self_heal"
+RECOVERY_INPUT_KEY = "recovery"
+# リカバリタスクの印 (通常のグループ実行・DAG の対象から外す)
+RECOVERY_FOR_KEY = "recovery_for"
+DEFAULT_STRATEGY = "recover"
+
+
+def normalize_strategies(raw: Any) -> tuple[dict[str, Any], ...]:
+    """戦略指定 (文字列・dict・それらのリスト) を名前付き dict のタプルにする。"""
+    if raw is None:
+        return ()
+    if isinstance(raw, (str, Mapping)):
+        raw = [raw]
+    strategies: list[dict[str, Any]] = []
+    for index, item in enumerate(raw):
+        if isinstance(item, str):
+            item = {"strategy": item}
+        elif not isinstance(item, Mapping):
+            raise ValueError(f"recovery strategy must be a name or an object: {item!r}")
+        strategy = dict(item)
+        strategy.setdefault("strategy", f"strategy{index + 1}")
+        strategies.append(strategy)
+    return tuple(strategies)
+
+
+def is_recovery_task(task_input: Mapping[str, Any] | None) -> bool:
+    """セルフヒールが作成したリカバリタスクか。"""
+    return RECOVERY_FOR_KEY in (task_input or {})
+
+
+@dataclass(slots=True, frozen=True)
+class SelfHealPolicy:
+    """セルフヒールの再試行・並列リカバリ・予算の設定。"""
+
+    retries: int = 0
+    backoff_ms: float = 1000.0
+    backoff_max_ms: float = 30000.0
+    budget: int = 10
+    strategies: tuple[dict[str, Any], ...] = field(
+        default_factory=lambda: ({"strategy": DEFAULT_STRATEGY},)
+    )
+
+    @classmethod
+    def from_settings(cls, settings: Any) -> SelfHealPolicy:
+        names = [name.strip() for name in settings.workflow_self_heal_strategies.split(",")]
+        return cls(
+            retries=max(0, settings.workflow_self_heal_retries),
+            backoff_ms=max(0.0, float(settings.workflow_self_heal_backoff_ms)),
+            backoff_max_ms=max(0.0, float(settings.workflow_self_heal_backoff_max_ms)),
+            budget=max(0, settings.workflow_self_heal_budget),
+            strategies=normalize_strategies([name for name in names if name])
+            or ({"strategy": DEFAULT_STRATEGY},),
+        )
+
+    def with_overrides(self, overrides: Mapping[str, Any] | None) -> SelfHealPolicy:
+        """Mission.context["self_heal"] の値で上書きした方針を返す。"""
+        if not overrides:
+            return self
+        changes: dict[str, Any] = {}
+        for name, cast in (("retries", int), ("budget", int)):
+            if name in overrides:
+                changes[name] = max(0, cast(overrides[name]))
+        for name in ("backoff_ms", "backoff_max_ms"):
+            if name in overrides:
+                changes[name] = max(0.0, float(overrides[name]))
+        if overrides.get("strategies"):
+            changes["strategies"] = normalize_strategies(overrides["strategies"])
+        return replace(self, **changes)
+
+    def backoff_seconds(self, attempt: int) -> float:
+        """attempt 回目 (1 始まり) の再試行前の待ち時間。"""
+        return min(self.backoff_ms * 2 ** max(0, attempt - 1), self.backoff_max_ms) / 1000
+
+    def strategies_for(self, task_input: Mapping[str, Any] | None) -> tuple[dict[str, Any], ...]:
+        """タスクに適用する戦略 (Task.input["recovery"] があればそれを優先)。"""
+        own = normalize_strategies((task_input or {}).get(RECOVERY_INPUT_KEY))
+        return own or self.strategies
+
+
+def strategy_names(strategies: Iterable[Mapping[str, Any]]) -> list[str]:
+    return [str(strategy["strategy"]) for strategy in strategies]
+
+
+__all__ = [
+    "RECOVERY_FOR_KEY",
+    "RECOVERY_INPUT_KEY",
+    "SELF_HEAL_CONTEXT_KEY",
+    "SelfHealPolicy",
+    "is_recovery_task",
+    "normalize_strategies",
+    "strategy_names",
+]
@@ -0,0 +1,174 @@
+"""プロセス内シグナルバス(購読者ごとの有界バッファ・古い順に破棄)。"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections import deque
+from collections.abc import Iterable
+from typing import Any
+
+from .models import Signal
+
+DEFAULT_BUFFER_SIZE = 256
+
+
+def signal_event(signal: Signal) -> dict[str, Any]:
+    """Signal 行を配信用の dict に変換する。"""
+    return {
+        "id": signal.id,
+        "type": signal.type,
+        "severity": signal.severity,
+        "status": signal.status,
+        "project_id": signal.project_id,
+        "mission_id": str(signal.mission_id) if signal.mission_id else None,
+        "created_at": signal.created_at.isoformat() if signal.created_at else None,
+        "message": signal.message,
+    }
+
+
+class Subscription:
+    """1 購読者分のキュー。満杯時は最古のイベントを捨てて最新を残す。"""
+
+    def __init__(
+        self,
+        *,
+        project_id: int | None = None,
+        severities: Iterable[str] | None = None,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+    ) -> None:
+        self.project_id = project_id
+        self.severities = frozenset(s.lower() for s in severities or ()) or None
+        self.buffer_size = max(1, int(buffer_size))
+        self.delivered = 0
+        self.dropped = 0
+        self._queue: deque[dict[str, Any]] = deque(maxlen=self.buffer_size)
+        self._lock = threading.Lock()
+        self._event = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+
+    def matches(self, event: dict[str, Any]) -> bool:
+        if self.project_id is not None and event.get("project_id") != self.project_id:
+            return False
+        if self.severities is not None:
+            return str(event.get("severity") or "").lower() in self.severities
+        return True
+
+    def push(self, event: dict[str, Any]) -> None:
+        with self._lock:
+            if len(self._queue) == self.buffer_size:
+                self.dropped += 1
+            self._queue.append(event)
+            self.delivered += 1
+        self._wake()
+
+    def _wake(self) -> None:
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._event.set()
+        elif not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._event.set)
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def drain(self) -> list[dict[str, Any]]:
+        """溜まっているイベントをすべて取り出す。"""
+        with self._lock:
+            items = list(self._queue)
+            self._queue.clear()
+            self._event.clear()
+        return items
+
+    async def wait(self, timeout: float | None = None) -> list[dict[str, Any]]:
+        """イベントが届くか timeout まで待ち、取り出したイベントを返す。"""
+        if not self._queue:
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        return self.drain()
+
+
+class SignalBus:
+    """シグナルを条件に合う全購読者へファンアウトする。"""
+
+    def __init__(self, *, buffer_size: int = DEFAULT_BUFFER_SIZE) -> None:
+        self.buffer_size = buffer_size
+        self.published = 0
+        self._subscribers: set[Subscription] = set()
+        self._lock = threading.Lock()
+        # 切断済み購読者の配信/破棄数も累計に含める
+        self._closed_delivered = 0
+        self._closed_dropped = 0
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
+    def subscribe(
+        self,
+        *,
+        project_id: int | None = None,
+        severities: Iterable[str] | None = None,
+        buffer_size: int | None = None,
+    ) -> Subscription:
+        sub = Subscription(
+            project_id=project_id,
+            severities=severities,
+            buffer_size=buffer_size or self.buffer_size,
+        )
+        with self._lock:
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            if sub in self._subscribers:
+                self._subscribers.discard(sub)
+                self._closed_delivered += sub.delivered
+                self._closed_dropped += sub.dropped
+
+    def publish(self, event: dict[str, Any]) -> int:
+        """イベントを配信し、受け取った購読者数を返す。"""
+        with self._lock:
+            self.published += 1
+            targets = [s for s in self._subscribers if s.matches(event)]
+        for sub in targets:
+            sub.push(event)
+        return len(targets)
+
+    def publish_signal(self, signal: Signal) -> int:
+        return self.publish(signal_event(signal))
+
+    def stats(self) -> dict[str, Any]:
+        """購読者数・配信/破棄数・キュー滞留(バックプレッシャー指標)を返す。"""
+        with self._lock:
+            subs = list(self._subscribers)
+            delivered = self._closed_delivered
+            dropped = self._closed_dropped
+        depths = [s.depth for s in subs]
+        return {
+            "subscribers": len(subs),
+            "published": self.published,
+            "delivered": delivered + sum(s.delivered for s in subs),
+            "dropped": dropped + sum(s.dropped for s in subs),
+            "queue_depth_max": max(depths, default=0),
+            "queue_depth_total": sum(depths),
+        }
+
+
+SIGNAL_BUS = SignalBus()
+
+
+__all__ = [
+    "DEFAULT_BUFFER_SIZE",
+    "SIGNAL_BUS",
+    "SignalBus",
+    "Subscription",
+    "signal_event",
+]
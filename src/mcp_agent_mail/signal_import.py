@@ -0,0 +1,309 @@
+"""JSONL 監査ログをシグナルとして取り込むストリーミング・インポーター。"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import structlog
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import select
+
+from .db import ensure_schema, get_session
+from .models import Signal, SignalImportCursor
+from .signal_bus import SIGNAL_BUS
+
+DEFAULT_DANGEROUS_LOG = "data/logs/current/audit/dangerous_command_events.jsonl"
+DEFAULT_BATCH_SIZE = 500
+
+ALLOWED_EVENTS = frozenset(
+    {"dangerous_command", "approval_required", "failing_test", "retry", "timeout"}
+)
+SEVERITY_MAP = {
+    "dangerous_command": "warning",
+    "approval_required": "info",
+    "failing_test": "warning",
+    "retry": "info",
+    "timeout": "warning",
+}
+
+
+@dataclass(slots=True)
+class ImportResult:
+    """1 回の取り込み結果。"""
+
+    imported: int = 0
+    skipped: int = 0
+    duplicates: int = 0
+    offset: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return {
+            "imported": self.imported,
+            "skipped": self.skipped,
+            "duplicates": self.duplicates,
+            "offset": self.offset,
+        }
+
+
+def _is_complete_record(line: bytes) -> bool:
+    try:
+        json.loads(line)
+    except ValueError:
+        return False
+    return True
+
+
+def _read_lines(
+    path: Path, offset: int, limit: int
+) -> tuple[list[bytes], int, bool]:
+    """offset から完結した行だけを最大 limit 行読む(書き込み途中の行は残す)。"""
+    lines: list[bytes] = []
+    with path.open("rb") as fh:
+        fh.seek(offset)
+        while len(lines) < limit:
+            line = fh.readline()
+            if not line:
+                return lines, offset, True
+            if not line.endswith(b"\n") and not _is_complete_record(line):
+                # 書き込み途中の末尾行は次回に持ち越す
+                return lines, offset, True
+            lines.append(line)
+            offset += len(line)
+    return lines, offset, False
+
+
+def dedupe_key(project_id: int, raw_line: bytes) -> str:
+    """プロジェクトと元行内容から重複防止キーを作る。"""
+    digest = hashlib.sha256()
+    digest.update(str(project_id).encode("ascii"))
+    digest.update(b"\0")
+    digest.update(raw_line.strip())
+    return digest.hexdigest()
+
+
+class SignalImporter:
+    """バイトオフセットから再開可能な、バッチ単位・冪等のシグナル取り込み。"""
+
+    def __init__(
+        self,
+        *,
+        project_key: str | None = None,
+        project_id: int | None = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> None:
+        self.project_key = project_key
+        self.project_id = int(project_id) if project_id is not None else None
+        self.batch_size = max(1, int(batch_size))
+        self._project_ids: dict[str, int | None] = {}
+
+    async def _resolve_projects(self, session: Any, keys: set[str]) -> None:
+        missing = [k for k in keys if k not in self._project_ids]
+        if not missing:
+            return
+        stmt = text(
+            "SELECT id, slug, human_key FROM projects "
+            "WHERE slug IN :keys OR human_key IN :keys"
+        ).bindparams(bindparam("keys", expanding=True))
+        rows = (await session.execute(stmt, {"keys": missing})).fetchall()
+        for key in missing:
+            self._project_ids[key] = None
+        for pid, slug, human_key in rows:
+            for key in (slug, human_key):
+                if key in self._project_ids:
+                    self._project_ids[key] = int(pid)
+
+    def _row_project_key(self, row: dict[str, Any]) -> str | None:
+        return (
+            row.get("project")
+            or row.get("project_slug")
+            or row.get("project_key")
+            or self.project_key
+        )
+
+    @property
+    def cursor_project(self) -> str:
+        """再開カーソルを分ける取り込み先 (同じログを別プロジェクトへ取り込めるように)。"""
+        if self.project_id is not None:
+            return str(self.project_id)
+        return self.project_key or ""
+
+    async def _load_offset(
+        self, session: Any, cursor_key: tuple[str, str], size: int
+    ) -> int:
+        cursor = await session.get(SignalImportCursor, cursor_key)
+        offset = int(cursor.offset) if cursor is not None else 0
+        # ローテーション/切り詰めを検知したら先頭から読み直す
+        return offset if offset <= size else 0
+
+    async def import_file(
+        self, path: str | Path, *, max_rows: int = 0, resume: bool = True
+    ) -> ImportResult:
+        """path を読み進めて取り込む。max_rows<=0 なら EOF まで。"""
+        p = Path(path)
+        cursor_key = (str(p.resolve()), self.cursor_project)
+        size = (await asyncio.to_thread(p.stat)).st_size
+        await ensure_schema()
+        result = ImportResult()
+        async with get_session() as session:
+            offset = await self._load_offset(session, cursor_key, size) if resume else 0
+            remaining = max_rows if max_rows > 0 else None
+            while remaining is None or remaining > 0:
+                limit = (
+                    self.batch_size
+                    if remaining is None
+                    else min(self.batch_size, remaining)
+                )
+                lines, next_offset, eof = await asyncio.to_thread(
+                    _read_lines, p, offset, limit
+                )
+                if lines:
+                    inserted = await self._import_batch(session, lines, result)
+                    offset = next_offset
+                    await self._save_offset(session, cursor_key, offset)
+                    # バッチとオフセットを同一トランザクションで確定する
+                    await session.commit()
+                    if inserted and SIGNAL_BUS.has_subscribers:
+                        await self._publish(session, inserted)
+                    if remaining is not None:
+                        remaining -= len(lines)
+                if eof or not lines:
+                    break
+        result.offset = offset
+        return result
+
+    async def _save_offset(
+        self, session: Any, cursor_key: tuple[str, str], offset: int
+    ) -> None:
+        cursor = await session.get(SignalImportCursor, cursor_key)
+        now = datetime.now(timezone.utc)
+        if cursor is None:
+            path, project = cursor_key
+            session.add(
+                SignalImportCursor(
+                    path=path, project=project, offset=offset, updated_at=now
+                )
+            )
+        else:
+            cursor.offset = offset
+            cursor.updated_at = now
+
+    async def _publish(self, session: Any, keys: list[str]) -> None:
+        rows = await session.execute(
+            select(Signal).where(Signal.dedupe_key.in_(keys)).order_by(Signal.id)
+        )
+        for signal in rows.scalars().all():
+            SIGNAL_BUS.publish_signal(signal)
+
+    async def _import_batch(
+        self, session: Any, lines: list[bytes], result: ImportResult
+    ) -> list[str]:
+        """1 バッチを挿入し、新規に挿入した dedupe_key を返す。"""
+        parsed: list[tuple[bytes, dict[str, Any]]] = []
+        keys: set[str] = set()
+        for raw in lines:
+            if not raw.strip():
+                continue
+            try:
+                obj = json.loads(raw)
+            except Exception:
+                continue
+            if not isinstance(obj, dict) or obj.get("event") not in ALLOWED_EVENTS:
+                continue
+            parsed.append((raw, obj))
+            if obj.get("project_id") is None and self.project_id is None:
+                key = self._row_project_key(obj)
+                if key:
+                    keys.add(str(key))
+        if keys:
+            await self._resolve_projects(session, keys)
+
+        values: dict[str, dict[str, Any]] = {}
+        now = datetime.now(timezone.utc)
+        for raw, obj in parsed:
+            pid_raw = obj.get("project_id") or self.project_id
+            if pid_raw is None:
+                project_key = self._row_project_key(obj)
+                pid_raw = (
+                    self._project_ids.get(str(project_key)) if project_key else None
+                )
+            if pid_raw is None:
+                result.skipped += 1
+                continue
+            pid = int(pid_raw)
+            key = dedupe_key(pid, raw)
+            if key in values:
+                result.duplicates += 1
+                continue
+            sig_type = (obj.get("event") or "dangerous_command").strip()
+            message = obj.get("command") or obj.get("note")
+            values[key] = {
+                "project_id": pid,
+                "mission_id": None,
+                "type": sig_type,
+                "severity": SEVERITY_MAP.get(sig_type, "info"),
+                "status": "pending",
+                "message": str(message)[:1024] if message is not None else None,
+                "created_at": now,
+                "dedupe_key": key,
+            }
+        if not values:
+            return []
+        existing_stmt = text(
+            "SELECT dedupe_key FROM signals WHERE dedupe_key IN :keys"
+        ).bindparams(bindparam("keys", expanding=True))
+        existing = {
+            row[0]
+            for row in (
+                await session.execute(existing_stmt, {"keys": list(values)})
+            ).fetchall()
+        }
+        rows = [v for k, v in values.items() if k not in existing]
+        result.duplicates += len(existing)
+        if rows:
+            stmt = sqlite_insert(Signal.__table__).on_conflict_do_nothing(
+                index_elements=["dedupe_key"]
+            )
+            await session.execute(stmt, rows)
+            result.imported += len(rows)
+        return [row["dedupe_key"] for row in rows]
+
+
+async def run_signal_tailer(
+    path: str | Path,
+    *,
+    interval_seconds: float = 5.0,
+    project_key: str | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> None:
+    """ログ末尾を追従し、新しい行を定期的に取り込み続ける。"""
+    log = structlog.get_logger("signals.tailer")
+    importer = SignalImporter(project_key=project_key, batch_size=batch_size)
+    p = Path(path)
+    while True:
+        try:
+            result = await importer.import_file(p)
+            if result.imported or result.skipped:
+                log.info("signals_tailed", path=str(p), **result.as_dict())
+        except FileNotFoundError:
+            pass  # ログ未作成: 次の周期で再試行
+        except Exception as exc:
+            log.warning("signals_tail_failed", path=str(p), error=str(exc))
+        await asyncio.sleep(max(interval_seconds, 0.1))
+
+
+__all__ = [
+    "ALLOWED_EVENTS",
+    "DEFAULT_DANGEROUS_LOG",
+    "ImportResult",
+    "SEVERITY_MAP",
+    "SignalImporter",
+    "dedupe_key",
+    "run_signal_tailer",
+]
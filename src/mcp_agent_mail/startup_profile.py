@@ -0,0 +1,148 @@
+"""Startup profiling helpers (``python -X importtime`` report for the HTTP server)."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+# Snippet executed in a fresh interpreter: import the module and build the app.
+_PROBE = """
+import time
+_t0 = time.perf_counter()
+from mcp_agent_mail.config import get_settings
+from mcp_agent_mail.http import build_http_app
+_t1 = time.perf_counter()
+build_http_app(get_settings())
+_t2 = time.perf_counter()
+print(f"__startup__ {(_t1 - _t0) * 1000:.3f} {(_t2 - _t1) * 1000:.3f}")
+"""
+
+
+@dataclass(slots=True, frozen=True)
+class ImportTiming:
+    """A single ``-X importtime`` line (microseconds)."""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+@dataclass(slots=True)
+class StartupProfile:
+    """Cold-start measurements for one fresh interpreter."""
+
+    wall_ms: float
+    import_ms: float
+    build_ms: float
+    imports: list[ImportTiming]
+
+    def top(self, limit: int = 25, *, by: str = "cumulative") -> list[ImportTiming]:
+        key = (
+            (lambda t: t.cumulative_us) if by == "cumulative" else (lambda t: t.self_us)
+        )
+        return sorted(self.imports, key=key, reverse=True)[:limit]
+
+    def loaded(self, module: str) -> bool:
+        """Return True when ``module`` (or a submodule) was imported."""
+        return any(
+            t.module == module or t.module.startswith(module + ".")
+            for t in self.imports
+        )
+
+
+def parse_importtime(stderr: str) -> list[ImportTiming]:
+    """Parse ``-X importtime`` output into structured rows."""
+    rows: list[ImportTiming] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:") :].split("|")
+        if len(parts) != 3:
+            continue
+        self_raw, cumulative_raw, name_raw = parts
+        try:
+            self_us = int(self_raw.strip())
+            cumulative_us = int(cumulative_raw.strip())
+        except ValueError:
+            continue  # header line
+        stripped = name_raw.lstrip(" ")
+        depth = (len(name_raw) - len(stripped) - 1) // 2
+        rows.append(
+            ImportTiming(
+                module=stripped.strip(),
+                self_us=self_us,
+                cumulative_us=cumulative_us,
+                depth=max(depth, 0),
+            )
+        )
+    return rows
+
+
+def profile_startup(
+    *, python: str | None = None, env: dict[str, str] | None = None
+) -> StartupProfile:
+    """Import ``mcp_agent_mail.http`` and build the app in a fresh interpreter."""
+    src_root = str(Path(__file__).resolve().parent.parent)
+    child_env = dict(os.environ if env is None else env)
+    child_env["PYTHONPATH"] = os.pathsep.join(
+        p for p in (src_root, child_env.get("PYTHONPATH", "")) if p
+    )
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [python or sys.executable, "-X", "importtime", "-c", _PROBE],
+        capture_output=True,
+        text=True,
+        env=child_env,
+        check=False,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(
+            f"startup probe failed (exit {proc.returncode}): {proc.stderr[-2000:]}"
+        )
+    import_ms = build_ms = 0.0
+    for line in proc.stdout.splitlines():
+        if line.startswith("__startup__ "):
+            _, import_raw, build_raw = line.split()
+            import_ms, build_ms = float(import_raw), float(build_raw)
+    return StartupProfile(
+        wall_ms=wall_ms,
+        import_ms=import_ms,
+        build_ms=build_ms,
+        imports=parse_importtime(proc.stderr),
+    )
+
+
+def format_report(profile: StartupProfile, *, limit: int = 25) -> str:
+    """Render a human-readable report (top imports by cumulative time)."""
+    lines = [
+        f"cold start: wall={profile.wall_ms:.1f}ms "
+        f"import={profile.import_ms:.1f}ms build_http_app={profile.build_ms:.1f}ms",
+        f"{'cumulative(ms)':>14} {'self(ms)':>9}  module",
+    ]
+    for row in profile.top(limit):
+        lines.append(
+            f"{row.cumulative_us / 1000:14.1f} {row.self_us / 1000:9.1f}  "
+            f"{'  ' * row.depth}{row.module}"
+        )
+    deferred = [
+        name
+        for name in ("PIL", "git", "bleach", "markdown2", "jinja2", "uvicorn")
+        if not profile.loaded(name)
+    ]
+    lines.append("deferred until first use: " + (", ".join(deferred) or "(none)"))
+    return "\n".join(lines)
+
+
+__all__ = [
+    "ImportTiming",
+    "StartupProfile",
+    "format_report",
+    "parse_importtime",
+    "profile_startup",
+]
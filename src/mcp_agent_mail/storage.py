@@ -6,6 +6,7 @@ import asyncio
 import base64
 import contextlib
 import hashlib
+import importlib
 import json
 import logging
 import os
@@ -14,14 +15,42 @@ import time
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Iterable, Sequence
+from typing import TYPE_CHECKING, Any, Iterable, Sequence
 
 import structlog
 from filelock import SoftFileLock, Timeout
-from git import Actor, Repo
-from PIL import Image
 
 from .config import Settings
+from .metrics import ATTACHMENT_CONVERT_MS, GIT_COMMIT_MS
+from .tracing import span, traced
+
+if TYPE_CHECKING:
+    from git import Actor, Repo
+    from PIL import Image
+
+# GitPython and Pillow are imported on first use to keep HTTP cold start cheap.
+_LAZY_DEPS: dict[str, tuple[str, str | None]] = {
+    "Actor": ("git", "Actor"),
+    "Repo": ("git", "Repo"),
+    "Image": ("PIL.Image", None),
+}
+
+
+def __getattr__(name: str) -> Any:
+    try:
+        module_name, attr = _LAZY_DEPS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    module = importlib.import_module(module_name)
+    value = getattr(module, attr) if attr else module
+    globals()[name] = value
+    return value
+
+
+def _lazy_dep(name: str) -> Any:
+    """Return a lazily imported dependency (honours monkeypatched globals)."""
+    value = globals().get(name)
+    return value if value is not None else __getattr__(name)
 
 _IMAGE_PATTERN = re.compile(r"!\[(?P<alt>[^\]]*)\]\((?P<path>[^)]+)\)")
 
@@ -79,6 +108,7 @@ class AsyncFileLock:
         self._metadata_path = path.parent / f"{path.name}.owner.json"
         self._held = False
 
+    @traced("archive.lock.acquire", lambda self: {"lock.path": str(self._path)})
     async def __aenter__(self) -> None:
         # Attempt timed acquire; if timed out, check for stale lock and break it
         import structlog
@@ -308,11 +338,12 @@ async def ensure_archive(settings: Settings, slug: str) -> ProjectArchive:
 
 
 async def _ensure_repo(root: Path, settings: Settings) -> Repo:
+    repo_cls = _lazy_dep("Repo")
     git_dir = root / ".git"
     if git_dir.exists():
-        return _register_repo(Repo(str(root)))
+        return _register_repo(repo_cls(str(root)))
 
-    repo = await _to_thread(Repo.init, str(root))
+    repo = await _to_thread(repo_cls.init, str(root))
     repo = _register_repo(repo)
     # Ensure deterministic, non-interactive commits (disable GPG signing)
     with contextlib.suppress(Exception):  # pragma: no cover - best-effort config
@@ -418,6 +449,7 @@ async def write_message_bundle(
         else f"{created_iso}__{subject_slug}.md"
     )
     canonical_path = canonical_dir / filename
+    canonical_existed = await _to_thread(canonical_path.exists)
     await _write_text(canonical_path, content)
     rel_paths.append(canonical_path.relative_to(archive.repo_root).as_posix())
 
@@ -425,11 +457,22 @@ async def write_message_bundle(
     await _write_text(outbox_path, content)
     rel_paths.append(outbox_path.relative_to(archive.repo_root).as_posix())
 
+    new_inbox_files = 0
     for inbox_dir in inbox_dirs:
         inbox_path = inbox_dir / filename
+        if not await _to_thread(inbox_path.exists):
+            new_inbox_files += 1
         await _write_text(inbox_path, content)
         rel_paths.append(inbox_path.relative_to(archive.repo_root).as_posix())
 
+    # Keep retention/quota counters current without rescanning the archive
+    from .archive_usage import METRIC_INBOX, METRIC_MESSAGES, USAGE
+
+    month_bucket = f"{y_dir}-{m_dir}"
+    if not canonical_existed:
+        USAGE.add(archive.slug, METRIC_MESSAGES, 1, month_bucket)
+    USAGE.add(archive.slug, METRIC_INBOX, new_inbox_files, month_bucket)
+
     # Update thread-level digest for human review if thread_id present
     thread_id_obj = message.get("thread_id")
     if isinstance(thread_id_obj, str) and thread_id_obj.strip():
@@ -640,8 +683,11 @@ async def _store_image(
     archive: ProjectArchive, path: Path, *, embed_policy: str = "auto"
 ) -> tuple[dict[str, object], str | None]:
     data = await _to_thread(path.read_bytes)
-    pil = await _to_thread(Image.open, path)
-    img = pil.convert("RGBA" if pil.mode in ("LA", "RGBA") else "RGB")
+    with ATTACHMENT_CONVERT_MS.time_ms("decode"), span(
+        "attachment.decode", {"attachment.bytes": len(data)}
+    ):
+        pil = await _to_thread(_lazy_dep("Image").open, path)
+        img = pil.convert("RGBA" if pil.mode in ("LA", "RGBA") else "RGB")
     width, height = img.size
     buffer_path = archive.attachments_dir
     await _to_thread(buffer_path.mkdir, parents=True, exist_ok=True)
@@ -661,9 +707,16 @@ async def _store_image(
         if not orig_path.exists():
             await _to_thread(orig_path.write_bytes, data)
         original_rel = orig_path.relative_to(archive.repo_root).as_posix()
-    if not target_path.exists():
-        await _save_webp(img, target_path)
+    created = not target_path.exists()
+    if created:
+        with ATTACHMENT_CONVERT_MS.time_ms("webp"), span("attachment.convert.webp"):
+            await _save_webp(img, target_path)
     new_bytes = await _to_thread(target_path.read_bytes)
+    if created:
+        from .archive_usage import METRIC_ATTACHMENT_BYTES, METRIC_ATTACHMENTS, USAGE
+
+        USAGE.add(archive.slug, METRIC_ATTACHMENTS, 1)
+        USAGE.add(archive.slug, METRIC_ATTACHMENT_BYTES, len(new_bytes))
     rel_path = target_path.relative_to(archive.repo_root).as_posix()
     # Update per-attachment manifest with metadata
     with contextlib.suppress(Exception):  # pragma: no cover - manifest is best-effort
@@ -774,7 +827,9 @@ async def _commit(
 ) -> None:
     if not rel_paths:
         return
-    actor = Actor(settings.storage.git_author_name, settings.storage.git_author_email)
+    actor = _lazy_dep("Actor")(
+        settings.storage.git_author_name, settings.storage.git_author_email
+    )
 
     def _perform_commit() -> None:
         repo.index.add(rel_paths)
@@ -813,16 +868,23 @@ async def _commit(
     structlog.get_logger("debug").info(
         "_commit.locking", lock_path=str(commit_lock_path)
     )
-    async with AsyncFileLock(
-        commit_lock_path, timeout_seconds=15.0, stale_timeout_seconds=30.0
-    ):
-        structlog.get_logger("debug").info(
-            "_commit.locked", lock_path=str(commit_lock_path)
-        )
-        await _to_thread(_perform_commit)
-        structlog.get_logger("debug").info(
-            "_commit.performed", lock_path=str(commit_lock_path)
-        )
+    # Span tree: archive.commit -> archive.lock.acquire (wait) + archive.commit.git
+    with span("archive.commit", {"archive.paths": len(rel_paths)}) as commit_span:
+        wait_started = time.perf_counter()
+        async with AsyncFileLock(
+            commit_lock_path, timeout_seconds=15.0, stale_timeout_seconds=30.0
+        ):
+            commit_span.set_attribute(
+                "archive.lock_wait_ms", (time.perf_counter() - wait_started) * 1000
+            )
+            structlog.get_logger("debug").info(
+                "_commit.locked", lock_path=str(commit_lock_path)
+            )
+            with GIT_COMMIT_MS.labels().time_ms(), span("archive.commit.git"):
+                await _to_thread(_perform_commit)
+            structlog.get_logger("debug").info(
+                "_commit.performed", lock_path=str(commit_lock_path)
+            )
 
 
 # ==================================================================================
@@ -0,0 +1,161 @@
+"""タスク結果の内容アドレス型キャッシュ。
+
+キーは engine 設定・コマンド・Task.input・参照 artifact (Task.input["artifacts"]) の sha256 から
+計算し、成功した Task.output と生成 artifact を TTL 付きで保存する。Task.input["cache"] で
+タスク単位に有効/無効を上書きできる。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from collections.abc import Mapping
+from datetime import datetime, timedelta, timezone
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from .models import Artifact, CachedTaskResult, Task
+
+CACHE_INPUT_KEY = "cache"
+ARTIFACTS_INPUT_KEY = "artifacts"
+TASK_CACHE_TTL_SECONDS_DEFAULT = 86400.0
+
+# Scheduling/control keys do not change what a task computes
+_IGNORED_INPUT_KEYS = frozenset({CACHE_INPUT_KEY, "depends_on", "timeout"})
+_ARTIFACT_FIELDS = ("type", "scope", "path", "version", "sha256", "content_meta", "tags")
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+async def task_cache_key(
+    session: AsyncSession,
+    engine_cfg: Mapping[str, Any],
+    command: Any,
+    task_input: Mapping[str, Any] | None,
+) -> str:
+    """engine 設定・コマンド・入力・参照 artifact の内容ハッシュからキャッシュキーを作る。"""
+    task_input = dict(task_input or {})
+    refs = [str(ref) for ref in task_input.get(ARTIFACTS_INPUT_KEY) or []]
+    digests: list[str] = []
+    if refs:
+        ids = [UUID(ref) for ref in refs if _is_uuid(ref)]
+        rows = await session.execute(
+            select(Artifact.__table__.c.id, Artifact.__table__.c.sha256).where(
+                Artifact.__table__.c.id.in_(ids)  # type: ignore[arg-type]
+            )
+        )
+        by_id = {str(row_id): sha for row_id, sha in rows.all()}
+        # Unknown references stay in the key so they never alias a real artifact
+        digests = sorted(by_id.get(ref, f"missing:{ref}") for ref in refs)
+    payload = {
+        "engine": dict(engine_cfg),
+        "command": command,
+        "input": {
+            k: v
+            for k, v in task_input.items()
+            if k not in _IGNORED_INPUT_KEYS and k != ARTIFACTS_INPUT_KEY
+        },
+        "artifacts": digests,
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _is_uuid(value: str) -> bool:
+    try:
+        UUID(value)
+    except ValueError:
+        return False
+    return True
+
+
+class TaskResultCache:
+    """タスク結果キャッシュの参照・保存と、実行単位のヒット率集計。"""
+
+    def __init__(self, *, enabled: bool = False, ttl_seconds: float = TASK_CACHE_TTL_SECONDS_DEFAULT):
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def applies(self, task_input: Mapping[str, Any] | None) -> bool:
+        """Task.input["cache"] があればそれを優先し、無ければ全体設定に従う。"""
+        override = (task_input or {}).get(CACHE_INPUT_KEY)
+        if override is None:
+            return self.enabled and self.ttl_seconds > 0
+        return bool(override) and self.ttl_seconds > 0
+
+    async def lookup(self, session: AsyncSession, key: str) -> CachedTaskResult | None:
+        """有効期限内のエントリを返す (無ければ None)。"""
+        entry = await session.get(CachedTaskResult, key)
+        if entry is not None and _as_utc(entry.expires_at) > datetime.now(timezone.utc):
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    async def restore(
+        self, session: AsyncSession, entry: CachedTaskResult, task: Task, mission_id: UUID
+    ) -> list[Artifact]:
+        """キャッシュ済み出力をタスクに反映し、artifact を新しいタスクに付け直す。"""
+        task.output = {**(entry.output or {}), "cached": True, "cache_key": entry.key}
+        task.status = "completed"
+        task.error = None
+        artifacts = [
+            Artifact(mission_id=mission_id, task_id=task.id, **descriptor)
+            for descriptor in entry.artifacts or []
+        ]
+        session.add_all(artifacts)
+        return artifacts
+
+    async def store(self, session: AsyncSession, key: str, task: Task) -> None:
+        """成功したタスクの出力と生成 artifact を保存する (同じキーは上書き)。"""
+        rows = await session.execute(
+            select(Artifact).where(Artifact.__table__.c.task_id == task.id)  # type: ignore[arg-type]
+        )
+        descriptors = [
+            {name: getattr(artifact, name) for name in _ARTIFACT_FIELDS}
+            for artifact in rows.scalars().all()
+        ]
+        now = datetime.now(timezone.utc)
+        values = {
+            "key": key,
+            "output": task.output,
+            "artifacts": descriptors,
+            "source_task_id": task.id,
+            "created_at": now,
+            "expires_at": now + timedelta(seconds=self.ttl_seconds),
+        }
+        table = CachedTaskResult.__table__
+        stmt = sqlite_insert(table).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.key],
+            set_={name: stmt.excluded[name] for name in values if name != "key"},
+        )
+        await session.execute(stmt)
+        self.stores += 1
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+__all__ = [
+    "ARTIFACTS_INPUT_KEY",
+    "CACHE_INPUT_KEY",
+    "TASK_CACHE_TTL_SECONDS_DEFAULT",
+    "TaskResultCache",
+    "task_cache_key",
+]
@@ -0,0 +1,118 @@
+"""タスク依存グラフ (Task.input["depends_on"]) の検証・順序付け・クリティカルパス計算。"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+DEPENDS_ON_KEY = "depends_on"
+
+
+class TaskDependencyError(ValueError):
+    """依存関係が不正 (未知のタスク ID・循環) な場合の例外。"""
+
+    def __init__(
+        self,
+        message: str,
+        *,
+        cycle: list[str] | None = None,
+        unknown: dict[str, list[str]] | None = None,
+    ):
+        super().__init__(message)
+        self.cycle = cycle or []
+        self.unknown = unknown or {}
+
+
+def task_dependencies(task_input: Mapping[str, Any] | None) -> list[str]:
+    """Task.input から依存タスク ID を重複なしの文字列リストで取り出す。"""
+    raw = (task_input or {}).get(DEPENDS_ON_KEY) or []
+    if isinstance(raw, (str, bytes)):
+        raw = [raw]
+    seen: dict[str, None] = {}
+    for dep in raw:
+        seen.setdefault(str(dep), None)
+    return list(seen)
+
+
+def topological_order(graph: Mapping[str, Iterable[str]]) -> list[str]:
+    """Kahn 法で依存順に並べる (同順位は挿入順)。未知 ID や循環は TaskDependencyError。"""
+    deps = {node: list(dict.fromkeys(edges)) for node, edges in graph.items()}
+    unknown = {
+        node: missing
+        for node, edges in deps.items()
+        if (missing := [d for d in edges if d not in deps])
+    }
+    if unknown:
+        detail = ", ".join(f"{node} -> {missing}" for node, missing in unknown.items())
+        raise TaskDependencyError(f"unknown task dependencies: {detail}", unknown=unknown)
+
+    remaining = {node: len(edges) for node, edges in deps.items()}
+    dependents: dict[str, list[str]] = {node: [] for node in deps}
+    for node, edges in deps.items():
+        for dep in edges:
+            dependents[dep].append(node)
+
+    order = [node for node, count in remaining.items() if count == 0]
+    for node in order:  # order grows while iterating
+        for child in dependents[node]:
+            remaining[child] -= 1
+            if remaining[child] == 0:
+                order.append(child)
+    if len(order) != len(deps):
+        cycle = _find_cycle(deps, {n for n, c in remaining.items() if c > 0})
+        raise TaskDependencyError(
+            "task dependency cycle: " + " -> ".join(cycle), cycle=cycle
+        )
+    return order
+
+
+def _find_cycle(deps: Mapping[str, list[str]], candidates: set[str]) -> list[str]:
+    """循環に含まれるノード列を 1 つ返す (先頭ノードを末尾にも含める)。"""
+    # Every candidate has an unresolved dependency inside the candidate set, so
+    # following those edges from any start must revisit a node.
+    node = next(iter(sorted(candidates)))
+    path: list[str] = []
+    index: dict[str, int] = {}
+    while node not in index:
+        index[node] = len(path)
+        path.append(node)
+        node = next(d for d in deps[node] if d in candidates)
+    return path[index[node] :] + [node]
+
+
+def critical_path(
+    graph: Mapping[str, Iterable[str]], durations: Mapping[str, float]
+) -> tuple[list[str], float]:
+    """所要時間が最長となる依存チェーン (クリティカルパス) とその合計時間を返す。
+
+    ``durations`` に無いノード (未実行タスク) は経路から除外する。
+    """
+    deps = {
+        node: [d for d in edges if d in durations]
+        for node, edges in graph.items()
+        if node in durations
+    }
+    finish: dict[str, float] = {}
+    via: dict[str, str | None] = {}
+    for node in topological_order(deps):
+        best = max(deps[node], key=lambda d: finish[d], default=None)
+        finish[node] = durations[node] + (finish[best] if best is not None else 0.0)
+        via[node] = best
+    if not finish:
+        return [], 0.0
+    tail: str | None = max(finish, key=lambda n: finish[n])
+    total = finish[tail]
+    path: list[str] = []
+    while tail is not None:
+        path.append(tail)
+        tail = via[tail]
+    return path[::-1], total
+
+
+__all__ = [
+    "DEPENDS_ON_KEY",
+    "TaskDependencyError",
+    "critical_path",
+    "task_dependencies",
+    "topological_order",
+]
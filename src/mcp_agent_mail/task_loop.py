@@ -0,0 +1,167 @@
+"""ループ実行 (run_mode="loop" / TaskGroup.kind="loop") の設定検証と収束判定。
+
+ループ設定は TaskGroup.loop (グループ単位) または Mission.context["loop"] (ミッション全体) に置く::
+
+    {
+        "max_iterations": 5,          # 反復回数の上限
+        "max_seconds": 600,           # 経過時間の上限 (任意)
+        "until": {...},               # 収束条件 (任意。無ければ max_iterations 回繰り返す)
+        "on_exhausted": "fail",       # 収束前に上限へ達した場合 fail|complete
+    }
+
+収束条件は JSON で表す::
+
+    {"shared": "tests.passed", "equals": true}                    # WorkflowContext.shared_data
+    {"task": "run tests", "path": "output.return_code", "equals": 0}  # タスク (ID かタイトル)
+    {"all": [...]}, {"any": [...]}, {"not": {...}}
+
+演算子は equals / not_equals / in / gte / lte / exists のいずれか 1 つ (省略時は真偽値判定)。
+task 条件は当該反復で実行されたタスクのみを参照し、path の既定は "status"。
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any
+
+LOOP_CONTEXT_KEY = "loop"
+LOOP_MAX_ITERATIONS_DEFAULT = 10
+LOOP_ON_EXHAUSTED = ("fail", "complete")
+
+_OPERATORS = ("equals", "not_equals", "in", "gte", "lte", "exists")
+_SPEC_KEYS = frozenset({"max_iterations", "max_seconds", "until", "on_exhausted"})
+_MISSING = object()
+
+
+class LoopSpecError(ValueError):
+    """ループ設定・収束条件が不正な場合の例外。"""
+
+
+@dataclass(slots=True, frozen=True)
+class LoopSpec:
+    """検証済みのループ設定。"""
+
+    max_iterations: int
+    max_seconds: float | None = None
+    until: dict[str, Any] | None = None
+    on_exhausted: str = "fail"
+
+
+def parse_loop_spec(
+    raw: Mapping[str, Any] | None, *, default_max_iterations: int = LOOP_MAX_ITERATIONS_DEFAULT
+) -> LoopSpec:
+    """ループ設定を検証して LoopSpec にする (不正なら LoopSpecError)。"""
+    raw = dict(raw or {})
+    unknown = sorted(set(raw) - _SPEC_KEYS)
+    if unknown:
+        raise LoopSpecError(f"unknown loop settings: {unknown}")
+    max_iterations = raw.get("max_iterations", default_max_iterations)
+    if isinstance(max_iterations, bool) or not isinstance(max_iterations, int) or max_iterations < 1:
+        raise LoopSpecError("max_iterations must be a positive integer")
+    max_seconds = raw.get("max_seconds")
+    if max_seconds is not None and (
+        isinstance(max_seconds, bool) or not isinstance(max_seconds, (int, float)) or max_seconds <= 0
+    ):
+        raise LoopSpecError("max_seconds must be a positive number")
+    on_exhausted = raw.get("on_exhausted", "fail")
+    if on_exhausted not in LOOP_ON_EXHAUSTED:
+        raise LoopSpecError(f"on_exhausted must be one of {list(LOOP_ON_EXHAUSTED)}")
+    until = raw.get("until")
+    if until is not None:
+        _validate_condition(until)
+    return LoopSpec(
+        max_iterations=max_iterations,
+        max_seconds=float(max_seconds) if max_seconds is not None else None,
+        until=until,
+        on_exhausted=on_exhausted,
+    )
+
+
+def _validate_condition(condition: Any) -> None:
+    if not isinstance(condition, Mapping) or not condition:
+        raise LoopSpecError("loop condition must be a non-empty object")
+    for combinator in ("all", "any"):
+        if combinator in condition:
+            parts = condition[combinator]
+            if len(condition) != 1 or not isinstance(parts, list) or not parts:
+                raise LoopSpecError(f'"{combinator}" takes a non-empty list and nothing else')
+            for part in parts:
+                _validate_condition(part)
+            return
+    if "not" in condition:
+        if len(condition) != 1:
+            raise LoopSpecError('"not" takes a single condition and nothing else')
+        _validate_condition(condition["not"])
+        return
+    sources = [key for key in ("shared", "task") if key in condition]
+    if len(sources) != 1:
+        raise LoopSpecError('loop condition needs exactly one of "shared" or "task"')
+    allowed = {sources[0], *_OPERATORS} | ({"path"} if sources[0] == "task" else set())
+    extra = sorted(set(condition) - allowed)
+    if extra:
+        raise LoopSpecError(f"unknown loop condition keys: {extra}")
+    if len([op for op in _OPERATORS if op in condition]) > 1:
+        raise LoopSpecError("loop condition takes at most one operator")
+    if "in" in condition and not isinstance(condition["in"], list):
+        raise LoopSpecError('"in" takes a list')
+
+
+def _lookup(value: Any, path: str) -> Any:
+    for part in path.split(".") if path else []:
+        if isinstance(value, Mapping) and part in value:
+            value = value[part]
+        else:
+            return _MISSING
+    return value
+
+
+def _compare(condition: Mapping[str, Any], value: Any) -> bool:
+    if "exists" in condition:
+        return (value is not _MISSING) == bool(condition["exists"])
+    if value is _MISSING:
+        return False
+    if "equals" in condition:
+        return value == condition["equals"]
+    if "not_equals" in condition:
+        return value != condition["not_equals"]
+    if "in" in condition:
+        return value in condition["in"]
+    try:
+        if "gte" in condition:
+            return value >= condition["gte"]
+        if "lte" in condition:
+            return value <= condition["lte"]
+    except TypeError:
+        return False
+    return bool(value)
+
+
+def converged(
+    condition: Mapping[str, Any],
+    shared_data: Mapping[str, Any],
+    tasks: Mapping[str, Mapping[str, Any]],
+) -> bool:
+    """収束条件を評価する。tasks はタスク ID・タイトルから {status, output, error} への対応。"""
+    if "all" in condition:
+        return all(converged(part, shared_data, tasks) for part in condition["all"])
+    if "any" in condition:
+        return any(converged(part, shared_data, tasks) for part in condition["any"])
+    if "not" in condition:
+        return not converged(condition["not"], shared_data, tasks)
+    if "shared" in condition:
+        value = _lookup(shared_data, str(condition["shared"]))
+    else:
+        task = tasks.get(str(condition["task"]))
+        value = _MISSING if task is None else _lookup(task, str(condition.get("path", "status")))
+    return _compare(condition, value)
+
+
+__all__ = [
+    "LOOP_CONTEXT_KEY",
+    "LOOP_MAX_ITERATIONS_DEFAULT",
+    "LoopSpec",
+    "LoopSpecError",
+    "converged",
+    "parse_loop_spec",
+]
@@ -0,0 +1,278 @@
+"""Buffered JSONL writers for workflow traces and CI evidence.
+
+Workflow runs emit many small events. Instead of opening, appending and
+closing the file on the event loop for every event, ``JsonlWriter`` keeps a
+per-file in-memory buffer that is drained by a worker thread:
+
+* when the buffer reaches ``buffer_bytes``,
+* every ``flush_interval`` seconds (one background flusher per event loop),
+* when the writer is closed (end of the run) or flushed explicitly.
+
+Each drain hands the batch to a single ``write`` call, so the shared
+``ci_evidence.jsonl`` gets one append per batch no matter how many runs feed
+it. Per-run traces keep their handle open and rotate to
+``<name>.<n>.jsonl[.gz]`` once they grow past ``max_bytes``. Without a
+running event loop (scripts, sync callers) writes happen inline.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import gzip
+import json
+import logging
+import os
+import shutil
+import threading
+import weakref
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import IO, Any
+
+logger = logging.getLogger(__name__)
+
+CI_EVIDENCE_PATH = Path("observability/policy/ci_evidence.jsonl")
+
+
+def _jsonl(event: str, payload: dict[str, Any]) -> str:
+    entry = {"ts": datetime.now(timezone.utc).isoformat(), "event": event}
+    entry.update(payload)
+    return json.dumps(entry, ensure_ascii=False) + "\n"
+
+
+class JsonlWriter:
+    """Buffered append-only JSONL file with optional size-based rotation."""
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        max_bytes: int | None = None,
+        compress: bool = False,
+        keep_open: bool = True,
+    ) -> None:
+        self.path = path
+        self.max_bytes = max_bytes if max_bytes and max_bytes > 0 else None
+        self.compress = compress
+        # Shared files (CI evidence) are reopened per batch so that other
+        # processes appending or rotating them are never fighting a stale handle
+        self.keep_open = keep_open
+        self.lines_written = 0
+        self.batches_written = 0
+        self.rotations = 0
+        self._buffer: list[str] = []
+        self._buffered_bytes = 0
+        self._lock = threading.Lock()  # guards the buffer (loop thread vs drain thread)
+        self._io_lock = threading.Lock()  # serializes drains so batches stay ordered
+        self._fh: IO[str] | None = None
+        self._size = 0
+        self.drain_scheduled = False
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def append(self, line: str) -> int:
+        """Buffer one line; returns the buffered size in bytes."""
+        with self._lock:
+            self._buffer.append(line)
+            self._buffered_bytes += len(line)
+            return self._buffered_bytes
+
+    def drain(self) -> int:
+        """Write all buffered lines in one call (blocking); returns the line count."""
+        with self._io_lock:
+            with self._lock:
+                lines, self._buffer = self._buffer, []
+                self._buffered_bytes = 0
+                self.drain_scheduled = False
+            if not lines:
+                return 0
+            chunk = "".join(lines)
+            try:
+                fh = self._open()
+                if self.max_bytes and self._size and self._size + len(chunk) > self.max_bytes:
+                    self._rotate()
+                    fh = self._open()
+                fh.write(chunk)
+                fh.flush()
+                self._size += len(chunk)
+            except OSError as exc:
+                # Never let trace I/O fail a run; the batch is dropped
+                logger.warning("trace write failed for %s: %s", self.path, exc)
+                self._close_handle()
+                return 0
+            finally:
+                if not self.keep_open:
+                    self._close_handle()
+            self.lines_written += len(lines)
+            self.batches_written += 1
+            return len(lines)
+
+    def close(self) -> None:
+        self.drain()
+        with self._io_lock:
+            self._close_handle()
+
+    def _open(self) -> IO[str]:
+        if self._fh is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = self.path.open("a", encoding="utf-8")
+            self._size = self._fh.tell()
+        return self._fh
+
+    def _close_handle(self) -> None:
+        if self._fh is not None:
+            try:
+                self._fh.close()
+            finally:
+                self._fh = None
+
+    def _rotate(self) -> None:
+        self._close_handle()
+        index = 1
+        suffix = ".jsonl.gz" if self.compress else ".jsonl"
+        while (target := self.path.with_name(f"{self.path.stem}.{index}{suffix}")).exists():
+            index += 1
+        if self.compress:
+            with self.path.open("rb") as src, gzip.open(target, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            self.path.unlink()
+        else:
+            self.path.rename(target)
+        self.rotations += 1
+
+
+class TraceWriterService:
+    """Registry of buffered writers keyed by absolute path."""
+
+    def __init__(
+        self,
+        *,
+        flush_interval: float = 1.0,
+        buffer_bytes: int = 64 * 1024,
+        max_bytes: int | None = 64 * 1024 * 1024,
+        compress: bool = False,
+    ) -> None:
+        self.flush_interval = flush_interval
+        self.buffer_bytes = buffer_bytes
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self._writers: dict[str, JsonlWriter] = {}
+        self._flushers: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Task[None]] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._inflight: set[asyncio.Task[int]] = set()
+
+    def configure(self, settings: Any) -> None:
+        self.flush_interval = max(0.0, settings.workflow_trace_flush_ms / 1000)
+        self.max_bytes = settings.workflow_trace_max_bytes or None
+        self.compress = settings.workflow_trace_compress
+
+    @staticmethod
+    def _key(path: Path | str) -> str:
+        raw = os.fspath(path)
+        return raw if os.path.isabs(raw) else os.path.join(os.getcwd(), raw)
+
+    def writer(self, path: Path, *, shared: bool = False) -> JsonlWriter:
+        key = self._key(path)
+        writer = self._writers.get(key)
+        if writer is None:
+            writer = JsonlWriter(
+                Path(key),
+                max_bytes=None if shared else self.max_bytes,
+                compress=self.compress,
+                keep_open=not shared,
+            )
+            self._writers[key] = writer
+        return writer
+
+    def write(self, path: Path, event: str, payload: dict[str, Any], *, shared: bool = False) -> None:
+        """Queue one event; flushing happens off the event loop."""
+        writer = self.writer(path, shared=shared)
+        size = writer.append(_jsonl(event, payload))
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            writer.drain()
+            return
+        if (size >= self.buffer_bytes or self.flush_interval <= 0) and not writer.drain_scheduled:
+            writer.drain_scheduled = True
+            task = loop.create_task(asyncio.to_thread(writer.drain))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+        self._ensure_flusher(loop)
+
+    async def flush(self, path: Path | None = None) -> None:
+        """Drain one writer (or all of them) and wait for the data to hit the file."""
+        if path is not None:
+            writer = self._writers.get(self._key(path))
+            targets = [writer] if writer is not None else []
+        else:
+            targets = list(self._writers.values())
+        for writer in targets:
+            if writer.pending:
+                await asyncio.to_thread(writer.drain)
+
+    async def close(self, path: Path) -> None:
+        """Flush and close a per-run writer."""
+        writer = self._writers.pop(self._key(path), None)
+        if writer is not None:
+            await asyncio.to_thread(writer.close)
+
+    async def close_all(self) -> None:
+        writers, self._writers = list(self._writers.values()), {}
+        for writer in writers:
+            await asyncio.to_thread(writer.close)
+
+    def drain_all(self) -> None:
+        """Blocking drain of every writer (interpreter exit, sync callers)."""
+        for writer in list(self._writers.values()):
+            writer.drain()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "open_writers": len(self._writers),
+            "pending_lines": sum(w.pending for w in self._writers.values()),
+        }
+
+    def _ensure_flusher(self, loop: asyncio.AbstractEventLoop) -> None:
+        task = self._flushers.get(loop)
+        if task is None or task.done():
+            self._flushers[loop] = loop.create_task(self._flush_periodically())
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(max(self.flush_interval, 0.05))
+            try:
+                await self.flush()
+            except Exception as exc:  # pragma: no cover - defensive
+                logger.warning("trace flush failed: %s", exc)
+            if not any(w.pending for w in self._writers.values()):
+                return  # idle: restarted by the next write
+
+
+TRACE_WRITERS = TraceWriterService()
+# Lines buffered when the last event loop went away are written on exit
+atexit.register(TRACE_WRITERS.drain_all)
+
+
+def write_trace(path: Path | None, event: str, payload: dict[str, Any]) -> None:
+    if path is not None:
+        TRACE_WRITERS.write(path, event, payload)
+
+
+def append_evidence(event: str, payload: dict[str, Any], path: Path = CI_EVIDENCE_PATH) -> None:
+    # Resolved at write time: the evidence path is relative to the cwd
+    TRACE_WRITERS.write(path, event, payload, shared=True)
+
+
+__all__ = [
+    "CI_EVIDENCE_PATH",
+    "JsonlWriter",
+    "TRACE_WRITERS",
+    "TraceWriterService",
+    "append_evidence",
+    "write_trace",
+]
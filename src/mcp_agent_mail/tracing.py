@@ -0,0 +1,303 @@
+"""Optional OpenTelemetry tracing driven by the ``HTTP_OTEL_*``/``OTEL_*`` settings.
+
+``configure_tracing`` installs an SDK tracer provider when ``HTTP_OTEL_ENABLED``
+is set and ``opentelemetry-sdk`` is importable (``pip install
+mcp-agent-mail[otel]``). Spans go to OTLP/HTTP when ``OTEL_EXPORTER_OTLP_ENDPOINT``
+is set and/or to a JSONL file (``OTEL_FILE_EXPORTER_PATH``) for offline
+analysis, through a batch processor so export never runs on the request path.
+Sampling is parent-based with a trace-id ratio (``OTEL_TRACES_SAMPLER_ARG``).
+
+While tracing is off, ``span()`` returns a shared no-op context manager, so the
+instrumented call sites cost one global read.
+"""
+
+from __future__ import annotations
+
+import functools
+import importlib
+import json
+import threading
+import time
+from collections.abc import Callable, Mapping, Sequence
+from pathlib import Path
+from typing import Any
+
+import structlog
+
+from .config import Settings
+
+_SQL_STATEMENT_MAX = 1000
+
+_tracer: Any = None
+_provider: Any = None
+
+
+class _NoopSpan:
+    """Stand-in span used while tracing is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> _NoopSpan:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        return None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        return None
+
+    def set_attributes(self, attributes: Mapping[str, Any]) -> None:
+        return None
+
+    def update_name(self, name: str) -> None:
+        return None
+
+    def record_exception(self, exc: BaseException) -> None:
+        return None
+
+    def is_recording(self) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def tracing_enabled() -> bool:
+    return _tracer is not None
+
+
+def span(name: str, attributes: Mapping[str, Any] | None = None) -> Any:
+    """Context manager for a child span of the current span (no-op when disabled)."""
+    tracer = _tracer
+    if tracer is None:
+        return _NOOP_SPAN
+    return tracer.start_as_current_span(name, attributes=dict(attributes or {}))
+
+
+def traced(
+    name: str, attributes: Callable[..., Mapping[str, Any]] | None = None
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator wrapping an async function in ``span(name)``.
+
+    ``attributes`` receives the call arguments and returns span attributes; it
+    only runs while tracing is enabled.
+    """
+
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _tracer is None:
+                return await fn(*args, **kwargs)
+            attrs = attributes(*args, **kwargs) if attributes else None
+            with span(name, attrs):
+                return await fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class JsonlFileSpanExporter:
+    """SpanExporter writing one JSON object per finished span (thread-safe append)."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[Any]) -> Any:
+        result = importlib.import_module("opentelemetry.sdk.trace.export").SpanExportResult
+        lines = [json.dumps(_span_record(s), sort_keys=True, default=str) for s in spans]
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as fh:
+                fh.write("\n".join(lines) + "\n")
+        except OSError:
+            return result.FAILURE
+        return result.SUCCESS
+
+    def shutdown(self) -> None:
+        return None
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return True
+
+
+def _span_record(s: Any) -> dict[str, Any]:
+    ctx = s.get_span_context()
+    parent = s.parent
+    return {
+        "name": s.name,
+        "trace_id": f"{ctx.trace_id:032x}",
+        "span_id": f"{ctx.span_id:016x}",
+        "parent_span_id": f"{parent.span_id:016x}" if parent is not None else None,
+        "kind": getattr(s.kind, "name", str(s.kind)),
+        "start_unix_nano": s.start_time,
+        "end_unix_nano": s.end_time,
+        "duration_ms": round(((s.end_time or 0) - (s.start_time or 0)) / 1e6, 3),
+        "status": getattr(s.status.status_code, "name", str(s.status.status_code)),
+        "attributes": dict(s.attributes or {}),
+    }
+
+
+def configure_tracing(settings: Settings) -> bool:
+    """Install the tracer provider once; returns True when spans are being recorded."""
+    global _tracer, _provider
+    if _tracer is not None:
+        return True
+    http = settings.http
+    if not http.otel_enabled:
+        return False
+    log = structlog.get_logger("tracing")
+    try:
+        trace_api = importlib.import_module("opentelemetry.trace")
+        sdk_trace = importlib.import_module("opentelemetry.sdk.trace")
+        sdk_export = importlib.import_module("opentelemetry.sdk.trace.export")
+        sdk_sampling = importlib.import_module("opentelemetry.sdk.trace.sampling")
+        sdk_resources = importlib.import_module("opentelemetry.sdk.resources")
+    except ImportError as exc:
+        log.warning("otel_sdk_unavailable", error=str(exc))
+        return False
+
+    ratio = min(1.0, max(0.0, float(http.otel_sample_ratio)))
+    provider = sdk_trace.TracerProvider(
+        resource=sdk_resources.Resource.create({"service.name": http.otel_service_name}),
+        sampler=sdk_sampling.ParentBased(sdk_sampling.TraceIdRatioBased(ratio)),
+    )
+    exporters: list[Any] = []
+    if http.otel_exporter_otlp_endpoint:
+        try:
+            otlp = importlib.import_module(
+                "opentelemetry.exporter.otlp.proto.http.trace_exporter"
+            )
+            endpoint = http.otel_exporter_otlp_endpoint.rstrip("/")
+            if not endpoint.endswith("/v1/traces"):
+                endpoint += "/v1/traces"
+            exporters.append(otlp.OTLPSpanExporter(endpoint=endpoint))
+        except ImportError as exc:
+            log.warning("otel_otlp_exporter_unavailable", error=str(exc))
+    if http.otel_file_exporter_path:
+        exporters.append(JsonlFileSpanExporter(http.otel_file_exporter_path))
+    if not exporters:
+        log.warning("otel_no_exporter_configured")
+        return False
+    for exporter in exporters:
+        provider.add_span_processor(sdk_export.BatchSpanProcessor(exporter))
+    trace_api.set_tracer_provider(provider)
+    _provider = provider
+    _tracer = provider.get_tracer("mcp_agent_mail")
+    log.info(
+        "otel_tracing_enabled",
+        service=http.otel_service_name,
+        sample_ratio=ratio,
+        exporters=[type(e).__name__ for e in exporters],
+    )
+    return True
+
+
+def shutdown_tracing() -> None:
+    """Flush pending spans and disable tracing."""
+    global _tracer, _provider
+    provider, _provider, _tracer = _provider, None, None
+    if provider is not None:
+        provider.shutdown()
+
+
+def instrument_engine(engine: Any) -> None:
+    """Emit a ``db.query`` span per SQL statement executed on ``engine``."""
+    if _tracer is None:
+        return
+    from sqlalchemy import event
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if getattr(sync_engine, "_mcp_tracing", False):
+        return
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn: Any, cursor: Any, statement: str, params: Any, context: Any, executemany: bool) -> None:
+        tracer = _tracer
+        if tracer is None or context is None:
+            return
+        s = tracer.start_span(
+            "db.query",
+            attributes={
+                "db.system": sync_engine.dialect.name,
+                "db.statement": statement[:_SQL_STATEMENT_MAX],
+                "db.executemany": bool(executemany),
+            },
+        )
+        context._mcp_span = s
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn: Any, cursor: Any, statement: str, params: Any, context: Any, executemany: bool) -> None:
+        s = getattr(context, "_mcp_span", None)
+        if s is not None:
+            s.end()
+            context._mcp_span = None
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(exception_context: Any) -> None:
+        context = exception_context.execution_context
+        s = getattr(context, "_mcp_span", None) if context is not None else None
+        if s is not None:
+            s.record_exception(exception_context.original_exception)
+            s.end()
+            context._mcp_span = None
+
+    sync_engine._mcp_tracing = True
+
+
+class TracingMiddleware:
+    """ASGI middleware opening a server span per HTTP request (W3C traceparent aware)."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Any, receive: Any, send: Any) -> None:
+        tracer = _tracer
+        if tracer is None or scope.get("type") != "http":
+            await self.app(scope, receive, send)
+            return
+        propagate = importlib.import_module("opentelemetry.propagate")
+        trace_api = importlib.import_module("opentelemetry.trace")
+        carrier = {
+            k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])
+        }
+        method = scope.get("method", "GET")
+        started = time.perf_counter()
+        with tracer.start_as_current_span(
+            f"HTTP {method}",
+            context=propagate.extract(carrier),
+            kind=trace_api.SpanKind.SERVER,
+            attributes={"http.request.method": method, "url.path": scope.get("path", "")},
+        ) as server_span:
+
+            async def _send(message: Any) -> None:
+                if message["type"] == "http.response.start":
+                    status = int(message.get("status", 0))
+                    server_span.set_attribute("http.response.status_code", status)
+                    server_span.set_attribute(
+                        "http.server.ttfb_ms", (time.perf_counter() - started) * 1000
+                    )
+                    if status >= 500:
+                        server_span.set_status(trace_api.Status(trace_api.StatusCode.ERROR))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, _send)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    server_span.set_attribute("http.route", route)
+                    server_span.update_name(f"HTTP {method} {route}")
+
+
+__all__ = [
+    "JsonlFileSpanExporter",
+    "TracingMiddleware",
+    "configure_tracing",
+    "instrument_engine",
+    "shutdown_tracing",
+    "span",
+    "traced",
+    "tracing_enabled",
+]
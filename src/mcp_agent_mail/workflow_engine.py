@@ -2,26 +2,80 @@
 
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import hashlib
 import json
 import logging
+import os
+import socket
+import time
 import traceback
 from abc import ABC, abstractmethod
+from collections.abc import Callable
+from contextvars import ContextVar
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 from uuid import UUID
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlmodel import select
 
 from .models import Artifact, Knowledge, Mission, Signal, Task, TaskGroup, WorkflowRun
+from .self_heal import (
+    RECOVERY_FOR_KEY,
+    SELF_HEAL_CONTEXT_KEY,
+    SelfHealPolicy,
+    is_recovery_task,
+    strategy_names,
+)
+from .signal_bus import SIGNAL_BUS
+from .task_cache import TASK_CACHE_TTL_SECONDS_DEFAULT, TaskResultCache, task_cache_key
+from .task_graph import critical_path, task_dependencies, topological_order
+from .task_loop import (
+    LOOP_CONTEXT_KEY,
+    LOOP_MAX_ITERATIONS_DEFAULT,
+    LoopSpec,
+    converged,
+    parse_loop_spec,
+)
+from .trace_writer import CI_EVIDENCE_PATH, TRACE_WRITERS, append_evidence, write_trace
+from .tracing import traced
 
 TRACE_DIR_DEFAULT = Path("data/logs/current/audit/workflow_runs")
 
 logger = logging.getLogger(__name__)
 
-SELF_HEAL_MAX_RECOVERY_TASKS = 1  # MVP: 1 回だけ自動リカバリを試行
+PARALLEL_MAX_CONCURRENCY_DEFAULT = 4
+STATE_FLUSH_MS_DEFAULT = 500.0
+HEARTBEAT_SECONDS_DEFAULT = 60.0
+
+# 実行中 run の worker_id / 孤立判定に使うプロセス識別子 (host:pid)
+PROCESS_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+# 並列実行中のタスクごとの DB セッション (未設定時はエンジン共有のセッション)
+_TASK_SESSION: ContextVar[AsyncSession | None] = ContextVar("workflow_task_session", default=None)
+
+
+class TaskGroupError(Exception):
+    """タスクグループ内で失敗したタスクをまとめて保持する例外。"""
+
+    def __init__(self, group_id: Any, failures: list[tuple[Any, str]], scope: str = "TaskGroup"):
+        self.group_id = group_id
+        self.failures = failures
+        detail = "; ".join(f"Task {task_id} failed: {error}" for task_id, error in failures)
+        super().__init__(f"{scope} {group_id}: {len(failures)} task(s) failed: {detail}")
+
+
+class LoopExhaustedError(Exception):
+    """ループが収束条件を満たさないまま反復・時間の上限に達した場合の例外。"""
+
+    def __init__(self, scope_id: Any, iterations: int, reason: str):
+        self.scope_id = scope_id
+        self.iterations = iterations
+        self.reason = reason
+        super().__init__(f"Loop {scope_id} did not converge after {iterations} iteration(s) ({reason})")
 
 
 def _build_trace_path(trace_dir: Path | None, run_id: UUID) -> Path:
@@ -33,26 +87,57 @@ def _build_trace_path(trace_dir: Path | None, run_id: UUID) -> Path:
 
 
 def _write_trace_entry(trace_path: Path | None, event: str, payload: dict[str, Any]) -> None:
-    """Trace ファイルに JSON line を追記する。"""
-    if trace_path is None:
-        return
-    trace_path.parent.mkdir(parents=True, exist_ok=True)
-    entry = {"ts": datetime.now(timezone.utc).isoformat(), "event": event}
-    entry.update(payload)
-    with trace_path.open("a", encoding="utf-8") as fh:
-        json.dump(entry, fh, ensure_ascii=False)
-        fh.write("\n")
+    """Trace ファイルに JSON line を追記する (バッファリングし、書き込みはスレッドへ退避)。"""
+    write_trace(trace_path, event, payload)
 
 
 def _append_ci_evidence(event: str, payload: dict[str, Any]) -> None:
-    """observability/policy/ci_evidence.jsonl にワークフロー実行ログを追記する。"""
-    evidence_path = Path("observability/policy/ci_evidence.jsonl")
-    evidence_path.parent.mkdir(parents=True, exist_ok=True)
-    row = {"ts": datetime.now(timezone.utc).isoformat(), "event": event}
-    row.update(payload)
-    with evidence_path.open("a", encoding="utf-8") as fh:
-        json.dump(row, fh, ensure_ascii=False)
-        fh.write("\n")
+    """observability/policy/ci_evidence.jsonl にワークフロー実行ログを追記する (実行間でまとめて書き込む)。"""
+    append_evidence(event, payload)
+
+
+class StatePersister:
+    """状態遷移のコミットをまとめる永続化レイヤー。
+
+    途中状態 (running・completed 等) はセッションに積んだまま保留し、前回コミットから
+    flush_interval_ms 経過した時点かチェックポイント (グループ境界) でまとめてコミットする。
+    失敗と実行の終端状態は immediate=True で即時にコミットする。flush_interval_ms=0 は遷移ごと。
+    """
+
+    def __init__(self, flush_interval_ms: float = STATE_FLUSH_MS_DEFAULT):
+        self.flush_interval = max(0.0, flush_interval_ms) / 1000
+        self.transitions = 0
+        self.commits = 0
+
+    async def record(self, session: AsyncSession, *objs: Any, immediate: bool = False) -> None:
+        """オブジェクトの状態遷移を記録し、必要ならコミットする。"""
+        for obj in objs:
+            session.add(obj)
+        self.transitions += len(objs)
+        # Pending counts live on the session: parallel tasks use their own sessions
+        info = session.info
+        info["workflow_state_pending"] = info.get("workflow_state_pending", 0) + len(objs)
+        last = info.setdefault("workflow_state_flushed_at", time.perf_counter())
+        if immediate or time.perf_counter() - last >= self.flush_interval:
+            await self.flush(session)
+
+    async def checkpoint(self, session: AsyncSession) -> None:
+        """保留中の遷移があればコミットし、読み取りトランザクションも閉じる。"""
+        if session.info.get("workflow_state_pending") or session.in_transaction():
+            await self.flush(session)
+
+    async def flush(self, session: AsyncSession) -> None:
+        await session.commit()
+        self.commits += 1
+        session.info["workflow_state_pending"] = 0
+        session.info["workflow_state_flushed_at"] = time.perf_counter()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "state_transitions": self.transitions,
+            "state_commits": self.commits,
+            "state_flush_ms": round(self.flush_interval * 1000, 3),
+        }
 
 
 class WorkflowContext:
@@ -71,6 +156,13 @@ class WorkflowContext:
         self.shared_data: dict[str, Any] = {}
         self.execution_history: list[dict[str, Any]] = []
         self.trace_path = trace_path
+        self.completed_task_ids: set[str] = set()
+        # ループ範囲 (グループ ID / ミッション ID) ごとの {"iteration": n, "done": bool}
+        self.loops: dict[str, dict[str, Any]] = {}
+        # run 単位で消費したセルフヒール予算 (再試行・リカバリタスクの数)
+        self.recovery_attempts = 0
+        # run 終了時にまとめて保存するセルフヒールの artifact / knowledge
+        self.pending_records: list[Artifact | Knowledge] = []
 
     def update(self, key: str, value: Any) -> None:
         """共有データをセットする。"""
@@ -85,43 +177,136 @@ class WorkflowContext:
         self.execution_history.append(entry)
         _write_trace_entry(self.trace_path, "workflow_engine_task_event", entry)
 
+    def mark_completed(self, task_id: Any) -> None:
+        """完了タスクを再開カーソルに加える。"""
+        self.completed_task_ids.add(str(task_id))
+
+    def is_completed(self, task_id: Any) -> bool:
+        """再開カーソル上で完了済みか。"""
+        return str(task_id) in self.completed_task_ids
+
+    def cursor(self) -> dict[str, Any]:
+        """WorkflowRun.checkpoint に保存する再開カーソル (JSON 化できない値は文字列化)。"""
+        return {
+            "completed_task_ids": sorted(self.completed_task_ids),
+            "shared_data": json.loads(json.dumps(self.shared_data, default=str)),
+            "loops": dict(self.loops),
+            "recovery_attempts": self.recovery_attempts,
+        }
+
+    def restore(self, checkpoint: dict[str, Any] | None) -> int:
+        """保存済みカーソルを読み込み、完了済みタスク数を返す。"""
+        if not checkpoint:
+            return 0
+        self.completed_task_ids.update(str(t) for t in checkpoint.get("completed_task_ids") or [])
+        self.shared_data.update(checkpoint.get("shared_data") or {})
+        self.loops.update(checkpoint.get("loops") or {})
+        self.recovery_attempts = int(checkpoint.get("recovery_attempts") or 0)
+        return len(self.completed_task_ids)
+
 
 class WorkflowEngine(ABC):
     """ワークフローエンジンの抽象基底クラス。"""
 
-    def __init__(self, session: AsyncSession, trace_dir: Path | None = None):
-        self.session = session
+    def __init__(
+        self,
+        session: AsyncSession,
+        trace_dir: Path | None = None,
+        *,
+        max_concurrency: int | None = None,
+        session_factory: Callable[[], AsyncSession] | None = None,
+        state_flush_ms: float | None = None,
+        heartbeat_seconds: float = HEARTBEAT_SECONDS_DEFAULT,
+        task_cache_enabled: bool = False,
+        task_cache_ttl_seconds: float = TASK_CACHE_TTL_SECONDS_DEFAULT,
+        loop_max_iterations: int = LOOP_MAX_ITERATIONS_DEFAULT,
+        self_heal_policy: SelfHealPolicy | None = None,
+    ):
+        self._session = session
         self.trace_dir = Path(trace_dir or TRACE_DIR_DEFAULT)
+        self.max_concurrency = max(1, max_concurrency or PARALLEL_MAX_CONCURRENCY_DEFAULT)
+        self._session_factory = session_factory
+        self.state = StatePersister(
+            STATE_FLUSH_MS_DEFAULT if state_flush_ms is None else state_flush_ms
+        )
+        self.heartbeat_seconds = heartbeat_seconds
+        self.task_cache = TaskResultCache(
+            enabled=task_cache_enabled, ttl_seconds=task_cache_ttl_seconds
+        )
+        self.loop_max_iterations = max(1, loop_max_iterations)
+        self.self_heal_policy = self_heal_policy or SelfHealPolicy()
+        self._run: WorkflowRun | None = None
+
+    @property
+    def session(self) -> AsyncSession:
+        """現在のタスクに割り当てられたセッション (並列実行中はタスク専用)。"""
+        return _TASK_SESSION.get() or self._session
+
+    @session.setter
+    def session(self, value: AsyncSession) -> None:
+        self._session = value
+
+    def _has_independent_connections(self) -> bool:
+        """セッションごとに別コネクションを得られるか (StaticPool 等は不可)。"""
+        if self._session_factory is not None:
+            return True
+        from sqlalchemy.pool import SingletonThreadPool, StaticPool
+
+        bind = self._session.bind
+        pool = getattr(getattr(bind, "sync_engine", bind), "pool", None)
+        return not isinstance(pool, (StaticPool, SingletonThreadPool))
+
+    def new_session(self) -> AsyncSession:
+        """並列タスク用に独立したセッションを生成する。"""
+        if self._session_factory is None:
+            self._session_factory = async_sessionmaker(
+                self._session.bind, class_=AsyncSession, expire_on_commit=False
+            )
+        return self._session_factory()
 
     @abstractmethod
-    async def run(self, mission: Mission) -> str:
-        """ミッションを実行し、最終ステータスを返す。"""
+    async def run(self, mission: Mission, run: WorkflowRun | None = None) -> str:
+        """ミッションを実行し、最終ステータスを返す (run 指定時はキュー済みの実行を引き継ぐ)。"""
 
 
 class SequentialWorkflow(WorkflowEngine):
-    """タスクグループとタスクを順次実行するワークフロー。"""
+    """タスクグループを順次実行し、kind="parallel" のグループ内タスクは並列実行するワークフロー。"""
+
+    # True の場合は kind に関係なく全グループのタスクを並列実行する
+    parallel_groups = False
+    # WorkflowRun.allow_self_heal に記録し、再開時に同じクラスを選べるようにする
+    self_heal = False
 
-    async def run(self, mission: Mission) -> str:
+    async def run(self, mission: Mission, run: WorkflowRun | None = None) -> str:
         logger.info(f"Starting mission {mission.id}: {mission.title}")
         mission.status = "running"
         mission.updated_at = datetime.now(timezone.utc)
-        self.session.add(mission)
-        await self.session.commit()
-
-        run = WorkflowRun(
-            mission_id=mission.id,
-            mode=mission.run_mode or "sequential",
-            status="running",
-            started_at=datetime.now(timezone.utc),
-        )
+
+        if run is None:
+            run = WorkflowRun(
+                mission_id=mission.id,
+                project_id=mission.project_id,
+                mode=mission.run_mode or "sequential",
+                status="running",
+                started_at=datetime.now(timezone.utc),
+                worker_id=f"{PROCESS_ID}:inline",
+                allow_self_heal=self.self_heal,
+            )
+        else:
+            # Queued (or resumed) run: keep its run_id and checkpoint
+            run.status = "running"
+            run.ended_at = None
+        run.heartbeat_at = datetime.now(timezone.utc)
+        self._run = run
         trace_path = _build_trace_path(self.trace_dir, run.run_id)
         run.trace_uri = str(trace_path)
-        self.session.add(run)
-        await self.session.commit()
+        # Mission and run become visible together (one commit)
+        await self.state.record(self.session, mission, run, immediate=True)
 
         context = WorkflowContext(mission.id, self.session, run.run_id, trace_path=trace_path)
         if mission.context:
             context.shared_data.update(mission.context)
+        resumed = context.restore(run.checkpoint)
 
         _write_trace_entry(
             trace_path,
@@ -142,41 +327,22 @@ class SequentialWorkflow(WorkflowEngine):
                 "trace_uri": str(trace_path),
             },
         )
+        if resumed:
+            _write_trace_entry(
+                trace_path,
+                "workflow_engine_run_resumed",
+                {"run_id": str(run.run_id), "completed_tasks": resumed},
+            )
 
-        last_task: Task | None = None
+        heartbeat = self._start_heartbeat(run.run_id)
         try:
-            # Fetch task groups sorted by order
-            stmt = (
-                select(TaskGroup)
-                .where(TaskGroup.mission_id == mission.id)
-                # SQLModel の型上 order は int だが、実体はカラムなので table.c を経由して明示する
-                .order_by(TaskGroup.__table__.c.order)  # type: ignore[arg-type]
-            )
-            result = await self.session.execute(stmt)
-            task_groups = result.scalars().all()
-
-            for group in task_groups:
-                await self.execute_group(group, context)
-
-                # Reload mission to check if it was cancelled externally
-                await self.session.refresh(mission)
-                if mission.status == "failed":
-                    break
-                # keep reference to last executed task for summary artifact
-                stmt_tasks = (
-                    select(Task).where(Task.group_id == group.id).order_by(Task.__table__.c.order)  # type: ignore[arg-type]
-                )
-                result_tasks = await self.session.execute(stmt_tasks)
-                tasks_in_group = result_tasks.scalars().all()
-                if tasks_in_group:
-                    last_task = tasks_in_group[-1]
+            last_task = await self.execute_groups(mission, context)
 
             if mission.status != "failed":
                 mission.status = "completed"
                 run.status = "completed"
                 if last_task is not None:
-                    await _record_self_heal_artifact(
-                        session=self.session,
+                    _queue_self_heal_artifact(
                         context=context,
                         task=last_task,
                         summary="workflow completed",
@@ -198,11 +364,19 @@ class SequentialWorkflow(WorkflowEngine):
                 },
             )
             # In a real system, we might want to store the error in the mission model
+        finally:
+            if heartbeat is not None:
+                heartbeat.cancel()
+                with contextlib.suppress(BaseException):
+                    await heartbeat
 
         mission.updated_at = datetime.now(timezone.utc)
-        self.session.add(mission)
         run.ended_at = datetime.now(timezone.utc)
-        self.session.add(run)
+        run.checkpoint = context.cursor()
+        # Self-heal artifacts/knowledge of the whole run go out with the final commit
+        self.session.add_all(context.pending_records)
+        context.pending_records = []
+        await self.state.record(self.session, mission, run, immediate=True)
         _write_trace_entry(
             trace_path,
             "workflow_engine_run_completed",
@@ -210,6 +384,8 @@ class SequentialWorkflow(WorkflowEngine):
                 "mission_id": str(mission.id),
                 "run_id": str(run.run_id),
                 "status": mission.status,
+                **self.state.stats(),
+                "task_cache": self.task_cache.stats(),
             },
         )
         _append_ci_evidence(
@@ -221,36 +397,101 @@ class SequentialWorkflow(WorkflowEngine):
                 "trace_uri": str(trace_path),
             },
         )
-        await self.session.commit()
+        # The run is over: its trace and evidence lines must be on disk for readers
+        await TRACE_WRITERS.close(trace_path)
+        await TRACE_WRITERS.flush(CI_EVIDENCE_PATH)
 
         logger.info(f"Mission {mission.id} finished with status: {mission.status}")
         return mission.status
 
+    async def save_checkpoint(self, context: WorkflowContext, *, immediate: bool = False) -> None:
+        """再開カーソルを WorkflowRun に記録する (共有セッション上でのみ呼ぶ)。"""
+        run = self._run
+        if run is None:
+            return
+        run.checkpoint = context.cursor()
+        run.heartbeat_at = datetime.now(timezone.utc)
+        await self.state.record(self.session, run, immediate=immediate)
+
+    def _start_heartbeat(self, run_id: UUID) -> asyncio.Task[None] | None:
+        """実行中であることを別セッションで定期的に記録する (孤立 run 検出用)。"""
+        if self.heartbeat_seconds <= 0 or not self._has_independent_connections():
+            return None
+
+        async def _beat() -> None:
+            table = WorkflowRun.__table__
+            while True:
+                await asyncio.sleep(self.heartbeat_seconds)
+                try:
+                    async with self.new_session() as session:
+                        await session.execute(
+                            table.update()
+                            .where(table.c.run_id == run_id)
+                            .values(heartbeat_at=datetime.now(timezone.utc))
+                        )
+                        await session.commit()
+                except Exception as exc:  # the next beat retries
+                    logger.warning(f"Heartbeat for run {run_id} failed: {exc}")
+
+        return asyncio.create_task(_beat())
+
+    async def _load_groups(self, mission: Mission) -> list[TaskGroup]:
+        """ミッションのタスクグループを order 順に取得する。"""
+        stmt = (
+            select(TaskGroup)
+            .where(TaskGroup.mission_id == mission.id)
+            # SQLModel の型上 order は int だが、実体はカラムなので table.c を経由して明示する
+            .order_by(TaskGroup.__table__.c.order)  # type: ignore[arg-type]
+        )
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def execute_groups(self, mission: Mission, context: WorkflowContext) -> Task | None:
+        """タスクグループを order 順に実行し、最後に実行したタスクを返す。"""
+        last_task: Task | None = None
+        for group in await self._load_groups(mission):
+            await self.execute_group(group, context)
+
+            # Check whether the mission was cancelled externally (status only;
+            # refresh() would also discard in-memory state)
+            current = await self.session.scalar(
+                select(Mission.__table__.c.status).where(Mission.__table__.c.id == mission.id)
+            )
+            if current == "failed":
+                mission.status = "failed"
+                break
+            # keep reference to last executed task for summary artifact
+            stmt_tasks = (
+                select(Task).where(Task.group_id == group.id).order_by(Task.__table__.c.order)  # type: ignore[arg-type]
+            )
+            result_tasks = await self.session.execute(stmt_tasks)
+            tasks_in_group = result_tasks.scalars().all()
+            if tasks_in_group:
+                last_task = tasks_in_group[-1]
+        return last_task
+
+    @traced(
+        "workflow.group",
+        lambda self, group, context: {"workflow.group_id": str(group.id), "workflow.run_id": str(context.run_id)},
+    )
     async def execute_group(self, group: TaskGroup, context: WorkflowContext):
-        """タスクグループを順次実行する。"""
+        """タスクグループを実行する (sequential は順次、parallel は並列)。"""
         logger.info(f"Executing TaskGroup {group.id}: {group.title} ({group.kind})")
         group.status = "running"
-        self.session.add(group)
-        await self.session.commit()
+        await self.state.record(self.session, group)
 
         try:
-            # Fetch tasks for this group
-            # Note: In a real sequential group, we might want an order for tasks too.
-            # For now, we assume tasks in a group can be run in any order or insertion order.
-            # But 'sequential' usually implies an order. Let's assume tasks have an implicit order or we just run them.
-            # If TaskGroup kind is 'sequential', we run tasks one by one.
-            # If 'parallel', we could run them concurrently (not implemented in v1).
-
-            stmt = (
-                select(Task).where(Task.group_id == group.id).order_by(Task.__table__.c.order)  # type: ignore[arg-type]
-            )
-            result = await self.session.execute(stmt)
-            tasks = result.scalars().all()
-
-            for task in tasks:
-                await self.execute_task(task, context)
-                if task.status == "failed":
-                    raise Exception(f"Task {task.id} failed: {task.error}")
+            if group.kind == "loop":
+                spec = parse_loop_spec(group.loop, default_max_iterations=self.loop_max_iterations)
+                await self.execute_loop(
+                    spec,
+                    [group],
+                    context,
+                    lambda: self.execute_group_tasks(group, context),
+                    scope_id=str(group.id),
+                )
+            else:
+                await self.execute_group_tasks(group, context)
 
             group.status = "completed"
 
@@ -260,15 +501,244 @@ class SequentialWorkflow(WorkflowEngine):
             # Propagate error to stop mission
             raise e
         finally:
-            self.session.add(group)
-            await self.session.commit()
+            # Group boundary: persist the coalesced task transitions and the cursor
+            await self.save_checkpoint(context)
+            await self.state.record(self.session, group, immediate=True)
+
+    async def execute_group_tasks(self, group: TaskGroup, context: WorkflowContext) -> None:
+        """グループのタスクを 1 巡実行する (失敗時は例外)。"""
+        # Tasks run in Task.order; kind="parallel" groups (or every group in
+        # ParallelWorkflow) run them concurrently up to max_concurrency.
+        stmt = (
+            select(Task).where(Task.group_id == group.id).order_by(Task.__table__.c.order)  # type: ignore[arg-type]
+        )
+        # no_autoflush: the deferred group state must not take the write lock
+        # for the whole group
+        with self.session.no_autoflush:
+            result = await self.session.execute(stmt)
+        tasks = result.scalars().all()
+
+        # Resumed runs skip tasks recorded in the checkpoint cursor; recovery
+        # tasks only run through self-heal
+        tasks = [
+            task
+            for task in tasks
+            if not context.is_completed(task.id) and not is_recovery_task(task.input)
+        ]
+        if self.parallel_groups or group.kind == "parallel":
+            await self.execute_tasks_parallel(group, tasks, context)
+        else:
+            for task in tasks:
+                await self.execute_task(task, context)
+                if task.status == "failed":
+                    raise Exception(f"Task {task.id} failed: {task.error}")
+                await self.save_checkpoint(context)
+
+    async def execute_loop(
+        self,
+        spec: LoopSpec,
+        groups: list[TaskGroup],
+        context: WorkflowContext,
+        body: Callable[[], Any],
+        *,
+        scope_id: str,
+    ) -> Any:
+        """body を収束条件が満たされるか反復・時間の上限まで繰り返し、最後の戻り値を返す。
+
+        各反復は同じ Task 行を pending に戻して再利用し、TaskGroup/Task.iteration を進める。
+        失敗したタスクを含む反復は未収束として扱い、上限内なら次の反復で再実行する。
+        再開時は checkpoint の反復から続ける (max_seconds の計測は再開時点から)。
+        """
+        state = context.loops.get(scope_id)
+        if state and state.get("done"):
+            return None  # finished before the run was interrupted
+        iteration = int(state["iteration"]) if state else 0
+        resume_current = state is not None
+        started = time.perf_counter()
+        result: Any = None
+        done = False
+        reason = "max_iterations"
+        error: Exception | None = None
+        while True:
+            if not resume_current:
+                iteration += 1
+                await self._begin_iteration(groups, iteration, context)
+                context.loops[scope_id] = {"iteration": iteration, "done": False}
+                await self.save_checkpoint(context)
+            resume_current = False
+            iteration_started = time.perf_counter()
+            error = None
+            try:
+                result = await body()
+            except Exception as exc:
+                error = exc
+            ran = await self._iteration_tasks(groups)
+            done = (
+                error is None
+                and spec.until is not None
+                and converged(spec.until, context.shared_data, ran)
+            )
+            _write_trace_entry(
+                context.trace_path,
+                "workflow_engine_loop_iteration",
+                {
+                    "scope_id": scope_id,
+                    "run_id": str(context.run_id),
+                    "iteration": iteration,
+                    "converged": done,
+                    "error": str(error) if error else None,
+                    "elapsed_ms": round((time.perf_counter() - iteration_started) * 1000, 3),
+                },
+            )
+            if done:
+                reason = "converged"
+                break
+            if iteration >= spec.max_iterations:
+                reason = "max_iterations"
+                break
+            if spec.max_seconds is not None and time.perf_counter() - started >= spec.max_seconds:
+                reason = "max_seconds"
+                break
+            # Stop looping when the mission was cancelled externally
+            current = await self.session.scalar(
+                select(Mission.__table__.c.status).where(Mission.__table__.c.id == context.mission_id)
+            )
+            if current == "failed":
+                reason = "cancelled"
+                break
+
+        context.loops[scope_id] = {"iteration": iteration, "done": error is None}
+        await self.save_checkpoint(context)
+        _write_trace_entry(
+            context.trace_path,
+            "workflow_engine_loop_completed",
+            {
+                "scope_id": scope_id,
+                "run_id": str(context.run_id),
+                "iterations": iteration,
+                "converged": done,
+                "reason": reason,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+            },
+        )
+        if error is not None:
+            raise error
+        if spec.until is not None and not done and reason != "cancelled" and spec.on_exhausted == "fail":
+            raise LoopExhaustedError(scope_id, iteration, reason)
+        return result
+
+    async def _begin_iteration(
+        self, groups: list[TaskGroup], iteration: int, context: WorkflowContext
+    ) -> None:
+        """反復の開始: 既存の Task 行を pending に戻し、反復番号を記録する。"""
+        rows = await self.session.execute(
+            select(Task).where(Task.group_id.in_([group.id for group in groups]))  # type: ignore[attr-defined]
+        )
+        tasks = rows.scalars().all()
+        for group in groups:
+            group.iteration = iteration
+            # Loops nested in a mission loop start over on every outer iteration
+            context.loops.pop(str(group.id), None)
+        for task in tasks:
+            task.status = "pending"
+            task.error = None
+            task.iteration = iteration
+            context.completed_task_ids.discard(str(task.id))
+        await self.state.record(self.session, *groups, *tasks)
+
+    async def _iteration_tasks(self, groups: list[TaskGroup]) -> dict[str, dict[str, Any]]:
+        """今回の反復で実行されたタスクを ID・タイトルから引ける形で返す (収束判定用)。"""
+        rows = await self.session.execute(
+            select(Task)
+            .where(Task.group_id.in_([group.id for group in groups]))  # type: ignore[attr-defined]
+            .order_by(Task.__table__.c.order)  # type: ignore[arg-type]
+        )
+        ran: dict[str, dict[str, Any]] = {}
+        for task in rows.scalars().all():
+            if task.status == "pending":
+                continue
+            doc = {"status": task.status, "output": task.output, "error": task.error}
+            ran[str(task.id)] = doc
+            ran[task.title] = doc
+        return ran
+
+    def _task_semaphore(self) -> asyncio.Semaphore:
+        """同時実行数を制限するセマフォ (共有コネクションのプールでは 1)。"""
+        if not self._has_independent_connections():
+            # A single shared connection (in-memory SQLite) cannot host
+            # concurrent transactions; run on the shared session one at a time.
+            logger.warning("Session pool shares one connection, running tasks sequentially")
+            return asyncio.Semaphore(1)
+        return asyncio.Semaphore(self.max_concurrency)
+
+    async def _run_isolated(
+        self, task: Task, context: WorkflowContext, semaphore: asyncio.Semaphore
+    ) -> float:
+        """セマフォ内でタスクを専用セッションで実行し、所要時間 (ms) を返す。"""
+        async with semaphore:
+            started = time.perf_counter()
+            if not self._has_independent_connections():
+                await self.execute_task(task, context)
+            else:
+                async with self.new_session() as session:
+                    token = _TASK_SESSION.set(session)
+                    try:
+                        own_task = await session.get(Task, task.id)
+                        if own_task is not None:
+                            await self.execute_task(own_task, context)
+                            await self.state.checkpoint(session)
+                    finally:
+                        _TASK_SESSION.reset(token)
+                return (time.perf_counter() - started) * 1000
+            # The caller refreshes the task from the database
+            await self.state.checkpoint(self.session)
+            return (time.perf_counter() - started) * 1000
+
+    async def execute_tasks_parallel(
+        self, group: TaskGroup, tasks: list[Task], context: WorkflowContext
+    ) -> None:
+        """タスクを並列実行し、失敗をまとめて TaskGroupError として送出する。"""
+        # Release the shared session's transaction before workers write
+        await self.state.checkpoint(self.session)
+        semaphore = self._task_semaphore()
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(self._run_isolated(task, context, semaphore) for task in tasks),
+            return_exceptions=True,
+        )
+
+        # Worker sessions committed their own rows; reload the shared session's copies
+        failures: list[tuple[Any, str]] = []
+        for task, outcome in zip(tasks, results, strict=True):
+            await self.session.refresh(task)
+            if isinstance(outcome, BaseException):
+                failures.append((task.id, str(outcome)))
+            elif task.status == "failed":
+                failures.append((task.id, task.error or "failed"))
+        _write_trace_entry(
+            context.trace_path,
+            "workflow_engine_parallel_group_completed",
+            {
+                "group_id": str(group.id),
+                "run_id": str(context.run_id),
+                "tasks": len(tasks),
+                "failed": len(failures),
+                "max_concurrency": self.max_concurrency,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+            },
+        )
+        if failures:
+            raise TaskGroupError(group.id, failures)
 
+    @traced(
+        "workflow.task",
+        lambda self, task, context: {"workflow.task_id": str(task.id), "workflow.run_id": str(context.run_id)},
+    )
     async def execute_task(self, task: Task, context: WorkflowContext):
         """単一タスクを実行し、出力・ステータスを反映する (MVP では擬似実行)。"""
         logger.info(f"Executing Task {task.id}: {task.title}")
         task.status = "running"
-        self.session.add(task)
-        await self.session.commit()
+        await self.state.record(self.session, task)
 
         try:
             # Here is where we would actually invoke the agent or tool.
@@ -282,13 +752,45 @@ class SequentialWorkflow(WorkflowEngine):
 
             # Agent CLI execution path (minimal integration)
             if task.input.get("kind") == "agent_cli":
-                from orchestrator.conpty_wrapper import load_engine_config, spawn_agent_cli
+                from orchestrator.conpty_wrapper import load_engine_config, spawn_agent_cli_async
 
                 # Load engine config from engines.yaml with fallback
                 engine_name = task.input.get("engine", "demo")
                 engine_cfg = load_engine_config(engine_name)
                 command = task.input.get("command", engine_cfg["command"])
-                result = spawn_agent_cli(command, context.mission_id, context.run_id)
+                cache_key = None
+                if self.task_cache.applies(task.input):
+                    cache_key = await task_cache_key(self.session, engine_cfg, command, task.input)
+                    cached = await self.task_cache.lookup(self.session, cache_key)
+                    _write_trace_entry(
+                        context.trace_path,
+                        "workflow_engine_task_cache",
+                        {"task_id": str(task.id), "cache_key": cache_key, "hit": cached is not None},
+                    )
+                    if cached is not None:
+                        # Same engine, command, input and artifacts: reuse instead of re-spawning
+                        await self.task_cache.restore(self.session, cached, task, context.mission_id)
+                        context.append_history(
+                            {
+                                "task_id": str(task.id),
+                                "status": task.status,
+                                "output": task.output,
+                                "run_id": str(context.run_id),
+                            }
+                        )
+                        return
+                # The CLI may run for minutes: make "running" visible before blocking
+                await self.state.checkpoint(self.session)
+                # asyncio subprocess: the event loop keeps serving while the agent runs
+                result = await spawn_agent_cli_async(
+                    command,
+                    context.mission_id,
+                    context.run_id,
+                    timeout=float(task.input.get("timeout", 300.0)),
+                    role=task.title,
+                    task_id=task.id,
+                    cwd=engine_cfg.get("workdir"),
+                )
 
                 task.output = {
                     "result": "agent_cli_executed",
@@ -298,6 +800,10 @@ class SequentialWorkflow(WorkflowEngine):
                 task.status = "completed" if result.returncode == 0 else "failed"
                 if result.returncode != 0:
                     task.error = f"CLI exited with code {result.returncode}"
+                elif cache_key is not None:
+                    await self.task_cache.store(self.session, cache_key, task)
+                    # Commit now: the upsert must not hold the write lock for the group
+                    await self.state.record(self.session, task, immediate=True)
 
                 context.append_history(
                     {
@@ -307,8 +813,6 @@ class SequentialWorkflow(WorkflowEngine):
                         "run_id": str(context.run_id),
                     }
                 )
-                self.session.add(task)
-                await self.session.commit()
                 return  # Early return to skip simulation
 
             # Example: If previous task had output, merge it?
@@ -341,137 +845,472 @@ class SequentialWorkflow(WorkflowEngine):
                 }
             )
 
+        except asyncio.CancelledError:
+            task.error = "cancelled"
+            task.status = "failed"
+            raise
         except Exception as e:
-            task.error = str(e)
+            task.error = str(e) or type(e).__name__
             task.status = "failed"
             logger.error(f"Task execution failed: {e}")
         finally:
-            self.session.add(task)
-            await self.session.commit()
+            if task.status == "completed":
+                context.mark_completed(task.id)
+            await self.state.record(self.session, task, immediate=task.status == "failed")
 
 
 class SelfHealWorkflow(SequentialWorkflow):
-    """タスク失敗時にリカバリを試みるワークフロー。"""
+    """タスク失敗時にリカバリを試みるワークフロー (方針は SelfHealPolicy)。
 
-    async def execute_group(self, group: TaskGroup, context: WorkflowContext):
-        try:
-            await super().execute_group(group, context)
-        except Exception as e:
-            logger.warning(f"TaskGroup {group.id} failed, attempting self-heal... Error: {e}")
+    失敗タスクを回復できたらグループの残りのタスクを続けて実行する。
+    """
 
-            # Check if we can heal
-            # Simple logic: If a task failed, try to insert a recovery task
+    self_heal = True
 
-            # 1. Identify failed task
-            stmt = select(Task).where(Task.group_id == group.id, Task.status == "failed")
-            result = await self.session.execute(stmt)
-            failed_task = result.scalars().first()
-
-            if failed_task:
-                logger.info(f"Attempting to heal failed task: {failed_task.title}")
-                _append_ci_evidence(
-                    "workflow_self_heal_attempt",
-                    {
-                        "mission_id": str(context.mission_id),
-                        "run_id": str(context.run_id),
-                        "failed_task_id": str(failed_task.id),
-                        "failed_task_title": failed_task.title,
-                        "error": failed_task.error,
-                        "recovery_budget": SELF_HEAL_MAX_RECOVERY_TASKS,
-                    },
+    async def execute_group(self, group: TaskGroup, context: WorkflowContext):
+        while True:
+            try:
+                await super().execute_group(group, context)
+                return
+            except Exception as e:
+                logger.warning(f"TaskGroup {group.id} failed, attempting self-heal... Error: {e}")
+
+                # Heal every failed task (a parallel group can report several at once);
+                # healed tasks are in the cursor, so each one is healed only once
+                stmt = (
+                    select(Task)
+                    .where(Task.group_id == group.id, Task.status == "failed")
+                    .order_by(Task.__table__.c.order)  # type: ignore[arg-type]
                 )
+                result = await self.session.execute(stmt)
+                failed_tasks = [
+                    task
+                    for task in result.scalars().all()
+                    if not is_recovery_task(task.input) and not context.is_completed(task.id)
+                ]
+                if not failed_tasks:
+                    raise e
+
+                for failed_task in failed_tasks:
+                    if not await self._heal_task(group, failed_task, context):
+                        raise e  # Re-raise original exception
+                    context.mark_completed(failed_task.id)  # healed: skip on resume
+
+                logger.info("Recovery successful! Resuming group...")
+                await self.save_checkpoint(context)
+
+    def _policy(self, context: WorkflowContext) -> SelfHealPolicy:
+        """エンジン既定の方針に Mission.context["self_heal"] を重ねる。"""
+        return self.self_heal_policy.with_overrides(context.get(SELF_HEAL_CONTEXT_KEY))
+
+    @staticmethod
+    def _take_budget(context: WorkflowContext, policy: SelfHealPolicy) -> bool:
+        """予算が残っていれば 1 消費して True を返す。"""
+        if context.recovery_attempts >= policy.budget:
+            return False
+        context.recovery_attempts += 1
+        return True
+
+    async def _heal_task(
+        self, group: TaskGroup, failed_task: Task, context: WorkflowContext
+    ) -> bool:
+        """失敗タスク 1 件を再試行とリカバリ戦略で回復し、成否を返す。"""
+        logger.info(f"Attempting to heal failed task: {failed_task.title}")
+        policy = self._policy(context)
+        strategies = policy.strategies_for(failed_task.input)
+        error = failed_task.error
+        _append_ci_evidence(
+            "workflow_self_heal_attempt",
+            {
+                "mission_id": str(context.mission_id),
+                "run_id": str(context.run_id),
+                "failed_task_id": str(failed_task.id),
+                "failed_task_title": failed_task.title,
+                "error": error,
+                "retries": policy.retries,
+                "strategies": strategy_names(strategies),
+                "recovery_budget": policy.budget - context.recovery_attempts,
+            },
+        )
 
-                # 2. Create recovery task
-                recovery_task = Task(
+        # 1. Retry the original task with exponential backoff
+        attempts = 0
+        for attempt in range(1, policy.retries + 1):
+            if not self._take_budget(context, policy):
+                break
+            attempts += 1
+            delay = policy.backoff_seconds(attempt)
+            _write_trace_entry(
+                context.trace_path,
+                "workflow_engine_self_heal_retry",
+                {
+                    "task_id": str(failed_task.id),
+                    "run_id": str(context.run_id),
+                    "attempt": attempt,
+                    "delay_ms": round(delay * 1000, 3),
+                },
+            )
+            await asyncio.sleep(delay)
+            # Release the shared session's transaction before the retry writes
+            await self.state.checkpoint(self.session)
+            await self._run_isolated(failed_task, context, asyncio.Semaphore(1))
+            with self.session.no_autoflush:
+                await self.session.refresh(failed_task)
+            if failed_task.status == "completed":
+                return self._healed(context, failed_task, error, "retry", attempts, policy)
+
+        # 2. Race the recovery strategies: the first success wins
+        recovery_tasks: list[Task] = []
+        for strategy in strategies:
+            if not self._take_budget(context, policy):
+                break
+            recovery_tasks.append(
+                Task(
                     group_id=group.id,
                     agent_id=failed_task.agent_id,  # Same agent tries to fix
-                    title=f"Recovery: {failed_task.title}",
+                    title=(
+                        f"Recovery: {failed_task.title}"
+                        if len(strategies) == 1
+                        else f"Recovery ({strategy['strategy']}): {failed_task.title}"
+                    ),
                     status="pending",
                     input={
-                        "error": failed_task.error,
+                        **strategy,
+                        "error": error,
                         "original_input": failed_task.input,
+                        RECOVERY_FOR_KEY: str(failed_task.id),
                     },
                 )
-                self.session.add(recovery_task)
-                await self.session.commit()
-
-                # 3. Execute recovery task
-                attempts_left = SELF_HEAL_MAX_RECOVERY_TASKS
-                while attempts_left > 0:
-                    await self.execute_task(recovery_task, context)
-                    if recovery_task.status == "completed":
-                        break
-                    attempts_left -= 1
-
-                if recovery_task.status == "completed":
-                    logger.info("Recovery successful! Resuming group...")
-                    # Mark group as running again? Or just proceed?
-                    # Ideally we should retry the original task or move on.
-                    # For V1, if recovery works, we consider the group "healed" (but maybe partial).
-                    group.status = "completed"  # Force complete for now
-                    self.session.add(group)
-                    await self.session.commit()
-                    await _record_self_heal_artifact(
-                        session=self.session,
-                        context=context,
-                        task=failed_task,
-                        summary=f"Recovered after {failed_task.title} -> {failed_task.error}",
-                    )
-                    _append_ci_evidence(
-                        "workflow_self_heal_success",
-                        {
-                            "mission_id": str(context.mission_id),
-                            "run_id": str(context.run_id),
-                            "failed_task_id": str(failed_task.id),
-                            "recovery_task_id": str(recovery_task.id),
-                            "attempts_used": SELF_HEAL_MAX_RECOVERY_TASKS - attempts_left,
-                        },
-                    )
-                    return  # Suppress the exception
-                else:
-                    logger.error("Recovery failed.")
-                    await _record_self_heal_artifact(
-                        session=self.session,
-                        context=context,
-                        task=failed_task,
-                        summary=f"Recovery failed for {failed_task.title}: {failed_task.error}",
-                        success=False,
-                    )
-                    _append_ci_evidence(
-                        "workflow_self_heal_failure",
-                        {
-                            "mission_id": str(context.mission_id),
-                            "run_id": str(context.run_id),
-                            "failed_task_id": str(failed_task.id),
-                            "recovery_task_id": str(recovery_task.id),
-                            "attempts_used": SELF_HEAL_MAX_RECOVERY_TASKS,
-                            "error": recovery_task.error,
-                        },
-                    )
-                    mission = await self.session.get(Mission, context.mission_id)
-                    project_id = mission.project_id if mission else None
-                    if project_id is not None:
-                        await _emit_signal(
-                            session=self.session,
-                            project_id=project_id,
-                            mission_id=context.mission_id,
-                            sig_type="self_heal_failed",
-                            severity="warning",
-                            message=f"Recovery failed for {failed_task.title}: {failed_task.error}",
-                        )
-                    raise e  # Re-raise original exception
-            else:
-                raise e
+            )
+        attempts += len(recovery_tasks)
+        winner = await self._race_recovery(failed_task, recovery_tasks, context)
+        if winner is not None:
+            return self._healed(
+                context, failed_task, error, winner.input["strategy"], attempts, policy, winner
+            )
 
+        logger.error("Recovery failed.")
+        exhausted = context.recovery_attempts >= policy.budget
+        _queue_self_heal_artifact(
+            context=context,
+            task=failed_task,
+            summary=f"Recovery failed for {failed_task.title}: {error}",
+            success=False,
+        )
+        _append_ci_evidence(
+            "workflow_self_heal_failure",
+            {
+                "mission_id": str(context.mission_id),
+                "run_id": str(context.run_id),
+                "failed_task_id": str(failed_task.id),
+                "recovery_task_ids": [str(task.id) for task in recovery_tasks],
+                "attempts_used": attempts,
+                "budget_exhausted": exhausted,
+                "error": next((t.error for t in recovery_tasks if t.error), error),
+            },
+        )
+        mission = await self.session.get(Mission, context.mission_id)
+        project_id = mission.project_id if mission else None
+        if project_id is not None:
+            await _emit_signal(
+                session=self.session,
+                project_id=project_id,
+                mission_id=context.mission_id,
+                sig_type="self_heal_failed",
+                severity="warning",
+                message=f"Recovery failed for {failed_task.title}: {error}",
+            )
+        return False
 
-async def _record_self_heal_artifact(
-    session: AsyncSession,
+    def _healed(
+        self,
+        context: WorkflowContext,
+        failed_task: Task,
+        error: str | None,
+        strategy: str,
+        attempts: int,
+        policy: SelfHealPolicy,
+        recovery_task: Task | None = None,
+    ) -> bool:
+        """回復の成功を記録する (artifact は run 終了時にまとめて保存)。"""
+        _queue_self_heal_artifact(
+            context=context,
+            task=failed_task,
+            summary=f"Recovered after {failed_task.title} -> {error} ({strategy})",
+        )
+        _append_ci_evidence(
+            "workflow_self_heal_success",
+            {
+                "mission_id": str(context.mission_id),
+                "run_id": str(context.run_id),
+                "failed_task_id": str(failed_task.id),
+                "recovery_task_id": str(recovery_task.id) if recovery_task else None,
+                "strategy": strategy,
+                "attempts_used": attempts,
+                "recovery_budget": policy.budget - context.recovery_attempts,
+            },
+        )
+        return True
+
+    async def _race_recovery(
+        self, failed_task: Task, recovery_tasks: list[Task], context: WorkflowContext
+    ) -> Task | None:
+        """リカバリタスクを同時に実行し、最初に成功したものを返す (残りはキャンセル)。"""
+        if not recovery_tasks:
+            return None
+        # Worker sessions must see the rows; this also ends the shared transaction
+        await self.state.record(self.session, *recovery_tasks, immediate=True)
+        semaphore = self._task_semaphore()
+        started = time.perf_counter()
+        jobs = {
+            asyncio.create_task(self._run_isolated(task, context, semaphore)): task
+            for task in recovery_tasks
+        }
+        winner: Task | None = None
+        try:
+            while jobs and winner is None:
+                done, _ = await asyncio.wait(jobs, return_when=asyncio.FIRST_COMPLETED)
+                for job in done:
+                    task = jobs.pop(job)
+                    with self.session.no_autoflush:
+                        await self.session.refresh(task)
+                    if winner is None and job.exception() is None and task.status == "completed":
+                        winner = task
+        finally:
+            for job in jobs:
+                job.cancel()
+            await asyncio.gather(*jobs, return_exceptions=True)
+        cancelled = list(jobs.values())
+        for task in cancelled:
+            with self.session.no_autoflush:
+                await self.session.refresh(task)
+            task.status = "cancelled"
+            task.error = f"cancelled: recovery {winner.id} succeeded first" if winner else "cancelled"
+        if cancelled:
+            await self.state.record(self.session, *cancelled)
+        _write_trace_entry(
+            context.trace_path,
+            "workflow_engine_self_heal_race",
+            {
+                "failed_task_id": str(failed_task.id),
+                "run_id": str(context.run_id),
+                "strategies": [task.input["strategy"] for task in recovery_tasks],
+                "winner": winner.input["strategy"] if winner else None,
+                "cancelled": [task.input["strategy"] for task in cancelled],
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+            },
+        )
+        return winner
+
+
+class ParallelWorkflow(SequentialWorkflow):
+    """全タスクグループのタスクを並列実行するワークフロー (run_mode="parallel")。"""
+
+    parallel_groups = True
+
+
+class ParallelSelfHealWorkflow(SelfHealWorkflow, ParallelWorkflow):
+    """並列実行とセルフヒールを組み合わせたワークフロー。"""
+
+
+class LoopWorkflow(SequentialWorkflow):
+    """全タスクグループを 1 反復として収束条件まで繰り返すワークフロー (run_mode="loop")。
+
+    設定は Mission.context["loop"] (task_loop 参照)。
+    """
+
+    async def execute_groups(self, mission: Mission, context: WorkflowContext) -> Task | None:
+        spec = parse_loop_spec(
+            (mission.context or {}).get(LOOP_CONTEXT_KEY),
+            default_max_iterations=self.loop_max_iterations,
+        )
+        groups = await self._load_groups(mission)
+        if not groups:
+            return None
+        return await self.execute_loop(
+            spec,
+            groups,
+            context,
+            lambda: super(LoopWorkflow, self).execute_groups(mission, context),
+            scope_id=str(mission.id),
+        )
+
+
+class LoopSelfHealWorkflow(SelfHealWorkflow, LoopWorkflow):
+    """ループ実行とセルフヒールを組み合わせたワークフロー。"""
+
+
+class DagWorkflow(SequentialWorkflow):
+    """depends_on に従い、依存が解けたタスクから最大並列で実行するワークフロー (run_mode="dag")。
+
+    グループの境界は順序制約にならず、Task.input["depends_on"] の辺のみで順序が決まる。
+    """
+
+    async def execute_groups(self, mission: Mission, context: WorkflowContext) -> Task | None:
+        return await self.execute_dag(mission, context)
+
+    async def recover_task(self, task: Task, context: WorkflowContext) -> bool:
+        """失敗タスクの回復を試みるフック (既定は回復しない)。"""
+        return False
+
+    async def execute_dag(self, mission: Mission, context: WorkflowContext) -> Task | None:
+        """依存グラフ順にタスクを実行し、クリティカルパスを trace に記録する。"""
+        groups = await self._load_groups(mission)
+        group_rank = {group.id: rank for rank, group in enumerate(groups)}
+        rows = (
+            await self.session.execute(select(Task).where(Task.group_id.in_(list(group_rank))))  # type: ignore[attr-defined]
+        ).scalars().all()
+        tasks = sorted(
+            (row for row in rows if not is_recovery_task(row.input)),
+            key=lambda t: (group_rank[t.group_id], t.order),
+        )
+        by_id = {str(task.id): task for task in tasks}
+        graph = {tid: task_dependencies(task.input) for tid, task in by_id.items()}
+        order = topological_order(graph)  # unknown ids / cycles fail the run
+
+        dependents: dict[str, list[str]] = {tid: [] for tid in by_id}
+        for tid, deps in graph.items():
+            for dep in deps:
+                dependents[dep].append(tid)
+        waiting = {tid: len(deps) for tid, deps in graph.items()}
+        # Tasks completed before a resume count as satisfied dependencies
+        resumed = {tid for tid in order if context.is_completed(tid)}
+        for tid in resumed:
+            for child in dependents[tid]:
+                waiting[child] -= 1
+
+        for group in groups:
+            group.status = "running"
+        await self.state.record(self.session, *groups)
+        await self.state.checkpoint(self.session)
+
+        semaphore = self._task_semaphore()
+        started = time.perf_counter()
+        durations: dict[str, float] = {}
+        failures: list[tuple[Any, str]] = []
+        running: dict[asyncio.Task[float], str] = {}
+
+        def _launch(tid: str) -> None:
+            if tid in resumed:
+                return
+            job = asyncio.create_task(self._run_isolated(by_id[tid], context, semaphore))
+            running[job] = tid
+
+        for tid in order:
+            if waiting[tid] == 0:
+                _launch(tid)
+        while running:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for job in done:
+                tid = running.pop(job)
+                task = by_id[tid]
+                # Keep the deferred cursor in memory: flushing it here would hold
+                # the write lock while worker sessions commit
+                with self.session.no_autoflush:
+                    await self.session.refresh(task)
+                error = job.exception()
+                if error is None:
+                    durations[tid] = job.result()
+                succeeded = error is None and task.status == "completed"
+                if not succeeded and error is None:
+                    succeeded = await self.recover_task(task, context)
+                if not succeeded:
+                    failures.append((task.id, str(error) if error else task.error or "failed"))
+                    continue  # dependents stay blocked
+                context.mark_completed(tid)
+                await self.save_checkpoint(context)
+                for child in dependents[tid]:
+                    waiting[child] -= 1
+                    if waiting[child] == 0:
+                        _launch(child)
+
+        wall_ms = (time.perf_counter() - started) * 1000
+        path, path_ms = critical_path(graph, durations)
+        skipped = [
+            tid for tid in order if tid not in durations and tid not in resumed and waiting[tid] > 0
+        ]
+        _write_trace_entry(
+            context.trace_path,
+            "workflow_engine_dag_completed",
+            {
+                "mission_id": str(mission.id),
+                "run_id": str(context.run_id),
+                "tasks": len(by_id),
+                "completed": len(durations) - len(failures),
+                "failed": len(failures),
+                "resumed": len(resumed),
+                "skipped": skipped,
+                "max_concurrency": self.max_concurrency if self._has_independent_connections() else 1,
+                "wall_ms": round(wall_ms, 3),
+                "task_ms_total": round(sum(durations.values()), 3),
+                "parallelism": round(sum(durations.values()) / wall_ms, 3) if wall_ms else 0.0,
+                "critical_path_ms": round(path_ms, 3),
+                "critical_path": [
+                    {
+                        "task_id": tid,
+                        "title": by_id[tid].title,
+                        "duration_ms": round(durations[tid], 3),
+                    }
+                    for tid in path
+                ],
+            },
+        )
+
+        failed_groups = {by_id[str(task_id)].group_id for task_id, _ in failures}
+        failed_groups |= {by_id[tid].group_id for tid in skipped}
+        for group in groups:
+            group.status = "failed" if group.id in failed_groups else "completed"
+        await self.save_checkpoint(context)
+        await self.state.record(self.session, *groups, immediate=True)
+        if failures:
+            raise TaskGroupError(mission.id, failures, scope="Mission")
+        return by_id[path[-1]] if path else None
+
+
+class DagSelfHealWorkflow(SelfHealWorkflow, DagWorkflow):
+    """DAG 実行で失敗したタスクをリカバリタスクで補うワークフロー。"""
+
+    async def recover_task(self, task: Task, context: WorkflowContext) -> bool:
+        group = await self.session.get(TaskGroup, task.group_id)
+        if group is None:
+            return False
+        return await self._heal_task(group, task, context)
+
+
+def workflow_options(settings: Any) -> dict[str, Any]:
+    """Settings からワークフロー実行クラスのキーワード引数を組み立てる。"""
+    return {
+        "max_concurrency": settings.workflow_max_concurrency,
+        "state_flush_ms": settings.workflow_state_flush_ms,
+        "task_cache_enabled": settings.workflow_task_cache_enabled,
+        "task_cache_ttl_seconds": settings.workflow_task_cache_ttl_seconds,
+        "loop_max_iterations": settings.workflow_loop_max_iterations,
+        "self_heal_policy": SelfHealPolicy.from_settings(settings),
+    }
+
+
+def workflow_class_for(run_mode: str | None, allow_self_heal: bool = True) -> type[SequentialWorkflow]:
+    """Mission.run_mode とセルフヒール可否から実行クラスを選ぶ。"""
+    if run_mode == "parallel":
+        return ParallelSelfHealWorkflow if allow_self_heal else ParallelWorkflow
+    if run_mode == "dag":
+        return DagSelfHealWorkflow if allow_self_heal else DagWorkflow
+    if run_mode == "loop":
+        return LoopSelfHealWorkflow if allow_self_heal else LoopWorkflow
+    return SelfHealWorkflow if allow_self_heal else SequentialWorkflow
+
+
+def _queue_self_heal_artifact(
     context: WorkflowContext,
     task: Task,
     summary: str,
     success: bool = True,
-) -> tuple[Artifact, Knowledge | None]:
-    """Record artifact + knowledge entry for self-heal events."""
+) -> tuple[Artifact, Knowledge]:
+    """Build the artifact + knowledge entry for a self-heal event.
+
+    Nothing is written here: the rows wait in ``context.pending_records`` and
+    are committed together with the final run state.
+    """
 
     run_id = context.run_id
     mission_id = context.mission_id
@@ -490,10 +1329,8 @@ async def _record_self_heal_artifact(
         tags=["self-heal", "workflow"],
         content_meta={"error": task.error, "status": task.status, "success": success},
     )
-    session.add(artifact)
-    await session.commit()
-    await session.refresh(artifact)
-
+    # ids are generated client-side, so the knowledge row can point at the
+    # artifact without a flush in between
     knowledge = Knowledge(
         artifact_id=artifact.id,
         source_artifact_id=artifact.id,
@@ -504,9 +1341,7 @@ async def _record_self_heal_artifact(
         tags=["self-heal", "knowledge"],
         reusable=True,
     )
-    session.add(knowledge)
-    await session.commit()
-    await session.refresh(knowledge)
+    context.pending_records.extend([artifact, knowledge])
     return artifact, knowledge
 
 
@@ -529,4 +1364,5 @@ async def _emit_signal(
     session.add(signal)
     await session.commit()
     await session.refresh(signal)
+    SIGNAL_BUS.publish_signal(signal)
     return signal
@@ -2,13 +2,39 @@
 
 from __future__ import annotations
 
+import asyncio
+import codecs
+import contextlib
+import os
 import subprocess
 import sys
+import weakref
+from collections import deque
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import IO, Any
 from uuid import UUID
 
+def _env_int(name: str, default: int) -> int:
+    """環境変数を整数として読む (未設定・不正値は default)。"""
+    try:
+        return int(os.getenv(name) or default)
+    except ValueError:
+        return default
+
+
+# 同時に起動できるエージェント CLI プロセス数 (AGENT_CLI_MAX_PROCESSES)
+_MAX_AGENT_PROCESSES = max(1, _env_int("AGENT_CLI_MAX_PROCESSES", 4))
+_PROCESS_SLOTS: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = (
+    weakref.WeakKeyDictionary()
+)
+_CAPTURE_MAX_CHARS = 1_000_000  # result.stdout/stderr keep the tail beyond this
+# Output is read in fixed-size chunks: a long line without a newline must not
+# hit StreamReader's line limit
+_READ_CHUNK_BYTES = 64 * 1024
+_CAPTURE_CHUNKS = _CAPTURE_MAX_CHARS // _READ_CHUNK_BYTES + 1
+_TERMINATE_GRACE_SECONDS = 5.0
+
 
 def load_engine_config(engine_name: str = "demo") -> dict[str, Any]:
     """Load engine configuration from config/engines.yaml with fallback."""
@@ -113,6 +139,165 @@ def spawn_agent_cli(
         raise
 
 
+def set_max_agent_processes(limit: int) -> None:
+    """エージェント CLI の同時起動数の上限を変更する (次に作られるセマフォから有効)。"""
+    global _MAX_AGENT_PROCESSES
+    _MAX_AGENT_PROCESSES = max(1, int(limit))
+    _PROCESS_SLOTS.clear()
+
+
+def _process_slots() -> asyncio.Semaphore:
+    """実行中イベントループ単位のプロセス枠セマフォを返す。"""
+    loop = asyncio.get_running_loop()
+    slots = _PROCESS_SLOTS.get(loop)
+    if slots is None:
+        slots = _PROCESS_SLOTS[loop] = asyncio.Semaphore(_MAX_AGENT_PROCESSES)
+    return slots
+
+
+async def spawn_agent_cli_async(
+    command: list[str],
+    mission_id: UUID,
+    run_id: UUID,
+    trace_dir: Path | None = None,
+    timeout: float = 300.0,
+    command_index: int | None = None,
+    role: str | None = None,
+    task_id: UUID | None = None,
+    cwd: str | Path | None = None,
+) -> subprocess.CompletedProcess[str]:
+    """
+    エージェント CLI を asyncio サブプロセスで起動し、出力を行単位でトレースへ流す。
+
+    イベントループを塞がずに待機し、同時起動数はグローバルなセマフォで制限する。
+    タイムアウト時は terminate → kill して subprocess.TimeoutExpired を送出し、
+    キャンセル時もプロセスを停止してから CancelledError を再送出する。
+
+    Args:
+        command: 実行する CLI コマンド
+        mission_id: ログ用 Mission UUID
+        run_id: Workflow run UUID
+        trace_dir: ログ保存先(省略時 data/logs/current/audit/cli_runs)
+        timeout: タイムアウト(秒、セマフォ待ち時間は含まない)
+        command_index: 複数起動時のインデックス(ログ分離用)
+        role: ロール名(任意、ログ用)
+        task_id: タスク UUID(指定時はタスク単位でログを分離)
+        cwd: 作業ディレクトリ(任意)
+    """
+    target_dir = trace_dir or Path("data/logs/current/audit/cli_runs")
+    target_dir.mkdir(parents=True, exist_ok=True)
+    suffix = f"_cmd{command_index}" if command_index is not None else ""
+    if task_id is not None:
+        suffix += f"_{task_id}"
+    trace_path = target_dir / f"{run_id}{suffix}.log"
+
+    async with _process_slots():
+        with trace_path.open("w", encoding="utf-8") as log:
+            log.write(f"# Timestamp: {datetime.now(timezone.utc).isoformat()}\n")
+            log.write(f"# Mission ID: {mission_id}\n")
+            log.write(f"# Run ID: {run_id}\n")
+            if task_id is not None:
+                log.write(f"# Task ID: {task_id}\n")
+            if command_index is not None:
+                log.write(f"# Command Index: {command_index}\n")
+            if role:
+                log.write(f"# Role: {role}\n")
+            log.write(f"# Command: {' '.join(command)}\n\n")
+            log.flush()
+
+            kwargs: dict[str, Any] = {}
+            if sys.platform.startswith("win"):
+                kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    *command,
+                    stdin=asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=str(cwd) if cwd else None,
+                    **kwargs,
+                )
+            except Exception as e:
+                log.write(f"=== ERROR ===\n{e}\n")
+                raise
+
+            stdout: deque[str] = deque(maxlen=_CAPTURE_CHUNKS)
+            stderr: deque[str] = deque(maxlen=_CAPTURE_CHUNKS)
+            pumps = asyncio.gather(
+                _pump_stream(proc.stdout, "STDOUT", log, stdout),
+                _pump_stream(proc.stderr, "STDERR", log, stderr),
+            )
+            try:
+                await asyncio.wait_for(asyncio.shield(pumps), timeout=timeout)
+                returncode = await proc.wait()
+            except asyncio.TimeoutError:
+                returncode = await _stop_process(proc)
+                log.write(f"\n=== TIMEOUT ===\nkilled after {timeout}s (code {returncode})\n")
+                raise subprocess.TimeoutExpired(
+                    command, timeout, output="".join(stdout), stderr="".join(stderr)
+                ) from None
+            except asyncio.CancelledError:
+                returncode = await _stop_process(proc)
+                log.write(f"\n=== CANCELLED ===\nstopped (code {returncode})\n")
+                raise
+            except BaseException as e:
+                # Any other failure (e.g. reading the pipes) must not leave the child running
+                returncode = await _stop_process(proc)
+                log.write(f"\n=== ERROR ===\n{e!r} (stopped, code {returncode})\n")
+                raise
+            finally:
+                if not pumps.done():
+                    pumps.cancel()
+                with contextlib.suppress(BaseException):
+                    await pumps
+
+            log.write(f"\n=== RETURN CODE ===\n{returncode}\n")
+            return subprocess.CompletedProcess(
+                command, returncode, "".join(stdout), "".join(stderr)
+            )
+
+
+async def _pump_stream(
+    stream: asyncio.StreamReader | None, label: str, log: IO[str], sink: deque[str]
+) -> None:
+    """サブプロセスの出力を固定長チャンクで読み、行単位でログへ追記して末尾を sink に保持する。"""
+    if stream is None:
+        return
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    partial = ""
+    while True:
+        raw = await stream.read(_READ_CHUNK_BYTES)
+        text = decoder.decode(raw, final=not raw)
+        if text:
+            sink.append(text)
+            *lines, partial = (partial + text).split("\n")
+            for line in lines:
+                log.write(f"[{label}] {line}\n")
+            if len(partial) >= _READ_CHUNK_BYTES:
+                # Very long lines are logged piecewise instead of buffered whole
+                log.write(f"[{label}] {partial}\n")
+                partial = ""
+            log.flush()
+        if not raw:
+            if partial:
+                log.write(f"[{label}] {partial}\n")
+                log.flush()
+            return
+
+
+async def _stop_process(proc: asyncio.subprocess.Process) -> int:
+    """terminate → 猶予後 kill でプロセスを停止し、終了コードを返す。"""
+    if proc.returncode is None:
+        with contextlib.suppress(ProcessLookupError):
+            proc.terminate()
+        try:
+            return await asyncio.wait_for(proc.wait(), timeout=_TERMINATE_GRACE_SECONDS)
+        except asyncio.TimeoutError:
+            with contextlib.suppress(ProcessLookupError):
+                proc.kill()
+    return await proc.wait()
+
+
 def _write_trace_log(
     trace_path: Path,
     mission_id: UUID,
@@ -60,6 +60,7 @@ def isolated_env(tmp_path, monkeypatch):
     storage_root = tmp_path / "storage"
     storage_root.mkdir(parents=True, exist_ok=True)
     monkeypatch.setenv("STORAGE_ROOT", str(storage_root))
+    monkeypatch.setenv("RETENTION_SEGMENTS_DIR", str(tmp_path / "retention_segments"))
     monkeypatch.setenv("GIT_AUTHOR_NAME", "test-agent")
     monkeypatch.setenv("GIT_AUTHOR_EMAIL", "test@example.com")
     monkeypatch.setenv("INLINE_IMAGE_MAX_BYTES", "128")
@@ -216,6 +217,26 @@ def pytest_collection_modifyitems(
             "tests/test_models_unit_min.py",
             "tests/test_storage_write_unit_min.py",
             "tests/test_utils_unit_min.py",
+            "tests/test_responses_unit_min.py",
+            "tests/test_startup_profile_unit_min.py",
+            "tests/test_metrics_unit_min.py",
+            "tests/test_compression_unit_min.py",
+            "tests/test_signal_import_unit_min.py",
+            "tests/test_signals_api.py",
+            "tests/test_signal_bus_unit_min.py",
+            "tests/test_ack_scanner_unit_min.py",
+            "tests/test_reservation_scheduler_unit_min.py",
+            "tests/test_reservation_index_unit_min.py",
+            "tests/test_archive_usage_unit_min.py",
+            "tests/test_retention_unit_min.py",
+            "tests/test_tracing_unit_min.py",
+            "tests/test_query_stats_unit_min.py",
+            "tests/test_task_graph_unit_min.py",
+            "tests/test_run_queue_unit_min.py",
+            "tests/test_trace_writer_unit_min.py",
+            "tests/test_task_cache_unit_min.py",
+            "tests/test_task_loop_unit_min.py",
+            "tests/test_self_heal_unit_min.py",
         )
         allow_env = os.environ.get("TEST_ALLOWLIST") or os.environ.get(
             "WINDOWS_TEST_ALLOWLIST"
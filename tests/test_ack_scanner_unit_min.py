@@ -0,0 +1,81 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from mcp_agent_mail.ack_scanner import AckScanner
+from mcp_agent_mail.config import get_settings
+from mcp_agent_mail.db import ensure_schema, reset_database_state, session_context
+from mcp_agent_mail.models import Agent, Message, MessageRecipient, Project
+
+
+async def _seed(now: datetime) -> tuple[int, int]:
+    reset_database_state()
+    await ensure_schema()
+    async with session_context() as session:
+        project = Project(slug="ack-scan", human_key="ack-scan")
+        session.add(project)
+        await session.commit()
+        await session.refresh(project)
+        assert project.id is not None
+        agents = [
+            Agent(project_id=project.id, name=name, program="p", model="m")
+            for name in ("Sender", "Late", "Prompt")
+        ]
+        session.add_all(agents)
+        await session.commit()
+        for agent in agents:
+            await session.refresh(agent)
+        sender, late, prompt = (int(a.id or 0) for a in agents)
+        for age_s, ack_required in ((600, True), (30, True), (900, False)):
+            msg = Message(
+                project_id=project.id,
+                sender_id=sender,
+                subject=f"age {age_s}",
+                body_md="",
+                ack_required=ack_required,
+                created_ts=now - timedelta(seconds=age_s),
+            )
+            session.add(msg)
+            await session.commit()
+            await session.refresh(msg)
+            assert msg.id is not None
+            session.add(MessageRecipient(message_id=msg.id, agent_id=late))
+            session.add(
+                MessageRecipient(message_id=msg.id, agent_id=prompt, ack_ts=now)
+            )
+        await session.commit()
+        return late, prompt
+
+
+def test_scanner_alerts_each_overdue_ack_once(isolated_env, monkeypatch) -> None:
+    monkeypatch.setenv("ACK_TTL_SECONDS", "300")
+    monkeypatch.setenv("ACK_ESCALATION_ENABLED", "false")
+
+    async def _run() -> None:
+        now = datetime.now(timezone.utc)
+        late, _ = await _seed(now)
+        scanner = AckScanner(get_settings(), batch_size=1)
+
+        first = await scanner.scan_once(now)
+        assert [(o.agent_id, o.age_s) for o in first] == [(late, 600)]
+        assert scanner.watermark == now - timedelta(seconds=300)
+
+        assert await scanner.scan_once(now + timedelta(seconds=60)) == []
+        later = await scanner.scan_once(now + timedelta(seconds=600))
+        assert [o.agent_id for o in later] == [late]
+
+        # A restarted scanner (no watermark) relies on the escalated marker
+        assert await AckScanner(get_settings()).scan_once(now + timedelta(seconds=600)) == []
+        async with session_context() as session:
+            marked = (
+                await session.execute(
+                    text(
+                        "SELECT COUNT(*) FROM message_recipients "
+                        "WHERE ack_escalated_ts IS NOT NULL"
+                    )
+                )
+            ).scalar_one()
+        assert marked == 2
+
+    asyncio.run(_run())
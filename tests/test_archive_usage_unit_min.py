@@ -0,0 +1,98 @@
+import asyncio
+from datetime import datetime, timezone
+from pathlib import Path
+
+import mcp_agent_mail.archive_usage as archive_usage
+from mcp_agent_mail.archive_usage import (
+    METRIC_ATTACHMENT_BYTES,
+    METRIC_INBOX,
+    METRIC_MESSAGES,
+    USAGE,
+    reconcile,
+    scan_project_usage,
+    usage_report,
+)
+from mcp_agent_mail.config import get_settings
+from mcp_agent_mail.db import ensure_schema, reset_database_state
+from mcp_agent_mail.storage import ensure_archive, write_message_bundle
+
+
+def _touch(path: Path, data: bytes = b"x") -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+
+
+def test_scan_project_usage_counts_month_buckets(tmp_path: Path) -> None:
+    _touch(tmp_path / "messages" / "2025" / "01" / "a.md")
+    _touch(tmp_path / "messages" / "2025" / "01" / "b.md")
+    _touch(tmp_path / "messages" / "2025" / "02" / "c.md")
+    _touch(tmp_path / "agents" / "Blue" / "inbox" / "2025" / "01" / "a.md")
+    _touch(tmp_path / "agents" / "Green" / "inbox" / "2025" / "01" / "a.md")
+    _touch(tmp_path / "agents" / "Green" / "outbox" / "2025" / "01" / "a.md")
+    _touch(tmp_path / "attachments" / "ab" / "ab12.webp", b"12345")
+    _touch(tmp_path / "attachments" / "_manifests" / "ab12.json", b"{}")
+
+    usage = scan_project_usage(tmp_path)
+    assert usage[(METRIC_MESSAGES, "2025-01")] == 2
+    assert usage[(METRIC_MESSAGES, "2025-02")] == 1
+    assert usage[(METRIC_INBOX, "2025-01")] == 2
+    assert usage[(METRIC_ATTACHMENT_BYTES, "")] == 5
+
+
+def test_writes_update_counters_and_reconcile_agrees(isolated_env) -> None:
+    async def _run() -> None:
+        reset_database_state()
+        USAGE.drain()
+        await ensure_schema()
+        settings = get_settings()
+        archive = await ensure_archive(settings, "usage-proj")
+        for i, created in enumerate(
+            ["2024-01-05T10:00:00+00:00", "2026-10-01T10:00:00+00:00"]
+        ):
+            message = {"id": i + 1, "subject": f"s{i}", "created": created}
+            await write_message_bundle(archive, message, "body", "Blue", ["Green", "Red"])
+
+        await USAGE.flush()
+        cutoff = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        incremental = await usage_report(retention_cutoff=cutoff)
+        proj = incremental["usage-proj"]
+        assert proj["messages"] == 2 and proj["old_messages"] == 1
+        assert proj["inbox"] == 4
+
+        # A rescan replaces the counters and must reach the same totals
+        await reconcile(settings)
+        assert await usage_report(retention_cutoff=cutoff) == incremental
+
+        # Rewriting an archived message does not double-count it
+        message = {"id": 1, "subject": "s0", "created": "2024-01-05T10:00:00+00:00"}
+        await write_message_bundle(archive, message, "body", "Blue", ["Green", "Red"])
+        await USAGE.flush()
+        assert await usage_report(retention_cutoff=cutoff) == incremental
+
+    asyncio.run(_run())
+
+
+def test_reconcile_drops_deltas_of_writes_seen_by_the_scan(isolated_env, monkeypatch) -> None:
+    async def _run() -> None:
+        reset_database_state()
+        USAGE.drain()
+        await ensure_schema()
+        settings = get_settings()
+        archive = await ensure_archive(settings, "usage-race")
+        message = {"id": 1, "subject": "s", "created": "2026-10-01T10:00:00+00:00"}
+        await write_message_bundle(archive, message, "body", "Blue", ["Green"])
+        await USAGE.flush()
+        before = await usage_report()
+
+        def _scan_during_write(root: Path) -> dict:
+            usage = scan_project_usage(root)
+            # A write whose file the scan has already counted
+            USAGE.add(root.name, METRIC_MESSAGES, 1, "2026-10")
+            return usage
+
+        monkeypatch.setattr(archive_usage, "scan_project_usage", _scan_during_write)
+        await reconcile(settings)
+        await USAGE.flush()
+        assert await usage_report() == before
+
+    asyncio.run(_run())
@@ -0,0 +1,61 @@
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from mcp_agent_mail.compression import CompressionMiddleware
+
+
+def _client() -> TestClient:
+    app = FastAPI()
+
+    @app.get("/small")
+    async def small() -> PlainTextResponse:
+        return PlainTextResponse("ok")
+
+    @app.get("/large")
+    async def large() -> PlainTextResponse:
+        return PlainTextResponse("x" * 5000)
+
+    @app.get("/binary")
+    async def binary() -> PlainTextResponse:
+        return PlainTextResponse("x" * 5000, media_type="application/octet-stream")
+
+    @app.get("/stream")
+    async def stream() -> StreamingResponse:
+        async def _chunks():
+            for i in range(10):
+                yield f"<p>{i}</p>".encode() * 200
+
+        return StreamingResponse(_chunks(), media_type="text/html")
+
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    return TestClient(app)
+
+
+def test_small_and_disallowed_responses_are_not_compressed() -> None:
+    client = _client()
+    small = client.get("/small", headers={"accept-encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    assert small.text == "ok"
+    binary = client.get("/binary", headers={"accept-encoding": "gzip"})
+    assert "content-encoding" not in binary.headers
+
+
+def test_large_response_is_gzipped() -> None:
+    res = _client().get("/large", headers={"accept-encoding": "gzip"})
+    assert res.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in res.headers["vary"].lower()
+    assert res.text == "x" * 5000
+
+
+def test_streaming_response_is_compressed_incrementally() -> None:
+    res = _client().get("/stream", headers={"accept-encoding": "gzip"})
+    assert res.headers["content-encoding"] == "gzip"
+    assert "content-length" not in res.headers
+    assert res.text == "".join(f"<p>{i}</p>" * 200 for i in range(10))
+
+
+def test_identity_when_client_does_not_accept_gzip() -> None:
+    res = _client().get("/large", headers={"accept-encoding": "identity"})
+    assert "content-encoding" not in res.headers
+    assert res.text == "x" * 5000
@@ -79,3 +79,138 @@ def test_spawn_agent_cli_command_not_found(tmp_path: Path) -> None:
     assert trace_file.exists()
     content = trace_file.read_text()
     assert "ERROR" in content
+
+
+async def test_spawn_agent_cli_async_streams_output(tmp_path: Path) -> None:
+    """Async spawn streams stdout/stderr lines into a per-task trace file."""
+    from orchestrator.conpty_wrapper import spawn_agent_cli_async
+
+    run_id, task_id = uuid4(), uuid4()
+    result = await spawn_agent_cli_async(
+        command=[sys.executable, "-c", "import sys; print('out'); print('err', file=sys.stderr)"],
+        mission_id=uuid4(),
+        run_id=run_id,
+        trace_dir=tmp_path,
+        timeout=10.0,
+        task_id=task_id,
+    )
+
+    assert result.returncode == 0
+    assert result.stdout == "out\n" and result.stderr == "err\n"
+    content = (tmp_path / f"{run_id}_{task_id}.log").read_text(encoding="utf-8")
+    assert "[STDOUT] out" in content and "[STDERR] err" in content
+    assert "RETURN CODE" in content
+
+
+async def test_spawn_agent_cli_async_timeout_kills_process(tmp_path: Path) -> None:
+    """Timeout stops the process and raises TimeoutExpired."""
+    import subprocess
+
+    from orchestrator.conpty_wrapper import spawn_agent_cli_async
+
+    run_id = uuid4()
+    with pytest.raises(subprocess.TimeoutExpired):
+        await spawn_agent_cli_async(
+            command=[sys.executable, "-c", "import time; print('started', flush=True); time.sleep(30)"],
+            mission_id=uuid4(),
+            run_id=run_id,
+            trace_dir=tmp_path,
+            timeout=1.0,
+        )
+    content = (tmp_path / f"{run_id}.log").read_text(encoding="utf-8")
+    assert "[STDOUT] started" in content and "TIMEOUT" in content
+
+
+async def test_spawn_agent_cli_async_bounded_and_cancellable(tmp_path: Path) -> None:
+    """Concurrent spawns respect the process limit; cancellation stops the child."""
+    import asyncio
+    import time
+
+    from orchestrator import conpty_wrapper
+
+    conpty_wrapper.set_max_agent_processes(2)
+    try:
+        sleep = [sys.executable, "-c", "import time; time.sleep(0.5)"]
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(
+                conpty_wrapper.spawn_agent_cli_async(sleep, uuid4(), uuid4(), trace_dir=tmp_path)
+                for _ in range(4)
+            )
+        )
+        # Four 0.5s processes through two slots take at least two rounds
+        assert time.perf_counter() - started >= 1.0
+
+        run_id = uuid4()
+        job = asyncio.create_task(
+            conpty_wrapper.spawn_agent_cli_async(
+                [sys.executable, "-c", "import time; time.sleep(30)"],
+                uuid4(),
+                run_id,
+                trace_dir=tmp_path,
+            )
+        )
+        await asyncio.sleep(0.5)
+        job.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await job
+        assert "CANCELLED" in (tmp_path / f"{run_id}.log").read_text(encoding="utf-8")
+    finally:
+        conpty_wrapper.set_max_agent_processes(4)
+
+
+async def test_spawn_agent_cli_async_handles_long_lines(tmp_path: Path) -> None:
+    """A line far beyond the StreamReader line limit is read and logged in chunks."""
+    from orchestrator.conpty_wrapper import spawn_agent_cli_async
+
+    run_id = uuid4()
+    result = await spawn_agent_cli_async(
+        command=[sys.executable, "-c", "import sys; sys.stdout.write('x' * 200_000); print(); print('end')"],
+        mission_id=uuid4(),
+        run_id=run_id,
+        trace_dir=tmp_path,
+        timeout=10.0,
+    )
+
+    assert result.returncode == 0
+    assert result.stdout == "x" * 200_000 + "\nend\n"
+    content = (tmp_path / f"{run_id}.log").read_text(encoding="utf-8")
+    logged = [line for line in content.splitlines() if line.startswith("[STDOUT] x")]
+    assert sum(line.count("x") for line in logged) == 200_000 and len(logged) > 1
+    assert "[STDOUT] end" in content
+
+
+async def test_spawn_agent_cli_async_stops_process_on_read_error(tmp_path: Path, monkeypatch) -> None:
+    """Any failure while reading output stops the child before propagating."""
+    import asyncio
+    import os
+
+    from orchestrator import conpty_wrapper
+
+    pid_file = tmp_path / "child.pid"
+
+    async def _broken_pump(stream, label, log, sink):
+        if stream is not None and label == "STDOUT":
+            await stream.readline()  # the child has started and written its pid
+            raise ValueError("pipe broke")
+
+    monkeypatch.setattr(conpty_wrapper, "_pump_stream", _broken_pump)
+    run_id = uuid4()
+    script = f"import os, time; open({str(pid_file)!r}, 'w').write(str(os.getpid())); print('up', flush=True); time.sleep(30)"
+    with pytest.raises(ValueError):
+        await conpty_wrapper.spawn_agent_cli_async(
+            [sys.executable, "-c", script], uuid4(), run_id, trace_dir=tmp_path, timeout=20.0
+        )
+    pid = int(pid_file.read_text())
+    await asyncio.sleep(0.1)
+    with pytest.raises(ProcessLookupError):
+        os.kill(pid, 0)
+    assert "=== ERROR ===" in (tmp_path / f"{run_id}.log").read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize(("raw", "expected"), [("6", 6), ("", 4), ("lots", 4)])
+def test_env_int_falls_back_on_invalid_values(monkeypatch, raw: str, expected: int) -> None:
+    from orchestrator import conpty_wrapper
+
+    monkeypatch.setenv("AGENT_CLI_MAX_PROCESSES", raw)
+    assert conpty_wrapper._env_int("AGENT_CLI_MAX_PROCESSES", 4) == expected
@@ -0,0 +1,89 @@
+from mcp_agent_mail.metrics import Histogram, HistogramFamily
+
+
+def test_histogram_cumulative_buckets() -> None:
+    hist = Histogram(buckets=(1, 10, 100))
+    for value in (0.5, 1, 5, 50, 500):
+        hist.observe(value)
+    snap = hist.snapshot()
+    assert snap["count"] == 5
+    assert snap["max"] == 500
+    assert snap["buckets"] == {"1": 2, "10": 3, "100": 4, "+Inf": 5}
+
+
+def test_histogram_family_keys_by_label() -> None:
+    family = HistogramFamily("render_ms", buckets=(5,))
+    family.observe("a.html", 1)
+    family.observe("a.html", 9)
+    family.observe("b.html", 2)
+    snap = family.snapshot()
+    assert snap["a.html"]["buckets"] == {"5": 1, "+Inf": 2}
+    assert snap["b.html"]["count"] == 1
+
+
+def test_sharded_histogram_sums_threads() -> None:
+    import threading
+
+    hist = Histogram(buckets=(10,))
+    threads = [
+        threading.Thread(target=lambda: [hist.observe(1) for _ in range(1000)])
+        for _ in range(4)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert hist.count == 4000
+    assert hist.snapshot()["buckets"] == {"10": 4000, "+Inf": 4000}
+
+
+def test_registry_renders_prometheus_text() -> None:
+    from mcp_agent_mail.metrics import MetricsRegistry
+
+    registry = MetricsRegistry(prefix="t_")
+    registry.histogram("req_ms", "Latency", label_names=("route",), buckets=(5,)).observe(
+        'GET /a"b', 3
+    )
+    registry.counter("hits", "Hits", label_names=("route", "status")).inc(("GET /a", "2xx"), 2)
+    registry.gauge("depth", "Queue depth", lambda: 7)
+    text = registry.render_prometheus()
+    assert "# TYPE t_req_ms histogram" in text
+    assert 't_req_ms_bucket{route="GET /a\\"b",le="5"} 1' in text
+    assert 't_req_ms_count{route="GET /a\\"b"} 1' in text
+    assert "# TYPE t_hits_total counter" in text
+    assert 't_hits_total{route="GET /a",status="2xx"} 2' in text
+    assert "t_depth 7" in text
+
+
+def test_snapshot_delta_reports_only_moved_series() -> None:
+    from mcp_agent_mail.metrics import MetricsRegistry, snapshot_delta
+
+    registry = MetricsRegistry()
+    hist = registry.histogram("op_ms", buckets=(5,))
+    hits = registry.counter("hits")
+    hist.observe("a", 1)
+    hist.observe("b", 1)
+    hits.inc("x")
+    first = registry.snapshot()
+    hist.observe("a", 9)
+    second = registry.snapshot()
+    delta = snapshot_delta(first, second)
+    assert delta == {
+        "op_ms": {"a": {"count": 1, "sum": 9.0, "max": 9.0, "buckets": {"5": 0, "+Inf": 1}}}
+    }
+    assert snapshot_delta(second, second) == {}
+
+
+def test_track_tool_counts_errors() -> None:
+    import pytest
+
+    from mcp_agent_mail.metrics import TOOL_CALL_ERRORS, track_tool, tool_metrics_snapshot
+
+    with track_tool("unit_ok"):
+        pass
+    with pytest.raises(ValueError), track_tool("unit_fail"):
+        raise ValueError("boom")
+    snap = tool_metrics_snapshot()
+    assert snap["unit_ok"]["count"] == 1 and snap["unit_ok"]["errors"] == 0
+    assert snap["unit_fail"]["errors"] == 1
+    assert TOOL_CALL_ERRORS.snapshot()["unit_fail"] == 1
@@ -0,0 +1,77 @@
+import asyncio
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from mcp_agent_mail.config import DatabaseSettings
+from mcp_agent_mail.query_stats import (
+    QUERY_STATS,
+    QueryStats,
+    capture_plans,
+    install_query_stats,
+    normalize_sql,
+    redact_params,
+)
+
+
+def test_normalize_sql_collapses_literals_and_params() -> None:
+    a = normalize_sql("SELECT * FROM messages WHERE id IN (?, ?, ?) AND subject = 'hi'  LIMIT 50")
+    b = normalize_sql("SELECT * FROM messages WHERE id IN (?, ?) AND subject = 'it''s' LIMIT 10")
+    assert a == b == "SELECT * FROM messages WHERE id IN (?...) AND subject = ? LIMIT ?"
+    assert normalize_sql("SELECT t1.x FROM t1 WHERE y = :y_1") == "SELECT t1.x FROM t1 WHERE y = ?"
+
+
+def test_redact_params_keeps_only_types() -> None:
+    assert redact_params(("secret", 3, None)) == ["<str:6>", "<int>", "NULL"]
+    assert redact_params({"token": b"abc"}) == {"token": "<bytes:3>"}
+    assert redact_params([(1,), (2,)], executemany=True) == "<2 rows>"
+
+
+def test_report_orders_shapes_and_counts_slow() -> None:
+    stats = QueryStats(slow_ms=10)
+    assert not stats.record("SELECT 1 FROM a WHERE id = ?", (1,), 2.0)
+    assert stats.record("SELECT 1 FROM a WHERE id = ?", (2,), 30.0)
+    stats.record("SELECT 2 FROM b", (), 5.0)
+    report = stats.report()
+    assert report["statements"] == 3
+    assert report["slow_statements"] == 1
+    top = report["queries"][0]
+    assert top["sql"] == "SELECT ? FROM a WHERE id = ?"
+    assert top["count"] == 2 and top["max_ms"] == 30.0 and top["avg_ms"] == 16.0
+    assert [s.sql for s in stats.slowest(5)] == [top["sql"]]
+
+
+def test_shapes_are_bounded() -> None:
+    stats = QueryStats(max_shapes=2)
+    stats.record("SELECT a FROM t", (), 5.0)
+    stats.record("SELECT b FROM t", (), 1.0)
+    stats.record("SELECT c FROM t", (), 3.0)
+    assert {q["sql"] for q in stats.report()["queries"]} == {"SELECT a FROM t", "SELECT c FROM t"}
+
+
+def test_engine_hooks_record_and_capture_plans(tmp_path: Path) -> None:
+    async def _run() -> dict:
+        url = f"sqlite+aiosqlite:///{tmp_path / 'q.sqlite3'}"
+        engine = create_async_engine(url)
+        install_query_stats(engine, DatabaseSettings(url=url, echo=False, slow_query_ms=0))
+        try:
+            async with engine.begin() as conn:
+                await conn.exec_driver_sql("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+                await conn.exec_driver_sql("INSERT INTO items (name) VALUES (?)", ("secret",))
+                await conn.exec_driver_sql("SELECT name FROM items WHERE id = ?", (1,))
+            assert await capture_plans(engine, limit=10) >= 1
+            return QUERY_STATS.report(limit=10)
+        finally:
+            await engine.dispose()
+
+    QUERY_STATS.reset()
+    try:
+        report = asyncio.run(_run())
+    finally:
+        QUERY_STATS.reset()
+        QUERY_STATS.slow_ms = 100.0
+    by_sql = {q["sql"]: q for q in report["queries"]}
+    select = by_sql["SELECT name FROM items WHERE id = ?"]
+    assert select["slow_count"] == 1
+    assert select["plan"] and "items" in select["plan"][0]
+    assert not any(q["sql"].startswith("EXPLAIN") for q in report["queries"])
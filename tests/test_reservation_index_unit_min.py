@@ -0,0 +1,137 @@
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from mcp_agent_mail.db import ensure_schema, reset_database_state, session_context
+from mcp_agent_mail.mail_client import MailClient
+from mcp_agent_mail.models import Agent, Project
+from mcp_agent_mail.reservation_index import (
+    RESERVATION_INDEX,
+    ActiveReservation,
+    ProjectReservationTrie,
+    ReservationConflictError,
+    patterns_overlap,
+)
+
+FUTURE = datetime.now(timezone.utc) + timedelta(hours=1)
+
+
+def _entry(rid: int, pattern: str) -> ActiveReservation:
+    return ActiveReservation(
+        id=rid, agent_id=1, path_pattern=pattern, exclusive=True, expires_ts=FUTURE
+    )
+
+
+@pytest.mark.parametrize(
+    ("a", "b", "expected"),
+    [
+        ("src/app.py", "src/app.py", True),
+        ("src/*.py", "src/app.py", True),
+        ("src/*.py", "src/app.md", False),
+        ("agents/*/inbox/2025/01/*.md", "agents/Blue/inbox/2025/01/x.md", True),
+        ("agents/*/inbox/2025/01/*.md", "agents/Blue/outbox/2025/01/x.md", False),
+        ("docs/**", "docs/a/b/c.md", True),
+        ("**/*.md", "README.md", True),
+        ("src/**/test_*.py", "src/a/b/test_x.py", True),
+        ("src/**/test_*.py", "lib/test_x.py", False),
+        ("src/a*", "src/*b", True),
+        ("src/a*.py", "src/b*.py", False),
+    ],
+)
+def test_patterns_overlap(a: str, b: str, expected: bool) -> None:
+    assert patterns_overlap(a, b) is expected
+    assert patterns_overlap(b, a) is expected
+
+
+def test_trie_matches_linear_reference() -> None:
+    rng = random.Random(7)
+    choices = ["src", "docs", "agents", "*", "**", "a*", "*.py", "x.py", "inbox"]
+    patterns = [
+        "/".join(rng.choice(choices) for _ in range(rng.randint(1, 4)))
+        for _ in range(300)
+    ]
+    trie = ProjectReservationTrie()
+    for rid, pattern in enumerate(patterns):
+        trie.add(_entry(rid, pattern))
+    for query in patterns[:80] + ["src/x.py", "docs/a/b", "agents/Blue/inbox"]:
+        got = {e.id for e in trie.overlapping(query)}
+        want = {rid for rid, p in enumerate(patterns) if patterns_overlap(p, query)}
+        assert got == want, query
+
+
+def test_trie_remove_prunes_branches() -> None:
+    trie = ProjectReservationTrie()
+    trie.add(_entry(1, "src/**/a.py"))
+    trie.add(_entry(2, "src/lib/*.py"))
+    assert {e.id for e in trie.overlapping("src/lib/a.py")} == {1, 2}
+    assert trie.remove(1) and trie.remove(2)
+    assert trie.root.empty() and len(trie) == 0
+
+
+def test_create_lease_rejects_conflicting_pattern(isolated_env) -> None:
+    async def _run() -> None:
+        reset_database_state()
+        RESERVATION_INDEX.clear()
+        await ensure_schema()
+        async with session_context() as session:
+            project = Project(slug="fr-trie", human_key="fr-trie")
+            session.add(project)
+            await session.commit()
+            await session.refresh(project)
+            assert project.id is not None
+            session.add_all(
+                [
+                    Agent(project_id=project.id, name=n, program="p", model="m")
+                    for n in ("Blue", "Green")
+                ]
+            )
+            await session.commit()
+
+        client = MailClient()
+        held = await client.create_lease("fr-trie", "Blue", "src/**/*.py")
+        # The holder may extend its own reservation
+        await client.create_lease("fr-trie", "Blue", "src/pkg/*.py")
+        with pytest.raises(ReservationConflictError) as excinfo:
+            await client.create_lease("fr-trie", "Green", "src/pkg/mod.py")
+        assert held.id in {c.id for c in excinfo.value.conflicts}
+        assert await client.check_lease_conflicts("fr-trie", "docs/*.md", "Green") == []
+
+        assert held.id is not None
+        await client.release_lease(held.id)
+        remaining = await client.check_lease_conflicts("fr-trie", "src/pkg/mod.py", "Green")
+        assert [c.path_pattern for c in remaining] == ["src/pkg/*.py"]
+
+    asyncio.run(_run())
+
+
+def test_concurrent_create_lease_admits_one_holder(isolated_env) -> None:
+    async def _run() -> None:
+        reset_database_state()
+        RESERVATION_INDEX.clear()
+        await ensure_schema()
+        async with session_context() as session:
+            project = Project(slug="fr-race", human_key="fr-race")
+            session.add(project)
+            await session.commit()
+            await session.refresh(project)
+            assert project.id is not None
+            session.add_all(
+                [
+                    Agent(project_id=project.id, name=n, program="p", model="m")
+                    for n in ("Blue", "Green")
+                ]
+            )
+            await session.commit()
+
+        client = MailClient()
+        results = await asyncio.gather(
+            client.create_lease("fr-race", "Blue", "src/**"),
+            client.create_lease("fr-race", "Green", "src/app.py"),
+            return_exceptions=True,
+        )
+        assert sum(isinstance(r, ReservationConflictError) for r in results) == 1
+        assert sum(not isinstance(r, BaseException) for r in results) == 1
+
+    asyncio.run(_run())
@@ -0,0 +1,85 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from mcp_agent_mail.db import ensure_schema, reset_database_state, session_context
+from mcp_agent_mail.models import Agent, FileReservation, Project
+from mcp_agent_mail.reservation_scheduler import ReservationExpiryScheduler
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def test_heap_orders_reschedules_and_cancels() -> None:
+    sched = ReservationExpiryScheduler()
+    sched.schedule(1, T0 + timedelta(seconds=30))
+    sched.schedule(2, T0 + timedelta(seconds=10))
+    sched.schedule(3, T0 + timedelta(seconds=20))
+    sched.schedule(2, T0 + timedelta(seconds=40))  # extended lease
+    sched.cancel(3)
+    assert sched.next_due() == T0 + timedelta(seconds=30)
+    assert sched.pop_due(T0 + timedelta(seconds=35)) == [1]
+    assert sched.pop_due(T0 + timedelta(seconds=60)) == [2]
+    assert len(sched) == 0 and sched.next_due() is None
+
+
+async def _seed(expiries: list[datetime]) -> list[int]:
+    reset_database_state()
+    await ensure_schema()
+    async with session_context() as session:
+        project = Project(slug="fr-sched", human_key="fr-sched")
+        session.add(project)
+        await session.commit()
+        await session.refresh(project)
+        assert project.id is not None
+        agent = Agent(project_id=project.id, name="Holder", program="p", model="m")
+        session.add(agent)
+        await session.commit()
+        await session.refresh(agent)
+        assert agent.id is not None
+        rows = [
+            FileReservation(
+                project_id=project.id,
+                agent_id=agent.id,
+                path_pattern=f"src/{i}/*",
+                expires_ts=expires,
+            )
+            for i, expires in enumerate(expiries)
+        ]
+        session.add_all(rows)
+        await session.commit()
+        return [int(r.id or 0) for r in rows]
+
+
+def test_run_releases_due_rows_and_wakes_on_schedule(isolated_env) -> None:
+    async def _run() -> None:
+        now = datetime.now(timezone.utc)
+        stale, future = await _seed([now - timedelta(minutes=5), now + timedelta(hours=1)])
+        sched = ReservationExpiryScheduler(resync_seconds=3600)
+        task = asyncio.create_task(sched.run())
+        try:
+            for _ in range(100):
+                if sched.expired_total:
+                    break
+                await asyncio.sleep(0.02)
+            assert sched.expired_total == 1
+            assert len(sched) == 1
+
+            # A lease moved to expire shortly wakes the sleeping loop
+            sched.schedule(future, datetime.now(timezone.utc) + timedelta(seconds=0.1))
+            for _ in range(100):
+                if sched.expired_total == 2:
+                    break
+                await asyncio.sleep(0.02)
+            assert sched.expired_total == 2
+        finally:
+            task.cancel()
+        async with session_context() as session:
+            released = (
+                await session.execute(
+                    text("SELECT id FROM file_reservations WHERE released_ts IS NOT NULL")
+                )
+            ).scalars().all()
+        assert sorted(released) == sorted([stale, future])
+
+    asyncio.run(_run())
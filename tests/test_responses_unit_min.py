@@ -0,0 +1,70 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+from uuid import UUID
+
+from mcp_agent_mail import responses
+from mcp_agent_mail.responses import (
+    FastJSONResponse,
+    StreamingJSONResponse,
+    json_response_class,
+)
+
+
+def _payload() -> dict:
+    return {
+        "id": 1,
+        "subject": "日本語",
+        "created": datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        "uid": UUID("12345678-1234-5678-1234-567812345678"),
+    }
+
+
+def _expected() -> dict:
+    return {
+        "id": 1,
+        "subject": "日本語",
+        "created": "2025-01-02T03:04:05+00:00",
+        "uid": "12345678-1234-5678-1234-567812345678",
+    }
+
+
+def test_fast_json_response_renders_rich_types() -> None:
+    response = FastJSONResponse(_payload())
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == _expected()
+
+
+def test_stdlib_fallback_matches(monkeypatch) -> None:
+    monkeypatch.setattr(responses, "_orjson", None)
+    assert json.loads(FastJSONResponse(_payload()).body) == _expected()
+
+
+def test_json_response_class_is_opt_in() -> None:
+    from starlette.responses import JSONResponse
+
+    assert json_response_class(False) is JSONResponse
+    assert json_response_class(True) is FastJSONResponse
+
+
+async def _collect(response: StreamingJSONResponse) -> bytes:
+    chunks = [chunk async for chunk in response.body_iterator]
+    return b"".join(chunks)
+
+
+def test_streaming_array_from_async_iterable() -> None:
+    async def _items():
+        for i in range(150):
+            yield {"id": i}
+
+    response = StreamingJSONResponse(
+        _items(), array_key="messages", envelope={"projects": []}
+    )
+    body = json.loads(asyncio.run(_collect(response)))
+    assert [m["id"] for m in body["messages"]] == list(range(150))
+    assert body["projects"] == []
+
+
+def test_streaming_empty_array() -> None:
+    response = StreamingJSONResponse([], array_key="messages")
+    assert json.loads(asyncio.run(_collect(response))) == {"messages": []}
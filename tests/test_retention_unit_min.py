@@ -0,0 +1,141 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from mcp_agent_mail.config import get_settings
+from mcp_agent_mail.db import ensure_schema, reset_database_state, session_context
+from mcp_agent_mail.models import Agent, Message, MessageRecipient, Project
+from mcp_agent_mail.retention import (
+    RetentionExecutor,
+    archived_message,
+    archived_messages,
+    archived_months,
+    load_checkpoint,
+)
+
+NOW = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+async def _seed() -> list[int]:
+    reset_database_state()
+    await ensure_schema()
+    async with session_context() as session:
+        project = Project(slug="keep", human_key="keep")
+        session.add(project)
+        await session.commit()
+        await session.refresh(project)
+        assert project.id is not None
+        blue = Agent(project_id=project.id, name="Blue", program="p", model="m")
+        green = Agent(project_id=project.id, name="Green", program="p", model="m")
+        session.add_all([blue, green])
+        await session.commit()
+        await session.refresh(blue)
+        await session.refresh(green)
+        assert blue.id is not None and green.id is not None
+        ages = [400, 390, 370, 300, 10]  # days; 180-day retention keeps the last one
+        messages = [
+            Message(
+                project_id=project.id,
+                sender_id=blue.id,
+                thread_id="t-1",
+                subject=f"needle {i}",
+                body_md=f"body {i}",
+                created_ts=NOW - timedelta(days=age),
+            )
+            for i, age in enumerate(ages)
+        ]
+        session.add_all(messages)
+        await session.commit()
+        ids = [int(m.id or 0) for m in messages]
+        session.add_all(
+            [MessageRecipient(message_id=mid, agent_id=green.id) for mid in ids]
+        )
+        await session.commit()
+        return ids
+
+
+def test_retention_archives_in_batches_and_serves_months(isolated_env) -> None:
+    async def _run() -> None:
+        ids = await _seed()
+        settings = get_settings()
+
+        first = await RetentionExecutor(settings, batch_size=2, max_batches=1).run_once(NOW)
+        assert first.archived == 2 and not first.complete
+        checkpoint = await load_checkpoint()
+        assert checkpoint is not None and checkpoint["archived_total"] == 2
+
+        rest = await RetentionExecutor(settings, batch_size=2).run_once(NOW)
+        assert rest.archived == 2 and rest.complete
+        checkpoint = await load_checkpoint()
+        assert checkpoint is not None and checkpoint["archived_total"] == 4
+        assert checkpoint["last_message_id"] == ids[3]
+
+        async with session_context() as session:
+            left = (await session.execute(text("SELECT id FROM messages"))).scalars().all()
+            recipients = (
+                await session.execute(text("SELECT COUNT(*) FROM message_recipients"))
+            ).scalar()
+            fts = (
+                await session.execute(
+                    text("SELECT rowid FROM fts_messages WHERE fts_messages MATCH 'needle'")
+                )
+            ).scalars().all()
+        assert left == [ids[4]] and recipients == 1 and fts == [ids[4]]
+
+        months = await archived_months(settings, "keep")
+        assert months == sorted(
+            {(NOW - timedelta(days=d)).strftime("%Y-%m") for d in (400, 390, 370, 300)}
+        )
+        served = [r["id"] for m in months for r in await archived_messages(settings, "keep", m)]
+        assert served == ids[:4]
+        record = await archived_message(settings, "keep", ids[2])
+        assert record is not None and record["recipients"][0]["name"] == "Green"
+        only_blue = await archived_messages(settings, "keep", months[0], agent="Nobody")
+        assert only_blue == []
+
+        # Nothing left past the cutoff: a rerun is a no-op
+        assert (await RetentionExecutor(settings).run_once(NOW)).archived == 0
+
+    asyncio.run(_run())
+
+
+def test_retention_skips_ignored_projects(isolated_env) -> None:
+    async def _run() -> None:
+        ids = await _seed()
+        settings = get_settings()
+        assert "demo" in settings.retention_ignore_project_patterns
+        async with session_context() as session:
+            demo = Project(slug="demo", human_key="demo")
+            session.add(demo)
+            await session.commit()
+            await session.refresh(demo)
+            assert demo.id is not None
+            red = Agent(project_id=demo.id, name="Red", program="p", model="m")
+            session.add(red)
+            await session.commit()
+            await session.refresh(red)
+            assert red.id is not None
+            old = Message(
+                project_id=demo.id,
+                sender_id=red.id,
+                thread_id="t-2",
+                subject="demo",
+                body_md="demo",
+                created_ts=NOW - timedelta(days=500),
+            )
+            session.add(old)
+            await session.commit()
+            demo_id = int(old.id or 0)
+
+        result = await RetentionExecutor(settings, batch_size=2).run_once(NOW)
+        assert result.archived == 4 and result.complete
+
+        async with session_context() as session:
+            left = (
+                await session.execute(text("SELECT id FROM messages ORDER BY id"))
+            ).scalars().all()
+        assert left == [ids[4], demo_id]
+        assert await archived_months(settings, "demo") == []
+
+    asyncio.run(_run())
@@ -0,0 +1,219 @@
+import asyncio
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from mcp_agent_mail.db import ensure_schema, get_session
+from mcp_agent_mail.models import Agent, Mission, Project, Task, TaskGroup, WorkflowRun
+from mcp_agent_mail.run_queue import (
+    RunQueue,
+    mission_progress,
+    queue_position,
+    recover_orphaned_runs,
+)
+
+
+async def _mission(session: AsyncSession, project: Project, title: str) -> Mission:
+    agent = Agent(project_id=project.id, name=f"Queue{title}", program="test", model="test")
+    mission = Mission(project_id=project.id, title=title)
+    session.add_all([agent, mission])
+    await session.commit()
+    group = TaskGroup(mission_id=mission.id, title="g")
+    session.add(group)
+    await session.commit()
+    session.add(Task(group_id=group.id, agent_id=agent.id, title="t", input={"note": title}))
+    await session.commit()
+    return mission
+
+
+def test_enqueue_returns_before_worker_runs(
+    isolated_env, tmp_path: Path, monkeypatch
+) -> None:
+    monkeypatch.chdir(tmp_path)
+
+    async def _run() -> tuple[str, int | None, str, dict]:
+        await ensure_schema()
+        queue = RunQueue(workers=1, poll_seconds=0.1, trace_dir=tmp_path / "traces")
+        async with get_session() as session:
+            project = Project(slug="queue-a", human_key="queue-a")
+            session.add(project)
+            await session.commit()
+            mission = await _mission(session, project, "A")
+            run = await queue.enqueue(session, mission)
+            position = await queue_position(session, run)
+        queued_status = run.status
+        await queue.start()
+        try:
+            for _ in range(100):
+                async with get_session() as session:
+                    row = await session.get(WorkflowRun, run.run_id)
+                    if row.status not in {"queued", "running"}:
+                        progress = await mission_progress(session, mission.id)
+                        return queued_status, position, row.status, progress
+                await asyncio.sleep(0.05)
+        finally:
+            await queue.stop()
+        raise AssertionError("run was never executed")
+
+    queued, position, final, progress = asyncio.run(_run())
+    assert (queued, position, final) == ("queued", 1, "completed")
+    assert progress["tasks_by_status"] == {"completed": 1}
+    assert progress["fraction_done"] == 1.0
+
+
+def test_claim_respects_per_project_cap(
+    isolated_env, tmp_path: Path, monkeypatch
+) -> None:
+    async def _run() -> list:
+        await ensure_schema()
+        queue = RunQueue(per_project=1)
+        async with get_session() as session:
+            p1 = Project(slug="queue-b", human_key="queue-b")
+            p2 = Project(slug="queue-c", human_key="queue-c")
+            session.add_all([p1, p2])
+            await session.commit()
+            first = await queue.enqueue(session, await _mission(session, p1, "B1"))
+            await queue.enqueue(session, await _mission(session, p1, "B2"))
+            other = await queue.enqueue(session, await _mission(session, p2, "C1"))
+        claimed = [await queue.claim_next() for _ in range(3)]
+        async with get_session() as session:
+            rows = (await session.execute(select(WorkflowRun))).scalars().all()
+            statuses = sorted((r.project_id, r.status, r.worker_id == queue.worker_id) for r in rows)
+        return [claimed, first.run_id, other.run_id, statuses, p1.id, p2.id]
+
+    claimed, first, other, statuses, p1, p2 = asyncio.run(_run())
+    # Second run of project 1 waits until the first one finishes
+    assert claimed == [first, other, None]
+    assert statuses == sorted(
+        [(p1, "queued", False), (p1, "running", True), (p2, "running", True)]
+    )
+
+
+def test_failed_execution_marks_run_failed(
+    isolated_env, tmp_path: Path, monkeypatch
+) -> None:
+    async def _run() -> str:
+        await ensure_schema()
+        queue = RunQueue()
+        async with get_session() as session:
+            project = Project(slug="queue-d", human_key="queue-d")
+            session.add(project)
+            await session.commit()
+            mission = await _mission(session, project, "D")
+            run = await queue.enqueue(session, mission)
+            await session.delete(mission)
+            await session.commit()
+        assert await queue.claim_next() == run.run_id
+        await queue.execute(run.run_id)
+        async with get_session() as session:
+            return (await session.get(WorkflowRun, run.run_id)).status
+
+    assert asyncio.run(_run()) == "failed"
+
+
+def test_orphaned_runs_are_requeued(isolated_env) -> None:
+    async def _run() -> tuple[dict, dict, dict]:
+        await ensure_schema()
+        now = datetime.now(timezone.utc)
+        stale = now - timedelta(hours=1)
+        async with get_session() as session:
+            project = Project(slug="queue-e", human_key="queue-e")
+            session.add(project)
+            await session.commit()
+            mission = await _mission(session, project, "E")
+            host, pid, parent = socket.gethostname(), os.getpid(), os.getppid()
+            runs = {
+                "dead_pid": WorkflowRun(mission_id=mission.id, worker_id=f"{host}:999999999:x"),
+                # This host and PID: owned by this process, or by a predecessor at startup
+                "own_pid": WorkflowRun(mission_id=mission.id, worker_id=f"{host}:{pid}:x", heartbeat_at=now),
+                "own_inline": WorkflowRun(
+                    mission_id=mission.id, worker_id=f"{host}:{pid}:inline", heartbeat_at=stale
+                ),
+                "local_fresh": WorkflowRun(mission_id=mission.id, worker_id=f"{host}:{parent}:x", heartbeat_at=now),
+                "local_stale": WorkflowRun(
+                    mission_id=mission.id, worker_id=f"{host}:{parent}:y", heartbeat_at=stale
+                ),
+                "remote_fresh": WorkflowRun(mission_id=mission.id, worker_id="elsewhere:1:x", heartbeat_at=now),
+                "remote_stale": WorkflowRun(
+                    mission_id=mission.id,
+                    worker_id="elsewhere:2:x",
+                    heartbeat_at=stale,
+                    checkpoint={"completed_task_ids": ["a"], "shared_data": {}},
+                ),
+            }
+            session.add_all(runs.values())
+            await session.commit()
+            ids = {name: run.run_id for name, run in runs.items()}
+
+        async def _statuses() -> dict:
+            async with get_session() as session:
+                return {name: (await session.get(WorkflowRun, rid)).status for name, rid in ids.items()}
+
+        names = {rid: name for name, rid in ids.items()}
+        swept = await recover_orphaned_runs(stale_seconds=300)
+        after_sweep = await _statuses()
+        started = await recover_orphaned_runs(stale_seconds=300, startup=True)
+        recovered = {"sweep": sorted(names[r] for r in swept), "startup": sorted(names[r] for r in started)}
+        return recovered, after_sweep, await _statuses()
+
+    recovered, after_sweep, after_startup = asyncio.run(_run())
+    assert recovered == {
+        "sweep": ["dead_pid", "local_stale", "remote_stale"],
+        "startup": ["own_inline", "own_pid"],
+    }
+    assert after_sweep == {
+        "dead_pid": "queued",
+        "own_pid": "running",
+        "own_inline": "running",
+        "local_fresh": "running",
+        "local_stale": "queued",
+        "remote_fresh": "running",
+        "remote_stale": "queued",
+    }
+    assert after_startup == {**after_sweep, "own_pid": "queued", "own_inline": "queued"}
+
+
+def test_stop_requeues_in_flight_runs(isolated_env) -> None:
+    async def _run() -> tuple[str, str | None]:
+        await ensure_schema()
+        queue = RunQueue()
+        async with get_session() as session:
+            project = Project(slug="queue-f", human_key="queue-f")
+            session.add(project)
+            await session.commit()
+            mission = await _mission(session, project, "F")
+            run = WorkflowRun(mission_id=mission.id, status="running", worker_id=queue.worker_id)
+            session.add(run)
+            await session.commit()
+            run_id = run.run_id
+        queue.active[run_id] = 0
+        await queue.stop()
+        async with get_session() as session:
+            stored = await session.get(WorkflowRun, run_id)
+            return stored.status, stored.worker_id
+
+    assert asyncio.run(_run()) == ("queued", None)
+
+
+def test_worker_sweeps_for_orphans_periodically(isolated_env, monkeypatch) -> None:
+    calls: list[dict] = []
+
+    async def _recover(**kwargs) -> list:
+        calls.append(kwargs)
+        return []
+
+    monkeypatch.setattr("mcp_agent_mail.run_queue.recover_orphaned_runs", _recover)
+
+    async def _run() -> None:
+        await ensure_schema()
+        queue = RunQueue(workers=2, poll_seconds=0.1, orphan_seconds=1.0)
+        await queue.start()
+        await asyncio.sleep(1.3)
+        await queue.stop()
+
+    asyncio.run(_run())
+    assert calls == [{"stale_seconds": 1.0}]
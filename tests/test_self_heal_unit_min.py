@@ -0,0 +1,36 @@
+from types import SimpleNamespace
+
+import pytest
+
+from mcp_agent_mail.self_heal import SelfHealPolicy, is_recovery_task, normalize_strategies
+
+
+def test_policy_from_settings_and_mission_overrides() -> None:
+    settings = SimpleNamespace(
+        workflow_self_heal_retries=2,
+        workflow_self_heal_backoff_ms=100,
+        workflow_self_heal_backoff_max_ms=250,
+        workflow_self_heal_budget=5,
+        workflow_self_heal_strategies="recover, rollback,",
+    )
+    policy = SelfHealPolicy.from_settings(settings)
+    assert [policy.backoff_seconds(n) for n in (1, 2, 3, 4)] == [0.1, 0.2, 0.25, 0.25]
+    assert [s["strategy"] for s in policy.strategies] == ["recover", "rollback"]
+
+    tuned = policy.with_overrides({"retries": "0", "budget": 1, "strategies": "rewrite"})
+    assert (tuned.retries, tuned.budget, tuned.backoff_ms) == (0, 1, 100.0)
+    assert tuned.strategies == ({"strategy": "rewrite"},)
+    assert policy.with_overrides(None) is policy
+
+
+def test_task_strategies_override_policy() -> None:
+    policy = SelfHealPolicy()
+    assert policy.strategies_for({}) == ({"strategy": "recover"},)
+    own = policy.strategies_for({"recovery": [{"kind": "agent_cli", "command": ["fix"]}, "retry"]})
+    assert own == (
+        {"kind": "agent_cli", "command": ["fix"], "strategy": "strategy1"},
+        {"strategy": "retry"},
+    )
+    with pytest.raises(ValueError):
+        normalize_strategies([42])
+    assert is_recovery_task({"recovery_for": "x"}) and not is_recovery_task(None)
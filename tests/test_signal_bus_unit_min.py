@@ -0,0 +1,52 @@
+import asyncio
+import threading
+
+from mcp_agent_mail.signal_bus import SignalBus
+
+
+def _event(i: int, *, project_id: int = 1, severity: str = "info") -> dict:
+    return {"id": i, "project_id": project_id, "severity": severity}
+
+
+def test_subscription_drops_oldest_when_full() -> None:
+    async def _run() -> None:
+        bus = SignalBus(buffer_size=2)
+        sub = bus.subscribe()
+        for i in range(5):
+            bus.publish(_event(i))
+        assert [e["id"] for e in await sub.wait(0.1)] == [3, 4]
+        stats = bus.stats()
+        assert stats["dropped"] == 3 and stats["delivered"] == 5
+        bus.unsubscribe(sub)
+        assert bus.stats()["subscribers"] == 0
+        assert bus.stats()["dropped"] == 3
+
+    asyncio.run(_run())
+
+
+def test_publish_filters_by_project_and_severity() -> None:
+    async def _run() -> None:
+        bus = SignalBus()
+        warn = bus.subscribe(project_id=1, severities=["warning", "critical"])
+        everything = bus.subscribe()
+        assert bus.publish(_event(1, severity="info")) == 1
+        assert bus.publish(_event(2, project_id=2, severity="warning")) == 1
+        assert bus.publish(_event(3, severity="WARNING")) == 2
+        assert [e["id"] for e in await warn.wait(0.1)] == [3]
+        assert len(await everything.wait(0.1)) == 3
+        assert await warn.wait(0.01) == []
+
+    asyncio.run(_run())
+
+
+def test_publish_from_another_thread_wakes_subscriber() -> None:
+    async def _run() -> None:
+        bus = SignalBus()
+        sub = bus.subscribe()
+        thread = threading.Thread(target=bus.publish, args=(_event(7),))
+        thread.start()
+        events = await sub.wait(2.0)
+        thread.join()
+        assert [e["id"] for e in events] == [7]
+
+    asyncio.run(_run())
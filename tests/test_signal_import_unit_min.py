@@ -0,0 +1,72 @@
+import asyncio
+from pathlib import Path
+
+from mcp_agent_mail.db import ensure_schema, reset_database_state, session_context
+from mcp_agent_mail.models import Project
+from mcp_agent_mail.signal_import import SignalImporter, _read_lines, dedupe_key
+
+
+async def _project(slug: str) -> int:
+    reset_database_state()
+    await ensure_schema()
+    async with session_context() as session:
+        proj = Project(slug=slug, human_key=slug)
+        session.add(proj)
+        await session.commit()
+        await session.refresh(proj)
+        assert proj.id is not None
+        return int(proj.id)
+
+
+def _line(event: str, command: str) -> str:
+    return f'{{"event":"{event}","command":"{command}"}}\n'
+
+
+def test_read_lines_keeps_partial_tail(tmp_path: Path) -> None:
+    log = tmp_path / "events.jsonl"
+    log.write_bytes(b'{"event":"retry"}\n{"event":"time')
+    lines, offset, eof = _read_lines(log, 0, 10)
+    assert lines == [b'{"event":"retry"}\n']
+    assert offset == len(lines[0])
+    assert eof
+
+
+def test_dedupe_key_is_project_scoped() -> None:
+    assert dedupe_key(1, b"x\n") == dedupe_key(1, b"x")
+    assert dedupe_key(1, b"x") != dedupe_key(2, b"x")
+
+
+def test_import_resumes_and_dedupes(isolated_env, tmp_path: Path) -> None:
+    async def _run() -> None:
+        await _project("sig-import")
+        log = tmp_path / "dangerous_command_events.jsonl"
+        log.write_text(
+            _line("dangerous_command", "rm -rf /tmp")
+            + _line("unknown_event", "ignored")
+            + _line("retry", "again"),
+            encoding="utf-8",
+        )
+        importer = SignalImporter(project_key="sig-import", batch_size=1)
+        first = await importer.import_file(log)
+        assert first.imported == 2
+        assert first.offset == log.stat().st_size
+
+        with log.open("a", encoding="utf-8") as fh:
+            fh.write(_line("timeout", "slow"))
+        second = await importer.import_file(log)
+        assert (second.imported, second.duplicates) == (1, 0)
+
+        replay = await importer.import_file(log, resume=False)
+        assert (replay.imported, replay.duplicates) == (0, 3)
+
+        # A cursor belongs to one destination: the same log still imports elsewhere
+        await _project("sig-import-2")
+        other = await SignalImporter(project_key="sig-import-2").import_file(log)
+        assert (other.imported, other.duplicates) == (3, 0)
+
+        orphan = await SignalImporter(project_key="missing").import_file(
+            log, resume=False
+        )
+        assert orphan.imported == 0 and orphan.skipped == 3
+
+    asyncio.run(_run())
@@ -69,3 +69,62 @@ def test_signal_import_dangerous(tmp_path: Path) -> None:
     assert "dangerous_command" in types
     assert "approval_required" in types
     assert "failing_test" in types
+
+
+def test_signal_list_filters_and_keyset_pages() -> None:
+    pid, _ = asyncio.run(_setup_project())
+    other_pid, _ = asyncio.run(_setup_project())
+    app = build_http_app(get_settings())
+    client = TestClient(app)
+
+    for i in range(5):
+        client.post(
+            "/api/signals",
+            json={
+                "project_id": pid,
+                "type": "retry",
+                "severity": "warning" if i % 2 else "info",
+                "message": f"m{i}",
+            },
+        )
+    client.post("/api/signals", json={"project_id": other_pid, "type": "timeout"})
+
+    seen: list[int] = []
+    cursor = None
+    while True:
+        params = {"project_id": pid, "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/api/signals", params=params).json()
+        seen.extend(s["id"] for s in page["signals"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert len(seen) == 5
+    assert seen == sorted(seen, reverse=True)
+
+    warnings = client.get(
+        "/api/signals", params={"project_id": pid, "severity": "warning"}
+    ).json()["signals"]
+    assert len(warnings) == 2
+    assert client.get("/api/signals", params={"cursor": "%%%"}).status_code == 400
+
+
+def test_signal_counts_follow_status_updates() -> None:
+    pid, _ = asyncio.run(_setup_project())
+    app = build_http_app(get_settings())
+    client = TestClient(app)
+
+    ids = [
+        client.post(
+            "/api/signals",
+            json={"project_id": pid, "type": "retry", "severity": sev},
+        ).json()["id"]
+        for sev in ("info", "warning", "warning")
+    ]
+    client.patch(f"/api/signals/{ids[0]}", json={"status": "resolved"})
+
+    counts = client.get("/api/signals/counts", params={"project_id": pid}).json()
+    assert counts["total"] == 3
+    assert counts["by_status"] == {"pending": 2, "resolved": 1}
+    assert counts["by_severity"] == {"info": 1, "warning": 2}
@@ -0,0 +1,34 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from mcp_agent_mail.startup_profile import parse_importtime
+
+SAMPLE = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:      1500 |       4200 |   mcp_agent_mail.config
+import time:       300 |       2700 |     decouple
+"""
+
+
+def test_parse_importtime_rows() -> None:
+    rows = parse_importtime(SAMPLE)
+    assert [r.module for r in rows] == ["_io", "mcp_agent_mail.config", "decouple"]
+    assert rows[1].cumulative_us == 4200
+    assert rows[2].depth == rows[1].depth + 1
+
+
+def test_http_import_defers_heavy_dependencies() -> None:
+    src = Path(__file__).resolve().parent.parent / "src"
+    env = dict(os.environ, PYTHONPATH=str(src))
+    code = (
+        "import sys, mcp_agent_mail.http;"
+        "print(','.join(m for m in ('PIL', 'git', 'bleach', 'markdown2', 'uvicorn')"
+        " if m in sys.modules))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], env=env, capture_output=True, text=True
+    )
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.strip() == ""
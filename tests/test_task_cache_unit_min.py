@@ -0,0 +1,121 @@
+import asyncio
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel, select
+
+from mcp_agent_mail.models import Agent, Artifact, Mission, Project, Task, TaskGroup, WorkflowRun
+from mcp_agent_mail.task_cache import TaskResultCache, task_cache_key
+from mcp_agent_mail.workflow_engine import SequentialWorkflow
+
+ENGINE = {"command": ["agent"], "workdir": None}
+
+
+async def _factory(tmp_path: Path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'cache.sqlite3'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    return engine, async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def test_key_ignores_scheduling_keys_and_tracks_artifacts(tmp_path: Path) -> None:
+    async def _run() -> list[str]:
+        engine, factory = await _factory(tmp_path)
+        async with factory() as session:
+            project = Project(slug="ck", human_key="ck")
+            session.add(project)
+            await session.commit()
+            mission = Mission(project_id=project.id, title="m")
+            session.add(mission)
+            await session.commit()
+            artifact = Artifact(mission_id=mission.id, type="file", path="a.txt", version="1", sha256="aa")
+            session.add(artifact)
+            await session.commit()
+            base = {"kind": "agent_cli", "prompt": "lint", "artifacts": [str(artifact.id)]}
+            keys = [
+                await task_cache_key(session, ENGINE, ["agent"], base),
+                await task_cache_key(
+                    session, ENGINE, ["agent"], {**base, "depends_on": ["x"], "cache": True, "timeout": 5}
+                ),
+                await task_cache_key(session, ENGINE, ["agent"], {**base, "prompt": "test"}),
+                await task_cache_key(session, {**ENGINE, "workdir": "/tmp"}, ["agent"], base),
+            ]
+            artifact.sha256 = "bb"
+            session.add(artifact)
+            await session.commit()
+            keys.append(await task_cache_key(session, ENGINE, ["agent"], base))
+        await engine.dispose()
+        return keys
+
+    same, ignored, other_input, other_engine, other_artifact = asyncio.run(_run())
+    assert same == ignored
+    assert len({same, other_input, other_engine, other_artifact}) == 4
+
+
+def test_applies_honours_task_override() -> None:
+    assert not TaskResultCache().applies({})
+    assert TaskResultCache().applies({"cache": True})
+    assert TaskResultCache(enabled=True).applies({})
+    assert not TaskResultCache(enabled=True).applies({"cache": False})
+    assert not TaskResultCache(enabled=True, ttl_seconds=0).applies({"cache": True})
+
+
+def test_identical_agent_tasks_reuse_cached_output(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    import orchestrator.conpty_wrapper as conpty
+
+    spawned: list[str] = []
+
+    async def _fake_spawn(command, mission_id, run_id, **kwargs):
+        spawned.append(kwargs["role"])
+        return SimpleNamespace(returncode=0)
+
+    monkeypatch.setattr(conpty, "spawn_agent_cli_async", _fake_spawn)
+    monkeypatch.setattr(conpty, "load_engine_config", lambda name: dict(ENGINE))
+
+    async def _run() -> tuple[list[Task], dict]:
+        engine, factory = await _factory(tmp_path)
+        async with factory() as session:
+            project = Project(slug="cache", human_key="cache")
+            session.add(project)
+            await session.commit()
+            agent = Agent(project_id=project.id, name="CacheAgent", program="t", model="t")
+            mission = Mission(project_id=project.id, title="cache")
+            session.add_all([agent, mission])
+            await session.commit()
+            group = TaskGroup(mission_id=mission.id, title="g")
+            session.add(group)
+            await session.commit()
+            lint = {"kind": "agent_cli", "command": ["lint"]}
+            session.add_all(
+                [
+                    Task(group_id=group.id, agent_id=agent.id, title="lint", order=0, input=lint),
+                    Task(group_id=group.id, agent_id=agent.id, title="lint again", order=1, input=dict(lint)),
+                    Task(
+                        group_id=group.id,
+                        agent_id=agent.id,
+                        title="lint forced",
+                        order=2,
+                        input={**lint, "cache": False},
+                    ),
+                ]
+            )
+            await session.commit()
+            workflow = SequentialWorkflow(session, trace_dir=tmp_path / "traces", task_cache_enabled=True)
+            assert await workflow.run(mission) == "completed"
+            tasks = list(
+                (await session.execute(select(Task).order_by(Task.__table__.c.order))).scalars().all()
+            )
+            run = (await session.execute(select(WorkflowRun))).scalars().one()
+        await engine.dispose()
+        events = [json.loads(line) for line in Path(run.trace_uri).read_text().splitlines()]
+        done = next(e for e in events if e["event"] == "workflow_engine_run_completed")
+        return tasks, done["task_cache"]
+
+    tasks, stats = asyncio.run(_run())
+    assert spawned == ["lint", "lint forced"]
+    assert tasks[1].status == "completed" and tasks[1].output["cached"] is True
+    assert "cached" not in tasks[0].output and "cached" not in tasks[2].output
+    assert stats == {"hits": 1, "misses": 1, "stores": 1, "hit_rate": 0.5}
@@ -0,0 +1,94 @@
+import asyncio
+from pathlib import Path
+from uuid import uuid4
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel, select
+
+from mcp_agent_mail.db import get_session
+from mcp_agent_mail.models import Project, Task
+from mcp_agent_mail.routers import missions
+from mcp_agent_mail.task_graph import (
+    TaskDependencyError,
+    critical_path,
+    task_dependencies,
+    topological_order,
+)
+
+
+def test_topological_order_is_stable() -> None:
+    graph = {"a": [], "b": ["a"], "c": [], "d": ["b", "c"]}
+    assert topological_order(graph) == ["a", "c", "b", "d"]
+
+
+def test_cycle_and_unknown_dependencies_are_rejected() -> None:
+    with pytest.raises(TaskDependencyError) as cyc:
+        topological_order({"a": ["c"], "b": ["a"], "c": ["b"], "d": []})
+    assert cyc.value.cycle[0] == cyc.value.cycle[-1]
+    assert set(cyc.value.cycle) == {"a", "b", "c"}
+    with pytest.raises(TaskDependencyError) as unk:
+        topological_order({"a": ["zz"]})
+    assert unk.value.unknown == {"a": ["zz"]}
+
+
+def test_critical_path_follows_longest_chain() -> None:
+    graph = {"a": [], "b": ["a"], "c": ["a"], "d": ["b", "c"]}
+    path, total = critical_path(graph, {"a": 10, "b": 5, "c": 30, "d": 1})
+    assert path == ["a", "c", "d"] and total == 41
+    # Unexecuted tasks drop out of the path
+    assert critical_path(graph, {"a": 10, "b": 5}) == (["a", "b"], 15)
+
+
+def test_task_dependencies_dedupes() -> None:
+    assert task_dependencies({"depends_on": ["x", "y", "x"]}) == ["x", "y"]
+    assert task_dependencies(None) == []
+
+
+def test_create_mission_rejects_cycles(tmp_path: Path) -> None:
+    async def _run() -> tuple[int, int, list[Task]]:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'm.sqlite3'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with factory() as session:
+            project = Project(slug="dag", human_key="dag")
+            session.add(project)
+            await session.commit()
+            project_id = project.id
+
+        app = FastAPI()
+        app.include_router(missions.router)
+
+        async def _session():
+            async with factory() as session:
+                yield session
+
+        app.dependency_overrides[get_session] = _session
+        a, b = str(uuid4()), str(uuid4())
+        body = {
+            "project_id": project_id,
+            "title": "dag",
+            "run_mode": "dag",
+            "groups": [
+                {"title": "g1", "tasks": [{"id": a, "title": "a", "agent_id": 1, "depends_on": [b]}]},
+                {"title": "g2", "tasks": [{"id": b, "title": "b", "agent_id": 1, "depends_on": [a]}]},
+            ],
+        }
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+            bad = await client.post("/missions/", json=body)
+            body["groups"][0]["tasks"][0]["depends_on"] = []
+            good = await client.post("/missions/", json=body)
+        async with factory() as session:
+            rows = list((await session.execute(select(Task))).scalars().all())
+        await engine.dispose()
+        assert bad.json()["detail"] == "TASK_DEPENDENCY_CYCLE"
+        return bad.status_code, good.status_code, rows
+
+    bad, good, rows = asyncio.run(_run())
+    assert (bad, good) == (400, 201)
+    deps = {row.title: (row.input or {}).get("depends_on") for row in rows}
+    assert deps["a"] is None and deps["b"] == [str(next(r.id for r in rows if r.title == "a"))]
@@ -0,0 +1,102 @@
+import pytest
+
+from mcp_agent_mail.task_loop import LoopSpecError, converged, parse_loop_spec
+from mcp_agent_mail.workflow_engine import LoopSelfHealWorkflow, LoopWorkflow, workflow_class_for
+
+
+def test_parse_loop_spec_defaults_and_validation() -> None:
+    spec = parse_loop_spec(None, default_max_iterations=4)
+    assert (spec.max_iterations, spec.max_seconds, spec.until, spec.on_exhausted) == (4, None, None, "fail")
+    spec = parse_loop_spec({"max_seconds": 30, "until": {"shared": "ok"}, "on_exhausted": "complete"})
+    assert spec.max_seconds == 30.0 and spec.on_exhausted == "complete"
+    for bad in (
+        {"max_iterations": 0},
+        {"max_iterations": True},
+        {"max_seconds": -1},
+        {"on_exhausted": "retry"},
+        {"forever": True},
+        {"until": {}},
+        {"until": {"shared": "a", "task": "b"}},
+        {"until": {"shared": "a", "equals": 1, "gte": 0}},
+        {"until": {"shared": "a", "path": "x"}},
+        {"until": {"all": []}},
+        {"until": {"task": "t", "in": "abc"}},
+    ):
+        with pytest.raises(LoopSpecError):
+            parse_loop_spec(bad)
+
+
+def test_converged_reads_shared_data_and_task_outputs() -> None:
+    shared = {"tests": {"passed": 12, "failed": 0}, "flag": True}
+    tasks = {"test": {"status": "completed", "output": {"return_code": 0}, "error": None}}
+    assert converged({"shared": "flag"}, shared, tasks)
+    assert converged({"shared": "tests.failed", "equals": 0}, shared, tasks)
+    assert converged({"shared": "tests.passed", "gte": 10}, shared, tasks)
+    assert not converged({"shared": "tests.missing", "equals": None}, shared, tasks)
+    assert converged({"shared": "tests.missing", "exists": False}, shared, tasks)
+    assert converged({"task": "test"}, shared, tasks)  # path defaults to status
+    assert converged({"task": "test", "path": "status", "in": ["completed"]}, shared, tasks)
+    assert converged({"task": "test", "path": "output.return_code", "equals": 0}, shared, tasks)
+    assert not converged({"task": "lint", "path": "status", "equals": "completed"}, shared, tasks)
+    assert converged(
+        {"all": [{"shared": "flag"}, {"any": [{"task": "lint"}, {"not": {"shared": "tests.failed"}}]}]},
+        shared,
+        tasks,
+    )
+    assert not converged({"shared": "flag", "lte": "x"}, {"flag": 1}, {})
+
+
+def test_loop_run_mode_selects_loop_workflow() -> None:
+    assert workflow_class_for("loop") is LoopSelfHealWorkflow
+    assert workflow_class_for("loop", allow_self_heal=False) is LoopWorkflow
+
+
+def test_create_mission_rejects_invalid_loop_spec(tmp_path) -> None:
+    import asyncio
+
+    import httpx
+    from fastapi import FastAPI
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+    from sqlmodel import SQLModel, select
+
+    from mcp_agent_mail.db import get_session
+    from mcp_agent_mail.models import Project, TaskGroup
+    from mcp_agent_mail.routers import missions
+
+    async def _run() -> tuple[list[int], list[TaskGroup]]:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'loop.sqlite3'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with factory() as session:
+            project = Project(slug="loop-api", human_key="loop-api")
+            session.add(project)
+            await session.commit()
+            project_id = project.id
+
+        app = FastAPI()
+        app.include_router(missions.router)
+
+        async def _session():
+            async with factory() as session:
+                yield session
+
+        app.dependency_overrides[get_session] = _session
+        group = {"title": "cycle", "kind": "loop", "loop": {"max_iterations": 0}, "tasks": []}
+        body = {"project_id": project_id, "title": "loop", "groups": [group]}
+        codes = []
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+            codes.append((await client.post("/missions/", json=body)).status_code)
+            bad_mission = {**body, "run_mode": "loop", "context": {"loop": {"until": {"x": 1}}}, "groups": []}
+            codes.append((await client.post("/missions/", json=bad_mission)).status_code)
+            group["loop"] = {"max_iterations": 3, "until": {"shared": "green"}}
+            codes.append((await client.post("/missions/", json=body)).status_code)
+        async with factory() as session:
+            rows = list((await session.execute(select(TaskGroup))).scalars().all())
+        await engine.dispose()
+        return codes, rows
+
+    codes, rows = asyncio.run(_run())
+    assert codes == [400, 400, 201]
+    assert [row.loop["max_iterations"] for row in rows] == [3]
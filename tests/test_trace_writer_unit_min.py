@@ -0,0 +1,68 @@
+import asyncio
+import gzip
+import json
+from pathlib import Path
+
+from mcp_agent_mail.trace_writer import JsonlWriter, TraceWriterService
+
+
+def _events(path: Path) -> list[str]:
+    return [json.loads(line)["event"] for line in path.read_text().splitlines()]
+
+
+def test_writes_are_buffered_until_flush(tmp_path: Path) -> None:
+    service = TraceWriterService(flush_interval=60)
+    trace = tmp_path / "runs" / "run.jsonl"
+
+    async def _run() -> bool:
+        for i in range(5):
+            service.write(trace, f"e{i}", {"i": i})
+        written_early = trace.exists()
+        await service.close(trace)
+        return written_early
+
+    assert asyncio.run(_run()) is False
+    assert _events(trace) == ["e0", "e1", "e2", "e3", "e4"]
+
+
+def test_shared_sink_batches_concurrent_runs(tmp_path: Path) -> None:
+    service = TraceWriterService(flush_interval=60)
+    evidence = tmp_path / "ci_evidence.jsonl"
+
+    async def _emit(run: int) -> None:
+        for i in range(3):
+            service.write(evidence, "step", {"run": run, "i": i}, shared=True)
+            await asyncio.sleep(0)
+
+    async def _run() -> JsonlWriter:
+        await asyncio.gather(*(_emit(run) for run in range(4)))
+        await service.flush(evidence)
+        return service.writer(evidence, shared=True)
+
+    writer = asyncio.run(_run())
+    assert writer.lines_written == 12 and writer.batches_written == 1
+    assert len(evidence.read_text().splitlines()) == 12
+
+
+def test_rotation_compresses_segments(tmp_path: Path) -> None:
+    trace = tmp_path / "run.jsonl"
+    writer = JsonlWriter(trace, max_bytes=200, compress=True)
+    for i in range(6):
+        writer.append(json.dumps({"event": f"e{i}", "pad": "x" * 60}) + "\n")
+        writer.drain()
+    writer.close()
+    segments = sorted(tmp_path.glob("run.*.jsonl.gz"))
+    assert writer.rotations == len(segments) >= 2
+    rotated = [
+        json.loads(line)["event"]
+        for seg in segments
+        for line in gzip.decompress(seg.read_bytes()).decode().splitlines()
+    ]
+    assert rotated + _events(trace) == [f"e{i}" for i in range(6)]
+
+
+def test_without_event_loop_writes_inline(tmp_path: Path) -> None:
+    service = TraceWriterService()
+    trace = tmp_path / "sync.jsonl"
+    service.write(trace, "sync", {"ok": True})
+    assert _events(trace) == ["sync"]
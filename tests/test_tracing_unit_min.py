@@ -0,0 +1,68 @@
+import asyncio
+import importlib.util
+import json
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+from mcp_agent_mail import tracing
+from mcp_agent_mail.config import get_settings
+
+
+def _settings(tmp_path: Path, **http_overrides):
+    base = get_settings()
+    http = replace(
+        base.http,
+        otel_enabled=True,
+        otel_exporter_otlp_endpoint="",
+        otel_file_exporter_path=str(tmp_path / "spans.jsonl"),
+        otel_sample_ratio=1.0,
+        **http_overrides,
+    )
+    return replace(base, http=http)
+
+
+def test_disabled_tracing_is_a_noop() -> None:
+    assert not tracing.tracing_enabled()
+    with tracing.span("x", {"a": 1}) as s:
+        s.set_attribute("b", 2)
+    assert not s.is_recording()
+
+    @tracing.traced("y", lambda value: {"v": value})
+    async def double(value: int) -> int:
+        return value * 2
+
+    assert asyncio.run(double(3)) == 6
+
+
+def test_enabled_without_sdk_stays_off(tmp_path: Path) -> None:
+    if importlib.util.find_spec("opentelemetry.sdk") is not None:
+        pytest.skip("opentelemetry-sdk installed")
+    assert tracing.configure_tracing(_settings(tmp_path)) is False
+    assert not tracing.tracing_enabled()
+
+
+def test_file_exporter_records_nested_and_sql_spans(isolated_env, tmp_path: Path) -> None:
+    pytest.importorskip("opentelemetry.sdk")
+    from sqlalchemy import text
+
+    from mcp_agent_mail.db import ensure_schema, reset_database_state, session_context
+
+    assert tracing.configure_tracing(_settings(tmp_path))
+    try:
+
+        async def _run() -> None:
+            reset_database_state()
+            await ensure_schema()
+            with tracing.span("outer"):
+                async with session_context() as session:
+                    await session.execute(text("SELECT 1"))
+
+        asyncio.run(_run())
+    finally:
+        tracing.shutdown_tracing()
+    records = [json.loads(line) for line in (tmp_path / "spans.jsonl").read_text().splitlines()]
+    outer = next(r for r in records if r["name"] == "outer")
+    queries = [r for r in records if r["name"] == "db.query" and r["attributes"]["db.statement"] == "SELECT 1"]
+    assert queries and queries[0]["parent_span_id"] == outer["span_id"]
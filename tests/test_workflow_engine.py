@@ -310,3 +310,432 @@ async def test_self_heal_writes_ci_evidence(db_session, tmp_path: Path, monkeypa
     assert any(ev["event"] == "workflow_self_heal_attempt" for ev in events)
     assert any(ev["event"] == "workflow_self_heal_success" for ev in events)
     assert any(ev["event"] == "workflow_run_completed" for ev in events)
+
+
+@pytest_asyncio.fixture
+async def file_db_session(tmp_path: Path):
+    # Parallel tasks open their own sessions, so they need a real pool rather
+    # than the single shared connection of an in-memory database.
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'parallel.sqlite3'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async_session = sessionmaker(  # type: ignore[arg-type]
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with async_session() as session:
+        yield session
+    await engine.dispose()
+
+
+async def _parallel_mission(db_session, slug: str, n_tasks: int, run_mode: str = "sequential"):
+    project = Project(slug=slug, human_key=slug)
+    db_session.add(project)
+    await db_session.commit()
+    agent = Agent(project_id=project.id, name="ParAgent", program="test", model="test")
+    db_session.add(agent)
+    await db_session.commit()
+    mission = Mission(project_id=project.id, title="Parallel Mission", run_mode=run_mode)
+    db_session.add(mission)
+    await db_session.commit()
+    group = TaskGroup(mission_id=mission.id, title="Fan-out", kind="parallel")
+    db_session.add(group)
+    await db_session.commit()
+    tasks = [
+        Task(group_id=group.id, agent_id=agent.id, title=f"Task {i}", order=i)
+        for i in range(n_tasks)
+    ]
+    db_session.add_all(tasks)
+    await db_session.commit()
+    return mission, group, tasks
+
+
+@pytest.mark.asyncio
+async def test_parallel_group_runs_tasks_concurrently(file_db_session, workflow_trace_dir: Path):
+    import asyncio
+
+    mission, group, tasks = await _parallel_mission(file_db_session, "par-ok", 6)
+    seen_sessions: list = []  # keep references so ids are not reused
+    active = peak = 0
+
+    class SlowWorkflow(SequentialWorkflow):
+        async def execute_task(self, task, context):
+            nonlocal active, peak
+            seen_sessions.append(self.session)
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.05)
+            active -= 1
+            await super().execute_task(task, context)
+
+    engine = SlowWorkflow(file_db_session, trace_dir=workflow_trace_dir, max_concurrency=3)
+    assert await engine.run(mission) == "completed"
+
+    assert peak == 3
+    assert len({id(s) for s in seen_sessions}) == 6
+    assert all(s is not file_db_session for s in seen_sessions)
+    for task in tasks:
+        await file_db_session.refresh(task)
+        assert task.status == "completed"
+    await file_db_session.refresh(group)
+    assert group.status == "completed"
+
+
+@pytest.mark.asyncio
+async def test_parallel_failures_are_aggregated_and_healed(file_db_session, workflow_trace_dir: Path):
+    from mcp_agent_mail.workflow_engine import TaskGroupError, workflow_class_for
+
+    mission, group, tasks = await _parallel_mission(file_db_session, "par-heal", 4, run_mode="parallel")
+    group.kind = "sequential"  # run_mode="parallel" fans out every group
+    file_db_session.add(group)
+    await file_db_session.commit()
+    errors: list[Exception] = []
+
+    base = workflow_class_for("parallel", allow_self_heal=True)
+
+    class FlakyWorkflow(base):
+        async def execute_tasks_parallel(self, group, tasks, context):
+            try:
+                await super().execute_tasks_parallel(group, tasks, context)
+            except TaskGroupError as exc:
+                errors.append(exc)
+                raise
+
+        async def execute_task(self, task, context):
+            if task.order in (1, 3) and not task.title.startswith("Recovery"):
+                task.status = "failed"
+                task.error = "boom"
+                self.session.add(task)
+                await self.session.commit()
+                return
+            await super().execute_task(task, context)
+
+    engine = FlakyWorkflow(file_db_session, trace_dir=workflow_trace_dir)
+    assert await engine.run(mission) == "completed"
+    assert errors and len(errors[0].failures) == 2
+
+    rows = (await file_db_session.execute(select(Task).where(Task.group_id == group.id))).scalars().all()
+    recovered = sorted(row.title for row in rows if row.title.startswith("Recovery"))
+    assert recovered == ["Recovery: Task 1", "Recovery: Task 3"]
+
+
+@pytest.mark.asyncio
+async def test_parallel_group_on_shared_connection_runs_in_order(db_session, workflow_trace_dir: Path):
+    mission, group, tasks = await _parallel_mission(db_session, "par-mem", 3)
+    engine = SequentialWorkflow(db_session, trace_dir=workflow_trace_dir, max_concurrency=3)
+    assert await engine.run(mission) == "completed"
+    for task in tasks:
+        await db_session.refresh(task)
+        assert task.status == "completed"
+
+
+@pytest.mark.asyncio
+async def test_dag_workflow_runs_across_groups_and_reports_critical_path(
+    file_db_session, workflow_trace_dir: Path
+):
+    import asyncio
+
+    from mcp_agent_mail.workflow_engine import DagWorkflow, workflow_class_for
+
+    session = file_db_session
+    mission, group1, (slow, fast) = await _parallel_mission(session, "dag-ok", 2, run_mode="dag")
+    group2 = TaskGroup(mission_id=mission.id, title="Later", order=1)
+    session.add(group2)
+    await session.commit()
+    # Depends only on the fast task, so it must not wait for the slow one
+    follow = Task(
+        group_id=group2.id,
+        agent_id=fast.agent_id,
+        title="Follow-up",
+        input={"depends_on": [str(fast.id)]},
+    )
+    session.add(follow)
+    await session.commit()
+    finished: list[str] = []
+
+    class TimedDag(DagWorkflow):
+        async def execute_task(self, task, context):
+            await asyncio.sleep(0.15 if task.title == "Task 0" else 0.01)
+            await super().execute_task(task, context)
+            finished.append(task.title)
+
+    assert workflow_class_for("dag", allow_self_heal=False) is DagWorkflow
+    engine = TimedDag(session, trace_dir=workflow_trace_dir)
+    assert await engine.run(mission) == "completed"
+    assert finished.index("Follow-up") < finished.index("Task 0")
+
+    run = (await session.execute(select(WorkflowRun))).scalars().one()
+    events = [json.loads(line) for line in Path(run.trace_uri).read_text().splitlines()]
+    summary = next(e for e in events if e["event"] == "workflow_engine_dag_completed")
+    assert summary["completed"] == 3 and summary["skipped"] == []
+    assert [step["title"] for step in summary["critical_path"]] == ["Task 0"]
+    for group in (group1, group2):
+        await session.refresh(group)
+        assert group.status == "completed"
+
+
+@pytest.mark.asyncio
+async def test_dag_failure_blocks_dependents(file_db_session, workflow_trace_dir: Path):
+    from mcp_agent_mail.workflow_engine import DagWorkflow
+
+    session = file_db_session
+    mission, group, (root, other) = await _parallel_mission(session, "dag-fail", 2, run_mode="dag")
+    child = Task(
+        group_id=group.id,
+        agent_id=root.agent_id,
+        title="Child",
+        order=5,
+        input={"depends_on": [str(root.id)]},
+    )
+    session.add(child)
+    await session.commit()
+
+    class FailingRoot(DagWorkflow):
+        async def execute_task(self, task, context):
+            if task.title == "Task 0":
+                task.status, task.error = "failed", "boom"
+                self.session.add(task)
+                await self.session.commit()
+                return
+            await super().execute_task(task, context)
+
+    engine = FailingRoot(session, trace_dir=workflow_trace_dir)
+    assert await engine.run(mission) == "failed"
+    await session.refresh(child)
+    await session.refresh(other)
+    assert child.status == "pending" and other.status == "completed"
+    run = (await session.execute(select(WorkflowRun))).scalars().one()
+    events = [json.loads(line) for line in Path(run.trace_uri).read_text().splitlines()]
+    summary = next(e for e in events if e["event"] == "workflow_engine_dag_completed")
+    assert summary["failed"] == 1 and summary["skipped"] == [str(child.id)]
+
+
+@pytest.mark.asyncio
+async def test_state_transitions_are_committed_per_group(file_db_session, workflow_trace_dir: Path):
+    mission, group, tasks = await _parallel_mission(file_db_session, "batched", 8)
+    group.kind = "sequential"
+    file_db_session.add(group)
+    await file_db_session.commit()
+
+    engine = SequentialWorkflow(file_db_session, trace_dir=workflow_trace_dir, state_flush_ms=60_000)
+    assert await engine.run(mission) == "completed"
+
+    # run start + group boundary + summary artifact (2) + run end, instead of 2 per task
+    assert engine.state.commits <= 5
+    assert engine.state.transitions >= 2 * len(tasks)
+    async with AsyncSession(file_db_session.bind) as fresh:
+        rows = (await fresh.execute(select(Task).where(Task.group_id == group.id))).scalars().all()
+        assert {row.status for row in rows} == {"completed"}
+    run = (await file_db_session.execute(select(WorkflowRun))).scalars().one()
+    events = [json.loads(line) for line in Path(run.trace_uri).read_text().splitlines()]
+    done = next(e for e in events if e["event"] == "workflow_engine_run_completed")
+    assert done["state_commits"] == engine.state.commits
+
+
+@pytest.mark.asyncio
+async def test_state_persister_defers_intermediate_and_flushes_failures(file_db_session):
+    from mcp_agent_mail.workflow_engine import StatePersister
+
+    _mission, _group, tasks = await _parallel_mission(file_db_session, "persister", 2)
+    persister = StatePersister(flush_interval_ms=60_000)
+
+    async def _status(task_id):
+        async with AsyncSession(file_db_session.bind) as fresh:
+            return (await fresh.get(Task, task_id)).status
+
+    tasks[0].status = "running"
+    await persister.record(file_db_session, tasks[0])
+    assert await _status(tasks[0].id) == "pending"
+
+    tasks[1].status = "failed"
+    await persister.record(file_db_session, tasks[1], immediate=True)
+    assert await _status(tasks[0].id) == "running"
+    assert await _status(tasks[1].id) == "failed"
+    assert persister.commits == 1
+
+    await persister.checkpoint(file_db_session)
+    assert persister.commits == 1  # nothing pending, no open transaction
+
+
+@pytest.mark.asyncio
+async def test_resume_skips_tasks_in_checkpoint(file_db_session, workflow_trace_dir: Path):
+    mission, group, tasks = await _parallel_mission(file_db_session, "resume", 4)
+    group.kind = "sequential"
+    file_db_session.add(group)
+    await file_db_session.commit()
+    executed: list[str] = []
+    fail_on = {"Task 2"}
+
+    class Interrupted(SequentialWorkflow):
+        async def execute_task(self, task, context):
+            if task.title in fail_on:
+                task.status, task.error = "failed", "deploy"
+                self.session.add(task)
+                await self.session.commit()
+                return
+            executed.append(task.title)
+            context.update("seen", executed[-1])
+            await super().execute_task(task, context)
+
+    engine = Interrupted(file_db_session, trace_dir=workflow_trace_dir)
+    assert await engine.run(mission) == "failed"
+    run = (await file_db_session.execute(select(WorkflowRun))).scalars().one()
+    assert run.checkpoint["completed_task_ids"] == sorted(str(t.id) for t in tasks[:2])
+    assert run.checkpoint["shared_data"]["seen"] == "Task 1"
+
+    fail_on.clear()
+    executed.clear()
+    resumed = Interrupted(file_db_session, trace_dir=workflow_trace_dir)
+    assert await resumed.run(mission, run=run) == "completed"
+    assert executed == ["Task 2", "Task 3"]
+    assert run.status == "completed" and len(run.checkpoint["completed_task_ids"]) == 4
+    events = [json.loads(line) for line in Path(run.trace_uri).read_text().splitlines()]
+    assert any(e["event"] == "workflow_engine_run_resumed" and e["completed_tasks"] == 2 for e in events)
+
+
+@pytest.mark.asyncio
+async def test_loop_group_reuses_rows_until_converged(file_db_session, workflow_trace_dir: Path):
+    mission, group, tasks = await _parallel_mission(file_db_session, "loop", 2)
+    group.kind = "loop"
+    group.loop = {"max_iterations": 5, "until": {"task": "Task 1", "path": "output.passed", "equals": True}}
+    file_db_session.add(group)
+    await file_db_session.commit()
+    rounds: list[tuple[str, int]] = []
+
+    class Iterating(SequentialWorkflow):
+        async def execute_task(self, task, context):
+            rounds.append((task.title, task.iteration))
+            await super().execute_task(task, context)
+            # "tests" pass on the third round; the first round also fails outright
+            if task.title == "Task 1":
+                if task.iteration == 1:
+                    task.status, task.error = "failed", "red"
+                task.output = {"passed": task.iteration >= 3}
+
+    engine = Iterating(file_db_session, trace_dir=workflow_trace_dir)
+    assert await engine.run(mission) == "completed"
+    assert rounds == [(f"Task {i}", n) for n in (1, 2, 3) for i in (0, 1)]
+    rows = (await file_db_session.execute(select(Task))).scalars().all()
+    assert len(rows) == 2 and {row.iteration for row in rows} == {3}
+    assert group.iteration == 3 and group.status == "completed"
+    run = (await file_db_session.execute(select(WorkflowRun))).scalars().one()
+    events = [json.loads(line) for line in Path(run.trace_uri).read_text().splitlines()]
+    iterations = [e for e in events if e["event"] == "workflow_engine_loop_iteration"]
+    assert [e["converged"] for e in iterations] == [False, False, True]
+    assert iterations[0]["error"]
+    done = next(e for e in events if e["event"] == "workflow_engine_loop_completed")
+    assert done["reason"] == "converged" and done["iterations"] == 3
+    assert run.checkpoint["loops"] == {str(group.id): {"iteration": 3, "done": True}}
+
+
+@pytest.mark.asyncio
+async def test_loop_mission_budget_exhaustion(file_db_session, workflow_trace_dir: Path):
+    from mcp_agent_mail.workflow_engine import LoopWorkflow
+
+    mission, group, tasks = await _parallel_mission(file_db_session, "loop-mission", 2, run_mode="loop")
+    group.kind = "sequential"
+    mission.context = {"loop": {"max_iterations": 2, "until": {"shared": "done"}}}
+    file_db_session.add_all([group, mission])
+    await file_db_session.commit()
+
+    engine = LoopWorkflow(file_db_session, trace_dir=workflow_trace_dir)
+    assert await engine.run(mission) == "failed"
+    assert [t.iteration for t in tasks] == [2, 2]
+    run = (await file_db_session.execute(select(WorkflowRun))).scalars().one()
+    events = [json.loads(line) for line in Path(run.trace_uri).read_text().splitlines()]
+    done = next(e for e in events if e["event"] == "workflow_engine_loop_completed")
+    assert (done["reason"], done["converged"]) == ("max_iterations", False)
+    assert "did not converge" in next(
+        e for e in events if e["event"] == "workflow_engine_run_failed"
+    )["error"]
+
+    # Without a condition the loop is a fixed number of rounds
+    mission.context = {"loop": {"max_iterations": 3}}
+    file_db_session.add(mission)
+    await file_db_session.commit()
+    engine = LoopWorkflow(file_db_session, trace_dir=workflow_trace_dir)
+    assert await engine.run(mission) == "completed"
+    assert [t.iteration for t in tasks] == [3, 3]
+
+
+@pytest.mark.asyncio
+async def test_self_heal_retries_with_backoff_then_continues_group(file_db_session, workflow_trace_dir: Path):
+    from mcp_agent_mail.self_heal import SelfHealPolicy
+
+    mission, group, tasks = await _parallel_mission(file_db_session, "heal-retry", 3)
+    group.kind = "sequential"
+    file_db_session.add(group)
+    await file_db_session.commit()
+    runs: list[str] = []
+
+    class Flaky(SelfHealWorkflow):
+        async def execute_task(self, task, context):
+            runs.append(task.title)
+            if task.title == "Task 0" and runs.count("Task 0") < 3:
+                task.status, task.error = "failed", "flaky"
+                await self.state.record(self.session, task, immediate=True)
+                return
+            await super().execute_task(task, context)
+
+    policy = SelfHealPolicy(retries=3, backoff_ms=10, backoff_max_ms=15)
+    engine = Flaky(file_db_session, trace_dir=workflow_trace_dir, self_heal_policy=policy)
+    assert await engine.run(mission) == "completed"
+    # Two retries were enough; the rest of the group ran afterwards (no force-complete)
+    assert runs == ["Task 0", "Task 0", "Task 0", "Task 1", "Task 2"]
+    rows = (await file_db_session.execute(select(Task))).scalars().all()
+    assert len(rows) == 3 and {row.status for row in rows} == {"completed"}
+    run = (await file_db_session.execute(select(WorkflowRun))).scalars().one()
+    assert run.checkpoint["recovery_attempts"] == 2
+    events = [json.loads(line) for line in Path(run.trace_uri).read_text().splitlines()]
+    delays = [e["delay_ms"] for e in events if e["event"] == "workflow_engine_self_heal_retry"]
+    assert delays == [10.0, 15.0]
+    artifacts = (await file_db_session.execute(select(Artifact))).scalars().all()
+    assert sorted(a.type for a in artifacts) == ["self_heal_artifact", "self_heal_artifact"]
+
+
+@pytest.mark.asyncio
+async def test_self_heal_races_strategies_and_respects_budget(file_db_session, workflow_trace_dir: Path):
+    import asyncio
+
+    from mcp_agent_mail.self_heal import SelfHealPolicy
+
+    mission, group, tasks = await _parallel_mission(file_db_session, "heal-race", 3)
+    mission.context = {"self_heal": {"budget": 2}}
+    tasks[0].input = {"recovery": ["slow", {"strategy": "fast", "hint": "use cache"}]}
+    file_db_session.add_all([mission, tasks[0]])
+    await file_db_session.commit()
+    seen_inputs: list[dict] = []
+
+    class Racing(SelfHealWorkflow):
+        async def execute_task(self, task, context):
+            strategy = (task.input or {}).get("strategy")
+            if strategy is None and task.order in (0, 2):
+                task.status, task.error = "failed", "broken"
+                await self.state.record(self.session, task, immediate=True)
+                return
+            if strategy is not None:
+                seen_inputs.append(task.input)
+                await asyncio.sleep(5 if strategy == "slow" else 0.05)
+            await super().execute_task(task, context)
+
+    engine = Racing(
+        file_db_session, trace_dir=workflow_trace_dir, self_heal_policy=SelfHealPolicy(budget=10)
+    )
+    assert await engine.run(mission) == "failed"
+
+    rows = (await file_db_session.execute(select(Task).where(Task.group_id == group.id))).scalars().all()
+    recovery = {row.input["strategy"]: row for row in rows if row.title.startswith("Recovery")}
+    assert recovery["fast"].status == "completed" and recovery["slow"].status == "cancelled"
+    assert recovery["fast"].title == "Recovery (fast): Task 0"
+    assert recovery["fast"].input["hint"] == "use cache"
+    assert recovery["fast"].input["recovery_for"] == str(tasks[0].id)
+    assert {i["strategy"] for i in seen_inputs} == {"slow", "fast"}
+    # The mission budget (2) was spent on Task 0's race; Task 2 could not be healed
+    assert not any(row.input["recovery_for"] == str(tasks[2].id) for row in recovery.values())
+    run = (await file_db_session.execute(select(WorkflowRun))).scalars().one()
+    events = [json.loads(line) for line in Path(run.trace_uri).read_text().splitlines()]
+    race = next(e for e in events if e["event"] == "workflow_engine_self_heal_race")
+    assert (race["winner"], race["cancelled"]) == ("fast", ["slow"])
+    assert race["elapsed_ms"] < 4000
+    artifacts = (await file_db_session.execute(select(Artifact))).scalars().all()
+    assert sorted(a.type for a in artifacts) == ["self_heal_artifact", "self_heal_failure"]
+    assert len((await file_db_session.execute(select(Knowledge))).scalars().all()) == 2